@@ -0,0 +1,284 @@
+"""asyncio SCCP client engine.
+
+``AsyncSCCPClient`` drives framing, keepalives and ``dispatch_message`` from a
+single event loop, so one process can hold thousands of registered phones
+without a recv + keepalive thread pair per device.  Handlers registered with
+``@register_handler`` run unchanged: ``client.sock`` is a small socket-shaped
+wrapper whose ``sendall`` writes to the asyncio transport.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import random
+import socket
+
+from client import KEEPALIVE_JITTER, SCCPClient
+from dispatcher import dispatch_message
+from messages.keepalive import send_keepalive_req
+from messages.register import UNREGISTER_END_CALL_WAIT, end_calls_before_unregister, send_unregister_req
+from state import PhoneState
+from utils.aio_transport import TransportSocket
+from utils.skinny_framing import SkinnyFrameReader
+
+
+class _SkinnyClientProtocol(asyncio.Protocol):
+    def __init__(self, client: "AsyncSCCPClient"):
+        self.client = client
+        self._reader = SkinnyFrameReader()
+
+    def connection_made(self, transport) -> None:
+        self.client._on_connection_made(transport)
+
+    def data_received(self, data: bytes) -> None:
+        try:
+            self._reader.feed(data)
+            for msg_id, payload in self._reader.frames():
+                self.client._dispatch(msg_id, bytes(payload))
+        except ValueError:
+            self.client.logger.error(
+                f"({self.client.state.device_name}) Skinny stream desynchronised", exc_info=True
+            )
+            self.client._transport.close()
+
+    def connection_lost(self, exc) -> None:
+        self.client._on_connection_lost(exc)
+
+
+class AsyncSCCPClient(SCCPClient):
+    """SCCP phone whose Skinny connection lives on an asyncio event loop.
+
+    Use ``await start_async()`` / ``await stop_async()`` from the loop.  The
+    blocking ``start()`` / ``stop()`` still work from another thread while the
+    loop runs elsewhere (e.g. console helpers and macros).
+    """
+
+    def __init__(self, state: PhoneState, *, loop: asyncio.AbstractEventLoop | None = None):
+        super().__init__(state)
+        self.loop = loop
+        self._transport: asyncio.Transport | None = None
+        self._keepalive_handle: asyncio.TimerHandle | None = None
+        self._closed: asyncio.Future | None = None
+        self._registered: asyncio.Future | None = None
+        self._unregistered: asyncio.Future | None = None
+        self._reregister_task: asyncio.Task | None = None
+
+    # --- lifecycle ---------------------------------------------------------
+
+    async def start_async(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        if self.get_tftp_config:
+            await self.loop.run_in_executor(None, self._fetch_tftp_config)
+        await self.connect_async()
+        self._send_register()
+
+    async def connect_async(self) -> None:
+        loop = self.loop = asyncio.get_running_loop()
+        self._closed = loop.create_future()
+        self._registered = loop.create_future()
+        self._unregistered = loop.create_future()
+        await loop.create_connection(
+            functools.partial(_SkinnyClientProtocol, self),
+            self.state.server,
+            self.state.port,
+        )
+        self.logger.info(f"({self.state.device_name}) Connected to CUCM; Type={self.state.model}")
+        self._schedule_keepalive()
+
+    async def wait_registered(self, timeout: float | None = None) -> bool:
+        """True once TimeDateRes completes registration, False on RegisterReject/close."""
+        if self.state.is_registered.is_set():
+            return True
+        if self._registered is None:
+            return False
+        try:
+            return await asyncio.wait_for(asyncio.shield(self._registered), timeout)
+        except asyncio.TimeoutError:
+            return False
+
+    async def stop_async(self, *, timeout: float = 5.0) -> None:
+        for _ in range(max(3, len(self.state.active_calls_list or []) + 1)):
+            if not self.state.active_calls_list and not self.state.call_active:
+                break
+            try:
+                self.press_softkey("EndCall")
+            except Exception:
+                pass
+            await asyncio.sleep(0.35)
+
+        try:
+            from messages.phone import _teardown_local_media
+            _teardown_local_media(self)
+        except Exception:
+            pass
+        try:
+            self.audio.clear_all()
+        except Exception:
+            pass
+
+        if self.sock is not None and self.state.is_registered.is_set():
+            try:
+                if end_calls_before_unregister(self):
+                    await asyncio.sleep(UNREGISTER_END_CALL_WAIT)  # never block the shared loop
+                send_unregister_req(self, end_calls=False)
+                if self._unregistered is not None:
+                    await asyncio.wait_for(asyncio.shield(self._unregistered), timeout)
+            except Exception:
+                pass
+
+        self.running = False
+        self._cancel_keepalive()
+        if self._reregister_task is not None and not self._reregister_task.done():
+            self._reregister_task.cancel()
+        await self._close_transport()
+
+        if self.state.is_registered.is_set():
+            self.state.is_registered.clear()
+        self.state.is_unregistered.set()
+
+        try:
+            self.audio.close()
+        except Exception:
+            pass
+        self._log_dispatch_profile()
+        self.call_trace.flush()
+
+    def start(self):
+        self._run_on_loop(self.start_async())
+
+    def stop(self):
+        self._run_on_loop(self.stop_async())
+
+    def _run_on_loop(self, coro):
+        loop = self.loop
+        if loop is None or not loop.is_running():
+            coro.close()
+            raise RuntimeError("AsyncSCCPClient needs a running event loop; use start_async()/stop_async()")
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            coro.close()
+            raise RuntimeError("call start_async()/stop_async() from inside the event loop")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    # --- CM Reset / Restart ------------------------------------------------
+
+    def reregister_from_cm(self, *, hard: bool) -> None:
+        label = "Reset" if hard else "Restart"
+        if self._reregister_task is not None and not self._reregister_task.done():
+            self.logger.debug(f"({self.state.device_name}) {label} already in progress")
+            return
+        self._reregister_task = self.loop.create_task(self._reregister_async(hard=hard, label=label))
+
+    async def _reregister_async(self, *, hard: bool, label: str) -> None:
+        self.logger.info(f"({self.state.device_name}) CM {label} — re-registering")
+        try:
+            if self.state.call_active or self.state.active_calls_list:
+                try:
+                    self.press_softkey("EndCall")
+                    await asyncio.sleep(0.75)
+                except Exception:
+                    pass
+
+            try:
+                from messages.phone import _teardown_local_media
+                _teardown_local_media(self)
+            except Exception:
+                pass
+
+            self.running = False
+            self._cancel_keepalive()
+            await self._close_transport()
+            self._reset_registration_state()
+
+            if hard:
+                await asyncio.sleep(1.0)
+
+            if self.get_tftp_config:
+                await self.loop.run_in_executor(None, self._fetch_tftp_config)
+
+            await self.connect_async()
+            self._send_register()
+            self.logger.info(f"({self.state.device_name}) CM {label} complete — RegisterReq sent")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.logger.exception(f"({self.state.device_name}) CM {label} failed")
+            self.running = False
+
+    # --- transport callbacks -----------------------------------------------
+
+    def _on_connection_made(self, transport: asyncio.Transport) -> None:
+        sock = transport.get_extra_info("socket")
+        if sock is not None:
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            except OSError:
+                pass
+        self._transport = transport
+        self.sock = TransportSocket(transport, self.loop)
+        self.running = True
+
+    def _on_connection_lost(self, exc) -> None:
+        self._cancel_keepalive()
+        self._transport = None
+        self.sock = None
+        if exc is not None and self.running:
+            self.logger.info(f"({self.state.device_name}) Connection lost: {exc}")
+        for fut in (self._registered, self._unregistered):
+            if fut is not None and not fut.done():
+                fut.set_result(False)
+        if self._closed is not None and not self._closed.done():
+            self._closed.set_result(None)
+        self.logger.info(f"({self.state.device_name}) Shutdown complete")
+
+    def _dispatch(self, msg_id: int, payload: bytes) -> None:
+        try:
+            dispatch_message(self, msg_id, payload)
+        except Exception as e:
+            self.logger.error(
+                f"({self.state.device_name}) Unexpected error in dispatch: {e}",
+                exc_info=True,
+            )
+        self.state.notify_changed()
+        # Handlers only touch threading.Events; mirror them onto loop futures.
+        fut = self._registered
+        if fut is not None and not fut.done():
+            if self.state.is_registered.is_set():
+                fut.set_result(True)
+            elif self.events.register_rejected.is_set():
+                fut.set_result(False)
+        fut = self._unregistered
+        if fut is not None and not fut.done() and self.state.is_unregistered.is_set():
+            fut.set_result(True)
+
+    async def _close_transport(self) -> None:
+        transport = self._transport
+        if transport is not None:
+            transport.close()
+            if self._closed is not None:
+                await self._closed
+        self.sock = None
+
+    # --- keepalive -----------------------------------------------------------
+
+    def _schedule_keepalive(self) -> None:
+        interval = max(1, int(self.state.keepalive_interval or 30))
+        interval -= interval * KEEPALIVE_JITTER * random.random()
+        self._keepalive_handle = self.loop.call_later(interval, self._keepalive_tick)
+
+    def _keepalive_tick(self) -> None:
+        self._keepalive_handle = None
+        if not self.running or self.sock is None:
+            return
+        send_keepalive_req(self)
+        if self.running:
+            self._schedule_keepalive()
+
+    def _cancel_keepalive(self) -> None:
+        if self._keepalive_handle is not None:
+            self._keepalive_handle.cancel()
+            self._keepalive_handle = None
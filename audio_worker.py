@@ -1,11 +1,17 @@
 from __future__ import annotations
 
-import wave, threading, numpy as np
+import threading, numpy as np
 import sounddevice as sd
 import queue
+import select
 from typing import Callable, Optional
 import os
-from utils.g711 import pcmu_decode_to_float32, pcma_decode_to_float32
+from utils.audio_cache import ASSETS
+from utils.jitter_buffer import JitterBuffer
+from utils.g711 import (
+    pcmu_decode_to_float32, pcma_decode_to_float32,
+    pcmu_encode_from_float32, pcma_encode_from_float32,
+)
 import socket
 import struct
 import time
@@ -222,6 +228,95 @@ def db_to_lin(db: float) -> float:
 #                 pass
 
 
+class StreamRingBuffer:
+    """
+    Fixed-capacity float32 ring for one RTP/PCM stream mixed by LoopingAudioWorker.
+    Writers resample into the ring through a cached index array; when a write
+    would exceed capacity the oldest samples are dropped (overrun), so the
+    buffered latency never exceeds capacity / samplerate. Reads that find fewer
+    samples than a block while the stream is playing count as underruns.
+    """
+    __slots__ = ("buf", "gain", "read", "size", "underruns", "overruns", "dropped", "_playing")
+
+    def __init__(self, capacity: int, gain: float = 1.0):
+        self.buf = np.zeros(max(int(capacity), 1), dtype=np.float32)
+        self.gain = gain
+        self.read = 0
+        self.size = 0
+        self.underruns = 0
+        self.overruns = 0
+        self.dropped = 0
+        self._playing = False
+
+    @property
+    def capacity(self) -> int:
+        return self.buf.shape[0]
+
+    def write(self, pcm: np.ndarray, idx: Optional[np.ndarray] = None) -> None:
+        """Append ``pcm`` (or ``pcm[idx]`` when resampling) without allocating."""
+        n = pcm.shape[0] if idx is None else idx.shape[0]
+        if n == 0:
+            return
+        cap = self.buf.shape[0]
+        if n > cap:
+            # A single write longer than the cap: keep only its newest part.
+            if idx is None:
+                pcm = pcm[n - cap:]
+            else:
+                idx = idx[n - cap:]
+            self.dropped += n - cap
+            n = cap
+        over = self.size + n - cap
+        if over > 0:
+            self.overruns += 1
+            self.dropped += over
+            self.read = (self.read + over) % cap
+            self.size -= over
+        w = (self.read + self.size) % cap
+        first = min(n, cap - w)
+        if idx is None:
+            self.buf[w:w + first] = pcm[:first]
+            if first < n:
+                self.buf[:n - first] = pcm[first:]
+        else:
+            # mode="clip" lets numpy write straight into the ring (no temp copy)
+            np.take(pcm, idx[:first], out=self.buf[w:w + first], mode="clip")
+            if first < n:
+                np.take(pcm, idx[first:], out=self.buf[:n - first], mode="clip")
+        self.size += n
+        self._playing = True
+
+    def mix_into(self, out: np.ndarray, scratch: np.ndarray) -> None:
+        """Add up to ``len(out)`` buffered samples × gain into ``out`` and consume them."""
+        n = out.shape[0]
+        k = min(n, self.size)
+        if k < n and self._playing:
+            self.underruns += 1
+            self._playing = k > 0
+        if k == 0:
+            return
+        cap = self.buf.shape[0]
+        r = self.read
+        first = min(k, cap - r)
+        np.multiply(self.buf[r:r + first], self.gain, out=scratch[:first])
+        out[:first] += scratch[:first]
+        if first < k:
+            rest = k - first
+            np.multiply(self.buf[:rest], self.gain, out=scratch[:rest])
+            out[first:k] += scratch[:rest]
+        self.read = (r + k) % cap
+        self.size -= k
+
+    def stats(self, samplerate: int) -> dict:
+        return {
+            "buffered_ms": round(self.size * 1000.0 / samplerate, 1),
+            "max_latency_ms": round(self.capacity * 1000.0 / samplerate, 1),
+            "underruns": self.underruns,
+            "overruns": self.overruns,
+            "dropped_samples": self.dropped,
+        }
+
+
 class LoopingAudioWorker:
     """
     Single-owner audio engine:
@@ -238,6 +333,7 @@ class LoopingAudioWorker:
         device=None,
         tone_resolver: Optional[Callable[[int], Optional[str]]] = None,  # tone_id -> file path
         master_gain_db: float = 0.0,
+        stream_max_latency_ms: float = 200.0,
     ):
         self.samplerate = samplerate
         self.channels = channels
@@ -248,7 +344,9 @@ class LoopingAudioWorker:
         self.cmd_q = queue.Queue()
         self.stop_ev = threading.Event()
         self.blocksize = 1024  # choose; 1024 at 44.1kHz ≈ 23 ms blocks
-        self.streams = {}  # source_id -> {"buf": np.ndarray(float32), "gain": float}
+        self.streams: dict[str, StreamRingBuffer] = {}  # source_id -> ring (audio thread only)
+        self.stream_capacity = max(int(samplerate * stream_max_latency_ms / 1000.0), blocksize)
+        self._resample_idx: dict[tuple[int, int], np.ndarray] = {}  # (src_rate, n) -> indices
         self.lock = threading.Lock()
 
         # audio
@@ -266,6 +364,7 @@ class LoopingAudioWorker:
         self.tone_cache: dict[int, np.ndarray] = {}        # tone_id -> float32 mono @ samplerate
         self.active: dict[int, dict] = {}                  # line -> {"buf": np.ndarray, "pos": int, "gain": float}
         self.oneshots: list[dict] = []                     # [{"buf": np.ndarray, "pos": int, "gain": float}, ...]
+        self._mix_scratch = np.empty(self.blocksize, dtype=np.float32)
 
         self._thr = threading.Thread(target=self._run, name="LoopingAudioWorker", daemon=True)
 
@@ -320,31 +419,28 @@ class LoopingAudioWorker:
     def set_stream_gain_db(self, source_id: str, gain_db: float):
         self.cmd_q.put(("stream_gain", (source_id, gain_db)))
 
+    def stream_stats(self) -> dict:
+        """Per-stream buffered latency and underrun/overrun counters."""
+        return {sid: st.stats(self.samplerate) for sid, st in list(self.streams.items())}
+
     # ---------- internals ----------
-    def _resample_nearest(self, data: np.ndarray, src_rate: int) -> np.ndarray:
-        if src_rate == self.samplerate or data.size == 0:
-            return data
-        ratio = self.samplerate / float(src_rate)
-        idx = (np.arange(int(len(data) * ratio)) / ratio).astype(np.int64)
-        return data[idx]
+    def _resample_index(self, src_rate: int, n: int) -> Optional[np.ndarray]:
+        """Nearest-neighbour indices taking ``n`` samples at ``src_rate`` to our rate."""
+        if src_rate == self.samplerate or n == 0:
+            return None
+        key = (src_rate, n)
+        idx = self._resample_idx.get(key)
+        if idx is None:
+            ratio = self.samplerate / float(src_rate)
+            idx = (np.arange(int(n * ratio)) / ratio).astype(np.int64)
+            if len(self._resample_idx) >= 64:
+                self._resample_idx.clear()
+            self._resample_idx[key] = idx
+        return idx
 
     def _load_wav_float32(self, path: str) -> np.ndarray:
-        with wave.open(path, "rb") as wf:
-            nchan, sampwidth, sr = wf.getnchannels(), wf.getsampwidth(), wf.getframerate()
-            raw = wf.readframes(wf.getnframes())
-        if sampwidth != 2:
-            raise ValueError(f"{os.path.basename(path)} must be 16-bit PCM WAV")
-        data = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
-        if nchan > 1:
-            data = data.reshape(-1, nchan).mean(axis=1)  # downmix
-        if sr != self.samplerate:
-            # fast nearest-neighbor (fine for tones); swap in a real resampler if needed
-            ratio = self.samplerate / sr
-            idx = (np.arange(int(len(data) * ratio)) / ratio).astype(np.int64)
-            data = data[idx]
-        if data.size == 0:
-            data = np.zeros(1, dtype=np.float32)
-        return data
+        # decoded once per process and rate (see utils.audio_cache); read-only
+        return ASSETS.get(path, self.samplerate).pcm
 
     def _ensure_tone_loaded(self, tone_id: int) -> Optional[np.ndarray]:
         if tone_id in self.tone_cache:
@@ -361,25 +457,23 @@ class LoopingAudioWorker:
             return
         if cmd == "add_stream":
             sid, gdb = payload
-            self.streams[sid] = {"buf": np.zeros(0, dtype=np.float32), "gain": 10 ** (gdb / 20.0)}
+            self.streams[sid] = StreamRingBuffer(self.stream_capacity, 10 ** (gdb / 20.0))
         elif cmd == "remove_stream":
             self.streams.pop(payload, None)
         elif cmd == "stream_gain":
             sid, gdb = payload
             if sid in self.streams:
-                self.streams[sid]["gain"] = 10 ** (gdb / 20.0)
+                self.streams[sid].gain = 10 ** (gdb / 20.0)
         elif cmd == "feed_stream":
             sid, pcm, src_rate = payload
-            # ensure float32 mono
-            if pcm.dtype != np.float32:
-                pcm = pcm.astype(np.float32, copy=False)
-            pcm = self._resample_nearest(pcm, src_rate)
             st = self.streams.get(sid)
             if st is None:
                 # auto-create with 0 dB gain if not present
-                self.streams[sid] = {"buf": pcm.copy(), "gain": 1.0}
-            else:
-                st["buf"] = np.concatenate([st["buf"], pcm], axis=0)
+                st = self.streams[sid] = StreamRingBuffer(self.stream_capacity)
+            # ensure float32 mono
+            if pcm.dtype != np.float32:
+                pcm = pcm.astype(np.float32, copy=False)
+            st.write(pcm, self._resample_index(src_rate, pcm.shape[0]))
         elif cmd == "master_gain":
             self.master_gain = db_to_lin(payload or 0.0)
         elif cmd == "set_tone":
@@ -410,18 +504,13 @@ class LoopingAudioWorker:
 
     def _mix_streams(self, out: np.ndarray):
         # mix up to blocksize samples from each active stream
-        n = out.shape[0]
-        for sid, st in list(self.streams.items()):
-            buf = st["buf"]
-            if buf.size == 0:
-                continue
-            take = min(n, buf.size)
-            out[:take] += st["gain"] * buf[:take]
-            # consume
-            if take == buf.size:
-                st["buf"] = np.zeros(0, dtype=np.float32)
-            else:
-                st["buf"] = buf[take:]
+        if not self.streams:
+            return
+        scratch = self._mix_scratch
+        if scratch.shape[0] < out.shape[0]:
+            scratch = self._mix_scratch = np.empty(out.shape[0], dtype=np.float32)
+        for st in self.streams.values():
+            st.mix_into(out, scratch)
 
     def _mix_tones(self, out: np.ndarray):
         n = out.shape[0]
@@ -537,17 +626,25 @@ class NullAudioWorker:
 
 class RTPReceiver:
     """
-    Minimal RTP receiver -> float32 mono -> AudioWorker.feed_stream().
+    Minimal RTP receiver -> jitter buffer -> float32 mono -> AudioWorker.feed_stream().
     Supports PT=0 (PCMU μ-law) and PT=8 (PCMA A-law).
     Optional echo_source receives decoded PCM for RTP loopback.
+    With jitter_buffer=False, frames are delivered in arrival order.
+    With engine=RTPEngine, the socket is serviced by the engine's selector loop.
     """
-    def __init__(self, worker, bind_ip="0.0.0.0", port=0, source_id="rx", log=None):
+    def __init__(self, worker, bind_ip="0.0.0.0", port=0, source_id="rx", log=None, jitter_buffer: bool = True,
+                 engine=None):
         self.worker = worker
+        self.engine = engine
+        self.jitter: JitterBuffer | None = JitterBuffer() if jitter_buffer else None
         self.source_id = source_id
         self.log = log
         self.echo_source: EchoSource | None = None
         self.recorder = None
         self.stats = None
+        # Called once, on the engine / receiver thread, when the first RTP
+        # packet arrives (call-setup tracing: media cut-through).
+        self.on_first_packet: Callable[[], None] | None = None
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.sock.bind((bind_ip, port))
         self.sock.settimeout(0.5)
@@ -570,10 +667,15 @@ class RTPReceiver:
     def start(self):
         if self.worker is not None:
             self.worker.add_stream(self.source_id, gain_db=0.0)
-        self._thr.start()
+        if self.engine is not None:
+            self.engine.add_receiver(self)
+        else:
+            self._thr.start()
 
     def stop(self):
         self._stop.set()
+        if self.engine is not None:
+            self.engine.remove_receiver(self)
         try: self.sock.close()
         except Exception: pass
         if self.worker is not None:
@@ -581,6 +683,7 @@ class RTPReceiver:
         self.echo_source = None
         self.recorder = None
         self.stats = None
+        self.on_first_packet = None
 
     def _decode_payload(self, pt: int, payload: bytes) -> np.ndarray:
         if pt == 0:   # PCMU
@@ -590,39 +693,80 @@ class RTPReceiver:
         # unknown codec: drop
         return np.zeros(0, dtype=np.float32)
 
+    def _deliver(self, pcm: np.ndarray) -> None:
+        echo = self.echo_source
+        if echo is not None:
+            echo.push(pcm)
+        rec = self.recorder
+        if rec is not None:
+            rec.write_rx(pcm)
+        if self.worker is not None:
+            self.worker.feed_stream(self.source_id, pcm, src_rate=8000)
+
+    def handle_datagram(self, data: bytes) -> None:
+        """Parse one RTP datagram and queue (or deliver) its decoded audio."""
+        if len(data) < 12:
+            return
+        # RTP header
+        b0, b1, seq, ts, ssrc = struct.unpack("!BBHII", data[:12])
+        version = (b0 >> 6) & 0x03
+        cc = b0 & 0x0F
+        pt = b1 & 0x7F
+        header_len = 12 + (cc * 4)
+        if version != 2 or len(data) <= header_len:
+            return
+        payload = data[header_len:]
+        first = self.on_first_packet
+        if first is not None:
+            self.on_first_packet = None
+            first()
+        now = time.monotonic()
+        stats = self.stats
+        if stats is not None:
+            stats.note_rx(pt, seq, ssrc, len(payload), known_codec=(pt in (0, 8)), ts=ts, arrival=now)
+        rec = self.recorder
+        if rec is not None and rec.passthrough:
+            rec.write_rx_payload(pt, payload)
+        pcm = self._decode_payload(pt, payload)
+        if not pcm.size:
+            return
+        jb = self.jitter
+        if jb is None:
+            self._deliver(pcm)
+        else:
+            jb.push(seq, ts, ssrc, pcm, now)
+
     def _run(self):
         if self.log: self.log.info(f"[RTP RX] listening on {self.port}")
+        jb = self.jitter
+        sock = self.sock  # keeps the 0.5 s timeout from __init__
         while not self._stop.is_set():
+            deadline = jb.next_deadline() if jb is not None else None
             try:
-                data, _ = self.sock.recvfrom(2048)
+                # a playout deadline sooner than the socket timeout: wait on select instead
+                if deadline is not None and not select.select(
+                    [sock], [], [], min(max(deadline - time.monotonic(), 0.0), 0.5)
+                )[0]:
+                    data = None
+                else:
+                    data, _ = sock.recvfrom(2048)
             except socket.timeout:
-                continue
-            except OSError:
-                break
-            if len(data) < 12:
-                continue
-            # RTP header
-            b0, b1, seq, ts, ssrc = struct.unpack("!BBHII", data[:12])
-            version = (b0 >> 6) & 0x03
-            cc = b0 & 0x0F
-            pt = b1 & 0x7F
-            header_len = 12 + (cc * 4)
-            if version != 2 or len(data) <= header_len:
-                continue
-            payload = data[header_len:]
-            stats = self.stats
-            if stats is not None:
-                stats.note_rx(pt, seq, ssrc, len(payload), known_codec=(pt in (0, 8)))
-            pcm = self._decode_payload(pt, payload)
-            if pcm.size:
-                echo = self.echo_source
-                if echo is not None:
-                    echo.push(pcm)
-                rec = self.recorder
-                if rec is not None:
-                    rec.write_rx(pcm)
-                if self.worker is not None:
-                    self.worker.feed_stream(self.source_id, pcm, src_rate=8000)
+                data = None
+            except (OSError, ValueError):
+                break  # socket closed by stop()
+            if data is not None:
+                self.handle_datagram(data)
+            if jb is not None:
+                self.playout(time.monotonic())
+
+    def playout(self, now: float) -> None:
+        """Deliver jitter-buffered frames due at ``now``."""
+        jb = self.jitter
+        for frame in jb.pop(now):
+            self._deliver(frame)
+        stats = self.stats
+        if stats is not None:
+            stats.note_jitter_buffer(jb)
 
 
 class _BaseSource:
@@ -630,10 +774,15 @@ class _BaseSource:
     def stop(self): pass
     def read(self, n: int) -> np.ndarray:  # float32 mono @ target sr
         return np.zeros(n, dtype=np.float32)
+    def read_frame(self, pt: int, n: int) -> Optional[bytes]:
+        """Pre-encoded payload for the next n samples, or None to fall back to read()."""
+        return None
 
 class SilenceSource(_BaseSource):
     def __init__(self, sr: int): self.sr = sr
     # read() inherited (zeros)
+    def read_frame(self, pt: int, n: int) -> Optional[bytes]:
+        return ASSETS.silence_frame(pt, n)
 
 
 class ToneSource(_BaseSource):
@@ -642,6 +791,7 @@ class ToneSource(_BaseSource):
     def __init__(self, sr: int, freq_hz: float = 1000.0, gain_db: float = -12.0):
         self.sr = sr
         self.freq_hz = float(freq_hz)
+        self.gain_db = float(gain_db)
         self.gain = 10 ** (gain_db / 20.0)
         self._phase = 0.0
 
@@ -653,6 +803,16 @@ class ToneSource(_BaseSource):
         self._phase = (self._phase + n) % self.sr
         return out
 
+    def read_frame(self, pt: int, n: int) -> Optional[bytes]:
+        if self._phase % n:
+            return None
+        frames = ASSETS.tone_frames(pt, n, self.sr, self.freq_hz, self.gain_db)
+        if frames is None:
+            return None
+        frame = frames[int(self._phase // n) % len(frames)]
+        self._phase = (self._phase + n) % self.sr
+        return frame
+
 
 class ToneThenEchoSource(_BaseSource):
     """Play a test tone, then switch to delayed echo (single RTPSender source)."""
@@ -684,26 +844,29 @@ class ToneThenEchoSource(_BaseSource):
 
 
 class WavSource(_BaseSource):
-    """Preload a 16-bit PCM wav, downmix to mono, resample if needed, loopable."""
+    """Cached 16-bit PCM wav (mono, resampled to target_sr; see utils.audio_cache), loopable."""
     def __init__(self, path: str, target_sr: int, loop: bool = False, gain_db: float = 0.0):
         self.loop = loop
+        self.gain_db = float(gain_db)
         self.gain = 10 ** (gain_db / 20.0)
-        with wave.open(path, "rb") as wf:
-            nchan, sampwidth, sr = wf.getnchannels(), wf.getsampwidth(), wf.getframerate()
-            raw = wf.readframes(wf.getnframes())
-        if sampwidth != 2:
-            raise ValueError(f"{os.path.basename(path)} must be 16-bit PCM WAV")
-        pcm = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
-        if nchan > 1:
-            pcm = pcm.reshape(-1, nchan).mean(axis=1)  # downmix
-        if sr != target_sr:
-            # quick nearest resample (good enough for prompts/tones)
-            ratio = target_sr / float(sr)
-            idx = (np.arange(int(len(pcm) * ratio)) / ratio).astype(np.int64)
-            pcm = pcm[idx]
-        self.buf = pcm if pcm.size else np.zeros(1, dtype=np.float32)
+        self.asset = ASSETS.get(path, target_sr)
+        self.buf = self.asset.pcm
         self.pos = 0
 
+    def read_frame(self, pt: int, n: int) -> Optional[bytes]:
+        L = self.buf.size
+        pos = self.pos
+        if pos >= L and not self.loop:
+            return ASSETS.silence_frame(pt, n)
+        if pos % n or (self.loop and L % n):
+            # unaligned, or a loop whose wrap would need the zero-padded tail
+            return None
+        frames = self.asset.frames(pt, n, self.gain_db)
+        if frames is None:
+            return None
+        self.pos = (pos + n) % L if self.loop else min(pos + n, L)
+        return frames[(pos % L) // n]
+
     def read(self, n: int) -> np.ndarray:
         if n <= 0: return np.zeros(0, dtype=np.float32)
         out = np.zeros(n, dtype=np.float32)
@@ -883,62 +1046,6 @@ class MicSource(_BaseSource):
                 i += take
         return out
 
-# ---------- ulaw / alaw encoders ----------
-# (fast, branchy µ/A-law from float32; matches your PCMU/PCMA decoders’ expectations)
-def pcmu_encode_from_float32(x: np.ndarray) -> bytes:
-    # clamp to [-1,1], scale to 16-bit, then encode
-    x = np.clip(x, -1.0, 1.0) * 32767.0
-    s = x.astype(np.int16, copy=False)
-    # µ-law constants
-    BIAS = 0x84
-    CLIP = 32635
-    out = bytearray(s.size)
-    for i, sample in enumerate(s):
-        sign = 0x00
-        v = sample
-        if v < 0:
-            v = -v - 1
-            sign = 0x80
-        if v > CLIP: v = CLIP
-        v = v + BIAS
-        # exponent
-        exp = 7
-        mask = 0x4000
-        while (v & mask) == 0 and exp > 0:
-            mask >>= 1; exp -= 1
-        mant = (v >> (exp + 3)) & 0x0F
-        out[i] = (~(sign | (exp << 4) | mant)) & 0xFF
-    return bytes(out)
-
-def pcma_encode_from_float32(x: np.ndarray) -> bytes:
-    x = np.clip(x, -1.0, 1.0) * 32767.0
-    s = x.astype(np.int16, copy=False)
-    out = bytearray(s.size)
-    for i, sample in enumerate(s):
-        sign = 0x00 if sample >= 0 else 0x80
-        if sample < 0: sample = -sample - 1
-        sample >>= 4
-        if sample > 0x1FFF: sample = 0x1FFF
-        if sample >= 0x1000:
-            exp = 7
-        elif sample >= 0x800:
-            exp = 6
-        elif sample >= 0x400:
-            exp = 5
-        elif sample >= 0x200:
-            exp = 4
-        elif sample >= 0x100:
-            exp = 3
-        elif sample >= 0x80:
-            exp = 2
-        elif sample >= 0x40:
-            exp = 1
-        else:
-            exp = 0
-        mant = (sample >> (exp + 1)) & 0x0F
-        out[i] = (sign | (exp << 4) | mant) ^ 0x55
-    return bytes(out)
-
 
 class RTPSender:
     """
@@ -947,18 +1054,25 @@ class RTPSender:
       - WAV file (16-bit PCM; optional loop)
       - Microphone (sounddevice)
     Encodes to PCMU (PT=0) or PCMA (PT=8) at self.sr with self.ptime_ms packets.
+    With engine=RTPEngine, packets are paced by the engine's shared tick.
     """
     def __init__(self, remote_ip: str, remote_port: int,
-                 ptime_ms: int = 20, samplerate: int = 8000, payload_type: int = 0, log=None):
+                 ptime_ms: int = 20, samplerate: int = 8000, payload_type: int = 0, log=None,
+                 engine=None):
         self.addr = (remote_ip, remote_port)
         self.ptime_ms = int(ptime_ms)
         self.sr = int(samplerate)
+        self.samples_per_packet = int(self.sr * self.ptime_ms / 1000)
+        self.engine = engine  # RTPEngine paces send_next() instead of a per-sender thread
         self.pt = int(payload_type)   # 0=PCMU, 8=PCMA
         self.log = log
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.seq = random.randint(0, 65535)
         self.ts = random.randint(0, 2**32 - 1)
         self.ssrc = random.getrandbits(32)
+        # RTCP sender info (utils/rtcp.py): packets and payload octets sent
+        self.packets_sent = 0
+        self.octets_sent = 0
         self._stop = threading.Event()
         self._thr = threading.Thread(target=self._run, name="RTPSender", daemon=True)
 
@@ -1051,10 +1165,15 @@ class RTPSender:
     # ---- lifecycle ----
     def start(self):
         if self.log: self.log.info(f"[RTP TX] -> {self.addr[0]}:{self.addr[1]} PT={self.pt} ptime={self.ptime_ms}ms sr={self.sr}")
-        self._thr.start()
+        if self.engine is not None:
+            self.engine.add_sender(self)
+        else:
+            self._thr.start()
 
     def stop(self):
         self._stop.set()
+        if self.engine is not None:
+            self.engine.remove_sender(self)
         # stop source first to release devices
         with self._src_lock:
             try: self._source.stop()
@@ -1079,13 +1198,17 @@ class RTPSender:
             # default to µ-law if unknown
             return pcmu_encode_from_float32(f32)
 
-    def _run(self):
-        samples_per_packet = int(self.sr * self.ptime_ms / 1000)
-        next_send = time.perf_counter()
-        while not self._stop.is_set():
-            # 1) pull from current source
-            with self._src_lock:
-                src = self._source
+    def send_next(self) -> bool:
+        """Build and send one ptime packet from the current source (False on socket error)."""
+        samples_per_packet = self.samples_per_packet
+        # 1) pull from current source
+        with self._src_lock:
+            src = self._source
+        rec = self.recorder
+        raw_rec = rec is not None and rec.passthrough
+        # cached prompts/tones/silence come pre-encoded (PCM recording needs the samples)
+        payload = src.read_frame(self.pt, samples_per_packet) if rec is None or raw_rec else None
+        if payload is None:
             f32 = src.read(samples_per_packet)
             if f32.size != samples_per_packet:
                 # zero-fill any underrun
@@ -1093,21 +1216,31 @@ class RTPSender:
                 take = min(f32.size, samples_per_packet)
                 if take > 0: tmp[:take] = f32[:take]
                 f32 = tmp
-            rec = self.recorder
-            if rec is not None:
+            if rec is not None and not raw_rec:
                 rec.write_tx(f32)
             # 2) encode -> payload
             payload = self._encode(f32)
-            stats = self.stats
-            if stats is not None:
-                stats.note_tx(self.pt, len(payload))
-            # 3) send
-            try:
-                self.sock.sendto(self._packet(payload), self.addr)
-            except Exception:
+        if raw_rec:
+            rec.write_tx_payload(self.pt, payload)
+        stats = self.stats
+        if stats is not None:
+            stats.note_tx(self.pt, len(payload))
+        # 3) send
+        try:
+            self.sock.sendto(self._packet(payload), self.addr)
+        except Exception:
+            return False
+        # 4) advance RTP clock
+        self.ts = (self.ts + samples_per_packet) & 0xFFFFFFFF
+        self.packets_sent += 1
+        self.octets_sent += len(payload)
+        return True
+
+    def _run(self):
+        next_send = time.perf_counter()
+        while not self._stop.is_set():
+            if not self.send_next():
                 break
-            # 4) advance RTP clock
-            self.ts = (self.ts + samples_per_packet) & 0xFFFFFFFF
             # 5) pacing
             next_send += self.ptime_ms / 1000.0
             sleep_time = next_send - time.perf_counter()
@@ -1,4 +1,3 @@
-import struct
 import socket
 import threading
 import logging
@@ -7,6 +6,11 @@ from messages.register import send_register_req, send_unregister_req, build_ip_p
 from messages.keepalive import send_keepalive_req
 from state import PhoneState
 from utils.tftp import get_device_config_via_tftp
+from utils.skinny_framing import SkinnyFrameReader
+from utils.skinny_writer import SkinnyWriter
+from utils.timers import default_scheduler
+from utils.dispatch_profile import DispatchProfiler
+from utils.call_trace import CallTracer
 from messages.generic import (
     handle_softkey_press,
     handle_keypad_press,
@@ -24,6 +28,10 @@ from collections import deque
 import time
 
 
+# Fraction of the keepalive interval a beat may fire early (spreads a fleet).
+KEEPALIVE_JITTER = 0.1
+
+
 def _tone_path_from_id(tone_id: int) -> str | None:
     fname = TONE_LOOKUP.get(tone_id)
     return os.path.join(TONE_FOLDER, fname) if fname else None
@@ -33,12 +41,22 @@ class SCCPClient:
     def __init__(self, state: PhoneState):
         self.state = state
         self.sock = None
+        self._frame_reader = None
         self.running = False
         self.get_tftp_config = True
+        self.tftp_config_dir = None  # None: ./downloaded_configs
         self.logger = logging.getLogger("SCCPClient")
         self.state._prompt_watchers.append(self._on_prompt_changed)
         self._stop_event = threading.Event()
         self._threads = []
+        self.timers = default_scheduler()
+        self._keepalive_timer = None
+        # Handler timings per message ID (--profile-dispatch); None costs nothing.
+        self.dispatch_profile = (
+            DispatchProfiler(state.profile_dispatch) if state.profile_dispatch else None
+        )
+        # Call-setup milestones and latency histograms (utils/call_trace.py).
+        self.call_trace = CallTracer(state.device_name)
         if state.enable_audio:
             self.audio = LoopingAudioWorker(
                 samplerate=44100,  # your key_beep.wav was 44.1k in logs
@@ -57,10 +75,12 @@ class SCCPClient:
             call_ended=threading.Event(),   # set when Disconnected
             register_rejected=threading.Event(),
         )
+        dtmf_lock = threading.Lock()
         self.dtmf = SimpleNamespace(
             event=threading.Event(),
             buf=deque(),
-            lock=threading.Lock()
+            lock=dtmf_lock,
+            cond=threading.Condition(dtmf_lock),
         )
         self.state.call_active = False
         self.state.call_connected = False
@@ -69,8 +89,11 @@ class SCCPClient:
         self.state.last_call_epoch = 0
 
     def connect(self):
-        self.sock = socket.create_connection((self.state.server, self.state.port))
-        self.sock.settimeout(1.0)
+        raw = socket.create_connection((self.state.server, self.state.port))
+        raw.settimeout(1.0)
+        self._frame_reader = SkinnyFrameReader(raw)
+        # Every sender (handlers, keepalive, UI) queues on one coalescing writer.
+        self.sock = SkinnyWriter(raw, name="pyskinny-writer")
         self.logger.info(f"({self.state.device_name}) Connected to CUCM; Type={self.state.model}")
         self.running = True
         self._start_threads()
@@ -80,19 +103,21 @@ class SCCPClient:
 
     def _start_threads(self):
         t_recv = threading.Thread(target=self._recv_loop, name="pyskinny-recv")
-        t_keep = threading.Thread(target=self._keepalive_loop, name="pyskinny-keepalive")
-        self._threads = [t_recv, t_keep]
-        for t in self._threads:
-            t.start()
+        self._threads = [t_recv]
+        t_recv.start()
+        self._start_keepalive()
 
-    def start(self):
+    def _fetch_tftp_config(self) -> None:
         if self.get_tftp_config:
             get_device_config_via_tftp(
                 tftp_server=self.state.server,
                 device_name=self.state.device_name,
                 port=getattr(self.state, "tftp_port", 69),
+                output_dir=self.tftp_config_dir,
             )
 
+    def start(self):
+        self._fetch_tftp_config()
         self.connect()
         self._send_register()
 
@@ -128,6 +153,7 @@ class SCCPClient:
 
         self.running = False
         self._stop_event.set()
+        self._stop_keepalive()
 
         for t in self._threads:
             if t.is_alive():
@@ -141,6 +167,19 @@ class SCCPClient:
             self.audio.close()
         except Exception:
             pass
+        self._log_dispatch_profile()
+        self.call_trace.flush()
+
+    def _log_dispatch_profile(self) -> None:
+        profile = self.dispatch_profile
+        if profile is None or not profile.snapshot():
+            return
+        self.logger.info(
+            "(%s) Dispatch profile (1 in %d timed):\n%s",
+            self.state.device_name,
+            profile.sample_every,
+            "\n".join(profile.format_lines()),
+        )
 
     def reregister_from_cm(self, *, hard: bool) -> None:
         """Handle CUCM Reset (hard) or Restart (soft) — TFTP + new RegisterReq."""
@@ -181,6 +220,7 @@ class SCCPClient:
 
             self.running = False
             self._stop_event.set()
+            self._stop_keepalive()
             self._close_skinny_socket(send_unregister=False)
 
             for t in list(self._threads):
@@ -188,31 +228,12 @@ class SCCPClient:
                     t.join(timeout=2.0)
 
             self._stop_event.clear()
-            self.state.is_registered.clear()
-            self.state.is_unregistered.clear()
-            self.state.active_calls_list = []
-            self.state.calls.clear()
-            self.state.callinfo.clear()
-            self.state.selected_softkeys.clear()
-            self.state.selected_call_reference = None
-            self.state.active_call = False
-            self.state.call_active = False
-            self.state.call_connected = False
-            self.state.media_active = False
-            self.events.call_ringing.clear()
-            self.events.call_connected.clear()
-            self.events.media_started.clear()
-            self.events.call_ended.clear()
+            self._reset_registration_state()
 
             if hard:
                 time.sleep(1.0)
 
-            if self.get_tftp_config:
-                get_device_config_via_tftp(
-                    tftp_server=self.state.server,
-                    device_name=self.state.device_name,
-                    port=getattr(self.state, "tftp_port", 69),
-                )
+            self._fetch_tftp_config()
 
             self.running = True
             self._threads = []
@@ -223,6 +244,24 @@ class SCCPClient:
             self.logger.exception(f"({self.state.device_name}) CM {label} failed")
             self.running = False
 
+    def _reset_registration_state(self) -> None:
+        """Forget calls, softkeys and registration flags before a fresh RegisterReq."""
+        self.state.is_registered.clear()
+        self.state.is_unregistered.clear()
+        self.state.active_calls_list = []
+        self.state.calls.clear()
+        self.state.callinfo.clear()
+        self.state.selected_softkeys.clear()
+        self.state.selected_call_reference = None
+        self.state.active_call = False
+        self.state.call_active = False
+        self.state.call_connected = False
+        self.state.media_active = False
+        self.events.call_ringing.clear()
+        self.events.call_connected.clear()
+        self.events.media_started.clear()
+        self.events.call_ended.clear()
+
     def _close_skinny_socket(self, *, send_unregister: bool) -> None:
         sock = self.sock
         if sock:
@@ -242,6 +281,11 @@ class SCCPClient:
                 pass
             self.sock = None
 
+    def send_stats(self) -> dict | None:
+        """Outbound queue depth / bytes-per-second of the Skinny connection."""
+        stats = getattr(self.sock, "stats", None)
+        return stats() if callable(stats) else None
+
     def _send_unregister(self):
         send_unregister_req(self)
 
@@ -252,21 +296,27 @@ class SCCPClient:
         self.sock.sendall(msg)
         self.logger.info(f"({self.state.device_name}) [SEND] RegisterReq")
 
-    def _keepalive_loop(self):
-        self.logger.info(f"({self.state.device_name}) Keepalive Loop Running")
-        interval = self.state.keepalive_interval
-        while self.running and not self._stop_event.is_set():
-            # wait returns True if stop set; exits immediately
-            if self._stop_event.wait(timeout=interval):
-                break
-            try:
-                send_keepalive_req(self)
-            except Exception:
-                # avoid noisy logs during shutdown
-                if self.running:
-                    self.logger.debug(f"({self.state.device_name}) keepalive send failed", exc_info=True)
-                break
-        self.logger.info(f"({self.state.device_name}) Keepalive Loop Stopped")
+    def _start_keepalive(self):
+        """Arm KeepAliveReq on the shared timer heap (no thread per phone)."""
+        self._stop_keepalive()
+        self._keepalive_timer = self.timers.call_every(
+            lambda: self.state.keepalive_interval,
+            self._keepalive_tick,
+            jitter=KEEPALIVE_JITTER,
+        )
+
+    def _stop_keepalive(self):
+        timer = self._keepalive_timer
+        self._keepalive_timer = None
+        if timer is not None:
+            timer.cancel()
+
+    def _keepalive_tick(self):
+        if not self.running or self._stop_event.is_set() or self.sock is None:
+            return False
+        # send_keepalive_req clears self.running if the socket is gone
+        send_keepalive_req(self)
+        return self.running
 
     def handle_volume_change(self, new_db: float):
         self.state.tone_volume = new_db
@@ -292,7 +342,7 @@ class SCCPClient:
                             f"({self.state.device_name}) Unexpected error in dispatch: {e}",
                             exc_info=True,
                         )
-                        continue
+                    self.state.notify_changed()
                 elif status in ("timeout",):
                     continue  # check flags and loop
                 else:  # "closed", "error"
@@ -305,35 +355,26 @@ class SCCPClient:
                 pass
 
     def read_skinny_message(self):
-        # header = sock.recv(12)
+        reader = self._frame_reader
         try:
-            header = self.sock.recv(12)
-        except socket.timeout:
-            return "timeout", None, None, None
-        except (OSError, ConnectionResetError) as e:
+            frame = reader.next_frame()
+            while frame is None:
+                try:
+                    n = reader.fill()
+                except socket.timeout:
+                    # Partial frames stay buffered for the next call.
+                    return "timeout", None, None, None
+                except OSError:
+                    return "error", None, None, None
+                if not n:
+                    return "closed", None, None, None
+                frame = reader.next_frame()
+        except ValueError:
+            self.logger.error(f"({self.state.device_name}) Skinny stream desynchronised", exc_info=True)
             return "error", None, None, None
 
-        if len(header) < 12:
-            return "closed", None, None, None
-
-        data_length, version, msg_id = struct.unpack("<III", header)
-        payload_length = data_length - 4  # header includes 4 bytes of length
-
-        payload = b""
-        while len(payload) < payload_length:
-            try:
-                chunk = self.sock.recv(payload_length - len(payload))
-            except socket.timeout:
-                return "timeout", None, None, None
-            except OSError as e:
-                return "error", None, None, None
-
-            if not chunk:
-                # Connection closed or error
-                return "closed", None, None, None
-            payload += chunk
-
-        return "ok", msg_id, data_length, payload
+        msg_id, payload = frame
+        return "ok", msg_id, len(payload) + 4, bytes(payload)
 
     @staticmethod
     def numeric_call_ref(ref) -> int | None:
@@ -350,27 +391,26 @@ class SCCPClient:
 
     def _call_ref_for_state(self, state: int) -> tuple[int, int] | None:
         """Return (line, ref) for a call in the given Skinny call state."""
+        calls = self.state.calls
+        in_state = calls.keys_in_state(state)
+        if not in_state:
+            return None
+        # Prefer the selected call, then the most recently activated one.
         candidates: list[str] = []
         selected = getattr(self.state, "selected_call_reference", None)
-        if selected:
+        if selected and str(selected) in in_state:
             candidates.append(str(selected))
         for key in reversed(self.state.active_calls_list or []):
             sk = str(key)
-            if sk not in candidates:
+            if sk in in_state and sk not in candidates:
                 candidates.append(sk)
 
-        seen: set[str] = set()
         for key in candidates:
-            if key in seen:
-                continue
-            seen.add(key)
-            call = self.state.calls.get(key, {})
-            if call.get("call_state") != state:
-                continue
-            line = int(call.get("line_instance") or 1)
+            call = calls[key]
+            line = int(call.line_instance or 1)
             ref = self.numeric_call_ref(key)
             if ref is None:
-                ref = self.numeric_call_ref(call.get("call_reference"))
+                ref = self.numeric_call_ref(call.call_reference)
             if ref is not None:
                 return line, ref
         return None
@@ -408,16 +448,19 @@ class SCCPClient:
                 cref = sk_meta.get("call_reference")
                 if cref:
                     candidates.append(cref)
+            calls = self.state.calls
             for candidate in candidates:
+                if candidate is None:
+                    continue
+                call = calls.get(str(candidate))
                 nref = self.numeric_call_ref(candidate)
-                if nref is None and candidate is not None:
-                    call = self.state.calls.get(str(candidate), {})
-                    nref = self.numeric_call_ref(call.get("call_reference"))
+                if nref is None and call is not None:
+                    nref = self.numeric_call_ref(call.call_reference)
                 if nref is not None:
                     numeric_ref = nref
-                    call = self.state.calls.get(str(candidate), {}) or self.state.calls.get(str(nref), {})
-                    if call.get("line_instance"):
-                        active_line = int(call["line_instance"])
+                    call = call or calls.get(str(nref))
+                    if call is not None and call.line_instance:
+                        active_line = int(call.line_instance)
                     break
 
         return active_line, numeric_ref or 0
@@ -525,15 +568,21 @@ class SCCPClient:
         if softkey_name == "EndCall":
             from messages.phone import end_local_call
             end_local_call(self, source="local-endcall", call_ref=active_call_ref)
+        elif softkey_name == "NewCall":
+            self.call_trace.start()
+        elif softkey_name == "Answer":
+            self.call_trace.mark("answer", active_call_ref)
         handle_softkey_press(self, active_line, event, active_call_ref)
 
     def place_call(self, number: str, *, line: int = 1, pause: float = 0.35) -> None:
         """Place an outbound call: NewCall softkey, or Line button + dial on button phones."""
+        refs_before = set(self.state.calls)
         if self.uses_softkeys():
             self.press_softkey("NewCall", line=line)
         else:
             self.press_line_button(line)
-        time.sleep(pause)
+        # Dial as soon as CM opens the call (dial tone); ``pause`` caps the wait.
+        self.wait_new_call(refs_before, timeout=pause)
         self.dial_digits(number, line=line)
 
     def dial_digits(self, number: str, *, line: int = 1, call_ref: int = 0) -> None:
@@ -556,6 +605,36 @@ class SCCPClient:
         else:
             self.press_line_button(line)
 
+    # ---- call-state waits (woken by update_call_state and every dispatched message) ----
+    def wait_until(self, predicate, timeout: float | None = None) -> bool:
+        """Block until ``predicate()`` is true; False on timeout."""
+        return self.state.wait_until(predicate, timeout)
+
+    def wait_call_state(self, call_ref, states, timeout: float | None = None) -> bool:
+        """Wait for ``call_ref`` to reach one of ``states`` (an int or iterable of ints)."""
+        wanted = {states} if isinstance(states, int) else set(states)
+        key = str(call_ref)
+        return self.wait_until(lambda: self.state.calls.get(key, {}).get("call_state") in wanted, timeout)
+
+    def wait_new_call(self, refs_before, timeout: float | None = None, *, states=None) -> str | None:
+        """Wait for a call ref not in ``refs_before`` (optionally in one of ``states``); returns it."""
+        before = {str(r) for r in (refs_before or [])}
+        wanted = None if states is None else ({states} if isinstance(states, int) else set(states))
+        found: list[str] = []
+
+        def _new() -> bool:
+            for key, call in list(self.state.calls.items()):
+                if key not in before and (wanted is None or call.get("call_state") in wanted):
+                    found.append(key)
+                    return True
+            return False
+
+        return found[0] if self.wait_until(_new, timeout) else None
+
+    def wait_softkey_set(self, softkey_set: int, timeout: float | None = None) -> bool:
+        """Wait until CM selects softkey set ``softkey_set`` (SelectSoftKeys)."""
+        return self.wait_until(lambda: int(self.state.selected_softkey_set) == int(softkey_set), timeout)
+
     def _peer_call_connected(self, peer) -> bool:
         """True when consult/transfer target has an active connected call."""
         if peer is None:
@@ -575,39 +654,30 @@ class SCCPClient:
         self, refs_before, timeout: float, *, peer_client=None
     ) -> bool:
         """Wait until consult leg connects (new ref, or CM2 re-use + peer answered)."""
-        import time
-
         before = {str(r) for r in (refs_before or [])}
-        deadline = time.time() + timeout
-        while time.time() < deadline:
-            for key in self.state.active_calls_list or []:
-                sk = str(key)
-                if sk in before:
-                    continue
-                call = self.state.calls.get(sk, {})
-                if call.get("call_state") == 5:
-                    return True
 
-            if self._peer_call_connected(peer_client):
+        def _connected() -> bool:
+            new = [
+                self.state.calls.get(str(key), {}).get("call_state")
+                for key in (self.state.active_calls_list or [])
+                if str(key) not in before
+            ]
+            if 5 in new or self._peer_call_connected(peer_client):
                 return True
+            if any(st in (3, 4, 12) for st in new):
+                return True
+            return self.events.call_connected.is_set() and bool(new)
 
-            for key in self.state.active_calls_list or []:
-                sk = str(key)
-                if sk in before:
-                    continue
-                call = self.state.calls.get(sk, {})
-                if call.get("call_state") in (3, 4, 5, 12):
-                    return True
-
-            if self.events.call_connected.wait(timeout=0.05):
-                if self._peer_call_connected(peer_client):
-                    return True
-                for key in self.state.active_calls_list or []:
-                    sk = str(key)
-                    if sk not in before:
-                        return True
-            time.sleep(0.05)
-        return False
+        if peer_client is None:
+            return self.wait_until(_connected, timeout)
+        # The peer's state changes do not wake our condition; re-check in short slices.
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if self.wait_until(_connected, min(remaining, 0.05)):
+                return True
 
     def _select_consult_call_key(self, refs_before) -> str | None:
         """Pick the consult leg before completing transfer (prefer new connected ref)."""
@@ -627,24 +697,32 @@ class SCCPClient:
         selected = getattr(self.state, "selected_call_reference", None)
         return str(selected) if selected else None
 
+    def _wait_consult_connected(self, refs_before, timeout: float) -> str | None:
+        """Wait for the new consult leg to be Connected; returns the ref to complete on."""
+        before = {str(r) for r in (refs_before or [])}
+        self.wait_until(
+            lambda: any(
+                str(key) not in before and self.state.calls.get(str(key), {}).get("call_state") == 5
+                for key in (self.state.active_calls_list or [])
+            ),
+            timeout,
+        )
+        return self._select_consult_call_key(refs_before)
+
     def blind_transfer(self, number: str, *, pause: float = 0.3) -> None:
-        """Blind transfer active call: Transfer -> dial -> Transfer."""
-        import time
+        """Blind transfer active call: Transfer -> dial -> Transfer.
 
+        Each step starts as soon as CM reports the consult leg (dial tone, then
+        ring-out); ``pause`` is the most any step waits.
+        """
+        refs_before = set(self.state.calls)
         self.press_softkey("Transfer")
-        time.sleep(pause)
-        for ch in number:
-            if ch == "*":
-                code = 0x0E
-            elif ch == "#":
-                code = 0x0F
-            elif ch.isdigit():
-                code = int(ch)
-            else:
-                continue
-            handle_keypad_press(self, 1, code)
-            time.sleep(0.05)
-        time.sleep(pause)
+        consult = self.wait_new_call(refs_before, timeout=pause)
+        self.dial_digits(number)
+        if consult:
+            self.wait_call_state(consult, (3, 4, 5, 6), timeout=pause)
+        else:
+            time.sleep(pause)
         self.press_softkey("Transfer")
 
     def consulted_transfer(
@@ -656,30 +734,18 @@ class SCCPClient:
         peer_client=None,
     ) -> None:
         """Consulted transfer: Transfer -> dial -> wait for answer -> Transfer."""
-        import time
-
         self.events.call_connected.clear()
         refs_before = list(self.state.active_calls_list or [])
+        known = set(self.state.calls)
         self.press_softkey("Transfer")
-        time.sleep(pause)
-        for ch in number:
-            if ch == "*":
-                code = 0x0E
-            elif ch == "#":
-                code = 0x0F
-            elif ch.isdigit():
-                code = int(ch)
-            else:
-                continue
-            handle_keypad_press(self, 1, code)
-            time.sleep(0.05)
+        self.wait_new_call(known, timeout=pause)
+        self.dial_digits(number)
         if not self._wait_new_call_connected(
             refs_before, consult_timeout, peer_client=peer_client
         ):
             self.logger.warning("Consult transfer: consult party did not connect in time")
             return
-        time.sleep(pause)
-        consult_key = self._select_consult_call_key(refs_before)
+        consult_key = self._wait_consult_connected(refs_before, pause)
         if consult_key:
             self.state.selected_call_reference = consult_key
         self.press_softkey("Transfer")
@@ -692,28 +758,16 @@ class SCCPClient:
         consult_timeout: float = 30.0,
     ) -> None:
         """Conference: Confrn -> dial -> wait for answer -> Confrn (all parties stay)."""
-        import time
-
         self.events.call_connected.clear()
         refs_before = list(self.state.active_calls_list or [])
+        known = set(self.state.calls)
         self.press_softkey("Confrn")
-        time.sleep(pause)
-        for ch in number:
-            if ch == "*":
-                code = 0x0E
-            elif ch == "#":
-                code = 0x0F
-            elif ch.isdigit():
-                code = int(ch)
-            else:
-                continue
-            handle_keypad_press(self, 1, code)
-            time.sleep(0.05)
+        self.wait_new_call(known, timeout=pause)
+        self.dial_digits(number)
         if not self._wait_new_call_connected(refs_before, consult_timeout):
             self.logger.warning("Conference: third party did not connect in time")
             return
-        time.sleep(pause)
-        consult_key = self._select_consult_call_key(refs_before)
+        consult_key = self._wait_consult_connected(refs_before, pause)
         if consult_key:
             self.state.selected_call_reference = consult_key
         self.press_softkey("Confrn")
@@ -786,33 +840,31 @@ class SCCPClient:
 
     def _on_digit(self, ch: str):
         if not ch: return
-        with self.dtmf.lock:
+        with self.dtmf.cond:
             self.dtmf.buf.append(ch)
             self.dtmf.event.set()
+            self.dtmf.cond.notify_all()
 
     def wait_for_digit(self, timeout=None, stop_event: threading.Event | None = None, poll: float = 0.1):
         """
-        Return one digit or None on timeout. If stop_event is given, returns None early when set.
+        Return one digit or None on timeout. If stop_event is given, returns None early when set
+        (checked every ``poll`` seconds; without it the wait is purely notification-driven).
         """
-        end = None if timeout is None else (time.time() + timeout)
-        while True:
-            if stop_event is not None and stop_event.is_set():
-                return None
-            # compute next slice
-            slice_to = poll
-            if end is not None:
-                remain = end - time.time()
-                if remain <= 0:
+        end = None if timeout is None else (time.monotonic() + timeout)
+        with self.dtmf.cond:
+            while not self.dtmf.buf:
+                if stop_event is not None and stop_event.is_set():
+                    return None
+                remain = None if end is None else end - time.monotonic()
+                if remain is not None and remain <= 0:
                     return None
-                slice_to = min(slice_to, max(0.01, remain))
-            # Event wait in small slices
-            if self.dtmf.event.wait(slice_to):
-                with self.dtmf.lock:
-                    if self.dtmf.buf:
-                        ch = self.dtmf.buf.popleft()
-                        if not self.dtmf.buf:
-                            self.dtmf.event.clear()
-                        return ch
+                if stop_event is not None:
+                    remain = poll if remain is None else min(remain, poll)
+                self.dtmf.cond.wait(remain)
+            ch = self.dtmf.buf.popleft()
+            if not self.dtmf.buf:
+                self.dtmf.event.clear()
+            return ch
 
     def read_digits(self, max_len=1, timeout=10.0, terminators="#", interdigit=2.0,
                     stop_event: threading.Event | None = None):
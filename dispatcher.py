@@ -1,3 +1,4 @@
+from utils.logs import log_skinny_wire
 from utils.skinny_messages import get_message_name, register_skinny_message_name
 
 message_handlers = {}
@@ -19,8 +20,6 @@ def dispatch_message(client, msg_id, payload):
     if not client.running or msg_id is None:
         return
 
-    from utils.logs import log_skinny_wire
-
     entry = message_handlers.get(msg_id)
     name = entry["name"] if entry else get_message_name(msg_id)
     log_skinny_wire(
@@ -31,11 +30,14 @@ def dispatch_message(client, msg_id, payload):
         name,
         len(payload),
     )
-    if entry:
-        client.logger.debug(f"Dispatching {name} (msg_id=0x{msg_id:04X})")
+    if entry is None:
+        client.logger.warning("Unhandled message ID: 0x%04X / %d", msg_id, msg_id)
+        return
 
-    if entry:
-        handler = entry["handler"]
-        handler(client, payload)
+    client.logger.debug("Dispatching %s (msg_id=0x%04X)", name, msg_id)
+    # utils.dispatch_profile.DispatchProfiler, only with --profile-dispatch
+    profile = client.dispatch_profile
+    if profile is None:
+        entry["handler"](client, payload)
     else:
-        client.logger.warning(f"Unhandled message ID: 0x{msg_id:04X} / {msg_id}")
+        profile.call(msg_id, entry, client, payload)
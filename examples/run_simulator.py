@@ -4,6 +4,9 @@ Run a minimal Skinny CallManager simulator with optional TFTP.
   # Simulator TFTP on 6969 (no admin needed)
   python -m examples.run_simulator -v --tftp-port 6969
 
+  # Many phones: all sessions on one asyncio loop
+  python -m examples.run_simulator --server-mode asyncio --backlog 1024
+
   # Optional admin terminal — phones still hit port 69
   python -m simulator.tftp_relay
 
@@ -22,6 +25,7 @@ import logging
 import signal
 import sys
 
+from simulator.call_hub import INTERDIGIT_TIMEOUT_SEC
 from simulator.server import SkinnySimulator
 from simulator.tftp_service import PRIVILEGED_TFTP_PORT
 from utils.logs import add_logging_cli_args, configure_logging_from_verbose
@@ -31,6 +35,19 @@ def main() -> None:
     parser = argparse.ArgumentParser(description="Minimal Skinny (SCCP) CallManager simulator")
     parser.add_argument("--host", default="0.0.0.0", help="Bind address for Skinny + TFTP (default: all interfaces)")
     parser.add_argument("--port", type=int, default=2000, help="Skinny TCP port (default: 2000)")
+    parser.add_argument(
+        "--server-mode",
+        choices=("threads", "asyncio"),
+        default="threads",
+        help="threads=one thread per phone, asyncio=all sessions on one event loop (default: threads)",
+    )
+    parser.add_argument(
+        "--backlog",
+        type=int,
+        default=128,
+        metavar="N",
+        help="TCP listen backlog; raise for large registration storms (default: 128)",
+    )
     parser.add_argument("--dn-start", type=int, default=1000, help="First auto-assigned DN (default: 1000)")
     parser.add_argument("--name", default="SkinnySim", help="Server name sent in ConfigStatRes")
     parser.add_argument(
@@ -103,12 +120,32 @@ def main() -> None:
         metavar="SEC",
         help="Play test tone this long before loopback starts (default: 2, 0=off)",
     )
+    parser.add_argument(
+        "--rtp-sim-rtcp",
+        type=float,
+        default=0.0,
+        metavar="SEC",
+        help="Run RTCP SR/RR on every sim RTP leg (port + 1) every SEC seconds (default: 0=off; RFC 3550 uses 5)",
+    )
     parser.add_argument(
         "--ivr-dn",
         default=None,
         metavar="DN",
         help="Virtual auto-answer IVR DN (e.g. 9999); single phone can dial for sim RTP tone/loopback",
     )
+    parser.add_argument(
+        "--dial-plan",
+        default=None,
+        metavar="FILE",
+        help="Route patterns (one per line: pattern [target=DN strip=N prefix=D discard=predot])",
+    )
+    parser.add_argument(
+        "--interdigit-timeout",
+        type=float,
+        default=INTERDIGIT_TIMEOUT_SEC,
+        metavar="SEC",
+        help="Route a complete but ambiguous number after this idle time (default: 15)",
+    )
     parser.add_argument(
         "--admin-port",
         type=int,
@@ -149,8 +186,13 @@ def main() -> None:
         rtp_sim_loopback_delay_ms=args.rtp_sim_loopback_delay,
         rtp_sim_loopback_gain_db=args.rtp_sim_loopback_gain,
         rtp_sim_loopback_preamble_sec=args.rtp_sim_loopback_preamble,
+        rtp_sim_rtcp_interval=args.rtp_sim_rtcp,
         ivr_dn=args.ivr_dn,
+        dial_plan=args.dial_plan,
+        interdigit_timeout=args.interdigit_timeout,
         admin_port=0 if args.no_admin else args.admin_port,
+        server_mode=args.server_mode,
+        backlog=args.backlog,
     )
 
     for mac in args.provision:
@@ -5,6 +5,7 @@ import datetime
 from dispatcher import register_handler
 from messages.generic import get_skinny_message, send_skinny_message, KEY_SET_INDEX_NAMES, SOFTKEY_TEMPLATE_INDEXES, SOFTKEY_INFO_INDEXES, BUTTON_TYPES, Buf
 from utils.client import clean_bytes
+from utils import skinny_schema as schema
 import logging
 logger = logging.getLogger(__name__)
 
@@ -270,7 +271,10 @@ def parse_softkey_set(client, payload):
 
 @register_handler(0x0110, "SelectSoftKeys")
 def parse_select_softkeys(client, payload):
-    lineInstance, callReference, softKeySetIndex, validKeyMask = struct.unpack("<IIII", payload[:16])
+    msg = schema.SELECT_SOFT_KEYS.decode(payload)
+    lineInstance, callReference, softKeySetIndex, validKeyMask = (
+        msg.line_instance, msg.call_reference, msg.softkey_set_index, msg.valid_key_mask
+    )
     softKeySetIndexName = KEY_SET_INDEX_NAMES.get(softKeySetIndex, "UNKNOWN")
 
     # client.state.selected_softkeys[str(lineInstance)] = {"call_reference": callReference, "softkeyset_index": softKeySetIndex, "softkeyset_index_name": softKeySetIndexName, "validkey_mask": validKeyMask, "validkey_mask_str": f"{validKeyMask:016b}"}
@@ -285,11 +289,11 @@ def parse_select_softkeys(client, payload):
 
 @register_handler(0x0112, "DisplayPromptStatus")
 def parse_display_prompt_status(client, payload):
-    buf = Buf(payload)
-    timeout = buf.read_u32()
-    prompt_status = buf.read_cstring(32)
-    line_instance = buf.read_u32()
-    call_reference = buf.read_u32()
+    msg = schema.DISPLAY_PROMPT_STATUS.decode(payload)
+    timeout = msg.timeout
+    prompt_status = msg.prompt
+    line_instance = msg.line_instance
+    call_reference = msg.call_reference
 
     client.state.update_prompt(prompt_status, timeout, line_instance, call_reference)
 
@@ -300,7 +304,8 @@ def parse_display_prompt_status(client, payload):
 
 @register_handler(0x0113, "ClearPromptStatus")
 def parse_clear_prompt_status(client, payload):
-    line_instance, call_reference = struct.unpack("<II", payload)
+    msg = schema.CLEAR_PROMPT_STATUS.decode(payload)
+    line_instance, call_reference = msg.line_instance, msg.call_reference
 
     client.state.update_prompt("", 0, line_instance, call_reference)
 
@@ -315,15 +320,12 @@ def parse_clear_prompt_status(client, payload):
 
 @register_handler(0x0093, "ConfigStatRes")
 def parse_config_stat(client, payload):
-    device_name_bytes = payload[:16]                                                            # 16 bytes
-    reserved, instance = struct.unpack("<II", payload[16:24])                            # 4 bytes, 4 bytes
-    user_name_bytes = payload[24:64]                                                            # 40 bytes
-    server_name_bytes = payload[64:104]                                                         # 40 bytes
-    number_of_lines, number_of_speed_dials = struct.unpack("<II", payload[104:112])      # 4 bytes, 4 bytes
-
-    device_name = device_name_bytes.decode("ascii", errors="ignore").rstrip('\x00')
-    user_name = user_name_bytes.decode("ascii", errors="ignore").rstrip('\x00')
-    server_name = server_name_bytes.decode("ascii", errors="ignore").rstrip('\x00')
+    msg = schema.CONFIG_STAT_RES.decode(payload)
+    instance = msg.instance
+    user_name = msg.user_name
+    server_name = msg.server_name
+    number_of_lines = msg.number_of_lines
+    number_of_speed_dials = msg.number_of_speed_dials
 
     client.state.line_count = int(number_of_lines)
     client.state.speed_dial_count = int(number_of_speed_dials)
@@ -339,24 +341,14 @@ def parse_config_stat(client, payload):
 
 @register_handler(0x0092, "LineStatRes")
 def parse_line_stat(client, payload):
-    buf = Buf(payload)
-
-    line_number = buf.read_u32()
-    line_dir_number = buf.read_cstring(24)
+    # fqdn / label / display options are missing in CM 2.01.
+    msg = schema.LINE_STAT_RES.decode(payload)
 
-    line_fqdn = ""
-    line_text_label = ""
-    line_display_options = 0
-
-    # Present in later CallManager versions, missing in CM 2.01.
-    if buf.remaining() >= 40:
-        line_fqdn = buf.read_cstring(40)
-
-    if buf.remaining() >= 40:
-        line_text_label = buf.read_cstring(40)
-
-    if buf.remaining() >= 4:
-        line_display_options = buf.read_u32(0)
+    line_number = msg.line_number
+    line_dir_number = msg.line_dir_number
+    line_fqdn = msg.line_fqdn
+    line_text_label = msg.line_text_label
+    line_display_options = msg.line_display_options
 
     client.state.lines[str(line_number)] = {
         "line_dir_number": line_dir_number,
@@ -374,16 +366,13 @@ def parse_line_stat(client, payload):
 
 @register_handler(0x0090, "ForwardStatRes")
 def parse_forward_stat(client, payload):
-    active_forward, line_number, forward_all_active = struct.unpack("<III", payload[:12])   # 4 bytes, 4 bytes, 4 bytes
-    forward_all_dir_num_bytes = payload[12:36]                                                     # 24 bytes
-    forward_busy_active = struct.unpack("<I", payload[36:40])[0]                            # 4 bytes
-    forward_busy_dir_num_bytes = payload[40:64]                                                    # 24 bytes
-    forward_no_answer_active = struct.unpack("<I", payload[64:68])[0]                       # 4 bytes
-    forward_no_answer_dir_num_bytes = payload[68:92]                                               # 24 bytes
-
-    forward_all_dir_num = forward_all_dir_num_bytes.decode("ascii", errors="ignore").rstrip('\x00')
-    forward_busy_dir_num = forward_busy_dir_num_bytes.decode("ascii", errors="ignore").rstrip('\x00')
-    forward_no_answer_dir_num = forward_no_answer_dir_num_bytes.decode("ascii", errors="ignore").rstrip('\x00')
+    msg = schema.FORWARD_STAT_RES.decode(payload)
+    active_forward, line_number, forward_all_active = msg.active_forward, msg.line_number, msg.forward_all_active
+    forward_all_dir_num = msg.forward_all_number
+    forward_busy_active = msg.forward_busy_active
+    forward_busy_dir_num = msg.forward_busy_number
+    forward_no_answer_active = msg.forward_no_answer_active
+    forward_no_answer_dir_num = msg.forward_no_answer_number
 
     client.state.active_forward = active_forward
     client.state.call_forward[str(line_number)] = {"forward_all_active": forward_all_active, "forward_all_dirnum": forward_all_dir_num, "forward_busy_active": forward_busy_active, "forward_busy_dirnum": forward_busy_dir_num, "forward_no_answer_active": forward_no_answer_active, "forward_no_answer_dirnum": forward_no_answer_dir_num}
@@ -420,7 +409,10 @@ def parse_speed_dial_stat(client, payload):
 
 @register_handler(0x0094, "TimeDateRes")
 def parse_time_date(client, payload):
-    w_year, w_month, w_day_of_week, w_day, w_hour, w_minute, w_second, w_millisecond, w_systemtime = struct.unpack("<IIIIIIIII", payload)
+    msg = schema.TIME_DATE_RES.decode(payload)
+    w_year, w_month, w_day_of_week, w_day = msg.year, msg.month, msg.day_of_week, msg.day
+    w_hour, w_minute, w_second, w_millisecond = msg.hour, msg.minute, msg.second, msg.millisecond
+    w_systemtime = msg.system_time
     day_name = calendar.day_name[(w_day_of_week + 6) % 7]
 
     try:
@@ -1,5 +1,7 @@
 import struct
 from utils.skinny_messages import get_message_name
+from utils import call_trace
+from utils import skinny_schema as schema
 import os
 import string
 import datetime
@@ -434,32 +436,36 @@ def handle_softkey_press(client, line_number, softkey_id, call_reference=0):
     logger.info(
         f"[SEND] SoftKeyEvent lineNumber={line_number} callReference={wire_ref} softKeyId={softkey_id}"
     )
-    send_skinny_message(client, 0x0026, struct.pack("<III", softkey_id, line_number, wire_ref), silent=True)
+    send_skinny_message(client, 0x0026, schema.SOFTKEY_EVENT.pack(softkey_id, line_number, wire_ref), silent=True)
 
 
 def handle_keypad_press(client, line_number, keypad_btn, call_reference=0):
     from utils.call_management import skinny_wire_call_ref
 
     client.play_beep()
+    call_trace.mark(client, "digit", call_reference)
     wire_ref = skinny_wire_call_ref(client, call_reference)
     logger.info(
         f"[SEND] KeypadButton lineNumber={line_number} callReference={wire_ref} keyPadBtn={keypad_btn}"
     )
     send_skinny_message(
-        client, 0x0003, struct.pack("<III", int(keypad_btn), line_number, wire_ref), silent=True
+        client, 0x0003, schema.KEYPAD_BUTTON.pack(int(keypad_btn), line_number, wire_ref), silent=True
     )
 
 
 def handle_button_press(client, stimulus_type, line_instance):
     logger.info(f"[SEND] Stimulus stimulusType={stimulus_type} lineInstance={line_instance}")
     # Send "Stimulus" message
-    send_skinny_message(client, 0x0005, struct.pack("<II", stimulus_type, line_instance), silent=True)
+    send_skinny_message(client, 0x0005, schema.STIMULUS.pack(stimulus_type, line_instance), silent=True)
     if stimulus_type == 9:
         # Send "OffHook" message
         send_offhook(client)
 
 
 def send_offhook(client):
+    trace = call_trace.tracer(client)
+    if trace is not None:
+        trace.start(answer_ringing=True)
     logger.info(f"[SEND] OffHook")
     # Send "OffHook" message
     send_skinny_message(client, 0x0006, silent=True)
@@ -1,7 +1,8 @@
+import functools
 import struct
 import time
 from dispatcher import register_handler
-from messages.generic import STIMULUS_NAMES, TONE_NAMES, TONE_OUTPUT_DIRECTION_NAMES, CALL_TYPE_NAMES, CALL_STAT_STATE_NAMES, clean_bytes, send_skinny_message, Buf
+from messages.generic import STIMULUS_NAMES, TONE_NAMES, TONE_OUTPUT_DIRECTION_NAMES, CALL_TYPE_NAMES, CALL_STAT_STATE_NAMES, clean_bytes, send_skinny_message
 from utils.call_management import (
     CALL_STATE_NAMES,
     apply_call_state_from_skinny,
@@ -15,14 +16,37 @@ from utils.call_management import (
     update_call_state,
 )
 from utils.client import get_local_ip, ip_to_int, _keypad_code_to_char
+from utils import skinny_schema as schema
 from audio_worker import RTPReceiver, RTPSender, wire_rtp_loopback, socket
 from utils.rtp_record import RTPRecorder, rtp_record_base_path
 from utils.media_codecs import codec_label, lookup_skinny_compression, resolve_rtp_payload_type
 from utils.rtp_stats import RTPStats, RTPStatsMonitor
+from utils.rtcp import RTCPSession
+from utils import call_trace
 import logging
 logger = logging.getLogger(__name__)
 
 
+# StartTone ids that mean "dial tone" for call-setup tracing.
+_DIAL_TONES = frozenset({0x20, 0x21, 0x22, 0x33})
+# CallState -> call-setup milestone (utils/call_trace.py).
+_TRACE_CALL_STATES = {3: "ring_out", 5: "connected"}
+
+
+def _trace_call_state(client, call_state: int, call_ref) -> None:
+    trace = call_trace.tracer(client)
+    if trace is None:
+        return
+    if call_state == 1:
+        trace.bind(call_ref)
+    elif call_state == 4:
+        trace.ring_in(call_ref)
+    elif call_state == 2:
+        trace.finish(call_ref)
+    elif call_state in _TRACE_CALL_STATES:
+        trace.mark(_TRACE_CALL_STATES[call_state], call_ref)
+
+
 def _truthy(val) -> bool:
     return str(val).lower() in ("1", "true", "yes", "on")
 
@@ -110,7 +134,13 @@ def _start_rtp_recorder(client, call_ref: int) -> RTPRecorder | None:
     if existing is not None and not existing.closed:
         return existing
     base = rtp_record_base_path(client.state, call_ref)
-    rec = RTPRecorder(base, sr=8000, log=client.logger)
+    rec = RTPRecorder(
+        base,
+        sr=8000,
+        fmt=getattr(client.state, "rtp_record_format", "pcm"),
+        stereo=bool(getattr(client.state, "rtp_record_stereo", False)),
+        log=client.logger,
+    )
     client.state._rtp_recorder = rec
     client.logger.info("[RTP record] started base=%s", base)
     return rec
@@ -191,6 +221,34 @@ def _stop_rtp_stats_monitor(client, *, final_log: bool = True) -> None:
     client.state._rtp_stats = None
 
 
+def _start_rtcp(client, rx: RTPReceiver) -> None:
+    interval = float(getattr(client.state, "rtcp_interval", 0.0) or 0.0)
+    if interval <= 0:
+        return
+    _stop_rtcp(client)
+    try:
+        rtcp = RTCPSession(
+            rx,
+            cname=f"{client.state.device_name}@{get_local_ip(client.state.server)}",
+            interval=interval,
+            log=client.logger,
+        )
+    except OSError as exc:
+        client.logger.warning("[RTCP] port %s unavailable (%s); continuing without RTCP", rx.port + 1, exc)
+        return
+    rtcp.start()
+    client.state._rtcp = rtcp
+
+
+def _stop_rtcp(client) -> None:
+    rtcp = getattr(client.state, "_rtcp", None)
+    if rtcp is None:
+        return
+    client.state._rtcp = None
+    rtcp.stop()
+    client.logger.info("[RTCP] %s", rtcp.summary())
+
+
 def _teardown_local_media(client) -> None:
     """Stop client RTP legs when the call ends without explicit StopMedia."""
     tx = getattr(client.state, "_rtp_tx", None)
@@ -205,6 +263,7 @@ def _teardown_local_media(client) -> None:
     client.state._rtp_echo_source = None
     _stop_rtp_recorder(client)
     _stop_rtp_stats_monitor(client)
+    _stop_rtcp(client)
     client.state.media_active = False
     client.events.media_started.clear()
 
@@ -246,11 +305,11 @@ def _configure_rtp_sender(client, tx: RTPSender) -> None:
 
 @register_handler(0x0085, "SetRinger")
 def parse_set_ringer(client, payload):
-    buf = Buf(payload)
-    ring_mode = buf.read_u32()
-    ring_duration = buf.read_u32(0)                       # Missing in CallManager 3.1
-    line_instance = buf.read_u32(0)                       # Missing in CallManager 3.1
-    call_reference = buf.read_u32(0)                      # Missing in CallManager 3.1
+    msg = schema.SET_RINGER.decode(payload)
+    ring_mode = msg.ring_mode
+    ring_duration = msg.ring_duration                     # Missing in CallManager 3.1
+    line_instance = msg.line_instance                     # Missing in CallManager 3.1
+    call_reference = msg.call_reference                   # Missing in CallManager 3.1
 
     # ring_mode, ring_duration, line_instance, call_reference = struct.unpack("<IIII", payload)
 
@@ -286,7 +345,7 @@ def parse_set_ringer(client, payload):
 
 @register_handler(0x0088, "SetSpeakerMode")
 def parse_set_speaker_mode(client, payload):
-    speaker_mode = struct.unpack("<I", payload)[0]
+    speaker_mode = schema.SET_SPEAKER_MODE.decode(payload).speaker_mode
 
     client.state.speaker_mode = speaker_mode
     # logging.info(f"[RECV] SetSpeakerMode speakerMode: {speaker_mode}")
@@ -295,7 +354,8 @@ def parse_set_speaker_mode(client, payload):
 
 @register_handler(0x0086, "SetLamp")
 def parse_set_lamp(client, payload):
-    stimulus, stimulus_instance, lamp_mode = struct.unpack("<III", payload)
+    msg = schema.SET_LAMP.decode(payload)
+    stimulus, stimulus_instance, lamp_mode = msg.stimulus, msg.stimulus_instance, msg.lamp_mode
     stimulus_name = STIMULUS_NAMES.get(stimulus, "UNKNOWN")
 
     client.state.stimulus = stimulus
@@ -314,14 +374,14 @@ def parse_set_lamp(client, payload):
 
 @register_handler(0x0111, "CallState")
 def parse_call_state(client, payload):
-    buf = Buf(payload)
+    msg = schema.CALL_STATE.decode(payload)
 
-    call_state = buf.read_u32()
-    line_instance = buf.read_u32()
-    call_reference = buf.read_u32()
-    privacy = buf.read_u32(0) if buf.remaining() >= 4 else 0
-    precedence_level = buf.read_u32(0) if buf.remaining() >= 4 else 0
-    precedence_domain = buf.read_u32(0) if buf.remaining() >= 4 else 0
+    call_state = msg.call_state
+    line_instance = msg.line_instance
+    call_reference = msg.call_reference
+    privacy = msg.privacy
+    precedence_level = msg.precedence_level
+    precedence_domain = msg.precedence_domain
 
     key = apply_call_state_from_skinny(
         client,
@@ -330,6 +390,7 @@ def parse_call_state(client, payload):
         line_instance,
         source="CallState",
     )
+    _trace_call_state(client, call_state, call_reference or key)
 
     call = client.state.calls.get(key)
     if call:
@@ -349,7 +410,7 @@ def parse_call_state(client, payload):
 
 @register_handler(0x0116, "ActivateCallPlane")
 def parse_activate_callplane(client, payload):
-    line_instance = struct.unpack("<I", payload)[0]
+    line_instance = schema.ACTIVATE_CALL_PLANE.decode(payload).line_instance
 
     client.state.active_call = True
     client.state.active_call_line_instance = line_instance
@@ -370,16 +431,19 @@ def end_local_call(client, source: str = "local", *, call_ref: int | None = None
 
 @register_handler(0x0082, "StartTone")
 def parse_start_tone(client, payload):
-    buf = Buf(payload)
-    tone = buf.read_u32()
-    tone_output_direction = buf.read_u32(0)                      # Missing in CallManager 3.1
-    line_instance = buf.read_u32(0)                              # Missing in CallManager 3.1
-    call_reference = buf.read_u32(0)                             # Missing in CallManager 3.1
+    msg = schema.START_TONE.decode(payload)
+    tone = msg.tone
+    tone_output_direction = msg.tone_output_direction           # Missing in CallManager 3.1
+    line_instance = msg.line_instance                           # Missing in CallManager 3.1
+    call_reference = msg.call_reference                         # Missing in CallManager 3.1
 
     # tone, tone_output_direction, line_instance, call_reference = struct.unpack("<IIII", payload)
     tone_name = TONE_NAMES.get(tone, "UNKNOWN")
     tone_output_direction_name = TONE_OUTPUT_DIRECTION_NAMES.get(tone_output_direction, "UNKNOWN")
 
+    if tone in _DIAL_TONES:
+        call_trace.mark(client, "dial_tone", call_reference)
+
     client.state.play_tones = {"tone": tone, "tone_name": tone_name, "tone_output_direction": tone_output_direction, "tone_output_direction_name": tone_output_direction_name, "call_reference": call_reference, "line_instance": line_instance}
     if client.state.enable_audio:
         client.audio.set_tone(line_instance, tone, gain_db=client.state.tone_volume)
@@ -395,9 +459,9 @@ def parse_start_tone(client, payload):
 
 @register_handler(0x0083, "StopTone")
 def parse_stop_tone(client, payload):
-    buf = Buf(payload)
-    line_instance = buf.read_u32(0)                       # Missing in CallManager 3.1
-    call_reference = buf.read_u32(0)                      # Missing in CallManager 3.1
+    msg = schema.STOP_TONE.decode(payload)
+    line_instance = msg.line_instance                     # Missing in CallManager 3.1
+    call_reference = msg.call_reference                   # Missing in CallManager 3.1
 
     # line_instance, call_reference = struct.unpack("<II", payload)
 
@@ -415,69 +479,29 @@ def parse_stop_tone(client, payload):
 
 @register_handler(0x008F, "CallInfo")
 def parse_call_info(client, payload):
-    buf = Buf(payload)
-
-    calling_party_name = buf.read_cstring(40, "")
-    calling_party = buf.read_cstring(24, "")
-    called_party_name = buf.read_cstring(40, "")
-    called_party = buf.read_cstring(24, "")
-
-    line_instance = 0
-    call_reference = 0
-    call_type = 0
-
-    original_called_party_name = ""
-    original_called_party = ""
-    last_redirecting_party_name = ""
-    last_redirecting_party = ""
-    original_cpdn_redirect_reason = 0
-    last_redirecting_reason = 0
-    cgpn_voicemail_box = ""
-    cdpn_voicemail_box = ""
-    original_cdpn_voicemail_box = ""
-    last_redirecting_voicemail_box = ""
-    call_instance = 0
-    call_security_status = 0
-    party_pi_restriction_bits = 0
-
-    # CM 3.x/4.x+ extended CallInfo fields.
-    if buf.remaining() >= 12:
-        line_instance = buf.read_u32()
-        call_reference = buf.read_u32()
-        call_type = buf.read_u32()
-
-    if buf.remaining() >= 40:
-        original_called_party_name = buf.read_cstring(40, "")
-
-    if buf.remaining() >= 24:
-        original_called_party = buf.read_cstring(24, "")
-
-    if buf.remaining() >= 40:
-        last_redirecting_party_name = buf.read_cstring(40, "")
-
-    if buf.remaining() >= 24:
-        last_redirecting_party = buf.read_cstring(24, "")
-
-    if buf.remaining() >= 8:
-        original_cpdn_redirect_reason = buf.read_u32()
-        last_redirecting_reason = buf.read_u32()
-
-    if buf.remaining() >= 24:
-        cgpn_voicemail_box = buf.read_cstring(24, "")
-
-    if buf.remaining() >= 24:
-        cdpn_voicemail_box = buf.read_cstring(24, "")
-
-    if buf.remaining() >= 24:
-        original_cdpn_voicemail_box = buf.read_cstring(24, "")
-
-    if buf.remaining() >= 24:
-        last_redirecting_voicemail_box = buf.read_cstring(24, "")
-
-    if buf.remaining() >= 12:
-        call_instance = buf.read_u32()
-        call_security_status = buf.read_u32()
-        party_pi_restriction_bits = buf.read_u32()
+    # CM 2.x sends only the party fields; CM 3.x/4.x+ append the extended ones.
+    msg = schema.CALL_INFO.decode(payload)
+
+    calling_party_name = msg.calling_party_name
+    calling_party = msg.calling_party
+    called_party_name = msg.called_party_name
+    called_party = msg.called_party
+    line_instance = msg.line_instance
+    call_reference = msg.call_reference
+    call_type = msg.call_type
+    original_called_party_name = msg.original_called_party_name
+    original_called_party = msg.original_called_party
+    last_redirecting_party_name = msg.last_redirecting_party_name
+    last_redirecting_party = msg.last_redirecting_party
+    original_cpdn_redirect_reason = msg.original_cdpn_redirect_reason
+    last_redirecting_reason = msg.last_redirecting_reason
+    cgpn_voicemail_box = msg.cgpn_voicemail_box
+    cdpn_voicemail_box = msg.cdpn_voicemail_box
+    original_cdpn_voicemail_box = msg.original_cdpn_voicemail_box
+    last_redirecting_voicemail_box = msg.last_redirecting_voicemail_box
+    call_instance = msg.call_instance
+    call_security_status = msg.call_security_status
+    party_pi_restriction_bits = msg.party_pi_restriction_bits
 
     call_type_name = CALL_TYPE_NAMES.get(call_type, "UNKNOWN")
     binary_flags = format(party_pi_restriction_bits, "032b")
@@ -517,9 +541,6 @@ def parse_call_info(client, payload):
         "party_pi_restriction_bits": binary_flags,
     }
 
-    if key not in client.state.calls_list:
-        client.state.calls_list.append(key)
-
     remote_name = calling_party_name or called_party_name
     remote_number = calling_party or called_party
 
@@ -600,10 +621,9 @@ def parse_call_info(client, payload):
 
 @register_handler(0x011D, "DialedNumber")
 def parse_dialed_number(client, payload):
-    dialed_number_bytes = payload[:24]                                                       # 24 bytes
-    line_instance, call_reference = struct.unpack("<II", payload[24:])
-
-    dialed_number = dialed_number_bytes.decode("ascii", errors="ignore").rstrip('\x00')
+    msg = schema.DIALED_NUMBER.decode(payload)
+    dialed_number = msg.dialed_number
+    line_instance, call_reference = msg.line_instance, msg.call_reference
 
     client.state.dialed_number = {"line_instance": line_instance, "dialed_number": dialed_number, "call_reference": call_reference}
 
@@ -618,31 +638,28 @@ def parse_dialed_number(client, payload):
 
 @register_handler(0x008A, "StartMediaTransmission")
 def parse_start_media_transmission(client, payload):
-    buf = Buf(payload)
-
-    conference_id = buf.read_u32(0)
-    pass_through_party_id = buf.read_u32(0)
-    remote_ip_addr = buf.read_u32(0)
-    remote_port_number = buf.read_u32(0)
-    milli_second_packet_size = buf.read_u32(20)
-    compression_type = buf.read_u32(0)
-    precedence_value = buf.read_u32(0)
-    ss_value = buf.read_u32(0)
-    max_frames_per_packet = buf.read_u16(0)
-    padding = buf.read_u16(0)
+    msg = schema.START_MEDIA_TRANSMISSION.decode(payload)
+
+    conference_id = msg.conference_id
+    pass_through_party_id = msg.pass_through_party_id
+    remote_ip_addr = msg.remote_ip
+    remote_port_number = msg.remote_port
+    milli_second_packet_size = msg.ms_packet_size
+    compression_type = msg.compression_type
+    precedence_value = msg.precedence_value
+    ss_value = msg.ss_value
+    max_frames_per_packet = msg.max_frames_per_packet
+    padding = msg.padding
 
     # Present in later CM versions, missing in CM 2.01.
-    g723_bitrate = buf.read_u32(0) if buf.remaining() >= 4 else 0
-    call_reference = buf.read_u32(0) if buf.remaining() >= 4 else 0
-    algorithm_id = buf.read_u32(0) if buf.remaining() >= 4 else 0
-    key_len = buf.read_u16(0) if buf.remaining() >= 2 else 0
-    salt_len = buf.read_u16(0) if buf.remaining() >= 2 else 0
-
-    key_bytes = buf.read_bytes(16) if buf.remaining() >= 16 else b""
-    salt_bytes = buf.read_bytes(16) if buf.remaining() >= 16 else b""
-
-    key = clean_bytes(key_bytes)
-    salt = clean_bytes(salt_bytes)
+    g723_bitrate = msg.g723_bitrate
+    call_reference = msg.call_reference
+    algorithm_id = msg.algorithm_id
+    key_len = msg.key_len
+    salt_len = msg.salt_len
+
+    key = clean_bytes(msg.key)
+    salt = clean_bytes(msg.salt)
     # logger.info(f"[RECV] StartMediaTransmission conferenceId: {conference_id}, passThroughPartyId: {pass_through_party_id}, remoteIpAddr: {remote_ip_addr}, remotePortNumber: {remote_port_number}, milliSecondPacketSize: {milli_second_packet_size}, compressionType: {compression_type}, precedenceValue: {precedence_value}, ssValue: {ss_value}, maxFramesPerPacket: {max_frames_per_packet}, padding: {padding}, g723Bitrate: {g723_bitrate}, callReference: {call_reference}, algorithmId: {algorithm_id}, keyLen: {key_len}, saltLen: {salt_len}, key: {key}, salt: {salt}")
 
     key, call = resolve_active_call_key(client, call_reference)
@@ -655,6 +672,7 @@ def parse_start_media_transmission(client, payload):
             or (client.state.active_calls_list[-1] if client.state.active_calls_list else 0)
         )
 
+    call_trace.mark(client, "start_media", call_reference)
     client.state.media_active = True
     client.events.media_started.set()
 
@@ -725,6 +743,9 @@ def parse_start_media_transmission(client, payload):
         logger.warning("RTP TX left on silence (codec not supported for encoding)")
 
     client.state._rtp_tx = tx
+    rtcp = getattr(client.state, "_rtcp", None)
+    if rtcp is not None:
+        rtcp.set_sender(tx)
     _attach_recorder_to_media(client, call_reference)
     _attach_stats_to_media(client)
     _start_rtp_stats_monitor(client)
@@ -746,16 +767,19 @@ def parse_start_media_transmission(client, payload):
 
 @register_handler(0x008B, "StopMediaTransmission")
 def parse_stop_media_transmission(client, payload):
-    buf = Buf(payload)
+    msg = schema.STOP_MEDIA_TRANSMISSION.decode(payload)
 
-    conference_id = buf.read_u32(0)
-    pass_through_party_id = buf.read_u32(0) if buf.remaining() >= 4 else 0
-    call_reference = buf.read_u32(0) if buf.remaining() >= 4 else 0
+    conference_id = msg.conference_id
+    pass_through_party_id = msg.pass_through_party_id
+    call_reference = msg.call_reference
 
     tx = client.state._rtp_tx or None
     if tx:
         tx.stop()
     client.state._rtp_tx = None
+    rtcp = getattr(client.state, "_rtcp", None)
+    if rtcp is not None:
+        rtcp.set_sender(None)  # receive-only until media restarts: RR instead of SR
     rx = client.state._rtp_rx or None
     if rx:
         rx.detach_echo()
@@ -803,11 +827,11 @@ def parse_stop_media_transmission(client, payload):
 
 @register_handler(0x008C, "StartMediaReception")
 def parse_start_media_reception(client, payload):    # Wireshark dissector doesn't name this message; making an assumption here
-    buf = Buf(payload)
+    msg = schema.START_MEDIA_RECEPTION.decode(payload)
 
-    conference_id = buf.read_u32(0)
-    pass_through_party_id = buf.read_u32(0) if buf.remaining() >= 4 else 0
-    call_reference = buf.read_u32(0) if buf.remaining() >= 4 else 0
+    conference_id = msg.conference_id
+    pass_through_party_id = msg.pass_through_party_id
+    call_reference = msg.call_reference
 
     infer_resumed_on_media_start(
         client,
@@ -825,11 +849,11 @@ def parse_start_media_reception(client, payload):    # Wireshark dissector doesn
 
 @register_handler(0x008D, "StopMediaReception")
 def parse_stop_media_reception(client, payload):    # Wireshark dissector doesn't name this message; making an assumption here
-    buf = Buf(payload)
+    msg = schema.STOP_MEDIA_RECEPTION.decode(payload)
 
-    conference_id = buf.read_u32(0)
-    pass_through_party_id = buf.read_u32(0) if buf.remaining() >= 4 else 0
-    call_reference = buf.read_u32(0) if buf.remaining() >= 4 else 0
+    conference_id = msg.conference_id
+    pass_through_party_id = msg.pass_through_party_id
+    call_reference = msg.call_reference
 
     client.state.media_active = False
 
@@ -843,24 +867,21 @@ def parse_stop_media_reception(client, payload):    # Wireshark dissector doesn'
 
 @register_handler(0x0105, "OpenReceiveChannel")
 def parse_open_receive_channel(client, payload):
-    buf = Buf(payload)
-
-    conference_id = buf.read_u32(0)
-    pass_through_party_id = buf.read_u32(0)
-    milli_second_packet_size = buf.read_u32(20)
-    compression_type = buf.read_u32(0)
-    ec_value = buf.read_u32(0)
-    g723_bitrate = buf.read_u32(0)
-    call_reference = buf.read_u32(0) if buf.remaining() >= 4 else 0
-    algorithm_id = buf.read_u32(0) if buf.remaining() >= 4 else 0
-    key_len = buf.read_u16(0) if buf.remaining() >= 2 else 0
-    salt_len = buf.read_u16(0) if buf.remaining() >= 2 else 0
-
-    key_bytes = buf.read_bytes(16) if buf.remaining() >= 16 else b""
-    salt_bytes = buf.read_bytes(16) if buf.remaining() >= 16 else b""
-
-    key = clean_bytes(key_bytes)
-    salt = clean_bytes(salt_bytes)
+    msg = schema.OPEN_RECEIVE_CHANNEL.decode(payload)
+
+    conference_id = msg.conference_id
+    pass_through_party_id = msg.pass_through_party_id
+    milli_second_packet_size = msg.ms_packet_size
+    compression_type = msg.compression_type
+    ec_value = msg.ec_value
+    g723_bitrate = msg.g723_bitrate
+    call_reference = msg.call_reference
+    algorithm_id = msg.algorithm_id
+    key_len = msg.key_len
+    salt_len = msg.salt_len
+
+    key = clean_bytes(msg.key)
+    salt = clean_bytes(msg.salt)
 
     if not call_reference:
         from utils.call_management import skinny_wire_call_ref
@@ -874,6 +895,7 @@ def parse_open_receive_channel(client, payload):
     if not call_reference:
         call_reference = int(pass_through_party_id or 0)
 
+    call_trace.mark(client, "open_receive_channel", call_reference)
     logger.info(f"[RECV] OpenReceiveChannel")
 
     send_open_receive_channel_ack(
@@ -894,33 +916,32 @@ def send_open_receive_channel_ack(client, payload):
         source_id="rx",
         log=client.logger,
     )
+    call_reference = int(payload["callReference"] or 0)
+    trace = call_trace.tracer(client)
+    if trace is not None:
+        rx.on_first_packet = functools.partial(trace.mark, "first_rtp", call_reference)
     rx.start()
     client.state._rtp_rx = rx
     port_number = rx.port
 
-    call_reference = int(payload["callReference"] or 0)
     rec = _start_rtp_recorder(client, call_reference)
     if rec is not None:
         rx.attach_recorder(rec)
     stats = _ensure_rtp_stats(client)
     if stats is not None:
         rx.attach_stats(stats)
+    _start_rtcp(client, rx)
 
     call_manager_host_ip = get_local_ip(client.state.server)
     station_ip = ip_to_int(call_manager_host_ip)  # still in int form
     pass_through_party_id = int(payload["passThroughPartyId"] or 0)
-    station_ip_packed = struct.pack("!I", station_ip)  # Big-endian (network byte order)
 
-    data = struct.pack(
-        "<I",
-        media_reception_status
-    )
-    data += station_ip_packed
-    data += struct.pack(
-        "<III",
+    data = schema.OPEN_RECEIVE_CHANNEL_ACK.pack(
+        media_reception_status,
+        station_ip,  # sent in network byte order
         port_number,
         pass_through_party_id,
-        call_reference
+        call_reference,
     )
 
     # Call Trace Logging
@@ -941,10 +962,10 @@ def send_open_receive_channel_ack(client, payload):
 
 @register_handler(0x0106, "CloseReceiveChannel")
 def parse_close_receive_channel(client, payload):
-    buf = Buf(payload)
-    conference_id = buf.read_u32(0)
-    pass_through_party_id = buf.read_u32(0) if buf.remaining() >= 4 else 0
-    call_reference = buf.read_u32(0) if buf.remaining() >= 4 else 0
+    msg = schema.CLOSE_RECEIVE_CHANNEL.decode(payload)
+    conference_id = msg.conference_id
+    pass_through_party_id = msg.pass_through_party_id
+    call_reference = msg.call_reference
 
     # Close/clear RTP Receiver
     rx = client.state._rtp_rx or None
@@ -954,6 +975,7 @@ def parse_close_receive_channel(client, payload):
     client.state._rtp_echo_source = None
     _stop_rtp_recorder(client)
     _stop_rtp_stats_monitor(client)
+    _stop_rtcp(client)
 
     logger.info(f"[RECV] CloseReceiveChannel")
 
@@ -970,7 +992,8 @@ def parse_display_pri_notify(client, payload):
 
 @register_handler(0x0003, "KeypadButton")
 def parse_keypad_button(client, payload):
-    kp_button, line_instance, call_reference = struct.unpack("<III", payload[:12])
+    msg = schema.KEYPAD_BUTTON.decode(payload)
+    kp_button, line_instance, call_reference = msg.button, msg.line_instance, msg.call_reference
 
     logger.info(f"[RECV] KeypadButton {kp_button}")
 
@@ -981,7 +1004,8 @@ def parse_keypad_button(client, payload):
 
 @register_handler(0x0130, "CallSelectStatRes")
 def parse_call_select_stat_res(client, payload):
-    call_select_stat, call_reference, line_instance = struct.unpack("<III", payload)
+    msg = schema.CALL_SELECT_STAT_RES.decode(payload)
+    call_select_stat, call_reference, line_instance = msg.call_select_stat, msg.call_reference, msg.line_instance
     call_state_name = CALL_STAT_STATE_NAMES.get(call_select_stat, "UNKNOWN")
 
     # # Track call lifecycle
@@ -122,12 +122,23 @@ def parse_register_ack(client, payload):
     logger.info(f"({client.state.device_name}) [RECV] RegisterAck")
 
 
+UNREGISTER_END_CALL_WAIT = 0.5
+
+
+def end_calls_before_unregister(client) -> bool:
+    """Press EndCall if a call is still up; True when the caller should let it settle."""
+    if not (client.state.active_call or client.state.active_calls_list):
+        return False
+    logger.warning(f"({client.state.device_name}) Attempting to Unregister with active call. Ending Call first.")
+    client.press_softkey("EndCall")
+    return True
+
+
 @register_handler(0x0027, "UnregisterReq")
-def send_unregister_req(client):
-    if client.state.active_call or client.state.active_calls_list:
-        logger.warning(f"({client.state.device_name}) Attempting to Unregister with active call. Ending Call first.")
-        client.press_softkey("EndCall")
-        time.sleep(0.5)
+def send_unregister_req(client, *, end_calls=True):
+    # The asyncio engine ends calls itself (awaiting instead of sleeping) and passes end_calls=False.
+    if end_calls and end_calls_before_unregister(client):
+        time.sleep(UNREGISTER_END_CALL_WAIT)
         logger.warning(f"({client.state.device_name}) Now attempting to Unregister...")
 
     send_skinny_message(client, 0x0027)
@@ -10,6 +10,8 @@ from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from typing import TYPE_CHECKING, Callable
 from urllib.parse import parse_qs, quote, unquote, urlparse
 
+from simulator import metrics
+
 if TYPE_CHECKING:
     from simulator.call_hub import CallHub
     from simulator.registry import DeviceRegistry
@@ -104,6 +106,17 @@ def _admin_page(ctx: _AdminContext) -> bytes:
         "<tr><td colspan='6'><em>No phones registered yet.</em></td></tr>"
     )
 
+    timers = ctx.hub.timers.stats()
+    timer_line = (
+        f"Timers: {timers['pending']} pending, {timers['fired']} fired, "
+        f"{timers['cancelled']} cancelled (max lag {timers['max_lag_ms']} ms)"
+    )
+    locks = ctx.hub.lock_stats()
+    lock_line = "Lock waits: " + ", ".join(
+        f"{name} {row['contended']}/{row['acquired']} ({row['wait_ms']} ms)"
+        for name, row in locks.items()
+    )
+
     body = f"""<!DOCTYPE html>
 <html lang="en">
 <head>
@@ -143,8 +156,9 @@ document.addEventListener('DOMContentLoaded', function() {{
 <strong>Restart</strong> (CUCM soft): closes SCCP, re-fetches TFTP config, re-registers — usually seconds.<br>
 <strong>Reset</strong> (CUCM hard): full phone reboot cycle (network + TFTP + register) — slower on hardware.<br>
 Select phones with the checkboxes, then use bulk actions above or below the table. Per-row buttons still work.<br>
-Auto-refreshes every 5s. <a href="/api/phones">JSON</a>
+Auto-refreshes every 5s. <a href="/api/phones">JSON</a> · <a href="/metrics">Prometheus metrics</a>
 </p>
+<p class="note">{html.escape(timer_line)}<br>{html.escape(lock_line)}</p>
 <form method="post" action="/bulk">
 {bulk_bar}
 <table>
@@ -183,10 +197,16 @@ class _AdminHandler(BaseHTTPRequestHandler):
         if path in ("/", "/index.html"):
             self._send_bytes(_admin_page(ctx), "text/html; charset=utf-8")
             return
+        if path == "/metrics":
+            text = metrics.render_metrics(ctx.hub, ctx.tftp)
+            self._send_bytes(text.encode("utf-8"), metrics.CONTENT_TYPE)
+            return
         if path == "/api/phones":
             payload = {
                 "phones": ctx.hub.snapshot_sessions(),
                 "assignments": ctx.registry.snapshot(),
+                "timers": ctx.hub.timers.stats(),
+                "locks": ctx.hub.lock_stats(),
             }
             self._send_json(200, payload)
             return
@@ -2,16 +2,21 @@
 
 from __future__ import annotations
 
+import functools
 import logging
 import socket
 import struct
-import threading
+from collections import Counter
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING
 
 from simulator import payloads
+from simulator.dial_plan import MATCH, NO_MATCH, DialCursor, DialPlan, DialResult, Route
 from simulator.ivr_menu import IvrMenu
+from simulator.locks import CountingLock, LockStats
 from simulator.media_hub import SimMediaHub
+from utils.skinny_writer import ByteRate
+from utils.timers import TimerHandle, TimerScheduler
 
 if TYPE_CHECKING:
     from simulator.session import SkinnySession
@@ -47,6 +52,11 @@ def ip_to_le_int(ip: str) -> int:
 
 IVR_DEVICE_NAME = "SIMIVR"
 IVR_DISPLAY_NAME = "Sim-IVR"
+# Ring time before an auto-answer phone / the IVR picks up.
+AUTO_ANSWER_DELAY_SEC = 0.25
+# Wait this long after the last digit when a longer pattern could still match
+# (CUCM's T.302 default).
+INTERDIGIT_TIMEOUT_SEC = 15.0
 
 
 @dataclass
@@ -73,13 +83,65 @@ class SimCall:
     conference_consult_ref: int | None = None
     conference_primary_ref: int | None = None
     held_by: SkinnySession | None = None
+    # Deferred actions for this call; cancelled by end_call.
+    timers: list[TimerHandle] = field(default_factory=list)
+    dial: DialCursor | None = None
+    interdigit: TimerHandle | None = None
+    # Serializes everything done to this call; a consult leg shares its
+    # primary's lock so transfer / conference completion is one critical section.
+    lock: CountingLock = field(
+        default_factory=lambda: CountingLock(reentrant=True), repr=False, compare=False
+    )
+
+
+def _per_call(method):
+    """Run a session entry point under the lock of the call it acts on."""
+
+    @functools.wraps(method)
+    def wrapper(self: CallHub, session: SkinnySession, *args, **kwargs):
+        hint = kwargs.get("call_ref") or 0
+        while True:
+            call = self._target_call(session, hint)
+            if call is None:
+                return method(self, session, *args, **kwargs)
+            lock = call.lock
+            with lock:
+                # the session may have moved to another call, or the call to
+                # another (shared) lock, while we waited
+                if call.lock is lock and self._target_call(session, hint) is call:
+                    return method(self, session, *args, **kwargs)
+
+    return wrapper
 
 
 class CallHub:
     """Routes calls between registered simulator sessions by DN."""
 
-    def __init__(self, *, media_hub: SimMediaHub | None = None, ivr_dn: str | None = None):
-        self._lock = threading.Lock()
+    def __init__(
+        self,
+        *,
+        media_hub: SimMediaHub | None = None,
+        ivr_dn: str | None = None,
+        timers: TimerScheduler | None = None,
+        dial_plan: DialPlan | None = None,
+        interdigit_timeout: float = INTERDIGIT_TIMEOUT_SEC,
+    ):
+        # Session maps and the call table each sit behind a short lock (readers
+        # do single dict lookups without it); call state is guarded per call,
+        # so independent calls never wait for each other.
+        self._sessions_lock = CountingLock()
+        self._calls_lock = CountingLock()
+        self._call_lock_stats = LockStats()
+        # /metrics counters; each is only bumped under the lock noted beside it.
+        self.registrations = 0                  # _sessions_lock
+        self.registration_rate = ByteRate()     # counts registrations, not bytes
+        self.calls_started = 0                  # _calls_lock
+        self.calls_ended = 0                    # _calls_lock
+        # Skinny message counts of sessions that have gone away (_sessions_lock).
+        self._retired_rx: Counter[int] = Counter()
+        self._retired_tx: Counter[int] = Counter()
+        # One heap + thread for every deferred action (auto-answer, IVR pickup).
+        self.timers = timers or TimerScheduler(name="sim-timers")
         self._by_device: dict[str, SkinnySession] = {}
         self._by_dn: dict[str, SkinnySession] = {}
         self._calls: dict[int, SimCall] = {}
@@ -88,21 +150,39 @@ class CallHub:
         self.media_hub = media_hub
         self.ivr_dn = str(ivr_dn) if ivr_dn else None
         self.ivr_menu = IvrMenu() if self.ivr_dn else None
+        # Routes loaded from a plan file plus one exact pattern per registered DN.
+        self.dial_plan = dial_plan if dial_plan is not None else DialPlan()
+        self.interdigit_timeout = float(interdigit_timeout)
+        self._dn_routes: dict[str, Route] = {}
+        if self.ivr_dn:
+            self.dial_plan.add(self.ivr_dn, name=IVR_DEVICE_NAME)
 
     def register_session(self, session: SkinnySession) -> None:
-        with self._lock:
+        with self._sessions_lock:
+            self.registrations += 1
+            self.registration_rate.add(1)
             self._by_device[session.device_name] = session
             if session.directory_number:
                 self._by_dn[session.directory_number] = session
+                if session.directory_number not in self.dial_plan:
+                    self._dn_routes[session.directory_number] = self.dial_plan.add(
+                        session.directory_number, name=session.device_name
+                    )
 
     def unregister_session(self, session: SkinnySession) -> None:
-        with self._lock:
+        with self._sessions_lock:
             self._by_device.pop(session.device_name, None)
             if session.directory_number:
                 self._by_dn.pop(session.directory_number, None)
-            for call_ref, call in list(self._calls.items()):
-                if session in (call.caller, call.callee):
-                    self.end_call(call_ref, source=session)
+                route = self._dn_routes.pop(session.directory_number, None)
+                if route is not None:
+                    self.dial_plan.remove(session.directory_number, route)
+            self._retired_rx.update(getattr(session, "rx_messages", ()))
+            self._retired_tx.update(getattr(session, "tx_messages", ()))
+        # Outside the map lock: end_call takes each call's own lock.
+        for call in self._snapshot_calls():
+            if session in (call.caller, call.callee):
+                self.end_call(call.call_ref, source=session)
 
     def set_auto_answer(self, mac_or_sep: str) -> None:
         """Enable auto-answer for one device (* = all registered phones)."""
@@ -117,12 +197,79 @@ class CallHub:
         self.auto_answer_devices.add(name)
 
     def session_for_dn(self, dn: str) -> SkinnySession | None:
-        with self._lock:
-            return self._by_dn.get(str(dn))
+        return self._by_dn.get(str(dn))
 
     def should_auto_answer(self, session: SkinnySession) -> bool:
         return "*" in self.auto_answer_devices or session.device_name in self.auto_answer_devices
 
+    def _snapshot_calls(self) -> list[SimCall]:
+        with self._calls_lock:
+            return list(self._calls.values())
+
+    def _forget_call(self, call: SimCall) -> bool:
+        """Drop ``call`` from the table; False if it was already gone."""
+        with self._calls_lock:
+            if self._calls.get(call.call_ref) is not call:
+                return False
+            del self._calls[call.call_ref]
+            self.calls_ended += 1
+            return True
+
+    def _target_call(self, session: SkinnySession, call_ref: int = 0) -> SimCall | None:
+        if call_ref:
+            hinted = self._calls.get(call_ref)
+            if hinted is not None and session in (hinted.caller, hinted.callee, hinted.third_party):
+                return hinted
+        return session.active_call
+
+    def _claim(self, session: SkinnySession, call: SimCall, *, over_held: bool = False) -> bool:
+        """Make ``call`` the active call of an idle ``session``.
+
+        Every new call a session takes part in (going off-hook, being dialed,
+        being a consult target) is claimed here under one lock, so a phone
+        dialed by two callers, or dialed while going off-hook, ends up with
+        one call. ``over_held`` also replaces a call the session has on hold.
+        """
+        with self._sessions_lock:
+            current = session.active_call
+            if current is not None and not (over_held and current.state == "held"):
+                return False
+            session.active_call = call
+            return True
+
+    def message_counts(self) -> tuple[Counter, Counter]:
+        """Skinny messages received / sent by id, over every session so far."""
+        with self._sessions_lock:
+            rx, tx = Counter(self._retired_rx), Counter(self._retired_tx)
+            sessions = list(self._by_device.values())
+        for session in sessions:
+            rx.update(dict(session.rx_messages))
+            tx.update(dict(session.tx_messages))
+        return rx, tx
+
+    def stats(self) -> dict:
+        with self._sessions_lock:
+            sessions = list(self._by_device.values())
+        queues = [session.outbound for session in sessions]
+        return {
+            "sessions": len(sessions),
+            "registrations": self.registrations,
+            "registrations_per_sec": round(self.registration_rate.rate(), 2),
+            "calls_started": self.calls_started,
+            "calls_ended": self.calls_ended,
+            "calls_by_state": dict(Counter(call.state for call in self._snapshot_calls())),
+            "send_queue_depth": sum(q.depth for q in queues),
+            "send_queue_bytes": sum(q.bytes_queued for q in queues),
+            "send_queue_max_depth": max((q.max_depth for q in queues), default=0),
+        }
+
+    def lock_stats(self) -> dict:
+        return {
+            "sessions": self._sessions_lock.stats.as_dict(),
+            "calls": self._calls_lock.stats.as_dict(),
+            "per_call": self._call_lock_stats.as_dict(),
+        }
+
     def _alloc_call_ref(self) -> int:
         ref = self._next_call_ref
         self._next_call_ref += 1
@@ -134,24 +281,34 @@ class CallHub:
         *,
         line: int = 1,
         call_ref_hint: int | None = None,
+        lock: CountingLock | None = None,
     ) -> SimCall:
-        with self._lock:
-            held_call: SimCall | None = None
-            if caller.active_call is not None:
-                if caller.active_call.state != "held":
-                    raise RuntimeError(f"{caller.device_name} already in a call")
-                held_call = caller.active_call
-            if call_ref_hint is not None and call_ref_hint > 0:
-                call_ref = call_ref_hint
-            else:
+        """Start a dialing call for ``caller``; ``lock`` shares another call's lock (consult legs)."""
+        # Only the caller's own messages put its active call on hold, so the
+        # held call read here is still the one _claim replaces.
+        held_call = caller.active_call
+        if call_ref_hint is not None and call_ref_hint > 0:
+            call_ref = call_ref_hint
+        else:
+            with self._calls_lock:
                 call_ref = self._alloc_call_ref()
-            call = SimCall(call_ref=call_ref, caller=caller, state="dialing", line=max(1, line))
+        call = SimCall(
+            call_ref=call_ref,
+            caller=caller,
+            state="dialing",
+            line=max(1, line),
+            lock=lock if lock is not None else CountingLock(self._call_lock_stats, reentrant=True),
+        )
+        if not self._claim(caller, call, over_held=True):
+            raise RuntimeError(f"{caller.device_name} already in a call")
+        with self._calls_lock:
             self._calls[call_ref] = call
-            caller.active_call = call
-            if held_call and self.media_hub:
-                self.media_hub.stop_call(held_call.call_ref)
-            return call
+            self.calls_started += 1
+        if held_call is not None and held_call.state == "held" and self.media_hub:
+            self.media_hub.stop_call(held_call.call_ref)
+        return call
 
+    @_per_call
     def on_digit(self, caller: SkinnySession, digit: str) -> None:
         call = caller.active_call
         if not call:
@@ -222,7 +379,7 @@ class CallHub:
             return
 
         if digit == "#":
-            self._try_complete_dial(call)
+            self._try_complete_dial(call, final=True)
             return
 
         call.dialed += digit
@@ -231,21 +388,52 @@ class CallHub:
         )
         self._try_complete_dial(call)
 
-    def _try_complete_dial(self, call: SimCall) -> None:
-        if self.ivr_dn and call.dialed == self.ivr_dn:
+    def _dial_result(self, call: SimCall) -> DialResult:
+        """Feed the cursor only the digits dialed since the last call."""
+        cursor = call.dial
+        if cursor is None or not call.dialed.startswith(cursor.digits):
+            cursor = call.dial = self.dial_plan.cursor()
+        return cursor.feed(call.dialed[len(cursor.digits):])
+
+    def _try_complete_dial(self, call: SimCall, *, final: bool = False) -> None:
+        if call.interdigit is not None:
+            call.interdigit.cancel()
+            call.interdigit = None
+        result = self._dial_result(call)
+        if result.status == NO_MATCH:
+            logger.debug("No dial plan match for %s ref=%s", call.dialed, call.call_ref)
+            return
+        if result.status != MATCH and not final:
+            # Digits that already complete a route but could still grow wait
+            # for T.302; without a route there is nothing to time out into.
+            if result.route is not None:
+                call.interdigit = self._defer(
+                    call, self.interdigit_timeout, self._interdigit_expired, call
+                )
+            return
+        if result.route is None:
+            return
+        self._route_dialed(call, result.number or "")
+
+    def _interdigit_expired(self, call: SimCall) -> None:
+        with call.lock:
+            if call.state == "dialing" and call.caller.active_call is call:
+                self._try_complete_dial(call, final=True)
+
+    def _route_dialed(self, call: SimCall, number: str) -> None:
+        if self.ivr_dn and number == self.ivr_dn:
             self._start_ivr_call(call)
             return
 
-        callee = self.session_for_dn(call.dialed)
+        callee = self.session_for_dn(number)
         if not callee or callee is call.caller:
             return
-        if callee.active_call is not None:
-            logger.info("Call to busy DN %s ignored", call.dialed)
+        if not self._claim(callee, call):
+            logger.info("Call to busy DN %s ignored", number)
             return
 
         call.callee = callee
         call.state = "ringing"
-        callee.active_call = call
 
         caller_name = call.caller.device_name
         callee_name = callee.device_name
@@ -306,12 +494,7 @@ class CallHub:
             )
 
         if self.should_auto_answer(callee):
-            threading.Thread(
-                target=self._auto_answer_after_delay,
-                args=(callee,),
-                name=f"auto-answer-{callee.device_name}",
-                daemon=True,
-            ).start()
+            self._defer(call, AUTO_ANSWER_DELAY_SEC, self.answer, callee)
 
     def _start_ivr_call(self, call: SimCall) -> None:
         assert self.ivr_dn is not None
@@ -341,27 +524,21 @@ class CallHub:
             payloads.select_soft_keys(call.line, call.call_ref, softkey_set_index=8),
         ])
 
-        threading.Thread(
-            target=self._auto_connect_ivr,
-            args=(call,),
-            name=f"ivr-answer-{call.call_ref}",
-            daemon=True,
-        ).start()
-
-    def _auto_connect_ivr(self, call: SimCall) -> None:
-        import time
+        self._defer(call, AUTO_ANSWER_DELAY_SEC, self._connect_ivr, call)
 
-        time.sleep(0.25)
-        with self._lock:
-            if call.call_ref not in self._calls:
-                return
-        self._connect_ivr(call)
+    def _defer(self, call: SimCall, delay: float, callback, *args) -> TimerHandle:
+        """Run ``callback`` after ``delay`` unless ``call`` ends first."""
+        handle = self.timers.call_later(delay, callback, *args)
+        call.timers.append(handle)
+        return handle
 
     def _connect_ivr(self, call: SimCall) -> None:
+        with call.lock:
+            if self._calls.get(call.call_ref) is call:
+                self._ivr_pickup(call)
+
+    def _ivr_pickup(self, call: SimCall) -> None:
         assert self.ivr_dn is not None
-        with self._lock:
-            if call.call_ref not in self._calls:
-                return
         call.state = "connected"
         caller = call.caller
         caller_name = caller.device_name
@@ -481,12 +658,7 @@ class CallHub:
             payloads.open_receive_channel(call.call_ref),
         ]
 
-    def _auto_answer_after_delay(self, session: SkinnySession) -> None:
-        import time
-
-        time.sleep(0.25)
-        self.answer(session)
-
+    @_per_call
     def answer(self, session: SkinnySession) -> None:
         call = session.active_call
         if not call or call.state != "ringing":
@@ -531,6 +703,7 @@ class CallHub:
                 )
             party.awaiting_media_ack = True
 
+    @_per_call
     def hold(self, session: SkinnySession) -> None:
         call = session.active_call
         if not call or call.state != "connected" or call.callee is None:
@@ -540,7 +713,11 @@ class CallHub:
         logger.info("Hold call ref=%s by %s", call.call_ref, session.device_name)
         self._notify_hold(call, holder=session)
 
+    @_per_call
     def resume(self, session: SkinnySession) -> None:
+        self._resume(session)
+
+    def _resume(self, session: SkinnySession) -> None:
         call = session.active_call
         if not call or call.state != "held" or call.callee is None:
             return
@@ -568,13 +745,14 @@ class CallHub:
                 party.active_call = primary if party in (primary.caller, primary.callee) else None
             party.send(payloads.stop_tone(line, ref))
             party.send(payloads.call_state(payloads.CALL_STATE_ONHOOK, line, ref))
-        self._calls.pop(consult.call_ref, None)
+        self._forget_call(consult)
         if primary.transfer_consult_ref == consult.call_ref:
             primary.transfer_consult_ref = None
         if primary.conference_consult_ref == consult.call_ref:
             primary.conference_consult_ref = None
         consult.state = "ended"
 
+    @_per_call
     def on_conference_softkey(
         self,
         session: SkinnySession,
@@ -582,11 +760,7 @@ class CallHub:
         line: int = 1,
         call_ref: int = 0,
     ) -> None:
-        call = session.active_call
-        if call_ref and call_ref in self._calls:
-            hinted = self._calls[call_ref]
-            if hinted.caller is session or hinted.callee is session or hinted.third_party is session:
-                call = hinted
+        call = self._target_call(session, call_ref)
         if not call:
             return
 
@@ -678,7 +852,7 @@ class CallHub:
         call.conference_digits = ""
         logger.info("Conference cancelled ref=%s", call.call_ref)
         if call.state == "held" and holder:
-            self.resume(holder)
+            self._resume(holder)
 
     def _complete_conference(
         self,
@@ -716,7 +890,7 @@ class CallHub:
                 party.send(payloads.close_receive_channel(leg.call_ref))
             leg.media_ports.clear()
 
-        self._calls.pop(consult.call_ref, None)
+        self._forget_call(consult)
         consult.state = "ended"
 
         primary.conference_active = False
@@ -779,6 +953,7 @@ class CallHub:
             ])
             party.awaiting_media_ack = True
 
+    @_per_call
     def on_transfer_softkey(self, session: SkinnySession) -> None:
         call = session.active_call
         if not call:
@@ -869,18 +1044,27 @@ class CallHub:
             self._notify_hold(primary, holder=initiator)
 
         try:
-            consult = self.begin_outbound(initiator, line=primary.line)
+            # shares the primary's lock from the start: the consult is visible
+            # to other sessions as soon as it is claimed
+            consult = self.begin_outbound(initiator, line=primary.line, lock=primary.lock)
         except RuntimeError:
             logger.warning("%s: could not start outbound for %s", log_label, initiator.device_name)
             return
 
+        if not self._claim(target, consult):
+            # the target took another call since the caller's idle check
+            logger.info("%s to busy DN %s ignored", log_label, dn)
+            self._forget_call(consult)
+            with self._sessions_lock:
+                initiator.active_call = primary
+            return
+
         consult.dialed = dn
         setattr(consult, consult_primary_attr, primary.call_ref)
         setattr(primary, primary_ref_attr, consult.call_ref)
 
         consult.callee = target
         consult.state = "ringing"
-        target.active_call = consult
 
         caller_name = initiator.device_name
         callee_name = target.device_name
@@ -929,12 +1113,7 @@ class CallHub:
             )
 
         if self.should_auto_answer(target):
-            threading.Thread(
-                target=self._auto_answer_after_delay,
-                args=(target,),
-                name=f"auto-answer-{target.device_name}",
-                daemon=True,
-            ).start()
+            self._defer(consult, AUTO_ANSWER_DELAY_SEC, self.answer, target)
 
     def _begin_transfer(self, call: SimCall, initiator: SkinnySession) -> None:
         call.transfer_active = True
@@ -1079,7 +1258,7 @@ class CallHub:
                 payloads.call_state(payloads.CALL_STATE_ONHOOK, line, ref)
             )
 
-        self._calls.pop(consult.call_ref, None)
+        self._forget_call(consult)
         consult.state = "ended"
         if target.active_call is consult:
             target.active_call = None
@@ -1208,6 +1387,7 @@ class CallHub:
             ])
             party.awaiting_media_ack = True
 
+    @_per_call
     def on_media_ack(self, session: SkinnySession, payload: bytes) -> None:
         call = session.active_call
         if not call or call.state != "connected":
@@ -1314,7 +1494,8 @@ class CallHub:
         self, party: SkinnySession, *, exclude_ref: int | None = None
     ) -> list[SimCall]:
         calls: list[SimCall] = []
-        for ref, call in self._calls.items():
+        for call in self._snapshot_calls():
+            ref = call.call_ref
             if exclude_ref is not None and ref == exclude_ref:
                 continue
             if party not in (call.caller, call.callee, call.third_party):
@@ -1450,16 +1631,21 @@ class CallHub:
                 ])
 
     def end_call(self, call_ref: int | None = None, *, source: SkinnySession | None = None) -> None:
-        with self._lock:
-            if call_ref is None and source and source.active_call:
-                call_ref = source.active_call.call_ref
-            if call_ref is None:
-                return
-            call = self._calls.pop(call_ref, None)
-            if not call:
-                return
+        if call_ref is None and source and source.active_call:
+            call_ref = source.active_call.call_ref
+        if call_ref is None:
+            return
+        call = self._calls.get(call_ref)
+        if not call:
+            return
+        with call.lock:
+            if not self._forget_call(call):
+                return  # ended by another thread while we waited
 
             call.state = "ended"
+            for timer in call.timers:
+                timer.cancel()
+            call.timers.clear()
             parties = [call.caller]
             if call.callee:
                 parties.append(call.callee)
@@ -1523,28 +1709,27 @@ class CallHub:
         return name
 
     def session_for_device(self, device: str) -> SkinnySession | None:
-        name = self._normalize_device(device)
-        with self._lock:
-            return self._by_device.get(name)
+        return self._by_device.get(self._normalize_device(device))
 
     def snapshot_sessions(self) -> list[dict]:
-        with self._lock:
-            rows = []
-            for device, session in sorted(self._by_device.items()):
-                call = session.active_call
-                rows.append(
-                    {
-                        "device": device,
-                        "dn": session.directory_number or "",
-                        "ip": session.addr[0],
-                        "port": session.addr[1],
-                        "legacy": session._legacy_phone,
-                        "in_call": call is not None,
-                        "call_state": call.state if call else "idle",
-                        "call_ref": call.call_ref if call else None,
-                    }
-                )
-            return rows
+        with self._sessions_lock:
+            sessions = sorted(self._by_device.items())
+        rows = []
+        for device, session in sessions:
+            call = session.active_call
+            rows.append(
+                {
+                    "device": device,
+                    "dn": session.directory_number or "",
+                    "ip": session.addr[0],
+                    "port": session.addr[1],
+                    "legacy": session._legacy_phone,
+                    "in_call": call is not None,
+                    "call_state": call.state if call else "idle",
+                    "call_ref": call.call_ref if call else None,
+                }
+            )
+        return rows
 
     def _device_admin_action(self, device: str, *, reset: bool) -> bool:
         session = self.session_for_device(device)
@@ -0,0 +1,376 @@
+"""CUCM-style dial plan for the simulator: route patterns in a digit trie.
+
+``CallHub`` used to look the whole dialed string up as a DN after every digit.
+A ``DialPlan`` instead holds route patterns in a prefix trie and each call
+walks it with a ``DialCursor`` one digit at a time, so the work per digit
+depends on how many patterns are still alive at that depth, not on how many
+DNs or routes are loaded. Registered DNs are plain exact patterns in the same
+trie as the routes loaded from a plan file.
+
+Pattern syntax (the subset of CUCM route patterns the simulator needs):
+
+- ``0-9 * #``  the digit itself
+- ``X``        any digit 0-9
+- ``[1-5]``    one digit from the set; ranges and ``^`` (not) are allowed,
+  e.g. ``[2-9]``, ``[^01]``, ``[135]``
+- ``!``        one or more digits
+- ``.``        no digit; marks where ``discard=predot`` cuts the dialed string
+
+After each digit the cursor reports:
+
+- ``MATCH``    a route matches and no longer pattern can still match: route now
+- ``PARTIAL``  more digits could match; ``route`` is set if the digits dialed so
+  far already complete a pattern (route on ``#`` or the interdigit timeout,
+  like CUCM's T.302 for overlapping patterns)
+- ``NO_MATCH`` nothing in the plan can match these digits
+
+When several patterns match the same digits the most specific one wins (the
+one matching the fewest numbers, ``!`` last), then the one added first.
+
+Plan files have one route per line, ``#`` comments allowed::
+
+    # pattern        options
+    9.1XXXXXXXXXX    discard=predot
+    8XXX             strip=1 prefix=1
+    0                target=1000
+    [2-5]XXXX!       name=long-numbers
+
+``target`` replaces the dialed number, ``discard=predot`` drops the digits
+before ``.``, ``strip`` drops that many leading digits (after the discard) and
+``prefix`` is prepended last. The translated number is then looked up as a DN.
+"""
+
+from __future__ import annotations
+
+import itertools
+import threading
+from dataclasses import dataclass, field
+from typing import Iterable, NamedTuple
+
+MATCH = "match"
+PARTIAL = "partial"
+NO_MATCH = "no-match"
+
+DIGITS = frozenset("0123456789")
+# Characters a pattern (and a dialed string) may contain literally.
+LITERALS = frozenset("0123456789*#")
+
+
+@dataclass
+class Route:
+    pattern: str
+    target: str | None = None
+    strip: int = 0
+    prefix: str = ""
+    discard_predot: bool = False
+    name: str = ""
+    # Filled in by DialPlan.add.
+    predot: int = 0
+    rank: tuple = field(default=(), repr=False, compare=False)
+
+    def translate(self, digits: str) -> str:
+        if self.target:
+            return self.target
+        if self.discard_predot:
+            digits = digits[self.predot:]
+        if self.strip:
+            digits = digits[self.strip:]
+        return self.prefix + digits
+
+
+class DialResult(NamedTuple):
+    status: str
+    route: Route | None = None
+    number: str | None = None
+
+
+class _Node:
+    __slots__ = ("literal", "wild", "repeat", "routes")
+
+    def __init__(self, repeat: bool = False):
+        self.literal: dict[str, _Node] = {}
+        # (digit set, repeat) -> child; None until a wildcard is added here.
+        self.wild: dict[tuple[frozenset, bool], _Node] | None = None
+        self.repeat = repeat  # "!" node: loops on any digit
+        self.routes: list[Route] = []
+
+    def can_extend(self) -> bool:
+        return bool(self.literal or self.wild or self.repeat)
+
+    def empty(self) -> bool:
+        return not (self.routes or self.literal or self.wild)
+
+
+def parse_pattern(pattern: str) -> tuple[list[tuple], int]:
+    """Split ``pattern`` into trie steps; also return the digit count before ``.``."""
+    steps: list[tuple] = []
+    predot = 0
+    seen_dot = False
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch in LITERALS:
+            steps.append(("lit", ch))
+        elif ch == "X" or ch == "x":
+            steps.append(("wild", DIGITS, False))
+        elif ch == "!":
+            steps.append(("wild", DIGITS, True))
+        elif ch == ".":
+            if seen_dot:
+                raise ValueError(f"pattern {pattern!r} has more than one '.'")
+            if any(step[0] == "wild" and step[2] for step in steps):
+                raise ValueError(f"pattern {pattern!r} has '.' after '!'")
+            seen_dot = True
+            predot = len(steps)
+        elif ch == "[":
+            end = pattern.find("]", i)
+            if end < 0:
+                raise ValueError(f"pattern {pattern!r} has an unclosed '['")
+            steps.append(("wild", _digit_set(pattern, pattern[i + 1:end]), False))
+            i = end
+        else:
+            raise ValueError(f"pattern {pattern!r}: unsupported character {ch!r}")
+        i += 1
+    if not steps:
+        raise ValueError("empty dial pattern")
+    return steps, predot
+
+
+def _digit_set(pattern: str, body: str) -> frozenset:
+    negate = body.startswith("^")
+    if negate:
+        body = body[1:]
+    chars: set[str] = set()
+    i = 0
+    while i < len(body):
+        ch = body[i]
+        if i + 2 < len(body) and body[i + 1] == "-":
+            lo, hi = ch, body[i + 2]
+            if lo not in DIGITS or hi not in DIGITS or lo > hi:
+                raise ValueError(f"pattern {pattern!r}: bad range {lo}-{hi}")
+            chars.update(str(d) for d in range(int(lo), int(hi) + 1))
+            i += 3
+            continue
+        if ch not in LITERALS:
+            raise ValueError(f"pattern {pattern!r}: bad character {ch!r} in []")
+        chars.add(ch)
+        i += 1
+    result = frozenset(DIGITS - chars if negate else chars)
+    if not result:
+        raise ValueError(f"pattern {pattern!r}: [{body}] matches nothing")
+    return result
+
+
+def _rank(steps: list[tuple], seq: int) -> tuple:
+    # Fewest matching numbers first; "!" patterns after every fixed-length one.
+    variable = any(step[0] == "wild" and step[2] for step in steps)
+    size = 1
+    for step in steps:
+        if step[0] == "wild":
+            size *= len(step[1])
+    return (variable, size, seq)
+
+
+class DialCursor:
+    """Incremental walk of a ``DialPlan`` for one call's dialed digits."""
+
+    __slots__ = ("_nodes", "digits", "result")
+
+    def __init__(self, root: _Node):
+        self._nodes: list[_Node] = [root]
+        self.digits = ""
+        self.result = DialResult(PARTIAL)
+
+    def feed(self, digits: str) -> DialResult:
+        for digit in digits:
+            self._step(digit)
+        return self.result
+
+    def _step(self, digit: str) -> None:
+        self.digits += digit
+        if not self._nodes:
+            return
+        is_digit = digit in DIGITS
+        nxt: list[_Node] = []
+        for node in self._nodes:
+            child = node.literal.get(digit)
+            if child is not None and child not in nxt:
+                nxt.append(child)
+            if not is_digit:
+                continue
+            wild = node.wild
+            if wild:
+                # snapshot: DNs are added / removed while calls are dialing
+                for (chars, _repeat), child in tuple(wild.items()):
+                    if digit in chars and child not in nxt:
+                        nxt.append(child)
+            if node.repeat and node not in nxt:
+                nxt.append(node)
+        self._nodes = nxt
+        self.result = self._evaluate()
+
+    def _evaluate(self) -> DialResult:
+        nodes = self._nodes
+        if not nodes:
+            return DialResult(NO_MATCH)
+        best: Route | None = None
+        more = False
+        for node in nodes:
+            for route in node.routes:
+                if best is None or route.rank < best.rank:
+                    best = route
+            more = more or node.can_extend()
+        number = best.translate(self.digits) if best is not None else None
+        return DialResult(PARTIAL if more or best is None else MATCH, best, number)
+
+
+class DialPlan:
+    """Route patterns in a digit trie; ``cursor()`` walks it digit by digit."""
+
+    def __init__(self, routes: Iterable[Route] = ()):
+        self._root = _Node()
+        self._routes: dict[str, Route] = {}
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self.nodes = 1
+        for route in routes:
+            self.add_route(route)
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    def __contains__(self, pattern) -> bool:
+        return str(pattern) in self._routes
+
+    def get(self, pattern: str) -> Route | None:
+        return self._routes.get(str(pattern))
+
+    def routes(self) -> list[Route]:
+        return list(self._routes.values())
+
+    def add(self, pattern: str, **options) -> Route:
+        """Add (or replace) the route for ``pattern``; see ``Route`` for options."""
+        return self.add_route(Route(str(pattern), **options))
+
+    def add_route(self, route: Route) -> Route:
+        steps, route.predot = parse_pattern(route.pattern)
+        with self._lock:
+            route.rank = _rank(steps, next(self._seq))
+            old = self._routes.get(route.pattern)
+            if old is not None:
+                self._remove_locked(old)
+            node = self._root
+            for step in steps:
+                node = self._child(node, step)
+            node.routes.append(route)
+            self._routes[route.pattern] = route
+        return route
+
+    def remove(self, pattern: str, route: Route | None = None) -> bool:
+        """Drop ``pattern``; with ``route`` only if that route is still the current one."""
+        with self._lock:
+            current = self._routes.get(str(pattern))
+            if current is None or (route is not None and current is not route):
+                return False
+            self._remove_locked(current)
+            return True
+
+    def _remove_locked(self, route: Route) -> None:
+        steps, _ = parse_pattern(route.pattern)
+        path: list[tuple[_Node, tuple, _Node]] = []
+        node = self._root
+        for step in steps:
+            child = self._lookup(node, step)
+            if child is None:
+                return
+            path.append((node, step, child))
+            node = child
+        node.routes = [r for r in node.routes if r is not route]
+        del self._routes[route.pattern]
+        for parent, step, child in reversed(path):
+            if not child.empty():
+                break
+            if step[0] == "lit":
+                del parent.literal[step[1]]
+            else:
+                del parent.wild[step[1:]]
+                if not parent.wild:
+                    parent.wild = None
+            self.nodes -= 1
+
+    @staticmethod
+    def _lookup(node: _Node, step: tuple) -> _Node | None:
+        if step[0] == "lit":
+            return node.literal.get(step[1])
+        return node.wild.get(step[1:]) if node.wild else None
+
+    def _child(self, node: _Node, step: tuple) -> _Node:
+        child = self._lookup(node, step)
+        if child is None:
+            if step[0] == "lit":
+                child = node.literal[step[1]] = _Node()
+            else:
+                if node.wild is None:
+                    node.wild = {}
+                child = node.wild[step[1:]] = _Node(repeat=step[2])
+            self.nodes += 1
+        return child
+
+    def cursor(self) -> DialCursor:
+        return DialCursor(self._root)
+
+    def match(self, digits: str) -> DialResult:
+        """One-shot ``cursor().feed(digits)``."""
+        return self.cursor().feed(str(digits))
+
+    def load_lines(self, lines: Iterable[str], *, source: str = "<dial plan>") -> int:
+        """Add routes from plan-file lines; returns how many were added."""
+        added = 0
+        for lineno, raw in enumerate(lines, 1):
+            fields = raw.split()
+            # "#" starts a comment only as a word of its own ("*#21" is a pattern)
+            for i, item in enumerate(fields):
+                if item.startswith("#"):
+                    del fields[i:]
+                    break
+            if not fields:
+                continue
+            try:
+                self.add(fields[0], **_route_options(fields[1:]))
+            except (TypeError, ValueError) as exc:
+                raise ValueError(f"{source}:{lineno}: {exc}") from None
+            added += 1
+        return added
+
+    @classmethod
+    def load(cls, path: str) -> "DialPlan":
+        plan = cls()
+        with open(path, encoding="utf-8") as fh:
+            plan.load_lines(fh, source=path)
+        return plan
+
+    def stats(self) -> dict:
+        return {"routes": len(self._routes), "nodes": self.nodes}
+
+
+def _route_options(fields: list[str]) -> dict:
+    options: dict = {}
+    for item in fields:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"expected key=value, got {item!r}")
+        if key == "target":
+            options["target"] = value
+        elif key == "strip":
+            options["strip"] = int(value)
+        elif key == "prefix":
+            options["prefix"] = value
+        elif key == "discard":
+            if value.lower() != "predot":
+                raise ValueError(f"unsupported discard {value!r} (only predot)")
+            options["discard_predot"] = True
+        elif key == "name":
+            options["name"] = value
+        else:
+            raise ValueError(f"unknown route option {key!r}")
+    return options
@@ -0,0 +1,70 @@
+"""Locks that count how often the simulator had to wait for them.
+
+``CallHub`` keeps its session maps and its call table behind two short
+``CountingLock``s and gives every call (with its consult leg) a lock of its
+own, so independent calls never queue behind each other. The counters show
+whether that holds under load: ``contended`` is the number of acquisitions
+that found the lock taken and ``wait_ms`` the time spent waiting for it.
+Per-call locks share one ``LockStats`` so the hub can report them as a group.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+
+
+class LockStats:
+    __slots__ = ("acquired", "contended", "wait_sec", "max_wait_sec")
+
+    def __init__(self):
+        self.acquired = 0
+        self.contended = 0
+        self.wait_sec = 0.0
+        self.max_wait_sec = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "acquired": self.acquired,
+            "contended": self.contended,
+            "wait_ms": round(self.wait_sec * 1000.0, 2),
+            "max_wait_ms": round(self.max_wait_sec * 1000.0, 2),
+        }
+
+
+class CountingLock:
+    """``Lock`` (or ``RLock`` with ``reentrant=True``) that records contention."""
+
+    __slots__ = ("_lock", "stats")
+
+    def __init__(self, stats: LockStats | None = None, *, reentrant: bool = False):
+        self._lock = threading.RLock() if reentrant else threading.Lock()
+        self.stats = stats if stats is not None else LockStats()
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        stats = self.stats
+        if self._lock.acquire(False):
+            stats.acquired += 1
+            return True
+        if not blocking:
+            return False
+        start = time.perf_counter()
+        if not self._lock.acquire(True, timeout):
+            return False
+        waited = time.perf_counter() - start
+        stats.acquired += 1
+        stats.contended += 1
+        stats.wait_sec += waited
+        if waited > stats.max_wait_sec:
+            stats.max_wait_sec = waited
+        return True
+
+    def release(self) -> None:
+        self._lock.release()
+
+    def __enter__(self) -> "CountingLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._lock.release()
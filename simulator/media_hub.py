@@ -5,14 +5,17 @@ from __future__ import annotations
 import logging
 import struct
 import socket
-import threading
-import time
+from collections import Counter, deque
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING
 
 from audio_worker import EchoSource, RTPReceiver, RTPSender, wire_rtp_loopback
 from simulator import payloads
+from simulator.rtp_engine import RTPEngine
 from utils.media_codecs import DEFAULT_SKINNY_COMPRESSION, resolve_rtp_payload_type
+from utils.rtcp import RTCPSession
+from utils.rtp_stats import RTPStats
+from utils.timers import TimerHandle, TimerScheduler
 
 if TYPE_CHECKING:
     from simulator.call_hub import SimCall
@@ -21,6 +24,9 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
+_QUALITY_KEYS = ("rx_expected", "rx_lost", "rx_reordered", "rx_duplicates", "rx_late")
+
+
 def _ip_to_le_int(ip: str) -> int:
     return struct.unpack("<I", socket.inet_aton(ip))[0]
 
@@ -32,22 +38,30 @@ class _PartyLeg:
     rx: RTPReceiver
     tx: RTPSender | None = None
     echo: EchoSource | None = None
+    stats: RTPStats | None = None
+    rtcp: RTCPSession | None = None
 
 
 @dataclass
 class SimMediaSession:
     call_ref: int
     legs: list[_PartyLeg] = field(default_factory=list)
+    timers: list[TimerHandle] = field(default_factory=list)
 
 
 class SimMediaHub:
     """
     CM-side RTP stub: bind UDP on the simulator host and participate in calls.
+    Every leg's receiver and sender runs on one shared RTPEngine thread.
 
     Modes:
       - tone: send test tone to each party; StartMedia points phones at sim RX
       - loopback: echo each party's RTP back to that same party
       - bridge: forward A->B and B->A (sim replaces direct phone-to-phone RTP)
+
+    With ``rtcp_interval`` > 0 every leg also runs RTCP on its RTP port + 1
+    (on the same engine), so phones started with ``--rtcp`` exchange SR/RR
+    with the simulator and both ends get loss, jitter and round-trip time.
     """
 
     VALID_MODES = frozenset({"off", "tone", "loopback", "bridge"})
@@ -62,6 +76,8 @@ class SimMediaHub:
         loopback_delay_ms: float = 1500.0,
         loopback_gain_db: float = 12.0,
         loopback_preamble_sec: float = 2.0,
+        timers: TimerScheduler | None = None,
+        rtcp_interval: float = 0.0,
     ):
         self.mode = mode if mode in self.VALID_MODES else "off"
         self.advertise_ip = advertise_ip
@@ -71,11 +87,44 @@ class SimMediaHub:
         self.loopback_gain_db = loopback_gain_db
         self.loopback_preamble_sec = loopback_preamble_sec
         self._sessions: dict[int, SimMediaSession] = {}
+        self.media_started = 0
+        # RFC 3550 receive counters of legs already torn down
+        self._retired_quality: Counter[str] = Counter()
+        self.rtcp_interval = max(float(rtcp_interval), 0.0)
+        self._retired_rtcp: Counter[str] = Counter()
+        # last round-trip time of each finished leg that measured one
+        self.rtt_samples: deque[float] = deque(maxlen=10000)
+        self.engine = RTPEngine()
+        self.timers = timers or TimerScheduler(name="sim-timers")
 
     def set_advertise_ip(self, ip: str) -> None:
         if ip:
             self.advertise_ip = ip
 
+    def _start_receiver(self) -> RTPReceiver:
+        rx = RTPReceiver(worker=None, bind_ip="0.0.0.0", port=0, log=logger, engine=self.engine)
+        rx.attach_stats(RTPStats())
+        rx.start()
+        return rx
+
+    def _start_rtcp(self, leg: _PartyLeg) -> None:
+        if self.rtcp_interval <= 0:
+            return
+        try:
+            rtcp = RTCPSession(
+                leg.rx,
+                cname=f"pyskinny-sim@{self.advertise_ip}",
+                interval=self.rtcp_interval,
+                engine=self.engine,
+                log=logger,
+            )
+        except OSError as exc:
+            logger.warning("SimMediaHub: no RTCP for %s (port %s busy: %s)", leg.session.device_name, leg.rx.port + 1, exc)
+            return
+        rtcp.set_sender(leg.tx)
+        rtcp.start()
+        leg.rtcp = rtcp
+
     def start_call(self, call: SimCall) -> bool:
         """Return True if this hub handled StartMedia (caller should skip P2P)."""
         if self.mode == "off":
@@ -102,8 +151,7 @@ class SimMediaHub:
         sim_ip_int = _ip_to_le_int(self.advertise_ip)
 
         for party in parties:
-            rx = RTPReceiver(worker=None, bind_ip="0.0.0.0", port=0, log=logger)
-            rx.start()
+            rx = self._start_receiver()
             phone_port = call.media_ports[id(party)]
             phone_ip = party.station_ip
 
@@ -113,11 +161,13 @@ class SimMediaHub:
                 ptime_ms=20,
                 payload_type=pt,
                 log=logger,
+                engine=self.engine,
             )
             tx.start()
 
-            leg = _PartyLeg(session=party, phone_port=phone_port, rx=rx, tx=tx)
+            leg = _PartyLeg(session=party, phone_port=phone_port, rx=rx, tx=tx, stats=rx.stats)
             sim_session.legs.append(leg)
+            self._start_rtcp(leg)
 
             party.send(
                 payloads.start_media_transmission(
@@ -153,7 +203,6 @@ class SimMediaHub:
                         ref=call.call_ref,
                         delay=self.loopback_preamble_sec,
                     ) -> None:
-                        time.sleep(delay)
                         try:
                             rx.attach_echo(echo)
                             logger.info(
@@ -167,11 +216,9 @@ class SimMediaHub:
                                 ref,
                             )
 
-                    threading.Thread(
-                        target=_arm_rx,
-                        name=f"sim-rx-{call.call_ref}",
-                        daemon=True,
-                    ).start()
+                    sim_session.timers.append(
+                        self.timers.call_later(self.loopback_preamble_sec, _arm_rx)
+                    )
                 else:
                     rx.attach_echo(echo)
                     tx.send_echo(echo)
@@ -189,6 +236,7 @@ class SimMediaHub:
             b.echo = b_to_a
 
         self._sessions[call.call_ref] = sim_session
+        self.media_started += 1
         logger.info(
             "SimMediaHub %s active ref=%s advertise=%s legs=%s",
             self.mode,
@@ -217,8 +265,7 @@ class SimMediaHub:
         sim_ip_int = _ip_to_le_int(self.advertise_ip)
 
         for party in parties:
-            rx = RTPReceiver(worker=None, bind_ip="0.0.0.0", port=0, log=logger)
-            rx.start()
+            rx = self._start_receiver()
             phone_port = call.media_ports[id(party)]
             tx = RTPSender(
                 party.station_ip,
@@ -226,11 +273,12 @@ class SimMediaHub:
                 ptime_ms=20,
                 payload_type=pt,
                 log=logger,
+                engine=self.engine,
             )
             tx.start()
-            sim_session.legs.append(
-                _PartyLeg(session=party, phone_port=phone_port, rx=rx, tx=tx)
-            )
+            leg = _PartyLeg(session=party, phone_port=phone_port, rx=rx, tx=tx, stats=rx.stats)
+            sim_session.legs.append(leg)
+            self._start_rtcp(leg)
             party.send(
                 payloads.start_media_transmission(
                     call.call_ref,
@@ -252,6 +300,7 @@ class SimMediaHub:
                     leg_j.tx.send_echo(echo)
 
         self._sessions[call.call_ref] = sim_session
+        self.media_started += 1
         logger.info(
             "SimMediaHub conference ref=%s legs=%s",
             call.call_ref,
@@ -316,13 +365,82 @@ class SimMediaHub:
         sim_session = self._sessions.pop(call_ref, None)
         if not sim_session:
             return
+        for timer in sim_session.timers:
+            timer.cancel()
         for leg in sim_session.legs:
+            if leg.rtcp is not None:
+                self._retire_rtcp(leg.rtcp)
+                leg.rtcp.stop()
             leg.rx.detach_echo()
             leg.rx.stop()
             if leg.tx:
                 leg.tx.stop()
+            if leg.stats is not None:
+                counts = leg.stats.as_dict()
+                self._retired_quality.update({k: counts[k] for k in _QUALITY_KEYS})
         logger.info("SimMediaHub stopped ref=%s", call_ref)
 
+    def _retire_rtcp(self, rtcp: RTCPSession) -> None:
+        d = rtcp.as_dict()
+        self._retired_rtcp.update({"reports_tx": d["reports_tx"], "reports_rx": d["reports_rx"]})
+        if d["remote"]:
+            self._retired_rtcp["remote_lost"] += max(d["remote"]["cumulative_lost"], 0)
+        if d["rtt_ms"] is not None:
+            self.rtt_samples.append(d["rtt_ms"])
+            self._retired_rtcp["max_rtt_ms"] = max(self._retired_rtcp["max_rtt_ms"], d["max_rtt_ms"])
+
+    def _rtcp_stats(self, sessions: list[SimMediaSession]) -> dict:
+        retired = self._retired_rtcp
+        out = {
+            "sessions": 0,
+            "reports_tx": retired["reports_tx"],
+            "reports_rx": retired["reports_rx"],
+            "remote_lost": retired["remote_lost"],
+            "rtt_ms": None,
+            "max_rtt_ms": retired["max_rtt_ms"],
+        }
+        live_rtt = []
+        for s in sessions:
+            for leg in s.legs:
+                if leg.rtcp is None:
+                    continue
+                d = leg.rtcp.as_dict()
+                out["sessions"] += 1
+                out["reports_tx"] += d["reports_tx"]
+                out["reports_rx"] += d["reports_rx"]
+                if d["remote"]:
+                    out["remote_lost"] += max(d["remote"]["cumulative_lost"], 0)
+                if d["rtt_ms"] is not None:
+                    live_rtt.append(d["rtt_ms"])
+                    out["max_rtt_ms"] = max(out["max_rtt_ms"], d["max_rtt_ms"])
+        if live_rtt:
+            out["rtt_ms"] = round(max(live_rtt), 2)
+        return out
+
+    def stats(self) -> dict:
+        sessions = list(self._sessions.values())
+        quality = {k: self._retired_quality[k] for k in _QUALITY_KEYS}
+        jitter_ms = 0.0
+        for s in sessions:
+            for leg in s.legs:
+                if leg.stats is None:
+                    continue
+                counts = leg.stats.as_dict()
+                for k in _QUALITY_KEYS:
+                    quality[k] += counts[k]
+                jitter_ms = max(jitter_ms, counts["jitter_ms"])
+        quality["max_jitter_ms"] = jitter_ms
+        return {
+            "mode": self.mode,
+            "sessions": len(sessions),
+            "legs": sum(len(s.legs) for s in sessions),
+            "started": self.media_started,
+            "rx_quality": quality,
+            "rtcp": self._rtcp_stats(sessions),
+            "engine": self.engine.stats(),
+        }
+
     def stop_all(self) -> None:
         for ref in list(self._sessions):
             self.stop_call(ref)
+        self.engine.stop()
@@ -0,0 +1,149 @@
+"""Prometheus text exposition of the simulator counters (admin ``GET /metrics``).
+
+Nothing here is kept per scrape: ``SkinnySession``, ``CallHub``, the media
+``RTPEngine`` and ``TftpConfigService`` bump plain integer counters on the
+threads that already own the work, and ``render_metrics`` only reads them.
+Rates (registrations/sec, RTP packets/sec) are computed by their owners over
+a one-second window, so a scrape interval longer than that still sees the
+current rate; counters ending in ``_total`` are for ``rate()`` in PromQL.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from utils.skinny_messages import get_message_name
+
+if TYPE_CHECKING:
+    from simulator.call_hub import CallHub
+    from simulator.tftp_service import TftpConfigService
+
+PREFIX = "pyskinny_sim_"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Exposition:
+    def __init__(self):
+        self.lines: list[str] = []
+
+    def family(self, name: str, kind: str, help_text: str, samples) -> None:
+        """``samples`` is a number or an iterable of (labels dict, number)."""
+        full = PREFIX + name
+        self.lines.append(f"# HELP {full} {help_text}")
+        self.lines.append(f"# TYPE {full} {kind}")
+        if isinstance(samples, (int, float)):
+            samples = [({}, samples)]
+        for labels, value in samples:
+            if labels:
+                text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                self.lines.append(f"{full}{{{text}}} {value}")
+            else:
+                self.lines.append(f"{full} {value}")
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def render_metrics(hub: CallHub, tftp: TftpConfigService | None = None) -> str:
+    out = _Exposition()
+    stats = hub.stats()
+    out.family("sessions", "gauge", "Registered Skinny sessions.", stats["sessions"])
+    out.family("registrations_total", "counter", "Successful registrations.", stats["registrations"])
+    out.family(
+        "registrations_per_second", "gauge",
+        "Registrations in the last full second.", stats["registrations_per_sec"],
+    )
+    out.family("calls_started_total", "counter", "Calls (and consult legs) set up.", stats["calls_started"])
+    out.family("calls_ended_total", "counter", "Calls (and consult legs) torn down.", stats["calls_ended"])
+    out.family(
+        "calls", "gauge", "Active calls by state.",
+        [({"state": state}, n) for state, n in sorted(stats["calls_by_state"].items())],
+    )
+
+    rx, tx = hub.message_counts()
+    samples = []
+    for direction, counts in (("rx", rx), ("tx", tx)):
+        for msg_id in sorted(counts):
+            labels = {"direction": direction, "msg_id": f"0x{msg_id:04X}", "name": get_message_name(msg_id)}
+            samples.append((labels, counts[msg_id]))
+    out.family("skinny_messages_total", "counter", "Skinny messages by direction and id.", samples)
+
+    out.family("send_queue_depth", "gauge", "Packets queued to phones, all sessions.", stats["send_queue_depth"])
+    out.family("send_queue_bytes", "gauge", "Bytes queued to phones, all sessions.", stats["send_queue_bytes"])
+    out.family(
+        "send_queue_max_depth", "gauge",
+        "Deepest any live session's send queue has been.", stats["send_queue_max_depth"],
+    )
+
+    if hub.media_hub is not None:
+        media = hub.media_hub.stats()
+        engine = media["engine"]
+        out.family("media_sessions", "gauge", "Calls with simulator RTP legs.", media["sessions"])
+        out.family("rtp_legs", "gauge", "Simulator RTP legs (one per party).", media["legs"])
+        out.family(
+            "rtp_packets_total", "counter", "RTP packets through the media engine.",
+            [({"direction": "rx"}, engine["rx_packets"]), ({"direction": "tx"}, engine["tx_packets"])],
+        )
+        out.family(
+            "rtp_packets_per_second", "gauge", "RTP packets in the last second.",
+            [({"direction": "rx"}, engine["rx_pps"]), ({"direction": "tx"}, engine["tx_pps"])],
+        )
+        quality = media["rx_quality"]
+        out.family(
+            "rtp_rx_expected_total", "counter",
+            "RTP packets the legs expected from phones (RFC 3550 extended sequence).", quality["rx_expected"],
+        )
+        out.family("rtp_rx_lost_total", "counter", "RTP packets from phones never received.", quality["rx_lost"])
+        out.family(
+            "rtp_rx_out_of_order_total", "counter", "RTP packets from phones out of sequence, by kind.",
+            [
+                ({"kind": "reordered"}, quality["rx_reordered"]),
+                ({"kind": "duplicate"}, quality["rx_duplicates"]),
+                ({"kind": "late"}, quality["rx_late"]),
+            ],
+        )
+        out.family(
+            "rtp_rx_jitter_ms", "gauge",
+            "Highest RFC 3550 interarrival jitter over live legs.", quality["max_jitter_ms"],
+        )
+        rtcp = media["rtcp"]
+        out.family("rtcp_sessions", "gauge", "Simulator legs running RTCP.", rtcp["sessions"])
+        out.family(
+            "rtcp_reports_total", "counter", "RTCP compound reports by direction.",
+            [({"direction": "rx"}, rtcp["reports_rx"]), ({"direction": "tx"}, rtcp["reports_tx"])],
+        )
+        out.family(
+            "rtcp_remote_lost_total", "counter",
+            "Simulator RTP packets the phones reported lost (RTCP report blocks).", rtcp["remote_lost"],
+        )
+        out.family(
+            "rtcp_rtt_ms", "gauge", "Highest RTCP round-trip time over live legs (0 until measured).",
+            rtcp["rtt_ms"] or 0.0,
+        )
+        out.family("rtp_late_ticks_total", "counter", "Media ticks run over a tick late.", engine["late_ticks"])
+
+    timers = hub.timers.stats()
+    out.family("timers_pending", "gauge", "Deferred actions waiting on the timer heap.", timers["pending"])
+    out.family("timers_fired_total", "counter", "Deferred actions run.", timers["fired"])
+
+    locks = hub.lock_stats()
+    out.family(
+        "lock_acquired_total", "counter", "CallHub lock acquisitions.",
+        [({"lock": name}, row["acquired"]) for name, row in locks.items()],
+    )
+    out.family(
+        "lock_contended_total", "counter", "CallHub lock acquisitions that had to wait.",
+        [({"lock": name}, row["contended"]) for name, row in locks.items()],
+    )
+
+    if tftp is not None:
+        counts = tftp.stats()
+        out.family(
+            "tftp_requests_total", "counter", "TFTP read requests by outcome.",
+            [({"result": key}, counts[key]) for key in ("files", "configs", "not_found", "denied")],
+        )
+    return out.text()
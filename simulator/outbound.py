@@ -0,0 +1,181 @@
+"""Bounded per-session outbound packet queue for the simulator.
+
+``SkinnySession.send`` only appends to an ``OutboundQueue``; a writer (a
+thread in threaded mode, a coroutine in asyncio mode) takes everything queued
+so far and hands it to the kernel in one vectored write. ``CallHub`` can
+therefore send while holding its lock without ever blocking on a phone whose
+TCP window is full.
+
+Bytes stay accounted to the queue until the writer reports them written
+(``done``), so a stuck peer fills its queue. ``put`` refuses a packet when the
+queue would exceed ``max_bytes`` or when nothing has been written for
+``stall_sec`` while data is pending; the session then disconnects the peer.
+"""
+
+from __future__ import annotations
+
+import socket
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+DEFAULT_MAX_BYTES = 256 * 1024
+DEFAULT_STALL_SEC = 10.0
+# Buffers per sendmsg (well under IOV_MAX).
+MAX_BATCH = 64
+
+
+class OutboundQueue:
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        stall_sec: float = DEFAULT_STALL_SEC,
+        on_ready: Callable[[], None] | None = None,
+    ):
+        self.max_bytes = int(max_bytes)
+        self.stall_sec = float(stall_sec)
+        self.on_ready = on_ready
+        self._packets: deque[bytes] = deque()
+        self._bytes = 0            # queued + handed to the writer, not yet written
+        self._progress_at = time.monotonic()
+        self._cond = threading.Condition()
+        self.closed = False
+        self.enqueued = 0
+        self.sent_packets = 0
+        self.sent_bytes = 0
+        self.writes = 0
+        self.overflows = 0
+        self.max_depth = 0
+        self.max_bytes_queued = 0
+
+    @property
+    def depth(self) -> int:
+        return len(self._packets)
+
+    @property
+    def bytes_queued(self) -> int:
+        return self._bytes
+
+    def put(self, packet: bytes) -> bool:
+        """Queue ``packet``; False if the queue is closed, full or stalled."""
+        with self._cond:
+            if self.closed:
+                return False
+            now = time.monotonic()
+            if self._bytes + len(packet) > self.max_bytes or (
+                self._bytes and now - self._progress_at > self.stall_sec
+            ):
+                self.overflows += 1
+                return False
+            if not self._bytes:
+                self._progress_at = now
+            wake = not self._packets
+            self._packets.append(packet)
+            self._bytes += len(packet)
+            self.enqueued += 1
+            self.max_depth = max(self.max_depth, len(self._packets))
+            self.max_bytes_queued = max(self.max_bytes_queued, self._bytes)
+            if wake:
+                self._cond.notify()
+        if wake and self.on_ready is not None:
+            self.on_ready()
+        return True
+
+    def put_many(self, packets: list[bytes]) -> bool:
+        """Queue ``packets`` together (one wake-up); all-or-nothing like ``put``."""
+        size = sum(len(p) for p in packets)
+        with self._cond:
+            if self.closed:
+                return False
+            now = time.monotonic()
+            if self._bytes + size > self.max_bytes or (
+                self._bytes and now - self._progress_at > self.stall_sec
+            ):
+                self.overflows += 1
+                return False
+            if not self._bytes:
+                self._progress_at = now
+            wake = not self._packets
+            self._packets.extend(packets)
+            self._bytes += size
+            self.enqueued += len(packets)
+            self.max_depth = max(self.max_depth, len(self._packets))
+            self.max_bytes_queued = max(self.max_bytes_queued, self._bytes)
+            if wake:
+                self._cond.notify()
+        if wake and self.on_ready is not None:
+            self.on_ready()
+        return True
+
+    def take(self, timeout: float | None = None) -> list[bytes]:
+        """Pop up to ``MAX_BATCH`` packets, waiting up to ``timeout`` (0 = don't wait).
+
+        Returns an empty list on timeout, or once the queue is closed and drained.
+        """
+        with self._cond:
+            if timeout != 0:
+                self._cond.wait_for(lambda: self._packets or self.closed, timeout)
+            packets = self._packets
+            n = min(len(packets), MAX_BATCH)
+            return [packets.popleft() for _ in range(n)]
+
+    def done(self, batch: list[bytes]) -> None:
+        """The writer put ``batch`` on the wire."""
+        n = sum(len(p) for p in batch)
+        with self._cond:
+            self._bytes = max(self._bytes - n, 0)
+            self._progress_at = time.monotonic()
+            self.sent_packets += len(batch)
+            self.sent_bytes += n
+            self.writes += 1
+            if not self._bytes:
+                self._cond.notify_all()
+
+    def wait_drained(self, timeout: float | None = None) -> bool:
+        """Wait until everything queued has been written; False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._bytes or self.closed, timeout)
+
+    def close(self, drain: bool = False) -> None:
+        """Refuse further packets; ``drain`` leaves already queued ones for the writer."""
+        with self._cond:
+            self.closed = True
+            if not drain:
+                self._packets.clear()
+                self._bytes = 0
+            self._cond.notify_all()
+        if self.on_ready is not None:
+            self.on_ready()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "depth": len(self._packets),
+                "bytes_queued": self._bytes,
+                "max_depth": self.max_depth,
+                "max_bytes_queued": self.max_bytes_queued,
+                "enqueued": self.enqueued,
+                "sent_packets": self.sent_packets,
+                "sent_bytes": self.sent_bytes,
+                "writes": self.writes,
+                "overflows": self.overflows,
+            }
+
+
+def write_batch(conn: socket.socket, batch: list[bytes]) -> None:
+    """Blocking vectored write of ``batch`` (``sendall`` where ``sendmsg`` is missing)."""
+    if len(batch) == 1 or not hasattr(conn, "sendmsg"):
+        conn.sendall(batch[0] if len(batch) == 1 else b"".join(batch))
+        return
+    bufs = [memoryview(p) for p in batch]
+    while bufs:
+        sent = conn.sendmsg(bufs)
+        while sent:
+            head = bufs[0]
+            if sent >= len(head):
+                sent -= len(head)
+                bufs.pop(0)
+            else:
+                bufs[0] = head[sent:]
+                sent = 0
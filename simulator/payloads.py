@@ -1,13 +1,19 @@
-"""Minimal Skinny server response payloads for phone registration."""
+"""Minimal Skinny server response payloads for phone registration.
+
+The registration replies are the same bytes for every phone of a template
+profile (modern / legacy7912 / cm2), so those builders are cached and built
+once. Replies that carry per-device fields (ConfigStatRes, LineStatRes) are
+copied from a prebuilt frame and patched with ``pack_into``; TimeDateRes is
+rebuilt at most once per second.
+"""
 
 from __future__ import annotations
 
+import functools
 import struct
 import time
 
-
-def _cstring(text: str, length: int) -> bytes:
-    return text.encode("ascii", errors="replace")[: length - 1].ljust(length, b"\x00")
+from utils import skinny_schema as schema
 
 
 # SCCP call-state values (subset)
@@ -68,17 +74,12 @@ def phone_template_profile(device_type: int) -> str:
     return "modern"
 
 
+@functools.lru_cache(maxsize=None)
 def register_ack(keepalive: int = 30) -> bytes:
-    from simulator.protocol import pack_message
-
-    body = struct.pack("<I", keepalive)
-    body += b"MMDDYY"
-    body += struct.pack("<H", 0)
-    body += struct.pack("<I", keepalive)
-    body += struct.pack("<BBH", 5, 0, 0)
-    return pack_message(0x0081, body)
+    return schema.REGISTER_ACK.frame(keepalive=keepalive, secondary_keepalive=keepalive)
 
 
+@functools.lru_cache(maxsize=None)
 def capabilities_req() -> bytes:
     from simulator.protocol import pack_message
 
@@ -97,6 +98,7 @@ def normalize_skinny_packet(packet: bytes) -> bytes:
     return struct.pack("<III", expected, ver, mid) + body
 
 
+@functools.lru_cache(maxsize=None)
 def button_template_res(*, legacy: bool = False, cm2: bool = False) -> bytes:
     if cm2:
         from simulator.cm2_assets import CM2_BUTTON_TEMPLATE_RES
@@ -114,6 +116,7 @@ def button_template_res(*, legacy: bool = False, cm2: bool = False) -> bytes:
     return pack_message(0x0097, body)
 
 
+@functools.lru_cache(maxsize=None)
 def softkey_template_res(*, legacy: bool = False) -> bytes:
     if legacy:
         from simulator.cucm_legacy_assets import LEGACY_SOFTKEY_TEMPLATE_RES
@@ -138,6 +141,7 @@ def softkey_template_res(*, legacy: bool = False) -> bytes:
     return pack_message(0x0108, body)
 
 
+@functools.lru_cache(maxsize=None)
 def softkey_set_res(*, legacy: bool = False) -> bytes:
     if legacy:
         from simulator.cucm_legacy_assets import LEGACY_SOFTKEY_SET_RES
@@ -180,9 +184,7 @@ def softkey_set_res(*, legacy: bool = False) -> bytes:
 
 def set_speaker_mode(mode: int = 1) -> bytes:
     """Speaker on (1) — some 79xx need this before dial tone."""
-    from simulator.protocol import pack_message
-
-    return pack_message(0x0088, struct.pack("<I", mode))
+    return schema.SET_SPEAKER_MODE.frame(mode)
 
 
 def set_ringer(
@@ -191,22 +193,16 @@ def set_ringer(
     line: int = 0,
     call_ref: int = 0,
 ) -> bytes:
-    from simulator.protocol import pack_message
-
-    return pack_message(0x0085, struct.pack("<IIII", ring_mode, ring_duration, line, call_ref))
+    return schema.SET_RINGER.frame(ring_mode, ring_duration, line, call_ref)
 
 
 def set_lamp(stimulus: int = 9, instance: int = 1, lamp_mode: int = 2) -> bytes:
     """Line lamp on (stimulus 9 = Line, lamp_mode 2 = on)."""
-    from simulator.protocol import pack_message
-
-    return pack_message(0x0086, struct.pack("<III", stimulus, instance, lamp_mode))
+    return schema.SET_LAMP.frame(stimulus, instance, lamp_mode)
 
 
 def clear_prompt_status(line: int = 1, call_ref: int = 0) -> bytes:
-    from simulator.protocol import pack_message
-
-    return pack_message(0x0113, struct.pack("<II", line, call_ref))
+    return schema.CLEAR_PROMPT_STATUS.frame(line, call_ref)
 
 
 def call_state(
@@ -214,11 +210,11 @@ def call_state(
     line: int = 1,
     call_ref: int = 0,
 ) -> bytes:
-    from simulator.protocol import pack_message
+    return schema.CALL_STATE.frame(state, line, call_ref, 0, 4, 0)
+
 
-    body = struct.pack("<III", state, line, call_ref)
-    body += struct.pack("<III", 0, 4, 0)
-    return pack_message(0x0111, body)
+# CallInfo as CUCM 3.x sends it: parties + line/ref/type, no redirect fields.
+_CALL_INFO_SHORT = schema.CALL_INFO.prefix("call_type")
 
 
 def call_info(
@@ -231,14 +227,12 @@ def call_info(
     call_ref: int = 0,
     call_type: int = 2,
 ) -> bytes:
-    from simulator.protocol import pack_message
+    return _CALL_INFO_SHORT.frame(
+        caller_name, caller_num, called_name, called_num, line, call_ref, call_type
+    )
 
-    body = _cstring(caller_name, 40)
-    body += _cstring(caller_num, 24)
-    body += _cstring(called_name, 40)
-    body += _cstring(called_num, 24)
-    body += struct.pack("<III", line, call_ref, call_type)
-    return pack_message(0x008F, body)
+
+_START_TONE_LEGACY = schema.START_TONE.prefix("tone")
 
 
 def start_tone(
@@ -249,38 +243,26 @@ def start_tone(
     legacy: bool = False,
     direction: int = 2,
 ) -> bytes:
-    from simulator.protocol import pack_message
-
     if legacy:
         # CM 3.x / 7912: often only tone index in payload
-        return pack_message(0x0082, struct.pack("<I", tone))
-    return pack_message(0x0082, struct.pack("<IIII", tone, direction, line, call_ref))
+        return _START_TONE_LEGACY.frame(tone)
+    return schema.START_TONE.frame(tone, direction, line, call_ref)
 
 
 def stop_tone(line: int = 1, call_ref: int = 0) -> bytes:
-    from simulator.protocol import pack_message
-
-    return pack_message(0x0083, struct.pack("<II", line, call_ref))
+    return schema.STOP_TONE.frame(line, call_ref)
 
 
 def activate_call_plane(line: int = 1) -> bytes:
-    from simulator.protocol import pack_message
-
-    return pack_message(0x0116, struct.pack("<I", line))
+    return schema.ACTIVATE_CALL_PLANE.frame(line)
 
 
 def dialed_number(number: str, line: int = 1, call_ref: int = 0) -> bytes:
-    from simulator.protocol import pack_message
-
-    body = _cstring(number, 24)
-    body += struct.pack("<II", line, call_ref)
-    return pack_message(0x011D, body)
+    return schema.DIALED_NUMBER.frame(number, line, call_ref)
 
 
 def keypad_button(button: int, line: int = 1, call_ref: int = 0) -> bytes:
-    from simulator.protocol import pack_message
-
-    return pack_message(0x0003, struct.pack("<III", button, line, call_ref))
+    return schema.KEYPAD_BUTTON.frame(button, line, call_ref)
 
 
 # CUCM pass-through party id seen on 7912 legacy media (OpenRx / StartMedia / Ack).
@@ -294,23 +276,15 @@ def open_receive_channel(
     compression_type: int = 4,
     pass_through_party_id: int = PASS_THROUGH_PARTY_ID,
 ) -> bytes:
-    from simulator.protocol import pack_message
-
-    body = struct.pack(
-        "<IIIIIIIIHH",
-        call_ref,
+    return schema.OPEN_RECEIVE_CHANNEL.frame(
+        call_ref,               # conference_id
         pass_through_party_id,
         ptime_ms,
         compression_type,
-        0,
-        0,
+        0, 0,                   # ec_value, g723_bitrate
         call_ref,
-        0,
-        0,
-        0,
+        0, 0, 0, b"", b"",      # algorithm_id, key_len, salt_len, key, salt
     )
-    body += b"\x00" * 32
-    return pack_message(0x0105, body)
 
 
 def start_media_transmission(
@@ -323,24 +297,18 @@ def start_media_transmission(
     pass_through_party_id: int = PASS_THROUGH_PARTY_ID,
     precedence_value: int = 0,
 ) -> bytes:
-    from simulator.protocol import pack_message
-
-    body = struct.pack(
-        "<IIIIIIIIHH",
-        call_ref,
+    return schema.START_MEDIA_TRANSMISSION.frame(
+        call_ref,               # conference_id
         pass_through_party_id,
         remote_ip,
         remote_port,
         ptime_ms,
         compression_type,
         precedence_value,
-        0,
-        0,
-        0,
+        0, 0, 0,                # ss_value, max_frames_per_packet, padding
+        0, call_ref,            # g723_bitrate, call_reference
+        0, 0, 0, b"", b"",      # algorithm_id, key_len, salt_len, key, salt
     )
-    body += struct.pack("<IIIHH", 0, call_ref, 0, 0, 0)
-    body += b"\x00" * 32
-    return pack_message(0x008A, body)
 
 
 def stop_media_transmission(
@@ -348,10 +316,7 @@ def stop_media_transmission(
     *,
     pass_through_party_id: int = PASS_THROUGH_PARTY_ID,
 ) -> bytes:
-    from simulator.protocol import pack_message
-
-    body = struct.pack("<III", 0, pass_through_party_id, call_ref)
-    return pack_message(0x008B, body)
+    return schema.STOP_MEDIA_TRANSMISSION.frame(0, pass_through_party_id, call_ref)
 
 
 def close_receive_channel(
@@ -359,75 +324,73 @@ def close_receive_channel(
     *,
     pass_through_party_id: int = PASS_THROUGH_PARTY_ID,
 ) -> bytes:
-    from simulator.protocol import pack_message
-
-    body = struct.pack("<III", 0, pass_through_party_id, call_ref)
-    return pack_message(0x0106, body)
+    return schema.CLOSE_RECEIVE_CHANNEL.frame(0, pass_through_party_id, call_ref)
 
 
 def parse_open_receive_channel_ack(payload: bytes) -> dict[str, int]:
     """Parse OpenReceiveChannelAck (7912 sends 16 bytes; CM may send 20)."""
-    if len(payload) < 12:
-        raise ValueError(f"OpenReceiveChannelAck too short ({len(payload)} bytes)")
-    status, port = struct.unpack("<II", payload[0:4] + payload[8:12])
-    ip_raw = payload[4:8]
-    ip_int = struct.unpack("!I", ip_raw)[0]
-    out: dict[str, int] = {"status": status, "ip": ip_int, "port": port}
+    ack = schema.OPEN_RECEIVE_CHANNEL_ACK.decode(payload)
+    out: dict[str, int] = {"status": ack.status, "ip": ack.ip, "port": ack.port}
     if len(payload) >= 16:
-        out["pass_through_party_id"] = struct.unpack("<I", payload[12:16])[0]
+        out["pass_through_party_id"] = ack.pass_through_party_id
     if len(payload) >= 20:
-        out["call_reference"] = struct.unpack("<I", payload[16:20])[0]
+        out["call_reference"] = ack.call_reference
     return out
 
 
+# Per-device fields patched into the prebuilt frames (offset 12 = after the header).
+_CONFIG_DEVICE_NAME = struct.Struct("<16s")
+_LINE_STAT_FIELDS = struct.Struct("<I24s40s40s")
+
+
+@functools.lru_cache(maxsize=None)
+def _config_stat_template(server_label: str, lines: int, speed_dials: int) -> bytes:
+    return schema.CONFIG_STAT_RES.frame("", 0, 0, "SkinnySim", server_label, lines, speed_dials)
+
+
 def config_stat_res(device_name: str, server_label: str, lines: int = 1, speed_dials: int = 0) -> bytes:
-    from simulator.protocol import pack_message
+    buf = bytearray(_config_stat_template(server_label, lines, speed_dials))
+    _CONFIG_DEVICE_NAME.pack_into(buf, 12, device_name.encode("ascii", errors="replace")[:15])
+    return bytes(buf)
 
-    dev = device_name.encode("ascii", errors="replace")[:15].ljust(16, b"\x00")
-    user = b"SkinnySim\x00".ljust(40, b"\x00")
-    server = server_label.encode("ascii", errors="replace")[:39].ljust(40, b"\x00")
-    body = dev
-    body += struct.pack("<II", 0, 0)
-    body += user + server
-    body += struct.pack("<II", lines, speed_dials)
-    return pack_message(0x0093, body)
 
+@functools.lru_cache(maxsize=None)
+def _line_stat_template() -> bytes:
+    return schema.LINE_STAT_RES.frame(0, "", "", "", 0)
 
-def line_stat_res(line_number: int, directory_number: str) -> bytes:
-    from simulator.protocol import pack_message
 
-    dn = directory_number.encode("ascii", errors="replace")[:23].ljust(24, b"\x00")
-    fqdn = directory_number.encode("ascii", errors="replace")[:39].ljust(40, b"\x00")
-    label = directory_number.encode("ascii", errors="replace")[:39].ljust(40, b"\x00")
-    body = struct.pack("<I", line_number) + dn + fqdn + label + struct.pack("<I", 0)
-    return pack_message(0x0092, body)
+def line_stat_res(line_number: int, directory_number: str) -> bytes:
+    dn = directory_number.encode("ascii", errors="replace")
+    buf = bytearray(_line_stat_template())
+    _LINE_STAT_FIELDS.pack_into(buf, 12, line_number, dn[:23], dn[:39], dn[:39])
+    return bytes(buf)
 
 
 def forward_stat_res(line_number: int = 1) -> bytes:
-    from simulator.protocol import pack_message
-
-    body = struct.pack("<III", 0, line_number, 0)
-    body += b"\x00" * 24  # forward all
-    body += struct.pack("<I", 0)
-    body += b"\x00" * 24  # forward busy
-    body += struct.pack("<I", 0)
-    body += b"\x00" * 24  # forward no answer
-    return pack_message(0x0090, body)
+    return schema.FORWARD_STAT_RES.frame(line_number=line_number)
 
 
 def speed_dial_stat_res(speed_dial_number: int, dn: str = "", label: str = "") -> bytes:
-    from simulator.protocol import pack_message
+    return schema.SPEED_DIAL_STAT_RES.frame(speed_dial_number, dn, label)
 
-    dn_b = dn.encode("ascii", errors="replace")[:23].ljust(24, b"\x00")
-    label_b = label.encode("ascii", errors="replace")[:39].ljust(40, b"\x00")
-    body = struct.pack("<I", speed_dial_number) + dn_b + label_b
-    return pack_message(0x0091, body)
 
+_time_date_cache: tuple[int, bytes] = (-1, b"")
 
-def time_date_res() -> bytes:
-    from simulator.protocol import pack_message
 
-    now = time.gmtime()
+def time_date_res() -> bytes:
+    """TimeDateRes for the current second (shared by every phone registering in it)."""
+    global _time_date_cache
+    second = int(time.time())
+    cached_second, cached = _time_date_cache
+    if cached_second == second:
+        return cached
+    packet = _build_time_date_res(second)
+    _time_date_cache = (second, packet)
+    return packet
+
+
+def _build_time_date_res(w_systemtime: int) -> bytes:
+    now = time.gmtime(w_systemtime)
     w_year = now.tm_year
     w_month = now.tm_mon
     w_day = now.tm_mday
@@ -436,9 +399,7 @@ def time_date_res() -> bytes:
     w_minute = now.tm_min
     w_second = now.tm_sec
     w_millisecond = 0
-    w_systemtime = int(time.time())
-    body = struct.pack(
-        "<IIIIIIIII",
+    return schema.TIME_DATE_RES.frame(
         w_year,
         w_month,
         w_day_of_week,
@@ -449,15 +410,18 @@ def time_date_res() -> bytes:
         w_millisecond,
         w_systemtime,
     )
-    return pack_message(0x0094, body)
 
 
 def display_prompt_status(prompt: str = "Ready", line_instance: int = 1, call_reference: int = 0) -> bytes:
-    from simulator.protocol import pack_message
+    return schema.DISPLAY_PROMPT_STATUS.frame(0, prompt, line_instance, call_reference)
 
-    text = prompt.encode("ascii", errors="replace")[:31].ljust(32, b"\x00")
-    body = struct.pack("<I", 0) + text + struct.pack("<II", line_instance, call_reference)
-    return pack_message(0x0112, body)
+
+@functools.lru_cache(maxsize=None)
+def registration_ready(*, legacy: bool = False) -> tuple[bytes, ...]:
+    """Idle prompt + soft keys that complete registration (after TimeDateRes)."""
+    if legacy:
+        return legacy_display_prompt_ready(), legacy_select_softkeys_idle()
+    return display_prompt_status("Ready"), select_soft_keys(softkey_set_index=0)
 
 
 def legacy_display_text(
@@ -468,25 +432,16 @@ def legacy_display_text(
     tagged: bool = True,
 ) -> bytes:
     """7912 display lines use 0x8017-tagged text during calls (CUCM capture)."""
-    from simulator.protocol import pack_message
-
     if tagged:
         raw = b"\x80\x17" + text.encode("ascii", errors="replace")[:30]
     else:
         raw = text.encode("ascii", errors="replace")
-    raw = raw[:32].ljust(32, b"\x00")
-    body = struct.pack("<I", 0) + raw + struct.pack("<II", line_instance, call_reference)
-    return pack_message(0x0112, body)
+    return schema.DISPLAY_PROMPT_STATUS.frame(0, raw, line_instance, call_reference)
 
 
 def legacy_display_prompt_dial(line_instance: int = 1, call_reference: int = 0) -> bytes:
     """Empty dial prompt during New Call (CUCM cm_cap frame 85, tag 0x8020)."""
-    from simulator.protocol import pack_message
-
-    raw = b"\x80\x20" + b"\x00" * 30
-    raw = raw[:32].ljust(32, b"\x00")
-    body = struct.pack("<I", 0) + raw + struct.pack("<II", line_instance, call_reference)
-    return pack_message(0x0112, body)
+    return schema.DISPLAY_PROMPT_STATUS.frame(0, b"\x80\x20", line_instance, call_reference)
 
 
 def display_pri_notify(
@@ -496,41 +451,42 @@ def display_pri_notify(
     priority: int = 5,
     tagged: bool = True,
 ) -> bytes:
-    from simulator.protocol import pack_message
-
     if tagged:
         raw = b"\x80\x17" + text.encode("ascii", errors="replace")[:30]
     else:
         raw = text.encode("ascii", errors="replace")
-    raw = raw[:32].ljust(32, b"\x00")
-    body = struct.pack("<II", timeout, priority) + raw
-    return pack_message(0x0120, body)
+    return schema.DISPLAY_PRI_NOTIFY.frame(timeout, priority, raw)
 
 
+@functools.lru_cache(maxsize=None)
 def legacy_select_softkeys_idle() -> bytes:
     from simulator.cucm_legacy_assets import LEGACY_SELECT_SOFTKEYS_IDLE
 
     return normalize_skinny_packet(LEGACY_SELECT_SOFTKEYS_IDLE)
 
 
+@functools.lru_cache(maxsize=None)
 def legacy_display_prompt_idle() -> bytes:
     from simulator.cucm_legacy_assets import LEGACY_DISPLAY_PROMPT_IDLE
 
     return normalize_skinny_packet(LEGACY_DISPLAY_PROMPT_IDLE)
 
 
+@functools.lru_cache(maxsize=None)
 def legacy_display_prompt_ready() -> bytes:
     from simulator.cucm_legacy_assets import LEGACY_DISPLAY_PROMPT_READY
 
     return normalize_skinny_packet(LEGACY_DISPLAY_PROMPT_READY)
 
 
+@functools.lru_cache(maxsize=None)
 def legacy_select_softkeys_onhook() -> bytes:
     from simulator.cucm_legacy_assets import LEGACY_SELECT_SOFTKEYS_ONHOOK
 
     return normalize_skinny_packet(LEGACY_SELECT_SOFTKEYS_ONHOOK)
 
 
+@functools.lru_cache(maxsize=None)
 def feature_stat_res(*, legacy: bool = False) -> bytes:
     if legacy:
         from simulator.cucm_legacy_assets import LEGACY_FEATURE_STAT_RES
@@ -549,12 +505,10 @@ def select_soft_keys(
     softkey_set_index: int = 0,
     valid_key_mask: int = 0xFFFFFFFF,
 ) -> bytes:
-    from simulator.protocol import pack_message
-
-    body = struct.pack("<IIII", line_instance, call_reference, softkey_set_index, valid_key_mask)
-    return pack_message(0x0110, body)
+    return schema.SELECT_SOFT_KEYS.frame(line_instance, call_reference, softkey_set_index, valid_key_mask)
 
 
+@functools.lru_cache(maxsize=None)
 def keepalive_ack() -> bytes:
     from simulator.protocol import pack_message
 
@@ -562,9 +516,7 @@ def keepalive_ack() -> bytes:
 
 
 def unregister_ack(status: int = 0) -> bytes:
-    from simulator.protocol import pack_message
-
-    return pack_message(0x0118, struct.pack("<I", status))
+    return schema.UNREGISTER_ACK.frame(status)
 
 
 def reset_device() -> bytes:
@@ -1,4 +1,4 @@
-"""Skinny / SCCP framing helpers (server side)."""
+"""Skinny / SCCP framing helpers (server side); reads go through ``SkinnyFrameReader``."""
 
 from __future__ import annotations
 
@@ -12,32 +12,6 @@ def pack_message(msg_id: int, payload: bytes = b"") -> bytes:
     return struct.pack("<III", data_length, 0, msg_id) + payload
 
 
-def read_message(sock) -> tuple[int, bytes] | None:
-    """
-    Read one Skinny message from a connected socket.
-    Returns (msg_id, payload) or None on clean close.
-    """
-    header = _recv_exact(sock, 12)
-    if not header:
-        return None
-    data_length, _version, msg_id = struct.unpack("<III", header)
-    payload_len = max(0, data_length - 4)
-    payload = _recv_exact(sock, payload_len) if payload_len else b""
-    if payload is None and payload_len:
-        return None
-    return msg_id, payload
-
-
-def _recv_exact(sock, nbytes: int) -> bytes | None:
-    buf = bytearray()
-    while len(buf) < nbytes:
-        chunk = sock.recv(nbytes - len(buf))
-        if not chunk:
-            return None if not buf else None
-        buf.extend(chunk)
-    return bytes(buf)
-
-
 @dataclass
 class RegisterReqInfo:
     device_name: str
@@ -0,0 +1,272 @@
+"""One-thread RTP I/O for many legs: a selector for receive, a shared tick for send.
+
+``RTPReceiver`` / ``RTPSender`` constructed with ``engine=RTPEngine`` do not
+start their own threads. The engine thread waits on every receiver socket in
+a single selector and, on a monotonic schedule of ``tick_ms`` (20 ms), plays
+out the receivers' jitter buffers and then asks each sender for its next
+packet. Ticks are scheduled from the engine start time rather than from the
+previous wake-up, so the clock does not drift; if the loop falls more than
+``MAX_LAG_TICKS`` behind (a GC pause, a stalled host) it resynchronises
+instead of bursting.
+
+``RTCPSession`` objects (``utils/rtcp.py``) can be added too: the selector
+reads their sockets and every tick calls their ``poll`` to send reports that
+are due.
+
+Registration is thread-safe: calls queue a change and wake the selector
+through a socketpair; the selector itself is only touched by the engine
+thread.
+"""
+
+from __future__ import annotations
+
+import logging
+import selectors
+import socket
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class RTPEngine:
+    MAX_LAG_TICKS = 5
+    # Datagrams drained per ready socket per wake-up (keeps one busy leg from
+    # starving the tick).
+    MAX_READS = 32
+
+    def __init__(self, tick_ms: int = 20, name: str = "rtp-engine"):
+        self.tick_ms = int(tick_ms)
+        self.tick = self.tick_ms / 1000.0
+        self.name = name
+        self.ticks = 0
+        self.late_ticks = 0
+        self.max_lag_ms = 0.0
+        # Packet counters (engine thread only) and their per-second rates,
+        # recomputed about once a second on the tick.
+        self.rx_packets = 0
+        self.tx_packets = 0
+        self.rx_pps = 0.0
+        self.tx_pps = 0.0
+        self.rtcp_packets = 0
+        self._rate_at = 0.0
+        self._rate_base = (0, 0)
+        self._receivers: dict[int, object] = {}   # id(rx) -> RTPReceiver
+        self._senders: dict[int, object] = {}     # id(tx) -> RTPSender
+        self._rtcp: dict[int, object] = {}        # id(session) -> RTCPSession
+        self._pending: list[tuple[str, object]] = []
+        self._lock = threading.Lock()
+        self._sel: selectors.BaseSelector | None = None
+        self._wake_r: socket.socket | None = None
+        self._wake_w: socket.socket | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    # ---- registration (any thread) ----
+    def add_receiver(self, rx) -> None:
+        rx.sock.setblocking(False)
+        self._submit("add_rx", rx)
+
+    def remove_receiver(self, rx) -> None:
+        self._submit("remove_rx", rx)
+
+    def add_sender(self, tx) -> None:
+        if tx.ptime_ms % self.tick_ms:
+            raise ValueError(f"ptime {tx.ptime_ms} ms is not a multiple of the {self.tick_ms} ms engine tick")
+        self._submit("add_tx", tx)
+
+    def remove_sender(self, tx) -> None:
+        self._submit("remove_tx", tx)
+
+    def add_rtcp(self, session) -> None:
+        session.sock.setblocking(False)
+        self._submit("add_rtcp", session)
+
+    def remove_rtcp(self, session) -> None:
+        self._submit("remove_rtcp", session)
+
+    @property
+    def leg_counts(self) -> tuple[int, int]:
+        return len(self._receivers), len(self._senders)
+
+    def _submit(self, op: str, obj) -> None:
+        with self._lock:
+            self._pending.append((op, obj))
+            self._ensure_started()
+        try:
+            self._wake_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass  # wake pipe full (already pending) or engine stopping
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._sel = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._sel.register(self._wake_r, selectors.EVENT_READ, None)
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 1.0) -> None:
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return
+            self._stop.set()
+        try:
+            self._wake_w.send(b"\0")
+        except OSError:
+            pass
+        thread.join(timeout=timeout)
+        with self._lock:
+            self._thread = None
+
+    # ---- engine thread ----
+    def _apply_pending(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, []
+        for op, obj in pending:
+            if op == "add_rx":
+                if obj._stop.is_set():
+                    continue
+                try:
+                    self._sel.register(obj.sock, selectors.EVENT_READ, obj)
+                except (ValueError, KeyError, OSError):
+                    continue
+                self._receivers[id(obj)] = obj
+            elif op == "remove_rx":
+                if self._receivers.pop(id(obj), None) is not None:
+                    self._unregister(obj.sock)
+            elif op == "add_tx":
+                if not obj._stop.is_set():
+                    self._senders[id(obj)] = obj
+            elif op == "remove_tx":
+                self._senders.pop(id(obj), None)
+            elif op == "add_rtcp":
+                if obj._stop.is_set():
+                    continue
+                try:
+                    self._sel.register(obj.sock, selectors.EVENT_READ, obj)
+                except (ValueError, KeyError, OSError):
+                    continue
+                self._rtcp[id(obj)] = obj
+            elif op == "remove_rtcp":
+                if self._rtcp.pop(id(obj), None) is not None:
+                    self._unregister(obj.sock)
+
+    def _unregister(self, sock) -> None:
+        try:
+            self._sel.unregister(sock)
+        except (KeyError, ValueError, OSError):
+            pass
+
+    def _drain_wake(self) -> None:
+        try:
+            while self._wake_r.recv(512):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+    def _read(self, rx) -> None:
+        sock = rx.sock
+        for _ in range(self.MAX_READS):
+            try:
+                data, _ = sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                # socket closed under us; the pending remove will follow
+                self._receivers.pop(id(rx), None)
+                self._rtcp.pop(id(rx), None)
+                self._unregister(sock)
+                return
+            if id(rx) in self._rtcp:
+                self.rtcp_packets += 1
+            else:
+                self.rx_packets += 1
+            try:
+                rx.handle_datagram(data)
+            except Exception:
+                logger.exception("RTP engine: receiver %s failed", getattr(rx, "port", "?"))
+
+    def _on_tick(self, now: float) -> None:
+        self.ticks += 1
+        for rx in list(self._receivers.values()):
+            if rx.jitter is not None:
+                try:
+                    rx.playout(now)
+                except Exception:
+                    logger.exception("RTP engine: playout failed on %s", getattr(rx, "port", "?"))
+        for key, tx in list(self._senders.items()):
+            every = tx.ptime_ms // self.tick_ms
+            if every > 1 and self.ticks % every:
+                continue
+            if tx.send_next():
+                self.tx_packets += 1
+            else:
+                self._senders.pop(key, None)
+        for session in list(self._rtcp.values()):
+            try:
+                session.poll(now)
+            except Exception:
+                logger.exception("RTP engine: RTCP report failed on %s", getattr(session, "port", "?"))
+        elapsed = now - self._rate_at
+        if elapsed >= 1.0:
+            rx0, tx0 = self._rate_base
+            if self._rate_at:
+                self.rx_pps = (self.rx_packets - rx0) / elapsed
+                self.tx_pps = (self.tx_packets - tx0) / elapsed
+            self._rate_at = now
+            self._rate_base = (self.rx_packets, self.tx_packets)
+
+    def _run(self) -> None:
+        sel = self._sel
+        next_tick = time.monotonic() + self.tick
+        try:
+            while not self._stop.is_set():
+                timeout = max(next_tick - time.monotonic(), 0.0)
+                for key, _ in sel.select(timeout):
+                    if key.data is None:
+                        self._drain_wake()
+                    else:
+                        self._read(key.data)
+                if self._pending:
+                    self._apply_pending()
+                now = time.monotonic()
+                if now >= next_tick:
+                    lag = now - next_tick
+                    if lag > self.tick:
+                        self.late_ticks += 1
+                    self.max_lag_ms = max(self.max_lag_ms, lag * 1000.0)
+                    self._on_tick(now)
+                    next_tick += self.tick
+                    if now - next_tick > self.MAX_LAG_TICKS * self.tick:
+                        next_tick = now + self.tick
+        finally:
+            for rx in [*self._receivers.values(), *self._rtcp.values()]:
+                self._unregister(rx.sock)
+            self._receivers.clear()
+            self._rtcp.clear()
+            self._senders.clear()
+            sel.close()
+            self._wake_r.close()
+            self._wake_w.close()
+
+    def stats(self) -> dict:
+        rx, tx = self.leg_counts
+        return {
+            "receivers": rx,
+            "senders": tx,
+            "ticks": self.ticks,
+            "late_ticks": self.late_ticks,
+            "max_lag_ms": round(self.max_lag_ms, 2),
+            "rx_packets": self.rx_packets,
+            "tx_packets": self.tx_packets,
+            "rx_pps": round(self.rx_pps, 1),
+            "tx_pps": round(self.tx_pps, 1),
+            "rtcp_sessions": len(self._rtcp),
+            "rtcp_rx_packets": self.rtcp_packets,
+        }
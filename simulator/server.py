@@ -1,21 +1,34 @@
-"""Minimal SCCP / Skinny CallManager simulator."""
+"""Minimal SCCP / Skinny CallManager simulator.
+
+Two server modes share the same ``CallHub`` / ``DeviceRegistry``:
+``threads`` (default) runs one blocking thread per phone; ``asyncio`` runs every
+session as a coroutine on a single event loop with non-blocking writes, which
+holds up far better when hundreds of phones register at once.
+"""
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import socket
 import threading
 
-from simulator.call_hub import CallHub
+from simulator.call_hub import INTERDIGIT_TIMEOUT_SEC, CallHub
+from simulator.dial_plan import DialPlan
 from simulator.media_hub import SimMediaHub
+from simulator.outbound import DEFAULT_MAX_BYTES, DEFAULT_STALL_SEC
 from simulator.registry import DeviceRegistry
 from simulator.session import SkinnySession
 from simulator.tftp_service import TftpConfigService, resolve_advertise_host
 from simulator.cip_http import start_cip_http
 from simulator.admin_http import start_admin_http
+from utils.aio_transport import TransportSocket
+from utils.timers import TimerScheduler
 
 logger = logging.getLogger(__name__)
 
+SERVER_MODES = ("threads", "asyncio")
+
 
 class SkinnySimulator:
     def __init__(
@@ -37,9 +50,18 @@ class SkinnySimulator:
         rtp_sim_loopback_delay_ms: float = 1500.0,
         rtp_sim_loopback_gain_db: float = 12.0,
         rtp_sim_loopback_preamble_sec: float = 2.0,
+        rtp_sim_rtcp_interval: float = 0.0,
         ivr_dn: str | None = None,
         admin_port: int = 8090,
+        server_mode: str = "threads",
+        backlog: int = 128,
+        outbound_max_bytes: int = DEFAULT_MAX_BYTES,
+        slow_peer_sec: float = DEFAULT_STALL_SEC,
+        dial_plan: str | DialPlan | None = None,
+        interdigit_timeout: float = INTERDIGIT_TIMEOUT_SEC,
     ):
+        if server_mode not in SERVER_MODES:
+            raise ValueError(f"server_mode must be one of {SERVER_MODES}, got {server_mode!r}")
         self.host = host
         self.port = port
         self.server_name = server_name
@@ -47,15 +69,28 @@ class SkinnySimulator:
         self.ivr_dn = str(ivr_dn) if ivr_dn else None
         if self.ivr_dn:
             self.registry.reserve_dn(self.ivr_dn)
+        # Deferred call / media actions share one heap instead of a thread each.
+        self.timers = TimerScheduler(name="sim-timers")
         media_hub = SimMediaHub(
             mode=rtp_sim_peer,
             loopback_delay_ms=rtp_sim_loopback_delay_ms,
             loopback_gain_db=rtp_sim_loopback_gain_db,
             loopback_preamble_sec=rtp_sim_loopback_preamble_sec,
+            timers=self.timers,
+            rtcp_interval=rtp_sim_rtcp_interval,
         ) if rtp_sim_peer != "off" else None
         if self.ivr_dn and media_hub is None:
-            media_hub = SimMediaHub(mode="loopback")
-        self.hub = CallHub(media_hub=media_hub, ivr_dn=self.ivr_dn)
+            media_hub = SimMediaHub(mode="loopback", timers=self.timers, rtcp_interval=rtp_sim_rtcp_interval)
+        if isinstance(dial_plan, str):
+            dial_plan = DialPlan.load(dial_plan)
+            logger.info("Dial plan: %d route patterns", len(dial_plan))
+        self.hub = CallHub(
+            media_hub=media_hub,
+            ivr_dn=self.ivr_dn,
+            timers=self.timers,
+            dial_plan=dial_plan,
+            interdigit_timeout=interdigit_timeout,
+        )
         self._media_hub = media_hub
         if self.ivr_dn:
             logger.info(
@@ -75,6 +110,14 @@ class SkinnySimulator:
         self._sock: socket.socket | None = None
         self._thread: threading.Thread | None = None
         self._stop = threading.Event()
+        self.server_mode = server_mode
+        self.backlog = int(backlog)
+        # Per-session send queue cap / no-progress limit before a phone is dropped.
+        self.outbound_max_bytes = outbound_max_bytes
+        self.slow_peer_sec = slow_peer_sec
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._async_stop: asyncio.Event | None = None
+        self._session_tasks: set[asyncio.Task] = set()
         self.tftp: TftpConfigService | None = None
         self._cip_http = None
         self._admin_http = None
@@ -136,12 +179,14 @@ class SkinnySimulator:
         self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self._sock.bind((self.host, self.port))
-        self._sock.listen(32)
+        self._sock.listen(self.backlog)
         bound = self._sock.getsockname()
         logger.info(
-            "Skinny simulator listening on %s:%s (DNs from %s%s)",
+            "Skinny simulator listening on %s:%s [%s, backlog %s] (DNs from %s%s)",
             bound[0],
             bound[1],
+            self.server_mode,
+            self.backlog,
             self.registry._dn_start,
             f", IVR DN {self.ivr_dn}" if self.ivr_dn else "",
         )
@@ -171,16 +216,22 @@ class SkinnySimulator:
                 server_name=self.server_name,
             )
             logger.info("Simulator admin UI http://%s:%s/", admin_host, self.admin_port)
+        serve = self._serve_forever
+        if self.server_mode == "asyncio":
+            self._loop = asyncio.new_event_loop()
+            self._async_stop = asyncio.Event()
+            serve = self._serve_asyncio
         if background:
-            self._thread = threading.Thread(target=self._serve_forever, name="skinny-sim", daemon=True)
+            self._thread = threading.Thread(target=serve, name="skinny-sim", daemon=True)
             self._thread.start()
         else:
-            self._serve_forever()
+            serve()
 
     def stop(self) -> None:
         self._stop.set()
         if self._media_hub is not None:
             self._media_hub.stop_all()
+        self.timers.stop()
         if self.tftp:
             self.tftp.stop()
         if self._admin_http:
@@ -191,7 +242,13 @@ class SkinnySimulator:
             self._cip_http.shutdown()
             self._cip_http.server_close()
             self._cip_http = None
-        if self._sock:
+        loop = self._loop
+        if loop is not None and self._async_stop is not None:
+            try:
+                loop.call_soon_threadsafe(self._async_stop.set)
+            except RuntimeError:
+                pass  # loop already closed
+        if self._sock and loop is None:  # asyncio mode: the server owns and closes the socket
             try:
                 self._sock.close()
             except OSError:
@@ -226,5 +283,49 @@ class SkinnySimulator:
             self.server_name,
             self.hub,
             tftp=self.tftp,
+            outbound_max_bytes=self.outbound_max_bytes,
+            slow_peer_sec=self.slow_peer_sec,
         )
         session.run()
+
+    # ---- asyncio server mode ----
+    def _serve_asyncio(self) -> None:
+        loop = self._loop
+        assert loop is not None
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self._serve_async())
+        finally:
+            loop.close()
+
+    async def _serve_async(self) -> None:
+        assert self._sock is not None and self._async_stop is not None
+        server = await asyncio.start_server(self._handle_client_async, sock=self._sock, backlog=self.backlog)
+        async with server:
+            await self._async_stop.wait()
+        tasks = list(self._session_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _handle_client_async(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._session_tasks.add(task)
+        session = SkinnySession(
+            TransportSocket(writer.transport, asyncio.get_running_loop()),
+            writer.get_extra_info("peername"),
+            self.registry,
+            self.server_name,
+            self.hub,
+            tftp=self.tftp,
+            outbound_max_bytes=self.outbound_max_bytes,
+            slow_peer_sec=self.slow_peer_sec,
+        )
+        try:
+            await session.run_async(reader, writer)
+        except asyncio.CancelledError:
+            # Server stopping: run_async's finally closed the session. Not
+            # re-raising keeps asyncio's stream callback from logging it.
+            pass
+        finally:
+            self._session_tasks.discard(task)
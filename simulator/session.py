@@ -2,16 +2,23 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import socket
 import struct
+import threading
+from collections import Counter
 from typing import TYPE_CHECKING
 
 from simulator import payloads
 from simulator.call_hub import CallHub, keypad_to_char
-from simulator.protocol import parse_register_req, read_message
+from simulator.outbound import DEFAULT_MAX_BYTES, DEFAULT_STALL_SEC, OutboundQueue, write_batch
+from simulator.protocol import parse_register_req
 from simulator.registry import DeviceRegistry
 from simulator.tftp_service import TftpConfigService
+from utils import skinny_schema as schema
+from utils.aio_transport import TransportSocket
+from utils.skinny_framing import SkinnyFrameReader
 
 if TYPE_CHECKING:
     from simulator.call_hub import SimCall
@@ -40,6 +47,13 @@ MSG_KEYPAD = 0x0003
 MSG_SOFTKEY = 0x0026
 MSG_OPEN_RX_ACK = 0x0022
 
+# asyncio mode: bytes requested per StreamReader.read()
+READ_CHUNK = 65536
+# On disconnect, how long the writer may keep flushing queued packets.
+DRAIN_SEC = 1.0
+# Message id of a queued frame (after the length and version words).
+_FRAME_MSG_ID = struct.Struct("<I")
+
 
 class SkinnySession:
     def __init__(
@@ -50,6 +64,9 @@ class SkinnySession:
         server_name: str,
         hub: CallHub,
         tftp: TftpConfigService | None = None,
+        *,
+        outbound_max_bytes: int = DEFAULT_MAX_BYTES,
+        slow_peer_sec: float = DEFAULT_STALL_SEC,
     ):
         self.conn = conn
         self.addr = addr
@@ -68,50 +85,175 @@ class SkinnySession:
         self._template_profile = "modern"
         self.active_call: SimCall | None = None
         self.awaiting_media_ack = False
+        # send() only queues; a writer thread / coroutine owns the socket's send side.
+        self.outbound = OutboundQueue(outbound_max_bytes, slow_peer_sec)
+        self.slow_peer = False
+        # Replies to the frames of one read, queued together by _handle_frames.
+        self._reply_batch: list[bytes] | None = None
+        self._batch_thread = 0
+        # Skinny messages by id for /metrics. Each has one writer (the reader
+        # and the writer of this session), so plain increments are safe.
+        self.rx_messages: Counter[int] = Counter()
+        self.tx_messages: Counter[int] = Counter()
 
     def run(self) -> None:
+        writer = threading.Thread(
+            target=self._write_loop,
+            name=f"skinny-tx-{self.addr[0]}:{self.addr[1]}",
+            daemon=True,
+        )
+        writer.start()
+        reader = SkinnyFrameReader(self.conn)
+        try:
+            while reader.fill():
+                if not self._handle_frames(reader):
+                    return
+        except (ConnectionResetError, BrokenPipeError, OSError, ValueError) as exc:
+            logger.debug("Session %s closed: %s", self.device_name or self.addr, exc)
+        finally:
+            self.outbound.close(drain=True)
+            writer.join(timeout=DRAIN_SEC)
+            self._closed()
+
+    async def run_async(self, stream: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Coroutine twin of ``run`` for the asyncio server (``conn`` is a TransportSocket)."""
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+
+        def _wake() -> None:
+            try:
+                loop.call_soon_threadsafe(ready.set)
+            except RuntimeError:
+                pass  # loop closed
+
+        self.outbound.on_ready = _wake
+        tx = asyncio.ensure_future(self._write_loop_async(writer, ready))
+        reader = SkinnyFrameReader()
         try:
             while True:
-                msg = read_message(self.conn)
-                if msg is None:
-                    break
-                msg_id, payload = msg
-                if not self._handle(msg_id, payload):
-                    break
-        except (ConnectionResetError, BrokenPipeError, OSError) as exc:
+                data = await stream.read(READ_CHUNK)
+                if not data:
+                    return
+                reader.feed(data)
+                if not self._handle_frames(reader):
+                    return
+        except (ConnectionResetError, BrokenPipeError, OSError, ValueError) as exc:
             logger.debug("Session %s closed: %s", self.device_name or self.addr, exc)
         finally:
-            self.hub.unregister_session(self)
+            self.outbound.close(drain=True)
             try:
-                self.conn.close()
-            except OSError:
-                pass
-            if self.device_name:
-                logger.info(
-                    "Device %s (%s) disconnected",
-                    self.device_name,
-                    self.directory_number or "?",
-                )
+                await asyncio.wait_for(tx, DRAIN_SEC)
+            except asyncio.TimeoutError:
+                self.disconnect()  # peer stopped reading: drop what is left
+            self._closed()
 
-    def send(self, packet: bytes) -> None:
-        if len(packet) >= 12:
-            from utils.skinny_messages import get_message_name
-            from utils.logs import log_skinny_wire
-
-            _mid = struct.unpack("<III", packet[:12])[2]
-            log_skinny_wire(
-                logger,
-                self.device_name or self.addr[0],
-                "SEND",
-                _mid,
-                get_message_name(_mid),
-                len(packet),
+    def _handle_frames(self, reader: SkinnyFrameReader) -> bool:
+        """Handle every complete frame read so far; False ends the session.
+
+        Replies this session sends to itself meanwhile are collected and
+        queued at the end in one ``put_many``, so a registration burst
+        (RegisterReq .. TimeDateReq) is answered with a single write.
+        """
+        self._reply_batch = []
+        self._batch_thread = threading.get_ident()
+        try:
+            for msg_id, payload in reader.frames():
+                if not self._handle(msg_id, bytes(payload)):
+                    return False
+            return True
+        finally:
+            batch, self._reply_batch = self._reply_batch, None
+            if batch and not self.outbound.put_many(batch) and not self.outbound.closed:
+                self._drop_slow_peer()
+
+    def _write_loop(self) -> None:
+        queue = self.outbound
+        while True:
+            batch = queue.take()
+            if not batch:
+                return
+            try:
+                write_batch(self.conn, batch)
+            except OSError as exc:
+                logger.debug("Session %s write failed: %s", self.device_name or self.addr, exc)
+                self.disconnect()
+                return
+            queue.done(batch)
+            self._count_tx(batch)
+
+    async def _write_loop_async(self, writer: asyncio.StreamWriter, ready: asyncio.Event) -> None:
+        queue = self.outbound
+        while True:
+            batch = queue.take(0)
+            if batch:
+                try:
+                    writer.writelines(batch)
+                    await writer.drain()
+                except OSError as exc:
+                    logger.debug("Session %s write failed: %s", self.device_name or self.addr, exc)
+                    self.disconnect()
+                    return
+                queue.done(batch)
+                self._count_tx(batch)
+            elif queue.closed:
+                return
+            else:
+                await ready.wait()
+                ready.clear()
+
+    def _count_tx(self, batch: list[bytes]) -> None:
+        counts = self.tx_messages
+        for packet in batch:
+            if len(packet) >= 12:
+                counts[_FRAME_MSG_ID.unpack_from(packet, 8)[0]] += 1
+
+    def _closed(self) -> None:
+        self.hub.unregister_session(self)
+        self._close_conn(abort=False)
+        if self.device_name:
+            logger.info(
+                "Device %s (%s) disconnected",
+                self.device_name,
+                self.directory_number or "?",
             )
-        self.conn.sendall(packet)
 
-    def send_many(self, packets: list[bytes]) -> None:
+    def send(self, packet: bytes) -> None:
+        self.send_many((packet,))
+
+    def send_many(self, packets) -> None:
+        """Queue ``packets`` in order with one queue put (or onto the reply batch)."""
+        from utils.skinny_messages import get_message_name
+        from utils.logs import log_skinny_wire
+
         for packet in packets:
-            self.send(packet)
+            if len(packet) >= 12:
+                _mid = struct.unpack_from("<III", packet)[2]
+                log_skinny_wire(
+                    logger,
+                    self.device_name or self.addr[0],
+                    "SEND",
+                    _mid,
+                    get_message_name(_mid),
+                    len(packet),
+                )
+        batch = self._reply_batch
+        if batch is not None and self._batch_thread == threading.get_ident():
+            batch.extend(packets)
+            return
+        if not self.outbound.put_many(list(packets)) and not self.outbound.closed:
+            self._drop_slow_peer()
+
+    def _drop_slow_peer(self) -> None:
+        stats = self.outbound.stats()
+        self.slow_peer = True
+        logger.warning(
+            "Disconnecting slow peer %s (%s): %s packets / %s bytes queued",
+            self.device_name or self.addr[0],
+            self.directory_number or "?",
+            stats["depth"],
+            stats["bytes_queued"],
+        )
+        self.disconnect()
 
     def _handle(self, msg_id: int, payload: bytes) -> bool:
         from utils.skinny_messages import get_message_name
@@ -125,6 +267,7 @@ class SkinnySession:
             get_message_name(msg_id),
             len(payload),
         )
+        self.rx_messages[msg_id] += 1
         if msg_id == MSG_REGISTER_REQ:
             return self._on_register(payload)
         if msg_id == MSG_IP_PORT:
@@ -257,18 +400,11 @@ class SkinnySession:
             info.station_ip,
             "legacy" if self._legacy_phone else self._template_profile,
         )
-        self.send(payloads.register_ack())
-        self.send(payloads.capabilities_req())
+        self.send_many([payloads.register_ack(), payloads.capabilities_req()])
         return True
 
     def _finish_registration(self) -> None:
-        self.send(payloads.time_date_res())
-        if self._legacy_phone:
-            self.send(payloads.legacy_display_prompt_ready())
-            self.send(payloads.legacy_select_softkeys_idle())
-        else:
-            self.send(payloads.display_prompt_status("Ready"))
-            self.send(payloads.select_soft_keys(softkey_set_index=0))
+        self.send_many([payloads.time_date_res(), *payloads.registration_ready(legacy=self._legacy_phone)])
         self._registered = True
         self.hub.register_session(self)
         logger.info(
@@ -288,7 +424,8 @@ class SkinnySession:
     def _on_softkey(self, payload: bytes) -> bool:
         if len(payload) < 12:
             return True
-        softkey_id, line, call_ref = struct.unpack("<III", payload[:12])
+        event = schema.SOFTKEY_EVENT.decode(payload)
+        softkey_id, line, call_ref = event.softkey_event, event.line_instance, event.call_reference
         logger.info(
             "(%s) SoftKeyEvent id=%s line=%s ref=%s",
             self.device_name,
@@ -379,6 +516,19 @@ class SkinnySession:
 
     def disconnect(self) -> None:
         """Force-close the Skinny TCP session (phone should re-register)."""
+        self._close_conn(abort=True)
+
+    def _close_conn(self, *, abort: bool) -> None:
+        self.outbound.close()
+        if isinstance(self.conn, TransportSocket):
+            # asyncio close() waits for the write buffer to drain, which a
+            # stuck peer never does; a forced disconnect aborts instead so
+            # run_async sees the connection go.
+            if abort:
+                self.conn.abort()
+            else:
+                self.conn.close()
+            return
         try:
             self.conn.shutdown(socket.SHUT_RDWR)
         except OSError:
@@ -7,6 +7,7 @@ import os
 import shutil
 import tempfile
 import threading
+from collections import Counter
 from pathlib import Path
 
 import tftpy
@@ -85,6 +86,10 @@ class TftpConfigService:
     Serves XMLDefault.cnf.xml and per-device SEP*.cnf.xml from a TFTP root.
 
     Unknown SEP files are created on demand (DN reserved from the registry).
+
+    tftpy itself is rooted at an empty directory so that every read request
+    reaches ``_dyn_file``, which serves files from the real root and counts
+    requests for ``stats()``.
     """
 
     def __init__(
@@ -113,6 +118,9 @@ class TftpConfigService:
         self._server: tftpy.TftpServer | None = None
         self._thread: threading.Thread | None = None
         self._lock = threading.Lock()
+        self._serve_root: str | None = None
+        # Read requests by outcome; only the tftpy thread writes these.
+        self.requests: Counter[str] = Counter()
         self._write_xml_default()
         self._seed_static_assets()
 
@@ -183,8 +191,18 @@ class TftpConfigService:
         return path
 
     def _dyn_file(self, requested: str, **kwargs):
-        """tftpy dyn_file_func: materialize XML on disk and return a real file object."""
+        """tftpy dyn_file_func: serve from the root, else materialize the XML config."""
         name = requested.replace("\\", "/").lstrip("/")
+        path = self._root / name
+        # tftpy only vetted the raw name against its empty root, where a
+        # backslash is an ordinary character: check the real path here.
+        if not path.resolve().is_relative_to(self._root.resolve()):
+            logger.warning("TFTP request outside the root refused: %r", requested)
+            self.requests["denied"] += 1
+            return None
+        if path.is_file():
+            self.requests["file"] += 1
+            return open(path, "rb")
         sep = _sep_name_from_filename(name)
         if sep:
             dn = self.registry.assign(sep)
@@ -192,16 +210,29 @@ class TftpConfigService:
         elif name == "XMLDefault.cnf.xml":
             text = build_xml_default(self.cm_host, self.skinny_port)
         else:
+            self.requests["not_found"] += 1
             return None
+        self.requests["config"] += 1
 
-        path = self._root / name
         with self._lock:
             path.write_text(text, encoding="utf-8")
         return open(path, "rb")
 
+    def stats(self) -> dict:
+        counts = dict(self.requests)
+        return {
+            "requests": sum(counts.values()),
+            "files": counts.get("file", 0),
+            "configs": counts.get("config", 0),
+            "not_found": counts.get("not_found", 0),
+            "denied": counts.get("denied", 0),
+        }
+
     def start(self, background: bool = True) -> None:
+        if self._serve_root is None:
+            self._serve_root = tempfile.mkdtemp(prefix="pyskinny-tftp-serve-")
         self._server = tftpy.TftpServer(
-            str(self._root),
+            self._serve_root,
             dyn_file_func=self._dyn_file,
         )
         if background:
@@ -232,7 +263,7 @@ class TftpConfigService:
                 time.sleep(1)
                 try:
                     self._server = tftpy.TftpServer(
-                        str(self._root),
+                        self._serve_root,
                         dyn_file_func=self._dyn_file,
                     )
                 except Exception as recreate_exc:
@@ -249,3 +280,6 @@ class TftpConfigService:
         if self._thread and self._thread.is_alive():
             self._thread.join(timeout=2)
             self._thread = None
+        if self._serve_root is not None:
+            shutil.rmtree(self._serve_root, ignore_errors=True)
+            self._serve_root = None
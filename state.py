@@ -6,6 +6,9 @@ import json
 import threading
 import time
 from config import load_config, resolve_config_path
+from collections.abc import Mapping
+from utils.call_table import CallTable
+from utils.timers import default_scheduler
 from datetime import datetime, timezone
 
 
@@ -76,7 +79,7 @@ class PhoneState:
         self._current_prompt = ""
         self.prompt_details = {}
         self._prompt_lock = threading.Lock()
-        self._prompt_restore_thread = None
+        self._prompt_restore_timer = None
         self._prompt_watchers = []
 
         # SoftKeySetRes
@@ -122,7 +125,9 @@ class PhoneState:
         self.active_call = False
         self.active_call_line_instance = 0
         self.calls = {}
-        self.calls_list = []
+        # Bumped on every call-state update / dispatched message; see wait_until().
+        self._change_cond = threading.Condition()
+        self._change_seq = 0
 
         # added for softphone
         self.active_calls_list = []
@@ -155,11 +160,18 @@ class PhoneState:
         self.rtp_tone_hz = 1000.0
         self.rtp_record = False
         self.rtp_record_dir = "logs/rtp"
+        self.rtp_record_format = "pcm"    # or "g711": payload passthrough
+        self.rtp_record_stereo = False
         self.rtp_pt_override = None
         self.rtp_stats = False
         self.rtp_stats_interval = 0.0
         self._rtp_stats = None
         self._rtp_stats_monitor = None
+        # RTCP report interval in seconds (0 = no RTCP; utils/rtcp.py).
+        self.rtcp_interval = 0.0
+        self._rtcp = None
+        # Time 1 in N handler calls per message ID (0 = dispatch profiling off).
+        self.profile_dispatch = 0
 
         # Key Value storage
         self.kv_dict = {}
@@ -196,25 +208,56 @@ class PhoneState:
             old_prompt = self.current_prompt
             self.current_prompt = text
 
+        # A newer prompt supersedes any pending restore.
+        pending = self._prompt_restore_timer
+        if pending is not None:
+            pending.cancel()
+            self._prompt_restore_timer = None
+
         if duration > 0:
             def restore():
-                time.sleep(duration)
                 with self._prompt_lock:
                     # Only restore if no newer prompt was set
                     if self.current_prompt == text:
                         self.current_prompt = old_prompt
 
-            # Cancel any previous restore thread if still running
-            if self._prompt_restore_thread and self._prompt_restore_thread.is_alive():
-                # No cancel mechanism in threads, but we won't wait for it
-                pass
+            self._prompt_restore_timer = default_scheduler().call_later(duration, restore)
+
+    @property
+    def calls(self) -> CallTable:
+        return self._calls
+
+    @calls.setter
+    def calls(self, rows):
+        # Plain dict rows (tests, saved state) are converted to CallRecords.
+        if not isinstance(rows, CallTable):
+            rows = CallTable(rows or {}, on_evict=self._forget_call)
+        self._calls = rows
 
-            # Start a new restore thread
-            self._prompt_restore_thread = threading.Thread(target=restore, daemon=True)
-            self._prompt_restore_thread.start()
+    @property
+    def calls_list(self):
+        """Call keys still retained in ``calls`` (ended calls are bounded), oldest first."""
+        return list(self._calls)
+
+    def _forget_call(self, key):
+        callinfo = getattr(self, "callinfo", None)
+        if callinfo is not None:
+            callinfo.pop(key, None)
 
     def set_call_state(self, call_id, state):
         self.calls[call_id] = state
+        self.notify_changed()
+
+    def notify_changed(self):
+        """Wake wait_until() callers; call after mutating call / softkey state."""
+        with self._change_cond:
+            self._change_seq += 1
+            self._change_cond.notify_all()
+
+    def wait_until(self, predicate, timeout=None) -> bool:
+        """Block until predicate() is true (re-checked on each notify_changed)."""
+        with self._change_cond:
+            return bool(self._change_cond.wait_for(predicate, timeout))
 
     def to_dict(self):
         def safe_convert(value):
@@ -222,14 +265,17 @@ class PhoneState:
                 return value.is_set()
             elif isinstance(value, datetime):
                 return value.isoformat()
-            elif isinstance(value, dict):
+            elif isinstance(value, Mapping):
                 return {k: safe_convert(v) for k, v in value.items()}
             elif isinstance(value, (list, tuple)):
                 return [safe_convert(v) for v in value]
             else:
                 return value
 
-        return {k: safe_convert(v) for k, v in self.__dict__.items() if not k.startswith('_')}
+        data = {k: safe_convert(v) for k, v in self.__dict__.items() if not k.startswith('_')}
+        data["calls"] = safe_convert(self.calls)
+        data["calls_list"] = self.calls_list
+        return data
 
     def to_json(self, indent=2):
         return json.dumps(self.to_dict(), indent=indent)
@@ -406,6 +452,10 @@ def apply_media_options(state: PhoneState, args, cfg: dict | None) -> None:
     record_dir = getattr(args, "rtp_record_dir", None)
     if record_dir:
         state.rtp_record_dir = str(record_dir)
+    if (cfg and cfg.get("rtp_record_raw")) or getattr(args, "rtp_record_raw", False):
+        state.rtp_record_format = "g711"
+    if (cfg and cfg.get("rtp_record_stereo")) or getattr(args, "rtp_record_stereo", False):
+        state.rtp_record_stereo = True
     pt = getattr(args, "rtp_pt", None)
     if pt is not None:
         state.rtp_pt_override = int(pt)
@@ -422,6 +472,14 @@ def apply_media_options(state: PhoneState, args, cfg: dict | None) -> None:
         state.rtp_stats_interval = float(interval)
     elif getattr(args, "rtp_stats", False) and state.rtp_stats_interval <= 0:
         state.rtp_stats_interval = 5.0
+    if cfg and cfg.get("rtcp"):
+        state.rtcp_interval = float(cfg["rtcp"])
+    if getattr(args, "rtcp", None):
+        state.rtcp_interval = float(args.rtcp)
+    if cfg and cfg.get("profile_dispatch"):
+        state.profile_dispatch = int(cfg["profile_dispatch"])
+    if getattr(args, "profile_dispatch", None):
+        state.profile_dispatch = int(args.profile_dispatch)
 
     _apply_ivr_lab_media_defaults(state, args, cfg)
 
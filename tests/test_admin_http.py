@@ -201,3 +201,27 @@ def test_admin_reset_unknown_device():
     finally:
         server.shutdown()
         server.server_close()
+
+
+def test_admin_reports_pending_timers():
+    port = _free_port()
+    hub = CallHub()
+    handle = hub.timers.call_later(60, lambda: None)
+    server = start_admin_http(
+        "127.0.0.1",
+        port,
+        hub=hub,
+        registry=DeviceRegistry(),
+        server_name="TestSim",
+    )
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/phones", timeout=3) as resp:
+            data = json.loads(resp.read())
+        assert data["timers"]["pending"] == 1
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=3) as resp:
+            assert b"Timers: 1 pending" in resp.read()
+    finally:
+        handle.cancel()
+        hub.timers.stop()
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,120 @@
+"""asyncio SCCP client engine against the simulator."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import messages  # noqa: F401
+import pytest
+
+from async_client import AsyncSCCPClient
+from simulator.server import SkinnySimulator
+from state import PhoneState
+
+
+@pytest.fixture
+def sim_server():
+    sim = SkinnySimulator(
+        host="127.0.0.1",
+        port=0,
+        dn_start=5400,
+        tftp=False,
+        admin_port=0,
+    )
+    sim.start(background=True)
+    time.sleep(0.15)
+    host, port = sim.address
+    yield sim, host, port
+    sim.stop()
+
+
+def _phone(host: str, port: int, idx: int) -> AsyncSCCPClient:
+    state = PhoneState(server=host, mac=f"AABBCC{idx:06X}", model="7970", port=port, tftp_port=6969)
+    state.enable_audio = False
+    client = AsyncSCCPClient(state)
+    client.get_tftp_config = False
+    return client
+
+
+def test_many_phones_register_on_one_loop(sim_server):
+    sim, host, port = sim_server
+    phones = [_phone(host, port, i) for i in range(8)]
+
+    async def scenario() -> tuple[list[bool], int]:
+        await asyncio.gather(*(p.start_async() for p in phones))
+        ok = await asyncio.gather(*(p.wait_registered(timeout=20) for p in phones))
+        threads = sum(1 for t in threading.enumerate() if t.name.startswith("pyskinny-"))
+        await asyncio.gather(*(p.stop_async() for p in phones))
+        return ok, threads
+
+    ok, threads = asyncio.run(scenario())
+    assert all(ok)
+    assert threads == 0, "async phones must not spawn recv/keepalive threads"
+    for p in phones:
+        assert sim.registry.get(p.state.device_name)
+        assert p.state.is_unregistered.is_set()
+        assert not p.state.is_registered.is_set()
+
+
+def test_keepalive_uses_loop_timer(sim_server):
+    _sim, host, port = sim_server
+    phone = _phone(host, port, 0x99)
+
+    async def scenario() -> bool:
+        await phone.start_async()
+        assert await phone.wait_registered(timeout=20)
+        phone._cancel_keepalive()
+        phone.state.keepalive_interval = 1
+        phone._schedule_keepalive()
+        handle = phone._keepalive_handle
+        await asyncio.sleep(1.3)
+        rescheduled = phone._keepalive_handle is not None and phone._keepalive_handle is not handle
+        await phone.stop_async()
+        return rescheduled
+
+    assert asyncio.run(scenario())
+    assert phone.running is False
+
+
+def test_dispatch_wakes_state_waiters(sim_server):
+    _sim, host, port = sim_server
+    phone = _phone(host, port, 0x9A)
+    woke: list[float] = []
+
+    def waiter() -> None:
+        # registration touches no call state, only the per-message notify wakes this
+        t0 = time.monotonic()
+        if phone.wait_until(phone.state.is_registered.is_set, timeout=15):
+            woke.append(time.monotonic() - t0)
+
+    t = threading.Thread(target=waiter, daemon=True)
+    t.start()
+
+    async def scenario() -> None:
+        await phone.start_async()
+        assert await phone.wait_registered(timeout=20)
+        await asyncio.to_thread(t.join, 15)
+        await phone.stop_async()
+
+    asyncio.run(scenario())
+    assert woke and woke[0] < 5
+
+
+def test_unregister_with_a_stuck_call_does_not_block_the_loop(sim_server, monkeypatch):
+    _sim, host, port = sim_server
+    phone = _phone(host, port, 0x9B)
+
+    blocking_sleeps: list[float] = []
+
+    async def scenario() -> None:
+        await phone.start_async()
+        assert await phone.wait_registered(timeout=20)
+        phone.state.active_call = True  # a call EndCall does not clear
+        monkeypatch.setattr("messages.register.time.sleep", blocking_sleeps.append)
+        await phone.stop_async()
+
+    asyncio.run(scenario())
+    assert blocking_sleeps == [], "time.sleep on the event loop"
+    assert phone.state.is_unregistered.is_set()
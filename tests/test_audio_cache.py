@@ -0,0 +1,72 @@
+"""Process-wide audio asset cache and pre-encoded G.711 frames."""
+
+from __future__ import annotations
+
+import os
+import wave
+
+import numpy as np
+
+from audio_worker import SilenceSource, ToneSource, WavSource
+from utils.audio_cache import AudioAssetCache
+from utils.g711 import pcma_encode_from_float32, pcmu_encode_from_float32
+
+
+def _write_wav(path, samples: np.ndarray, rate: int = 8000) -> str:
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes((samples * 32767).astype(np.int16).tobytes())
+    return str(path)
+
+
+def test_hits_skip_disk_and_mtime_invalidates(tmp_path):
+    path = _write_wav(tmp_path / "a.wav", np.full(400, 0.25))
+    cache = AudioAssetCache(revalidate_sec=60.0)
+    first = cache.get(path, 8000)
+    os.remove(path)  # served from memory inside the revalidate window
+    assert cache.get(path, 8000) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert not first.pcm.flags.writeable
+
+    _write_wav(tmp_path / "a.wav", np.full(800, 0.5))
+    os.utime(path, ns=(1, 1))
+    cache.revalidate_sec = 0.0
+    second = cache.get(path, 8000)
+    assert second is not first and second.pcm.size == 800
+    assert cache.get(path, 16000).pcm.size == 1600  # keyed by target rate too
+
+
+def test_lru_respects_memory_cap(tmp_path):
+    paths = [_write_wav(tmp_path / f"{i}.wav", np.zeros(8000)) for i in range(4)]
+    cache = AudioAssetCache(max_bytes=3 * 8000 * 4)
+    for p in paths:
+        cache.get(p, 8000)
+    stats = cache.stats()
+    assert stats["entries"] == 3 and stats["evictions"] == 1
+    assert stats["bytes"] <= cache.max_bytes
+
+
+def test_wav_frames_match_live_encode(tmp_path):
+    rng = np.random.default_rng(7)
+    path = _write_wav(tmp_path / "prompt.wav", rng.uniform(-0.9, 0.9, 8000 + 77))
+    for pt, enc in ((0, pcmu_encode_from_float32), (8, pcma_encode_from_float32)):
+        cached, live = WavSource(path, 8000, gain_db=-3.0), WavSource(path, 8000, gain_db=-3.0)
+        for _ in range(55):  # runs past the end into silence
+            assert cached.read_frame(pt, 160) == enc(live.read(160))
+
+
+def test_looping_wav_falls_back_when_length_is_not_frame_aligned(tmp_path):
+    path = _write_wav(tmp_path / "ring.wav", np.full(250, 0.1))
+    assert WavSource(path, 8000, loop=True).read_frame(0, 160) is None
+    path = _write_wav(tmp_path / "ring2.wav", np.full(320, 0.1))
+    src = WavSource(path, 8000, loop=True)
+    assert src.read_frame(0, 160) and src.read_frame(0, 160) and src.pos == 0
+
+
+def test_tone_and_silence_frames():
+    cached, live = ToneSource(8000, 440.0, -12.0), ToneSource(8000, 440.0, -12.0)
+    for _ in range(30):
+        assert cached.read_frame(0, 160) == pcmu_encode_from_float32(live.read(160))
+    assert SilenceSource(8000).read_frame(8, 160) == pcma_encode_from_float32(np.zeros(160, dtype=np.float32))
@@ -0,0 +1,176 @@
+"""CallHub locking: per-call locks, contention counters, unregister mid-call."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+import messages  # noqa: F401
+import pytest
+
+from client import SCCPClient
+from messages.generic import handle_keypad_press
+from simulator.call_hub import CallHub, SimCall, _per_call
+from simulator.locks import CountingLock
+from simulator.server import SkinnySimulator
+from state import PhoneState
+
+
+def test_counting_lock_records_contention():
+    lock = CountingLock()
+    held = threading.Event()
+    release = threading.Event()
+
+    def holder():
+        with lock:
+            held.set()
+            release.wait(2)
+
+    t = threading.Thread(target=holder)
+    t.start()
+    assert held.wait(2)
+    threading.Timer(0.05, release.set).start()
+    with lock:
+        pass
+    t.join()
+    stats = lock.stats.as_dict()
+    assert stats["acquired"] == 2 and stats["contended"] == 1
+    assert stats["wait_ms"] >= 20
+
+
+def test_per_call_retries_when_the_call_lock_is_swapped():
+    class Session:
+        active_call = None
+
+    session = Session()
+    call = SimCall(call_ref=1, caller=session, lock=CountingLock(reentrant=True))
+    session.active_call = call
+    shared = CountingLock(reentrant=True)
+    ran = threading.Event()
+    probe = _per_call(lambda hub, sess: ran.set())
+
+    call.lock.acquire()
+    t = threading.Thread(target=probe, args=(CallHub(), session), daemon=True)
+    t.start()
+    time.sleep(0.05)               # the probe is waiting on the old lock
+    old, call.lock = call.lock, shared
+    with shared:
+        old.release()
+        # it must now wait for the lock the call actually uses
+        assert not ran.wait(0.2)
+    assert ran.wait(2)
+    t.join(timeout=2)
+
+
+@pytest.fixture
+def sim_server():
+    sim = SkinnySimulator(
+        host="127.0.0.1",
+        port=0,
+        dn_start=5800,
+        tftp=False,
+        admin_port=0,
+        auto_answer=["*"],
+    )
+    sim.start(background=True)
+    time.sleep(0.15)
+    yield sim
+    sim.stop()
+
+
+def _phones(sim, count):
+    host, port = sim.address
+    phones = []
+    for i in range(count):
+        state = PhoneState(server=host, mac=f"AABBCCDD58{i:02X}", model="7970", port=port)
+        state.enable_audio = False
+        client = SCCPClient(state)
+        client.get_tftp_config = False
+        client.start()
+        assert state.is_registered.wait(timeout=20)
+        phones.append(client)
+    return phones
+
+
+def _dial(client, dn):
+    client.press_softkey("NewCall")
+    time.sleep(0.25)
+    for ch in dn:
+        handle_keypad_press(client, 1, int(ch))
+        time.sleep(0.05)
+
+
+def test_independent_calls_do_not_share_a_lock(sim_server):
+    sim = sim_server
+    phones = _phones(sim, 4)
+    try:
+        _dial(phones[0], sim.registry.get(phones[1].state.device_name))
+        assert phones[1].events.call_connected.wait(timeout=5)
+        busy = sim.hub._target_call(sim.hub.session_for_device(phones[0].state.device_name))
+        # While one call is locked, a second pair still dials, rings and connects.
+        with busy.lock:
+            _dial(phones[2], sim.registry.get(phones[3].state.device_name))
+            assert phones[3].events.call_connected.wait(timeout=5)
+        stats = sim.hub.lock_stats()
+        assert set(stats) == {"sessions", "calls", "per_call"}
+        assert stats["per_call"]["acquired"] > 0
+    finally:
+        for client in phones:
+            client.stop()
+
+
+def test_unregister_mid_call_ends_call(sim_server):
+    sim = sim_server
+    phones = _phones(sim, 2)
+    try:
+        _dial(phones[0], sim.registry.get(phones[1].state.device_name))
+        assert phones[1].events.call_connected.wait(timeout=5)
+        # what the session does when its TCP connection drops with a call up
+        session = sim.hub.session_for_device(phones[0].state.device_name)
+        t = threading.Thread(target=sim.hub.unregister_session, args=(session,), daemon=True)
+        t.start()
+        t.join(timeout=3)
+        assert not t.is_alive()
+        assert phones[1].events.call_ended.wait(timeout=5)
+        assert [row["in_call"] for row in sim.hub.snapshot_sessions()] == [False]
+    finally:
+        for client in phones:
+            client.stop()
+
+
+def test_two_callers_racing_for_one_callee_make_one_call():
+    sim = SkinnySimulator(host="127.0.0.1", port=0, dn_start=5850, tftp=False, admin_port=0)
+    sim.start(background=True)
+    time.sleep(0.15)
+    phones = _phones(sim, 3)
+    try:
+        hub = sim.hub
+        callers = [hub.session_for_device(p.state.device_name) for p in phones[:2]]
+        callee = hub.session_for_device(phones[2].state.device_name)
+        dn = callee.directory_number
+        start = threading.Barrier(3)
+
+        def dial(session):
+            start.wait()
+            if session is callee:
+                try:
+                    hub.begin_outbound(session)  # callee goes off-hook meanwhile
+                except RuntimeError:
+                    pass
+                return
+            hub.begin_outbound(session)
+            for ch in dn:
+                hub.on_digit(session, ch)
+
+        threads = [threading.Thread(target=dial, args=(s,)) for s in (*callers, callee)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=5)
+        calls = [c for c in hub._snapshot_calls() if callee in (c.caller, c.callee)]
+        assert len(calls) == 1 and callee.active_call is calls[0]
+        assert sum(s.active_call.state == "ringing" for s in callers) <= 1
+    finally:
+        for client in phones:
+            client.stop()
+        sim.stop()
@@ -0,0 +1,70 @@
+"""Slotted call records and the indexed, bounded call table in PhoneState."""
+
+from __future__ import annotations
+
+import json
+import threading
+from types import SimpleNamespace
+
+from state import PhoneState
+from utils.call_management import mark_call_connected, mark_call_ended, update_call_state
+from utils.call_table import CallRecord, CallTable
+
+
+class _FakeClient:
+    def __init__(self):
+        self.state = PhoneState(server="10.0.0.1", mac="222233334444", model="7970")
+        self._call_epoch = 0
+        self.events = SimpleNamespace(
+            call_ringing=threading.Event(),
+            call_connected=threading.Event(),
+            media_started=threading.Event(),
+            call_ended=threading.Event(),
+        )
+
+
+def test_plain_dict_rows_become_indexed_records():
+    state = PhoneState(server="10.0.0.1", mac="222233334444", model="7970")
+    state.calls = {"cm2-1": {"call_reference": 16777225, "line_instance": 2, "call_state": 8, "privacy": 1}}
+    call = state.calls["cm2-1"]
+    assert isinstance(call, CallRecord)
+    assert call["privacy"] == 1 and call.get("call_started") is None
+    assert dict(call)["call_state"] == 8
+    assert list(state.calls.keys_in_state(8)) == ["cm2-1"]
+    assert list(state.calls.keys_for_ref(16777225)) == ["cm2-1"]
+
+    call["call_state"] = 5
+    call.line_instance = 1
+    assert not state.calls.keys_in_state(8)
+    assert list(state.calls.keys_in_state(5)) == ["cm2-1"]
+    assert list(state.calls.keys_on_line(1)) == ["cm2-1"]
+    del state.calls["cm2-1"]
+    assert state.calls.stats()["by_state"] == {}
+
+
+def test_update_call_state_is_in_place():
+    client = _FakeClient()
+    key = update_call_state(client, call_reference=7, line_instance=1, call_state=3, calling_party="1000")
+    call = client.state.calls[key]
+    update_call_state(client, call_reference=7, call_state=5, remote_name="Bob")
+    assert client.state.calls[key] is call
+    assert call.call_state_name == "Connected"
+    assert call.calling_party == "1000" and call.remote_name == "Bob"
+    assert call.line_instance == 1
+    assert client.state.calls_list == ["7"]
+
+
+def test_ended_calls_are_bounded_and_callinfo_pruned():
+    client = _FakeClient()
+    client.state.calls = CallTable(max_ended=3, on_evict=client.state._forget_call)
+    for ref in range(1, 11):
+        client.state.callinfo[str(ref)] = {"calling_party": "1000"}
+        mark_call_connected(client, ref, 1)
+        mark_call_ended(client, ref)
+    assert client.state.calls_list == ["8", "9", "10"]
+    assert sorted(client.state.callinfo) == ["10", "8", "9"]
+    assert client.state.calls.stats()["evicted"] == 7
+
+    mark_call_connected(client, 11, 1)
+    assert list(client.state.calls.keys_in_state(5)) == ["11"]
+    json.dumps(client.state.to_dict())
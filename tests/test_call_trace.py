@@ -0,0 +1,117 @@
+"""Call-setup tracing: milestones, spans, histograms and export."""
+
+from __future__ import annotations
+
+import csv
+import json
+import time
+
+import messages  # noqa: F401
+import pytest
+
+from client import SCCPClient
+from messages.generic import handle_keypad_press
+from simulator.server import SkinnySimulator
+from state import PhoneState
+from utils.call_trace import CallTraceFleet, CallTracer, LatencyHistogram
+
+
+def test_histogram_quantiles_use_bucket_bounds():
+    hist = LatencyHistogram()
+    for ms in (0.5, 3.0, 4.0, 40.0, 700.0):
+        hist.add(ms)
+    d = hist.as_dict()
+    assert (d["count"], d["min_ms"], d["max_ms"]) == (5, 0.5, 700.0)
+    assert d["p50_ms"] == 5.0 and d["p99_ms"] == 700.0
+    assert d["buckets"]["<=5ms"] == 2 and sum(d["buckets"].values()) == 5
+
+
+def test_tracer_spans_and_export(tmp_path):
+    fleet = CallTraceFleet()
+    tracer = CallTracer("SEPAABBCCDD6000", fleet=fleet)
+    tracer.start()
+    tracer.mark("dial_tone")
+    tracer.bind(7)
+    for _ in range(4):
+        tracer.mark("digit", 7)
+    for name in ("ring_out", "connected", "open_receive_channel", "start_media", "first_rtp"):
+        tracer.mark(name, 7)
+    tracer.mark("digit", 7)  # DTMF after connect is not dialing
+    record = tracer.finish(7)
+
+    assert record["direction"] == "outbound" and record["call_ref"] == "7"
+    assert set(record["spans_ms"]) == {
+        "dial_tone", "post_dial_delay", "ringback", "setup",
+        "open_receive", "start_media", "first_rtp", "cut_through",
+    }
+    assert tracer.finish(7) is None
+    assert fleet.as_dict()["fleet"]["setup"]["count"] == 1
+
+    data = json.loads(fleet.export(tmp_path / "setup.json").read_text())
+    assert data["phones"]["SEPAABBCCDD6000"]["cut_through"]["count"] == 1
+    with fleet.export(tmp_path / "setup.csv").open() as fh:
+        rows = list(csv.DictReader(fh))
+    assert {(r["scope"], r["span"]) for r in rows} >= {("fleet", "setup"), ("SEPAABBCCDD6000", "setup")}
+    with fleet.export_calls_csv(tmp_path / "calls.csv").open() as fh:
+        (row,) = list(csv.DictReader(fh))
+    assert row["direction"] == "outbound" and float(row["setup"]) >= 0
+
+
+@pytest.fixture
+def sim_server():
+    sim = SkinnySimulator(
+        host="127.0.0.1",
+        port=0,
+        dn_start=6000,
+        tftp=False,
+        admin_port=0,
+        rtp_sim_peer="tone",
+    )
+    sim.start(background=True)
+    time.sleep(0.15)
+    yield sim
+    sim.stop()
+
+
+def test_simulated_call_is_traced_on_both_phones(sim_server):
+    sim = sim_server
+    host, port = sim.address
+    fleet = CallTraceFleet()
+    phones = []
+    try:
+        for i in range(2):
+            state = PhoneState(server=host, mac=f"AABBCCDD60{i:02X}", model="7970", port=port)
+            state.enable_audio = False
+            client = SCCPClient(state)
+            client.get_tftp_config = False
+            client.call_trace = CallTracer(state.device_name, fleet=fleet)
+            client.start()
+            assert state.is_registered.wait(timeout=20)
+            phones.append(client)
+        caller, callee = phones
+
+        caller.press_softkey("NewCall")
+        time.sleep(0.25)
+        for ch in sim.registry.get(callee.state.device_name):
+            handle_keypad_press(caller, 1, int(ch))
+            time.sleep(0.05)
+        assert callee.events.call_ringing.wait(timeout=10)
+        callee.press_softkey("Answer")
+        assert caller.events.call_connected.wait(timeout=5)
+        time.sleep(0.5)
+        caller.press_softkey("EndCall")
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and len(fleet.calls) < 2:
+            time.sleep(0.05)
+    finally:
+        for client in phones:
+            client.stop()
+
+    out = caller.call_trace.as_dict()
+    assert [c["direction"] for c in out["calls"]] == ["outbound"]
+    for span in ("dial_tone", "post_dial_delay", "ringback", "setup", "cut_through"):
+        assert out["spans"][span]["count"] == 1, span
+    inbound = callee.call_trace.as_dict()
+    assert [c["direction"] for c in inbound["calls"]] == ["inbound"]
+    assert inbound["spans"]["answer"]["count"] == 1
+    assert fleet.as_dict()["fleet"]["setup"]["count"] == 1
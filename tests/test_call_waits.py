@@ -0,0 +1,63 @@
+"""Event-driven call-state waits fed from update_call_state."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+from client import SCCPClient
+from state import PhoneState
+from utils.call_management import mark_call_connected, update_call_state
+
+
+def _client() -> SCCPClient:
+    state = PhoneState(server="127.0.0.1", mac="AABBCCDDEE01", model="7970")
+    state.enable_audio = False
+    return SCCPClient(state)
+
+
+def _later(delay: float, fn, *args, **kwargs) -> threading.Thread:
+    t = threading.Timer(delay, fn, args=args, kwargs=kwargs)
+    t.start()
+    return t
+
+
+def test_wait_call_state_wakes_on_update():
+    client = _client()
+    update_call_state(client, call_reference=101, line_instance=1, call_state=3)
+    _later(0.05, mark_call_connected, client, 101, 1)
+    start = time.monotonic()
+    assert client.wait_call_state(101, 5, timeout=5)
+    assert time.monotonic() - start < 1.0
+    assert not client.wait_call_state(101, (6, 7), timeout=0.05)
+
+
+def test_wait_new_call_returns_ref_and_filters_by_state():
+    client = _client()
+    update_call_state(client, call_reference=200, line_instance=1, call_state=5)
+    before = set(client.state.calls)
+    _later(0.02, update_call_state, client, call_reference=201, line_instance=1, call_state=1)
+    assert client.wait_new_call(before, timeout=5) == "201"
+    _later(0.02, update_call_state, client, call_reference=201, line_instance=1, call_state=3)
+    assert client.wait_new_call(before, timeout=5, states=3) == "201"
+    assert client.wait_new_call(set(client.state.calls), timeout=0) is None
+
+
+def test_wait_softkey_set_and_digit_are_notification_driven():
+    client = _client()
+
+    def _select():
+        client.state.selected_softkey_set = 4
+        client.state.notify_changed()
+
+    _later(0.02, _select)
+    assert client.wait_softkey_set(4, timeout=5)
+
+    _later(0.02, client._on_digit, "7")
+    start = time.monotonic()
+    assert client.wait_for_digit(timeout=5) == "7"
+    assert time.monotonic() - start < 1.0
+    assert client.wait_for_digit(timeout=0.02) is None
+    stop = threading.Event()
+    stop.set()
+    assert client.wait_for_digit(timeout=5, stop_event=stop) is None
@@ -26,6 +26,8 @@ def _mock_client(*, registered: bool = True) -> MagicMock:
     client.running = True
     client.uses_softkeys.return_value = True
     client.resolve_call_target.return_value = (1, 0)
+    client.send_stats.return_value = {"depth": 0, "bytes_per_sec": 0.0}
+    client.dispatch_profile = None
 
     state = SimpleNamespace(
         is_registered=threading.Event(),
@@ -94,6 +96,7 @@ def test_client_web_http_action():
         status, data, _ = _post_json(f"http://127.0.0.1:{port}/api/state")
         assert status == 200
         assert data["capabilities"]["execute"] is True
+        assert data["send_queue"]["depth"] == 0
 
         status, body, ct = _post_json(f"http://127.0.0.1:{port}/api/screenshot")
         assert status == 200
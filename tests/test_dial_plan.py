@@ -0,0 +1,137 @@
+"""Dial-plan trie: pattern matching, translation and CallHub routing."""
+
+from __future__ import annotations
+
+import time
+
+import messages  # noqa: F401
+import pytest
+
+from client import SCCPClient
+from messages.generic import handle_keypad_press
+from simulator.dial_plan import MATCH, NO_MATCH, PARTIAL, DialPlan
+from simulator.server import SkinnySimulator
+from state import PhoneState
+
+
+def test_patterns_report_match_partial_and_no_match():
+    plan = DialPlan()
+    plan.add("1000")
+    plan.add("2[1-3]X")
+    plan.add("9!")
+
+    cursor = plan.cursor()
+    assert cursor.feed("10").status == PARTIAL
+    result = cursor.feed("00")
+    assert (result.status, result.number) == (MATCH, "1000")
+
+    assert plan.match("225").status == MATCH
+    assert plan.match("245").status == NO_MATCH
+    assert plan.match("5").status == NO_MATCH
+
+    # "!" always could take another digit: complete, but wait for # / T.302
+    result = plan.match("9123")
+    assert result.status == PARTIAL and result.route.pattern == "9!"
+    assert plan.match("9").route is None
+
+
+def test_most_specific_route_wins_and_translation():
+    plan = DialPlan()
+    plan.load_lines(
+        [
+            "# pattern  options",
+            "9.XXXX     discard=predot",
+            "9.1XXX     discard=predot prefix=55",
+            "8XXX       strip=1 prefix=7   # trailing comment",
+            "0          target=1000",
+            "[^01]X     name=two",
+        ]
+    )
+    assert plan.match("91234").number == "551234"
+    assert plan.match("92234").number == "2234"
+    assert plan.match("8123").number == "7123"
+    assert plan.match("0").number == "1000"
+    assert plan.match("27").route.name == "two"
+    assert plan.match("17").status == NO_MATCH
+
+    with pytest.raises(ValueError, match=":2:"):
+        DialPlan().load_lines(["1000", "12@4"])
+
+
+def test_remove_prunes_trie_and_live_cursor_sees_new_routes():
+    plan = DialPlan()
+    route = plan.add("5001")
+    plan.add("5002")
+    nodes = plan.stats()["nodes"]
+    plan.add("5001", name="replacement")
+    assert not plan.remove("5001", route)  # stale handle leaves the new route
+    assert plan.remove("5001")
+    assert plan.stats()["nodes"] == nodes - 1
+
+    cursor = plan.cursor()
+    assert cursor.feed("500").status == PARTIAL
+    plan.add("5003")
+    assert cursor.feed("3").status == MATCH
+
+
+@pytest.fixture
+def sim_server():
+    plan = DialPlan()
+    plan.add("9.57XX", discard_predot=True)
+    plan.add("5701!")  # overlaps DN 5701 -> routed after the interdigit timeout
+    sim = SkinnySimulator(
+        host="127.0.0.1",
+        port=0,
+        dn_start=5700,
+        tftp=False,
+        admin_port=0,
+        dial_plan=plan,
+        interdigit_timeout=0.3,
+    )
+    sim.start(background=True)
+    time.sleep(0.15)
+    yield sim
+    sim.stop()
+
+
+def _phones(sim, count=2):
+    host, port = sim.address
+    phones = []
+    for i in range(count):
+        state = PhoneState(server=host, mac=f"AABBCCDD57{i:02X}", model="7970", port=port)
+        state.enable_audio = False
+        client = SCCPClient(state)
+        client.get_tftp_config = False
+        client.start()
+        assert state.is_registered.wait(timeout=20)
+        phones.append(client)
+    return phones
+
+
+def _dial(client, digits):
+    client.press_softkey("NewCall")
+    time.sleep(0.25)
+    for ch in digits:
+        handle_keypad_press(client, 1, int(ch))
+        time.sleep(0.05)
+
+
+def test_hub_routes_translated_and_ambiguous_numbers(sim_server):
+    sim = sim_server
+    phones = _phones(sim)
+    try:
+        callee_dn = sim.registry.get(phones[1].state.device_name)
+        assert callee_dn == "5701"
+        _dial(phones[0], "9" + callee_dn)
+        assert phones[1].events.call_ringing.wait(timeout=5)
+        phones[0].press_softkey("EndCall")
+        assert phones[1].events.call_ended.wait(timeout=5)
+
+        phones[1].events.call_ringing.clear()
+        _dial(phones[0], callee_dn)
+        started = time.monotonic()
+        assert phones[1].events.call_ringing.wait(timeout=5)
+        assert time.monotonic() - started >= 0.2
+    finally:
+        for client in phones:
+            client.stop()
@@ -0,0 +1,66 @@
+"""Dispatcher profiling: per-message-ID handler timings and ``show perf``."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import messages  # noqa: F401
+from client import SCCPClient
+from dispatcher import dispatch_message
+from state import PhoneState
+from ui.cli import load_cli_spec, resolve_command_with_tokens
+from ui.cli_handlers import exec_show_perf
+from utils.dispatch_profile import DispatchProfiler
+
+
+def _client(profile_dispatch: int) -> SCCPClient:
+    state = PhoneState(server="127.0.0.1", mac="AABBCCDDEE21", model="7970", port=2000)
+    state.enable_audio = False
+    state.profile_dispatch = profile_dispatch
+    client = SCCPClient(state)
+    client.running = True
+    return client
+
+
+def test_profiler_samples_and_buckets():
+    profile = DispatchProfiler(sample_every=2)
+    entry = {"name": "Thing", "handler": lambda client, payload: None}
+    for _ in range(5):
+        profile.call(0x0042, entry, None, b"")
+    (row,) = profile.snapshot()
+    assert (row["msg_id"], row["name"], row["handler"]) == ("0x0042", "Thing", "<lambda>")
+    assert (row["count"], row["timed"]) == (5, 2)
+    assert sum(row["histogram"].values()) == 2
+    assert row["max_ms"] >= row["avg_ms"] >= 0
+
+
+def test_dispatch_records_only_when_enabled():
+    off = _client(0)
+    assert off.dispatch_profile is None
+    dispatch_message(off, 0x0100, b"")
+
+    client = _client(1)
+    for _ in range(3):
+        dispatch_message(client, 0x0100, b"")
+    dispatch_message(client, 0x7FFF, b"")  # unhandled: no handler to time
+    (row,) = client.dispatch_profile.snapshot()
+    assert row["handler"] == "parse_keep_alive_ack" and row["count"] == 3
+
+
+def test_show_perf_command():
+    spec = load_cli_spec("ui/cli_commands.json")
+    func, _tokens, _caps, err = resolve_command_with_tokens(spec, ["show", "perf"])
+    assert (func, err) == ("exec_show_perf", "")
+
+    client = _client(1)
+    dispatch_message(client, 0x0100, b"")
+    lines: list[str] = []
+    exec_show_perf(SimpleNamespace(client=client), "show perf", ["show", "perf"], lines.append)
+    assert any("parse_keep_alive_ack" in line for line in lines)
+
+    exec_show_perf(SimpleNamespace(client=client), "show perf detail", ["show", "perf", "detail"], lines.append)
+    assert any('"histogram"' in line for line in lines)
+
+    lines.clear()
+    exec_show_perf(SimpleNamespace(client=_client(0)), "show perf", ["show", "perf"], lines.append)
+    assert lines and lines[0].startswith("% Dispatch profiling is off")
@@ -0,0 +1,82 @@
+"""RTP playout (jitter) buffer."""
+
+from __future__ import annotations
+
+import numpy as np
+
+from utils.jitter_buffer import JitterBuffer
+from utils.rtp_stats import RTPStats
+
+
+def _frame(seq: int) -> np.ndarray:
+    return np.full(160, seq / 1000.0, dtype=np.float32)
+
+
+def _ids(frames) -> list[int]:
+    return [int(round(float(f[0]) * 1000)) for f in frames]
+
+
+def test_reorders_within_playout_delay():
+    jb = JitterBuffer(initial_ms=40)
+    t = 100.0
+    for seq in (10, 12, 11, 13):
+        jb.push(seq, seq * 160, 1, _frame(seq), t)
+        t += 0.005
+    assert jb.pop(100.039) == []
+    assert _ids(jb.pop(100.100)) == [10, 11, 12, 13]
+    assert jb.late == 0 and jb.concealed == 0
+
+
+def test_late_and_duplicate_packets_are_dropped():
+    jb = JitterBuffer(initial_ms=20)
+    jb.push(1, 160, 1, _frame(1), 0.0)
+    jb.push(2, 320, 1, _frame(2), 0.0)
+    assert _ids(jb.pop(0.045)) == [1, 2]
+    assert jb.push(1, 160, 1, _frame(1), 0.05) is False
+    jb.push(3, 480, 1, _frame(3), 0.05)
+    assert jb.push(3, 480, 1, _frame(3), 0.05) is False
+    assert (jb.late, jb.duplicate) == (1, 1)
+
+
+def test_gap_is_concealed_with_faded_repeat():
+    jb = JitterBuffer(initial_ms=20)
+    jb.push(1, 160, 1, _frame(100), 0.0)
+    jb.push(3, 480, 1, _frame(300), 0.0)
+    out = jb.pop(0.065)
+    assert len(out) == 3
+    assert np.allclose(out[1], out[0] * 0.5)
+    assert _ids([out[2]]) == [300]
+    assert jb.concealed == 1
+
+
+def test_long_loss_burst_fades_then_plays_silence():
+    jb = JitterBuffer(initial_ms=20)
+    jb.push(1, 160, 1, _frame(800), 0.0)
+    jb.push(9, 9 * 160, 1, _frame(300), 0.0)  # 2..8 lost, 9 already queued
+    out = jb.pop(0.2)
+    gap = [float(f[0]) for f in out[1:8]]
+    assert np.allclose(gap[:JitterBuffer.MAX_CONCEAL], [0.8 * 0.5 ** k for k in range(1, 6)])
+    assert gap[JitterBuffer.MAX_CONCEAL:] == [0.0, 0.0]
+    assert _ids([out[8]]) == [300]
+
+
+def test_burst_latency_is_bounded():
+    jb = JitterBuffer(initial_ms=20, max_ms=100)
+    for seq in range(50):
+        jb.push(seq, seq * 160, 7, _frame(seq), 0.0)
+    assert jb.depth_ms <= 100.0
+    assert jb.overflow >= 45
+    out = jb.pop(0.021)
+    assert _ids(out)[0] >= 45
+
+
+def test_stream_stop_returns_to_idle_and_stats_report():
+    jb = JitterBuffer(initial_ms=20)
+    jb.push(1, 160, 1, _frame(1), 0.0)
+    jb.pop(1.0)
+    assert jb.next_deadline() is None
+    assert jb.underruns == JitterBuffer.MAX_CONCEAL
+    stats = RTPStats()
+    stats.note_jitter_buffer(jb)
+    assert stats.jb_underruns == JitterBuffer.MAX_CONCEAL
+    assert "jb=0 pkts" in stats.summary()
@@ -0,0 +1,28 @@
+"""Virtual-phone load generator against the embedded simulator."""
+
+from __future__ import annotations
+
+from tools.load import LoadConfig, mac_range, percentiles, run_load
+
+
+def test_percentiles_nearest_rank():
+    summary = percentiles([float(v) for v in range(1, 101)])
+    assert summary["count"] == 100
+    assert (summary["min"], summary["p50"], summary["p90"], summary["p99"], summary["max"]) == (1, 50, 90, 99, 100)
+    assert summary["mean"] == 50.5
+    assert percentiles([]) == {"count": 0}
+
+
+def test_mac_range_is_consecutive():
+    assert mac_range("AA:BB:CC:00:00:FE", 3) == ["AABBCC0000FE", "AABBCC0000FF", "AABBCC000100"]
+
+
+def test_load_run_reports_latencies():
+    report = run_load(LoadConfig(phones=4, register_rate=50, cps=10, calls=4, hold=0.1, timeout=10))
+    assert report["phones"] == {"requested": 4, "registered": 4}
+    assert report["failures"] == {}
+    assert report["calls"]["completed"] == 4
+    for key in ("registration_ms", "dial_to_ringback_ms", "answer_to_media_ms"):
+        assert report[key]["count"] == 4
+        assert 0 < report[key]["p50"] <= report[key]["max"]
+    assert report["call_setup_ms"]["post_dial_delay"]["count"] == 4
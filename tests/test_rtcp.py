@@ -0,0 +1,149 @@
+"""RTCP sender / receiver reports: packet format, RTT, simulator legs."""
+
+from __future__ import annotations
+
+import time
+
+import messages  # noqa: F401
+import pytest
+
+from audio_worker import RTPReceiver, RTPSender
+from client import SCCPClient
+from messages.generic import handle_keypad_press
+from simulator.rtp_engine import RTPEngine
+from simulator.server import SkinnySimulator
+from state import PhoneState
+from utils.rtcp import (
+    RTCPSession,
+    build_bye,
+    build_rr,
+    build_sdes_cname,
+    build_sr,
+    ntp_compact,
+    parse_compound,
+)
+
+
+def _wait(pred, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if pred():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_compound_round_trip():
+    block = {"ssrc": 0xBEEF, "fraction_lost": 64, "cumulative_lost": -3, "highest_seq": 70000, "jitter": 12}
+    data = (
+        build_sr(0x1111, (3900000000, 0x80000000), 1234, 50, 8000, [block])
+        + build_sdes_cname(0x1111, "SEP001122334455@10.0.0.5")
+        + build_rr(0x2222)
+        + build_bye(0x1111)
+    )
+    sr, rr, bye = parse_compound(data)
+    assert (sr["type"], sr["ssrc"], sr["packets"], sr["octets"], sr["rtp_ts"]) == ("SR", 0x1111, 50, 8000, 1234)
+    assert ntp_compact(*sr["ntp"]) == ((3900000000 & 0xFFFF) << 16) | 0x8000
+    (got,) = sr["blocks"]
+    assert {k: got[k] for k in block} == block
+    assert (got["lsr"], got["dlsr"]) == (0, 0)
+    assert (rr["type"], rr["ssrc"], rr["blocks"]) == ("RR", 0x2222, [])
+    assert bye == {"type": "BYE", "ssrc": 0x1111}
+    assert parse_compound(data[:-2]) == [sr, rr]  # truncated BYE is dropped
+
+
+def _endpoint(engine=None) -> tuple[RTPReceiver, RTCPSession]:
+    # the ephemeral RTP port's + 1 is almost always free; retry if not
+    for _ in range(20):
+        rx = RTPReceiver(worker=None, bind_ip="127.0.0.1", port=0, engine=engine)
+        try:
+            return rx, RTCPSession(rx, bind_ip="127.0.0.1", interval=0.1, engine=engine)
+        except OSError:
+            rx.sock.close()
+    pytest.fail("no free RTP/RTCP port pair")
+
+
+@pytest.mark.parametrize("engine", [None, RTPEngine(name="rtcp-test")], ids=["threads", "engine"])
+def test_sessions_exchange_reports_and_measure_rtt(engine):
+    rx_a, rtcp_a = _endpoint(engine)
+    rx_b, rtcp_b = _endpoint(engine)
+    tx_a = RTPSender("127.0.0.1", rx_b.port)
+    tx_b = RTPSender("127.0.0.1", rx_a.port)
+    try:
+        # B heard 8 of A's 10 packets; A heard all of B's
+        for seq in (1, 2, 3, 4, 6, 7, 8, 10):
+            rx_b.stats.note_rx(0, seq, tx_a.ssrc, 160, known_codec=True, ts=seq * 160)
+        tx_a.packets_sent, tx_a.octets_sent = 10, 1600
+        for seq in range(1, 11):
+            rx_a.stats.note_rx(0, seq, tx_b.ssrc, 160, known_codec=True, ts=seq * 160)
+        rtcp_a.set_sender(tx_a)
+        rtcp_b.set_sender(tx_b)
+        rtcp_a.start()
+        rtcp_b.start()
+        assert _wait(lambda: rtcp_a.rtt_ms is not None and rtcp_b.rtt_ms is not None)
+        assert 0 <= rtcp_a.rtt_ms < 100
+        assert rtcp_a.remote["cumulative_lost"] == 2
+        assert rtcp_b.remote["cumulative_lost"] == 0
+        d = rtcp_a.as_dict()
+        assert d["reports_tx"] >= 1 and d["reports_rx"] >= 1
+        assert "rtt=" in rtcp_a.summary()
+    finally:
+        rtcp_a.stop()
+        assert _wait(lambda: rtcp_b.remote_bye, timeout=2)
+        rtcp_b.stop()
+        for sock_owner in (rx_a, rx_b, tx_a, tx_b):
+            sock_owner.stop()
+        if engine is not None:
+            engine.stop()
+
+
+@pytest.fixture
+def sim_server():
+    sim = SkinnySimulator(
+        host="127.0.0.1",
+        port=0,
+        dn_start=6100,
+        tftp=False,
+        admin_port=0,
+        auto_answer=["*"],
+        rtp_sim_peer="tone",
+        rtp_sim_rtcp_interval=0.2,
+    )
+    sim.start(background=True)
+    time.sleep(0.15)
+    yield sim
+    sim.stop()
+
+
+def test_phones_and_simulator_legs_exchange_rtcp(sim_server):
+    sim = sim_server
+    host, port = sim.address
+    phones = []
+    try:
+        for i in range(2):
+            state = PhoneState(server=host, mac=f"AABBCCDD61{i:02X}", model="7970", port=port)
+            state.enable_audio = False
+            state.rtcp_interval = 0.2
+            client = SCCPClient(state)
+            client.get_tftp_config = False
+            client.start()
+            assert state.is_registered.wait(timeout=20)
+            phones.append(client)
+
+        phones[0].press_softkey("NewCall")
+        time.sleep(0.25)
+        for ch in sim.registry.get(phones[1].state.device_name):
+            handle_keypad_press(phones[0], 1, int(ch))
+            time.sleep(0.05)
+        assert phones[1].events.call_connected.wait(timeout=5)
+        assert phones[0].events.media_started.wait(timeout=5)
+
+        rtcp = phones[0].state._rtcp
+        assert rtcp is not None
+        assert _wait(lambda: rtcp.rtt_ms is not None and rtcp.remote is not None)
+        assert _wait(lambda: sim.hub.media_hub.stats()["rtcp"]["rtt_ms"] is not None)
+        stats = sim.hub.media_hub.stats()["rtcp"]
+        assert stats["sessions"] == 2 and stats["reports_rx"] > 0
+    finally:
+        for client in phones:
+            client.stop()
@@ -0,0 +1,68 @@
+"""Shared selector/tick RTP engine for simulator media legs."""
+
+from __future__ import annotations
+
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from audio_worker import RTPReceiver, RTPSender
+from simulator.rtp_engine import RTPEngine
+from utils.g711 import pcmu_encode_from_float32
+from utils.rtp_stats import RTPStats
+
+
+def test_many_legs_share_one_thread():
+    engine = RTPEngine()
+    sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sink.bind(("127.0.0.1", 0))
+    sink.settimeout(0.5)
+    before = threading.active_count()
+    legs = []
+    try:
+        for _ in range(20):
+            rx = RTPReceiver(worker=None, bind_ip="127.0.0.1", port=0, engine=engine)
+            rx.attach_stats(RTPStats())
+            tx = RTPSender("127.0.0.1", sink.getsockname()[1], engine=engine)
+            rx.start()
+            tx.start()
+            legs.append((rx, tx))
+        assert threading.active_count() <= before + 1
+
+        payload = pcmu_encode_from_float32(np.zeros(160, dtype=np.float32))
+        for i, (rx, _) in enumerate(legs):
+            sink.sendto(struct.pack("!BBHII", 0x80, 0, i, 160 * i, 0x1234) + payload, ("127.0.0.1", rx.port))
+
+        ssrcs = set()
+        deadline = time.monotonic() + 3.0
+        while len(ssrcs) < len(legs) and time.monotonic() < deadline:
+            data, _ = sink.recvfrom(2048)
+            ssrcs.add(struct.unpack("!I", data[8:12])[0])
+        assert len(ssrcs) == len(legs)
+        assert engine.leg_counts == (20, 20)
+        assert all(rx.stats.rx_packets == 1 for rx, _ in legs)
+    finally:
+        for rx, tx in legs:
+            rx.stop()
+            tx.stop()
+        sink.close()
+    deadline = time.monotonic() + 1.0
+    while engine.leg_counts != (0, 0) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert engine.leg_counts == (0, 0)
+    engine.stop()
+    assert threading.active_count() <= before
+
+
+def test_sender_ptime_must_align_with_tick():
+    engine = RTPEngine(tick_ms=20)
+    tx = RTPSender("127.0.0.1", 9, ptime_ms=30, engine=engine)
+    try:
+        with pytest.raises(ValueError):
+            tx.start()
+    finally:
+        tx.sock.close()
@@ -23,6 +23,55 @@ def test_rtp_stats_rx_tx_counts():
     assert "rx=2" in stats.summary()
 
 
+def _feed(stats: RTPStats, seqs, *, ssrc=0x1234, ptime=0.02):
+    for i, seq in enumerate(seqs):
+        stats.note_rx(0, seq & 0xFFFF, ssrc, 160, known_codec=True, ts=(seq * 160) & 0xFFFFFFFF, arrival=i * ptime)
+
+
+def test_rtp_stats_loss_reorder_duplicate():
+    stats = RTPStats()
+    _feed(stats, [1, 2, 4, 3, 3, 6, 7])  # 5 lost, 3 reordered, 3 duplicated
+    assert stats.rx_expected == 7
+    assert stats.rx_lost == 1
+    assert (stats.rx_reordered, stats.rx_duplicates, stats.rx_late) == (1, 1, 0)
+    assert stats.as_dict()["loss_pct"] == round(100 / 7, 2)
+
+
+def test_rtp_stats_sequence_wrap_and_late():
+    stats = RTPStats()
+    _feed(stats, range(65530, 65530 + 80))
+    assert stats.rx_expected == 80 and stats.rx_lost == 0
+    stats.note_rx(0, (65530 + 5) & 0xFFFF, 0x1234, 160, known_codec=True)  # 74 behind: too old to classify
+    assert stats.rx_late == 1 and stats.rx_duplicates == 0
+
+
+def test_rtp_stats_jitter_follows_rfc3550():
+    stats = RTPStats()
+    _feed(stats, range(100))
+    assert stats.jitter_ms < 0.001
+    # every other packet 10 ms late: |D| = 80 timestamp units alternately
+    stats = RTPStats()
+    for i in range(200):
+        stats.note_rx(0, i, 1, 160, known_codec=True, ts=i * 160, arrival=i * 0.02 + (0.01 if i % 2 else 0.0))
+    assert 9.0 < stats.jitter_ms <= 10.0
+    assert stats.max_jitter_ms >= stats.jitter_ms
+
+
+def test_rtp_stats_ssrc_change_and_intervals():
+    stats = RTPStats()
+    _feed(stats, [1, 2, 5])
+    first = stats.snapshot()
+    assert (first["rx_packets"], first["rx_expected"], first["rx_lost"]) == (3, 5, 2)
+    assert first["fraction_lost"] == 0.4
+    _feed(stats, [900, 901, 902], ssrc=0x9999)
+    assert stats.rx_ssrc_changes == 1
+    assert stats.rx_lost == 2  # the old source's loss is kept
+    second = stats.snapshot()
+    assert (second["rx_packets"], second["rx_expected"], second["rx_lost"]) == (3, 3, 0)
+    assert second["fraction_lost"] == 0.0
+    assert "ssrc_changes=1" in stats.summary()
+
+
 def test_apply_media_options_rtp_stats():
     state = PhoneState(server="127.0.0.1", mac="AABBCCDDEEFF", model="7970")
     args = type(
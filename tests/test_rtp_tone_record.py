@@ -2,13 +2,15 @@
 
 from __future__ import annotations
 
+import struct
 import tempfile
+import time
 import wave
 from pathlib import Path
 
 import numpy as np
 
-from audio_worker import RTPSender, ToneSource
+from audio_worker import RTPReceiver, RTPSender, ToneSource
 from utils.rtp_record import RTPRecorder, rtp_record_base_path
 from state import PhoneState, apply_media_options
 
@@ -59,6 +61,71 @@ def test_rtp_recorder_skips_empty_close():
         assert not Path(f"{base}_tx.wav").exists()
 
 
+def _wav_chunks(path: Path) -> dict[bytes, bytes]:
+    data = path.read_bytes()
+    assert data[:4] == b"RIFF" and data[8:12] == b"WAVE"
+    assert struct.unpack_from("<I", data, 4)[0] == len(data) - 8
+    chunks, pos = {}, 12
+    while pos + 8 <= len(data):
+        cid, size = data[pos:pos + 4], struct.unpack_from("<I", data, pos + 4)[0]
+        chunks[cid] = data[pos + 8:pos + 8 + size]
+        pos += 8 + size + (size & 1)
+    return chunks
+
+
+def test_rtp_recorder_header_is_fixed_up_while_recording(tmp_path):
+    base = str(tmp_path / "live")
+    rec = RTPRecorder(base, sr=8000, record_tx=False, fixup_sec=0.05)
+    try:
+        for _ in range(5):
+            rec.write_rx(np.full(160, 0.1, dtype=np.float32))
+        time.sleep(0.3)
+        # readable before close(), as after a crash
+        with wave.open(f"{base}_rx.wav", "rb") as wf:
+            assert wf.getnframes() == 800
+    finally:
+        rec.close()
+    assert not Path(f"{base}_tx.wav").exists()
+
+
+def test_rtp_recorder_g711_passthrough(tmp_path):
+    base = str(tmp_path / "raw")
+    rec = RTPRecorder(base, fmt="g711")
+    payload = bytes(range(160))
+    rx = RTPReceiver(worker=None, bind_ip="127.0.0.1", port=0, jitter_buffer=False)
+    rx.attach_recorder(rec)
+    rx.handle_datagram(struct.pack("!BBHII", 0x80, 0, 1, 160, 0x1234) + payload)
+    rx.handle_datagram(struct.pack("!BBHII", 0x80, 8, 2, 320, 0x1234) + payload)  # PCMA: not this file's codec
+    rx.sock.close()
+    rec.write_rx(np.zeros(160, dtype=np.float32))  # decoded audio is ignored in raw mode
+    tx = RTPSender("127.0.0.1", 9, payload_type=0)
+    tx.attach_recorder(rec)
+    tx.send_next()
+    tx.stop()
+    rec.close()
+    assert rec.dropped == 1
+
+    chunks = _wav_chunks(Path(f"{base}_rx.wav"))
+    fmt_tag, channels, sr, _rate, _align, bits = struct.unpack_from("<HHIIHH", chunks[b"fmt "])
+    assert (fmt_tag, channels, sr, bits) == (7, 1, 8000, 8)
+    assert struct.unpack("<I", chunks[b"fact"])[0] == 160
+    assert chunks[b"data"] == payload
+    assert len(_wav_chunks(Path(f"{base}_tx.wav"))[b"data"]) == 160
+
+
+def test_rtp_recorder_stereo_interleaves_and_pads(tmp_path):
+    base = str(tmp_path / "both")
+    rec = RTPRecorder(base, stereo=True)
+    rec.write_rx(np.full(160, 0.5, dtype=np.float32))
+    rec.write_tx(np.full(80, -0.5, dtype=np.float32))
+    rec.close()
+    with wave.open(f"{base}.wav", "rb") as wf:
+        assert (wf.getnchannels(), wf.getnframes()) == (2, 160)
+        frames = np.frombuffer(wf.readframes(160), dtype="<i2").reshape(-1, 2)
+    assert (frames[:, 0] == 16383).all()
+    assert (frames[:80, 1] == -16383).all() and (frames[80:, 1] == 0).all()
+
+
 def test_rtp_record_base_path():
     state = PhoneState(server="127.0.0.1", mac="AABBCCDDEEFF", model="7970")
     path = rtp_record_base_path(state, 0x0100001F)
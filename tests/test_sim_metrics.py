@@ -0,0 +1,96 @@
+"""Simulator Prometheus metrics: counters behind the admin GET /metrics."""
+
+from __future__ import annotations
+
+import re
+import socket
+import time
+import urllib.request
+
+import messages  # noqa: F401
+import pytest
+
+from client import SCCPClient
+from messages.generic import handle_keypad_press
+from simulator.server import SkinnySimulator
+from state import PhoneState
+
+
+def _free_port() -> int:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+@pytest.fixture
+def sim_server():
+    admin_port = _free_port()
+    sim = SkinnySimulator(
+        host="127.0.0.1",
+        port=0,
+        dn_start=5900,
+        tftp=False,
+        admin_port=admin_port,
+        auto_answer=["*"],
+        rtp_sim_peer="tone",
+    )
+    sim.start(background=True)
+    time.sleep(0.15)
+    yield sim, admin_port
+    sim.stop()
+
+
+def _scrape(admin_port: int) -> dict[str, float]:
+    with urllib.request.urlopen(f"http://127.0.0.1:{admin_port}/metrics", timeout=5) as resp:
+        assert resp.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+        text = resp.read().decode("utf-8")
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_metrics_count_registrations_messages_and_rtp(sim_server):
+    sim, admin_port = sim_server
+    host, port = sim.address
+    phones = []
+    try:
+        for i in range(2):
+            state = PhoneState(server=host, mac=f"AABBCCDD59{i:02X}", model="7970", port=port)
+            state.enable_audio = False
+            client = SCCPClient(state)
+            client.get_tftp_config = False
+            client.start()
+            assert state.is_registered.wait(timeout=20)
+            phones.append(client)
+
+        phones[0].press_softkey("NewCall")
+        time.sleep(0.25)
+        for ch in sim.registry.get(phones[1].state.device_name):
+            handle_keypad_press(phones[0], 1, int(ch))
+            time.sleep(0.05)
+        assert phones[1].events.call_connected.wait(timeout=5)
+        time.sleep(0.5)
+
+        m = _scrape(admin_port)
+        assert m["pyskinny_sim_sessions"] == 2
+        assert m["pyskinny_sim_registrations_total"] == 2
+        assert m['pyskinny_sim_calls{state="connected"}'] == 1
+        register = [k for k in m if re.match(r'pyskinny_sim_skinny_messages_total\{direction="rx",msg_id="0x0001"', k)]
+        assert register and m[register[0]] == 2
+        assert any(k.startswith('pyskinny_sim_skinny_messages_total{direction="tx"') for k in m)
+        assert m["pyskinny_sim_rtp_legs"] == 2
+        assert m['pyskinny_sim_rtp_packets_total{direction="tx"}'] > 0
+        assert m["pyskinny_sim_rtp_rx_expected_total"] > 0
+        assert m["pyskinny_sim_rtp_rx_lost_total"] == 0
+        assert m['pyskinny_sim_rtp_rx_out_of_order_total{kind="duplicate"}'] == 0
+        assert "pyskinny_sim_rtp_rx_jitter_ms" in m
+        assert m["pyskinny_sim_rtcp_sessions"] == 0  # RTCP is opt-in
+        assert "pyskinny_sim_send_queue_depth" in m
+    finally:
+        for client in phones:
+            client.stop()
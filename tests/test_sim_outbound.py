@@ -0,0 +1,165 @@
+"""Per-session outbound queues: coalesced writes and slow-peer disconnects."""
+
+from __future__ import annotations
+
+import socket
+import threading
+import time
+
+from simulator import payloads
+from simulator.call_hub import CallHub
+from simulator.outbound import OutboundQueue, write_batch
+from simulator.registry import DeviceRegistry
+from simulator.session import SkinnySession
+
+
+def test_queued_packets_go_out_in_one_write():
+    a, b = socket.socketpair()
+    try:
+        queue = OutboundQueue()
+        packets = [payloads.keepalive_ack() for _ in range(7)] + [payloads.register_ack(30)]
+        for p in packets:
+            assert queue.put(p)
+        batch = queue.take(0)
+        assert batch == packets and queue.depth == 0
+        write_batch(a, batch)
+        queue.done(batch)
+        b.settimeout(1.0)
+        want = b"".join(packets)
+        got = b""
+        while len(got) < len(want):
+            got += b.recv(65536)
+        assert got == want
+        stats = queue.stats()
+        assert stats["writes"] == 1 and stats["sent_packets"] == len(packets)
+        assert stats["bytes_queued"] == 0 and stats["max_depth"] == len(packets)
+    finally:
+        a.close()
+        b.close()
+
+
+def test_queue_refuses_when_full_and_drains_after_close():
+    queue = OutboundQueue(max_bytes=100)
+    assert queue.put(b"x" * 60)
+    assert not queue.put(b"y" * 60)
+    assert queue.overflows == 1
+    queue.close(drain=True)
+    assert not queue.put(b"z")
+    assert queue.take(0) == [b"x" * 60]
+    assert queue.take(0) == []
+
+
+# A peer that never reads is dropped once its queue overflows. The queue is
+# small and the stall timeout long, and each send waits for the writer to
+# drain the queue, so it only overflows once the kernel / transport buffers
+# in front of the peer are full and the writer really is stuck.
+STUCK_MAX_BYTES = 16 * 1024
+STUCK_SEND_LIMIT = 64 * 1024 * 1024
+
+
+def _send_until_dropped(session: SkinnySession) -> int:
+    """Send 2 KB packets to a peer that never reads; bytes sent before the drop."""
+    packet = payloads.register_ack(30) * 64
+    sent = 0
+    while not session.slow_peer and sent < STUCK_SEND_LIMIT:
+        session.send(packet)  # only queues: never blocks on the peer
+        sent += len(packet)
+        session.outbound.wait_drained(0.05)
+    return sent
+
+
+def test_stuck_phone_does_not_block_senders_and_is_dropped():
+    srv, phone = socket.socketpair()
+    phone.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    session = SkinnySession(
+        srv, ("127.0.0.1", 1), DeviceRegistry(), "TestSim", CallHub(), outbound_max_bytes=STUCK_MAX_BYTES
+    )
+    runner = threading.Thread(target=session.run, daemon=True)
+    runner.start()
+    try:
+        _send_until_dropped(session)
+        assert session.slow_peer, "stalled peer was not disconnected"
+        assert session.outbound.overflows >= 1
+        runner.join(timeout=3)
+        assert not runner.is_alive()
+    finally:
+        phone.close()
+
+
+def test_stuck_phone_is_dropped_in_asyncio_mode():
+    from messages.register import send_register_req
+    from simulator.protocol import pack_message
+    from simulator.server import SkinnySimulator
+    from state import PhoneState
+
+    sim = SkinnySimulator(
+        host="127.0.0.1",
+        port=0,
+        dn_start=6200,
+        tftp=False,
+        admin_port=0,
+        server_mode="asyncio",
+        outbound_max_bytes=STUCK_MAX_BYTES,
+    )
+    sim.start(background=True)
+    phone = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    phone.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    try:
+        phone.connect(sim.address)
+        state = PhoneState(server="127.0.0.1", mac="AABBCCDD6200", model="7970")
+        phone.sendall(send_register_req(state) + pack_message(0x000D))  # TimeDateReq; then never reads
+        deadline = time.monotonic() + 5.0
+        while sim.hub.session_for_device(state.device_name) is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        session = sim.hub.session_for_device(state.device_name)
+        assert session is not None
+
+        _send_until_dropped(session)
+        assert session.slow_peer, "stalled peer was not disconnected"
+        assert session.outbound.overflows >= 1
+        # the aborted transport ends run_async, which unregisters the session
+        deadline = time.monotonic() + 10.0
+        while sim.hub.session_for_device(state.device_name) is not None and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert sim.hub.session_for_device(state.device_name) is None
+    finally:
+        phone.close()
+        sim.stop()
+
+
+def test_put_many_is_all_or_nothing():
+    q = OutboundQueue(max_bytes=100)
+    assert q.put_many([b"a" * 40, b"b" * 40])
+    assert not q.put_many([b"c" * 10, b"d" * 20])
+    assert q.take(0) == [b"a" * 40, b"b" * 40]
+    assert q.stats()["overflows"] == 1
+
+
+def test_registration_burst_is_answered_in_one_write():
+    from messages.register import send_register_req
+    from simulator.protocol import pack_message
+    from state import PhoneState
+    from utils.skinny_framing import SkinnyFrameReader
+
+    srv, phone = socket.socketpair()
+    session = SkinnySession(srv, ("127.0.0.1", 1), DeviceRegistry(), "TestSim", CallHub())
+    runner = threading.Thread(target=session.run, daemon=True)
+    runner.start()
+    try:
+        state = PhoneState(server="127.0.0.1", mac="AABBCCDDEE10", model="7970")
+        phone.sendall(
+            send_register_req(state)
+            + pack_message(0x000E)   # ButtonTemplateReq
+            + pack_message(0x000C)   # ConfigStatReq
+            + pack_message(0x000D)   # TimeDateReq
+        )
+        phone.settimeout(2.0)
+        reader = SkinnyFrameReader(phone)
+        ids = []
+        while 0x0110 not in ids and reader.fill():
+            ids += [msg_id for msg_id, _ in reader.frames()]
+        assert ids == [0x0081, 0x009B, 0x0097, 0x0093, 0x0094, 0x0112, 0x0110]
+        assert session.outbound.stats()["writes"] == 1
+    finally:
+        phone.close()
+        runner.join(timeout=3)
@@ -0,0 +1,87 @@
+"""Simulator deferred actions (auto-answer, IVR pickup) on the shared timer heap."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+import messages  # noqa: F401
+import pytest
+
+import simulator.call_hub as call_hub
+from client import SCCPClient
+from messages.generic import handle_keypad_press
+from simulator.server import SkinnySimulator
+from state import PhoneState
+
+
+@pytest.fixture
+def sim_server():
+    sim = SkinnySimulator(
+        host="127.0.0.1",
+        port=0,
+        dn_start=5600,
+        tftp=False,
+        admin_port=0,
+        auto_answer=["*"],
+    )
+    sim.start(background=True)
+    time.sleep(0.15)
+    yield sim
+    sim.stop()
+
+
+def _phones(sim, count=2):
+    host, port = sim.address
+    phones = []
+    for i in range(count):
+        state = PhoneState(server=host, mac=f"AABBCCDD56{i:02X}", model="7970", port=port)
+        state.enable_audio = False
+        client = SCCPClient(state)
+        client.get_tftp_config = False
+        client.start()
+        assert state.is_registered.wait(timeout=20)
+        phones.append(client)
+    return phones
+
+
+def _dial(client, dn):
+    client.press_softkey("NewCall")
+    time.sleep(0.25)
+    for ch in dn:
+        handle_keypad_press(client, 1, int(ch))
+        time.sleep(0.05)
+
+
+def _stop(phones):
+    for client in phones:
+        client.stop()
+
+
+def test_auto_answer_runs_on_timer_heap(sim_server):
+    sim = sim_server
+    phones = _phones(sim)
+    try:
+        _dial(phones[0], sim.registry.get(phones[1].state.device_name))
+        assert phones[1].events.call_connected.wait(timeout=5)
+        stats = sim.timers.stats()
+        assert stats["fired"] >= 1 and stats["pending"] == 0
+        assert not any(t.name.startswith("auto-answer-") for t in threading.enumerate())
+    finally:
+        _stop(phones)
+
+
+def test_ending_call_cancels_pending_auto_answer(sim_server, monkeypatch):
+    monkeypatch.setattr(call_hub, "AUTO_ANSWER_DELAY_SEC", 30.0)
+    sim = sim_server
+    phones = _phones(sim)
+    try:
+        _dial(phones[0], sim.registry.get(phones[1].state.device_name))
+        assert phones[1].events.call_ringing.wait(timeout=5)
+        assert sim.timers.stats()["pending"] == 1
+        phones[0].press_softkey("EndCall")
+        assert phones[1].events.call_ended.wait(timeout=5)
+        stats = sim.timers.stats()
+        assert stats["pending"] == 0 and stats["cancelled"] == 1
+    finally:
+        _stop(phones)
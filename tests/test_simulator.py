@@ -68,11 +68,12 @@ def skinny_sim():
     sim.stop()
 
 
-def test_pyskinny_client_registers_against_simulator(skinny_sim):
+def test_pyskinny_client_registers_against_simulator(skinny_sim, tmp_path):
     sim, host, port, tftp_port = skinny_sim
     state = PhoneState(server=host, mac="AABBCCDDEEFF", model="7970", port=port, tftp_port=tftp_port)
     client = SCCPClient(state)
     client.get_tftp_config = True
+    client.tftp_config_dir = str(tmp_path)
 
     try:
         client.start()
@@ -85,9 +86,9 @@ def test_pyskinny_client_registers_against_simulator(skinny_sim):
         assert state.is_unregistered.wait(timeout=10)
 
 
-def test_tftp_before_skinny_register(skinny_sim):
+def test_tftp_before_skinny_register(skinny_sim, tmp_path):
     sim, host, _skinny_port, tftp_port = skinny_sim
-    text = get_device_config_via_tftp(host, "SEPDDEEFF001122", port=tftp_port)
+    text = get_device_config_via_tftp(host, "SEPDDEEFF001122", port=tftp_port, output_dir=str(tmp_path))
     dn = sim.registry.get("SEPDDEEFF001122")
     assert dn
     assert dn in text
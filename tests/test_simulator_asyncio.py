@@ -0,0 +1,95 @@
+"""Simulator asyncio server mode: coroutine sessions on one event loop."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+import messages  # noqa: F401
+import pytest
+
+from client import SCCPClient
+from messages.generic import handle_keypad_press
+from simulator.server import SkinnySimulator
+from state import PhoneState
+
+
+@pytest.fixture
+def async_sim():
+    sim = SkinnySimulator(
+        host="127.0.0.1",
+        port=0,
+        dn_start=5600,
+        tftp=False,
+        admin_port=0,
+        server_mode="asyncio",
+        backlog=256,
+    )
+    sim.start(background=True)
+    time.sleep(0.15)
+    host, port = sim.address
+    yield sim, host, port
+    sim.stop()
+
+
+def _phone(host: str, port: int, mac: str) -> tuple[SCCPClient, PhoneState]:
+    state = PhoneState(server=host, mac=mac, model="7970", port=port, tftp_port=6969)
+    state.enable_audio = False
+    client = SCCPClient(state)
+    client.get_tftp_config = False
+    return client, state
+
+
+def test_unknown_server_mode_rejected():
+    with pytest.raises(ValueError):
+        SkinnySimulator(host="127.0.0.1", port=0, tftp=False, admin_port=0, server_mode="forking")
+
+
+def test_phones_register_without_per_session_threads(async_sim):
+    sim, host, port = async_sim
+    phones = [_phone(host, port, f"AABBCC00{i:04X}") for i in range(6)]
+    try:
+        for client, _ in phones:
+            client.start()
+        for _, state in phones:
+            assert state.is_registered.wait(timeout=20), f"{state.device_name} failed to register"
+        assert not [t for t in threading.enumerate() if t.name.startswith("skinny-127.0.0.1:")]
+        dns = {sim.registry.get(state.device_name) for _, state in phones}
+        assert len(dns) == len(phones)
+    finally:
+        for client, state in phones:
+            client.stop()
+            assert state.is_unregistered.wait(timeout=10)
+
+
+def test_call_between_async_sessions(async_sim):
+    sim, host, port = async_sim
+    (client_a, state_a), (client_b, state_b) = _phone(host, port, "AABBCC00A001"), _phone(host, port, "AABBCC00A002")
+    client_a.start()
+    client_b.start()
+    try:
+        assert state_a.is_registered.wait(timeout=20) and state_b.is_registered.wait(timeout=20)
+        client_a.press_softkey("NewCall")
+        time.sleep(0.25)
+        for ch in sim.registry.get(state_b.device_name):
+            handle_keypad_press(client_a, 1, int(ch))
+            time.sleep(0.05)
+        assert client_b.events.call_ringing.wait(timeout=10), "callee did not ring"
+        client_b.press_softkey("Answer")
+        assert client_a.events.call_connected.wait(timeout=10)
+        assert client_b.events.call_connected.wait(timeout=10)
+    finally:
+        client_a.stop()
+        client_b.stop()
+        assert state_a.is_unregistered.wait(timeout=10)
+        assert state_b.is_unregistered.wait(timeout=10)
+
+
+def test_stop_closes_live_sessions(async_sim):
+    sim, host, port = async_sim
+    client, state = _phone(host, port, "AABBCC00B001")
+    client.start()
+    assert state.is_registered.wait(timeout=20)
+    sim.stop()
+    assert not sim._thread.is_alive()
+    client.stop()
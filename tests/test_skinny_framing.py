@@ -0,0 +1,81 @@
+"""Buffered Skinny frame reader."""
+
+from __future__ import annotations
+
+import socket
+
+import pytest
+
+from simulator.protocol import pack_message
+from utils.skinny_framing import SkinnyFrameReader
+
+
+class _ScriptedSock:
+    """recv_into() serves pre-cut chunks; ``None`` simulates a socket timeout."""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.calls = 0
+
+    def recv_into(self, view):
+        self.calls += 1
+        if not self.chunks:
+            return 0
+        chunk = self.chunks.pop(0)
+        if chunk is None:
+            raise socket.timeout()
+        view[: len(chunk)] = chunk
+        return len(chunk)
+
+
+def test_many_frames_per_recv():
+    burst = b"".join(pack_message(0x0100 + i, bytes([i]) * i) for i in range(20))
+    sock = _ScriptedSock([burst])
+    reader = SkinnyFrameReader(sock)
+    assert reader.fill() == len(burst)
+    frames = [(msg_id, bytes(p)) for msg_id, p in reader.frames()]
+    assert sock.calls == 1
+    assert [m for m, _ in frames] == [0x0100 + i for i in range(20)]
+    assert frames[7][1] == b"\x07" * 7
+    assert reader.buffered == 0
+
+
+def test_partial_frame_survives_timeout():
+    packet = pack_message(0x0081, b"abcdefgh")
+    sock = _ScriptedSock([packet[:5], None, packet[5:15], None, packet[15:]])
+    reader = SkinnyFrameReader(sock)
+    got = []
+    while not got:
+        try:
+            if not reader.fill():
+                break
+        except socket.timeout:
+            continue
+        got.extend((m, bytes(p)) for m, p in reader.frames())
+    assert got == [(0x0081, b"abcdefgh")]
+
+
+def test_oversized_frame_grows_buffer():
+    big = pack_message(0x0097, b"x" * 10000)
+    sock = _ScriptedSock([big[i:i + 1500] for i in range(0, len(big), 1500)])
+    reader = SkinnyFrameReader(sock, bufsize=256)
+    while reader.next_frame() is None:
+        assert reader.fill()
+    sock.chunks = [big]
+    reader.fill()
+    msg_id, payload = reader.next_frame()
+    assert msg_id == 0x0097
+    assert bytes(payload) == b"x" * 10000
+
+
+def test_feed_and_corrupt_length():
+    reader = SkinnyFrameReader()
+    packet = pack_message(0x0000)
+    reader.feed(packet[:3])
+    assert reader.next_frame() is None
+    reader.feed(packet[3:])
+    msg_id, payload = reader.next_frame()
+    assert (msg_id, len(payload)) == (0x0000, 0)
+    reader.feed(b"\xff\xff\xff\x7f" + b"\x00" * 8)
+    with pytest.raises(ValueError):
+        reader.next_frame()
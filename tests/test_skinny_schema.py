@@ -0,0 +1,67 @@
+"""Declarative Skinny message schemas."""
+
+from __future__ import annotations
+
+import struct
+
+import pytest
+
+from simulator import payloads
+from utils import skinny_schema as schema
+
+
+def test_frame_header_and_roundtrip():
+    packet = schema.CALL_STATE.frame(5, 1, 42, 0, 4, 0)
+    data_length, version, msg_id = struct.unpack("<III", packet[:12])
+    assert (data_length, version, msg_id) == (len(packet) - 8, 0, 0x0111)
+    msg = schema.CALL_STATE.decode(packet[12:])
+    assert (msg.call_state, msg.line_instance, msg.call_reference, msg.precedence_level) == (5, 1, 42, 4)
+    assert schema.decode(0x0111, memoryview(packet)[12:]) == msg
+
+
+def test_decoded_objects_are_slotted():
+    msg = schema.STOP_TONE.decode(struct.pack("<II", 1, 7))
+    assert not hasattr(msg, "__dict__")
+    assert msg.as_dict() == {"line_instance": 1, "call_reference": 7}
+
+
+def test_truncated_call_info_uses_defaults():
+    # CM 2.x CallInfo: party strings only.
+    body = schema.CALL_INFO.prefix("called_party").pack("Alice", "1000", "Bob", "1001")
+    msg = schema.CALL_INFO.decode(body)
+    assert (msg.calling_party_name, msg.called_party) == ("Alice", "1001")
+    assert (msg.line_instance, msg.call_reference, msg.call_type) == (0, 0, 0)
+
+
+def test_simulator_call_info_decodes_on_client_side():
+    packet = payloads.call_info("Alice", "1000", "Bob", "1001", line=1, call_ref=9, call_type=1)
+    msg = schema.CALL_INFO.decode(packet[12:])
+    assert (msg.calling_party, msg.called_party_name, msg.call_reference, msg.call_type) == ("1000", "Bob", 9, 1)
+    assert msg.original_called_party == ""
+
+
+def test_cstring_truncation_keeps_nul():
+    body = schema.DIALED_NUMBER.pack("9" * 40, 1, 2)
+    assert body[23] == 0
+    assert schema.DIALED_NUMBER.decode(body).dialed_number == "9" * 23
+
+
+def test_open_receive_channel_ack_ip_is_network_order():
+    body = schema.OPEN_RECEIVE_CHANNEL_ACK.pack(0, 0x7F000001, 20000, 3, 4)
+    assert body[4:8] == b"\x7f\x00\x00\x01"
+    ack = payloads.parse_open_receive_channel_ack(body[:12])
+    assert ack == {"status": 0, "ip": 0x7F000001, "port": 20000}
+
+
+def test_min_size_rejects_short_payload():
+    with pytest.raises(ValueError):
+        schema.CALL_STATE.decode(b"\x05\x00\x00\x00")
+
+
+def test_patched_registration_payloads_match_fresh_frames():
+    long_dn = "9" * 50
+    assert payloads.config_stat_res("SEPAABBCCDDEEFF", "Sim", lines=2) == schema.CONFIG_STAT_RES.frame(
+        "SEPAABBCCDDEEFF", 0, 0, "SkinnySim", "Sim", 2, 0
+    )
+    assert payloads.line_stat_res(3, long_dn) == schema.LINE_STAT_RES.frame(3, long_dn, long_dn, long_dn, 0)
+    assert payloads.button_template_res(cm2=True) is payloads.button_template_res(cm2=True)
@@ -0,0 +1,82 @@
+"""Client outbound writer: coalesced Skinny frames on one writer thread."""
+
+from __future__ import annotations
+
+import socket
+import threading
+import time
+
+import messages  # noqa: F401
+import pytest
+
+from client import SCCPClient
+from messages.generic import get_skinny_message
+from simulator.server import SkinnySimulator
+from state import PhoneState
+from utils.skinny_writer import SkinnyWriter
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    sock.settimeout(2.0)
+    data = b""
+    while len(data) < n:
+        data += sock.recv(65536)
+    return data
+
+
+def test_burst_from_several_threads_is_one_write():
+    a, b = socket.socketpair()
+    writer = SkinnyWriter(a, tick_ms=50)
+    try:
+        frames = [get_skinny_message(0x000B, bytes([i, 0, 0, 0])) for i in range(12)]
+        threads = [threading.Thread(target=writer.sendall, args=(f,)) for f in frames]
+        # hold the flush until the whole burst is queued, whatever the scheduling
+        with writer._write_lock:
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        got = _recv_exact(b, sum(len(f) for f in frames))
+        writer.flush()  # waits for the writer thread's write to be counted
+        assert sorted(got[i:i + 16] for i in range(0, len(got), 16)) == sorted(frames)
+        stats = writer.stats()
+        assert stats["messages"] == 12 and stats["writes"] == 1
+        assert stats["depth"] == 0 and stats["bytes_sent"] == len(got)
+    finally:
+        writer.close()
+        b.close()
+
+
+def test_shutdown_flushes_and_write_errors_surface():
+    a, b = socket.socketpair()
+    writer = SkinnyWriter(a, tick_ms=10_000)  # only an explicit flush can send
+    frame = get_skinny_message(0x0027)
+    writer.sendall(frame)
+    writer.shutdown(socket.SHUT_WR)
+    assert _recv_exact(b, len(frame)) == frame
+    writer.sendall(frame)
+    writer.flush()  # EPIPE on the shut-down socket
+    with pytest.raises(OSError):
+        writer.sendall(frame)
+    writer.close()
+    b.close()
+
+
+def test_registration_burst_uses_fewer_writes_than_messages():
+    sim = SkinnySimulator(host="127.0.0.1", port=0, dn_start=5700, tftp=False, admin_port=0)
+    sim.start(background=True)
+    time.sleep(0.15)
+    host, port = sim.address
+    state = PhoneState(server=host, mac="AABBCC00C001", model="7970", port=port, tftp_port=6969)
+    state.enable_audio = False
+    client = SCCPClient(state)
+    client.get_tftp_config = False
+    try:
+        client.start()
+        assert state.is_registered.wait(timeout=20)
+        time.sleep(0.3)
+        stats = client.send_stats()
+        assert stats["writes"] < stats["messages"]
+    finally:
+        client.stop()
+        sim.stop()
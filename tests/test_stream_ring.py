@@ -0,0 +1,99 @@
+"""Per-stream ring buffers mixed by LoopingAudioWorker."""
+
+from __future__ import annotations
+
+import inspect
+import tracemalloc
+
+import numpy as np
+
+import audio_worker
+from audio_worker import StreamRingBuffer
+
+
+def _idx_8k_to_44k1(n: int) -> np.ndarray:
+    ratio = 44100 / 8000.0
+    return (np.arange(int(n * ratio)) / ratio).astype(np.int64)
+
+
+def test_write_and_mix_in_order_across_wrap():
+    ring = StreamRingBuffer(10, gain=2.0)
+    scratch = np.empty(8, dtype=np.float32)
+    ring.write(np.arange(6, dtype=np.float32))
+    out = np.zeros(4, dtype=np.float32)
+    ring.mix_into(out, scratch)
+    assert out.tolist() == [0, 2, 4, 6]
+    ring.write(np.arange(6, 12, dtype=np.float32))  # wraps
+    out = np.zeros(8, dtype=np.float32)
+    ring.mix_into(out, scratch)
+    assert out.tolist() == [8, 10, 12, 14, 16, 18, 20, 22]
+    assert (ring.size, ring.overruns, ring.underruns) == (0, 0, 0)
+
+
+def test_overrun_drops_oldest_and_caps_latency():
+    ring = StreamRingBuffer(8)
+    ring.write(np.arange(6, dtype=np.float32))
+    ring.write(np.arange(6, 12, dtype=np.float32))
+    assert (ring.size, ring.overruns, ring.dropped) == (8, 1, 4)
+    out = np.zeros(8, dtype=np.float32)
+    ring.mix_into(out, np.empty(8, dtype=np.float32))
+    assert out.tolist() == list(range(4, 12))
+    ring.write(np.arange(20, dtype=np.float32))
+    assert ring.size == 8 and ring.dropped == 16
+
+
+def test_underrun_counted_once_per_dry_spell():
+    ring = StreamRingBuffer(16)
+    scratch = np.empty(4, dtype=np.float32)
+    out = np.zeros(4, dtype=np.float32)
+    ring.mix_into(out, scratch)
+    assert ring.underruns == 0  # never played yet
+    ring.write(np.ones(2, dtype=np.float32))
+    ring.mix_into(out, scratch)
+    ring.mix_into(out, scratch)
+    ring.mix_into(out, scratch)
+    assert ring.underruns == 2
+    assert ring.stats(8000)["max_latency_ms"] == 2.0
+
+
+def test_resample_on_write_matches_nearest_neighbour():
+    pcm = np.linspace(-1, 1, 160, dtype=np.float32)
+    idx = _idx_8k_to_44k1(pcm.shape[0])
+    ring = StreamRingBuffer(4096)
+    ring.write(pcm[:3])
+    out = np.zeros(3, dtype=np.float32)
+    ring.mix_into(out, np.empty(3, dtype=np.float32))
+    ring.write(pcm, idx)
+    out = np.zeros(idx.shape[0], dtype=np.float32)
+    ring.mix_into(out, np.empty(idx.shape[0], dtype=np.float32))
+    assert np.array_equal(out, pcm[idx])
+
+
+def test_steady_state_does_not_allocate():
+    pcm = np.zeros(160, dtype=np.float32)
+    idx = _idx_8k_to_44k1(160)
+    ring = StreamRingBuffer(8820)
+    out = np.zeros(1024, dtype=np.float32)
+    scratch = np.empty(1024, dtype=np.float32)
+    for _ in range(50):
+        ring.write(pcm, idx)
+        ring.mix_into(out, scratch)
+    # Only count allocations made on StreamRingBuffer's own lines; other
+    # tests may leave daemon threads allocating in the background.
+    lines, first = inspect.getsourcelines(StreamRingBuffer)
+    ring_lines = range(first, first + len(lines))
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        for _ in range(500):
+            ring.write(pcm, idx)
+            ring.mix_into(out, scratch)
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    grown = sum(
+        stat.size_diff
+        for stat in after.compare_to(before, "lineno")
+        if stat.traceback[0].filename == audio_worker.__file__ and stat.traceback[0].lineno in ring_lines
+    )
+    assert grown < 1024  # a few int objects at most; no per-packet arrays
@@ -92,15 +92,34 @@ def test_tftp_dynamic_sep_file(tftp_service):
     assert "127.0.0.1" in body
     assert "3000" in body
     assert reg_get(svc, "SEPAAAABBBBCCCC") == "3000"
+    with pytest.raises(tftpy.TftpException):
+        client.download("missing.bin", tempfile.mktemp(), timeout=5)
+    client.download("SEPAAAABBBBCCCC.cnf.xml", dest, timeout=5)  # now on disk
+    assert svc.stats() == {"requests": 3, "files": 1, "configs": 1, "not_found": 1, "denied": 0}
+
+
+def test_tftp_refuses_paths_outside_root(tftp_service, tmp_path):
+    svc, port = tftp_service
+    secret = svc.root.parent / f"{svc.root.name}-secret.txt"
+    secret.write_text("not for phones", encoding="utf-8")
+    try:
+        client = tftpy.TftpClient("127.0.0.1", port)
+        for name in (f"..\\{secret.name}", f"sub\\..\\..\\{secret.name}"):
+            with pytest.raises(tftpy.TftpException):
+                client.download(name, str(tmp_path / "out"), timeout=5)
+    finally:
+        secret.unlink()
+    assert svc.stats()["files"] == 0 and svc.stats()["denied"] == 2
 
 
 def reg_get(svc, name):
     return svc.registry.get(name)
 
 
-def test_get_device_config_via_tftp_helper(tftp_service):
+def test_get_device_config_via_tftp_helper(tftp_service, tmp_path):
     _svc, port = tftp_service
-    text = get_device_config_via_tftp("127.0.0.1", "SEP111122223333", port=port)
+    text = get_device_config_via_tftp("127.0.0.1", "SEP111122223333", port=port, output_dir=str(tmp_path))
+    assert (tmp_path / "SEP111122223333.cnf.xml").is_file()
     assert text
     assert "processNodeName" in text
 
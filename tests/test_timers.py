@@ -0,0 +1,73 @@
+"""Process-wide timer heap for client keepalives and prompt restores."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+from client import SCCPClient
+from state import PhoneState
+from utils.timers import TimerScheduler
+
+
+def test_timers_fire_in_order_and_cancel():
+    sched = TimerScheduler(name="test-timers")
+    fired: list[str] = []
+    done = threading.Event()
+    # one base time, so arming late under load cannot reorder the deadlines
+    base = time.monotonic() + 0.1
+    sched.call_at(base + 0.3, lambda: (fired.append("c"), done.set()))
+    sched.call_at(base, fired.append, "a")
+    sched.call_at(base + 0.2, fired.append, "b").cancel()
+    sched.call_at(base + 0.1, fired.append, "b2")
+    assert done.wait(2)
+    assert fired == ["a", "b2", "c"]
+    assert sched.pending == 0
+
+
+def test_call_every_reads_interval_each_beat_and_stops_on_false():
+    sched = TimerScheduler(name="test-timers")
+    interval = [0.05]
+    beats: list[float] = []
+    done = threading.Event()
+
+    def beat():
+        beats.append(time.monotonic())
+        interval[0] = 0.01
+        if len(beats) == 4:
+            done.set()
+            return False
+        return None
+
+    start = time.monotonic()
+    timer = sched.call_every(lambda: interval[0], beat, jitter=0.5)
+    assert done.wait(2)
+    assert 0.02 <= beats[0] - start <= 0.5
+    assert beats[-1] - beats[0] < 0.3
+    assert timer.cancelled
+    time.sleep(0.05)
+    assert len(beats) == 4
+
+
+def test_many_clients_share_one_timer_thread():
+    before = {t.name for t in threading.enumerate()}
+    clients = []
+    for i in range(50):
+        state = PhoneState(server="127.0.0.1", mac=f"AABBCCDD{i:04X}", model="7970")
+        state.enable_audio = False
+        client = SCCPClient(state)
+        client.running = True
+        client.sock = object()
+        client._start_keepalive()
+        state.update_prompt("Your current options", duration=0.05)
+        clients.append(client)
+    try:
+        new = {t.name for t in threading.enumerate()} - before
+        assert new <= {"skinny-timers"}
+        deadline = time.monotonic() + 2
+        while any(c.state.current_prompt for c in clients) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert not any(c.state.current_prompt for c in clients)
+    finally:
+        for client in clients:
+            client._stop_keepalive()
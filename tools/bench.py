@@ -0,0 +1,501 @@
+"""Micro-benchmarks for the hot paths (framing, codecs, media).
+
+    python -m tools.bench framing --rounds 2000
+    python -m tools.bench codec --iterations 100000
+    python -m tools.bench g711 --packets 2000
+    python -m tools.bench rtp-engine --legs 100 --seconds 3
+    python -m tools.bench registration --phones 500
+    python -m tools.bench dial-plan --dns 20000
+    python -m tools.bench dispatch --iterations 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import socket
+import statistics
+import struct
+import threading
+import time
+
+import numpy as np
+
+from messages.generic import Buf
+from simulator import payloads
+from utils import g711
+from utils import skinny_schema as schema
+from utils.skinny_framing import SkinnyFrameReader
+
+
+def registration_burst() -> bytes:
+    """Server → phone messages for one modern registration (as the simulator sends them)."""
+    packets = [
+        payloads.register_ack(30),
+        payloads.capabilities_req(),
+        payloads.button_template_res(),
+        payloads.softkey_template_res(),
+        payloads.softkey_set_res(),
+        payloads.config_stat_res("SEP001122334455", "PySkinnySim"),
+        payloads.line_stat_res(1, "1000"),
+        payloads.forward_stat_res(1),
+        payloads.feature_stat_res(),
+        payloads.time_date_res(),
+        payloads.display_prompt_status("Ready"),
+        payloads.select_soft_keys(),
+        payloads.keepalive_ack(),
+    ]
+    return b"".join(packets)
+
+
+def _per_frame_reader(sock):
+    """The old client loop: recv(12) for the header, then ``payload += chunk``."""
+    while True:
+        header = sock.recv(12)
+        if len(header) < 12:
+            return
+        data_length, _version, msg_id = struct.unpack("<III", header)
+        payload = b""
+        while len(payload) < data_length - 4:
+            chunk = sock.recv(data_length - 4 - len(payload))
+            if not chunk:
+                return
+            payload += chunk
+        yield msg_id, payload
+
+
+def _buffered_reader(sock):
+    reader = SkinnyFrameReader(sock)
+    while reader.fill():
+        for msg_id, payload in reader.frames():
+            yield msg_id, bytes(payload)
+
+
+def _time_reader(reader_fn, data: bytes, rounds: int) -> tuple[int, float]:
+    a, b = socket.socketpair()
+
+    def writer() -> None:
+        try:
+            for _ in range(rounds):
+                a.sendall(data)
+        finally:
+            a.shutdown(socket.SHUT_WR)
+
+    t = threading.Thread(target=writer, daemon=True)
+    t0 = time.perf_counter()
+    t.start()
+    count = sum(1 for _ in reader_fn(b))
+    elapsed = time.perf_counter() - t0
+    t.join()
+    a.close()
+    b.close()
+    return count, elapsed
+
+
+def bench_framing(rounds: int) -> dict:
+    burst = registration_burst()
+    out = {}
+    for name, fn in (("per_frame", _per_frame_reader), ("buffered", _buffered_reader)):
+        count, elapsed = _time_reader(fn, burst, rounds)
+        out[name] = {"messages": count, "seconds": round(elapsed, 4), "msgs_per_sec": round(count / elapsed)}
+    out["speedup"] = round(out["buffered"]["msgs_per_sec"] / out["per_frame"]["msgs_per_sec"], 2)
+    return out
+
+
+def _buf_call_info(payload: bytes) -> tuple:
+    """The old hand-written CallInfo reader (Buf.read_cstring / read_u32)."""
+    buf = Buf(payload)
+    fields = [buf.read_cstring(40, ""), buf.read_cstring(24, ""), buf.read_cstring(40, ""), buf.read_cstring(24, "")]
+    if buf.remaining() >= 12:
+        fields += [buf.read_u32(), buf.read_u32(), buf.read_u32()]
+    for size in (40, 24, 40, 24):
+        if buf.remaining() >= size:
+            fields.append(buf.read_cstring(size, ""))
+    if buf.remaining() >= 8:
+        fields += [buf.read_u32(), buf.read_u32()]
+    for _ in range(4):
+        if buf.remaining() >= 24:
+            fields.append(buf.read_cstring(24, ""))
+    if buf.remaining() >= 12:
+        fields += [buf.read_u32(), buf.read_u32(), buf.read_u32()]
+    return tuple(fields)
+
+
+def _handbuilt_start_media(call_ref: int, remote_ip: int, remote_port: int) -> bytes:
+    """The old simulator builder: struct.pack per segment + concatenation + pack_message."""
+    from simulator.protocol import pack_message
+
+    body = struct.pack("<IIIIIIIIHH", call_ref, 0x01000101, remote_ip, remote_port, 20, 4, 0, 0, 0, 0)
+    body += struct.pack("<IIIHH", 0, call_ref, 0, 0, 0)
+    body += b"\x00" * 32
+    return pack_message(0x008A, body)
+
+
+def _rate(fn, iterations: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return iterations / (time.perf_counter() - t0)
+
+
+def bench_codec(iterations: int) -> dict:
+    info = schema.CALL_INFO.pack("Alice", "1000", "Bob", "1001", 1, 9, 1)
+    old_decode = _rate(lambda: _buf_call_info(info), iterations)
+    new_decode = _rate(lambda: schema.CALL_INFO.decode(info), iterations)
+    old_encode = _rate(lambda: _handbuilt_start_media(9, 0x0100007F, 20000), iterations)
+    new_encode = _rate(lambda: payloads.start_media_transmission(9, 0x0100007F, 20000), iterations)
+    return {
+        "call_info_decode_buf_per_sec": round(old_decode),
+        "call_info_decode_schema_per_sec": round(new_decode),
+        "decode_speedup": round(new_decode / old_decode, 2),
+        "start_media_encode_handbuilt_per_sec": round(old_encode),
+        "start_media_encode_schema_per_sec": round(new_encode),
+        "encode_speedup": round(new_encode / old_encode, 2),
+    }
+
+
+def _loop_pcmu_encode(x: np.ndarray) -> bytes:
+    """The old audio_worker encoder: one Python loop iteration per sample."""
+    s = (np.clip(x, -1.0, 1.0) * 32767.0).astype(np.int16)
+    out = bytearray(s.size)
+    for i, sample in enumerate(s):
+        sign = 0x00
+        v = sample
+        if v < 0:
+            v = -v - 1
+            sign = 0x80
+        if v > 32635: v = 32635
+        v = v + 0x84
+        exp = 7
+        mask = 0x4000
+        while (v & mask) == 0 and exp > 0:
+            mask >>= 1; exp -= 1
+        mant = (v >> (exp + 3)) & 0x0F
+        out[i] = (~(sign | (exp << 4) | mant)) & 0xFF
+    return bytes(out)
+
+
+def _arith_pcmu_decode(data: bytes) -> np.ndarray:
+    """The old utils/g711 decoder: per-packet numpy bit arithmetic."""
+    u = np.frombuffer(data, dtype=np.uint8) ^ 0xFF
+    sign = (u & 0x80).astype(np.int16)
+    exponent = (u >> 4) & 0x07
+    mantissa = u & 0x0F
+    mag = ((mantissa.astype(np.int16) << 3) + 0x84) << exponent
+    pcm16 = np.where(sign != 0, -mag, mag).astype(np.int16)
+    return pcm16.astype(np.float32) / 32768.0
+
+
+def bench_g711(packets: int) -> dict:
+    """20 ms μ-law packets (160 samples): encode + decode per packet, and the
+    number of full-duplex legs (50 pkt/s each way) one core could sustain."""
+    rng = np.random.default_rng(0)
+    pcm = rng.uniform(-0.8, 0.8, 160).astype(np.float32)
+    payload = g711.pcmu_encode_from_float32(pcm)
+    out = {}
+    for name, enc, dec in (("loop", _loop_pcmu_encode, _arith_pcmu_decode),
+                           ("table", g711.pcmu_encode_from_float32, g711.pcmu_decode_to_float32)):
+        enc_rate = _rate(lambda: enc(pcm), packets)
+        dec_rate = _rate(lambda: dec(payload), packets)
+        per_packet = 1.0 / enc_rate + 1.0 / dec_rate
+        out[f"{name}_encode_pkts_per_sec"] = round(enc_rate)
+        out[f"{name}_decode_pkts_per_sec"] = round(dec_rate)
+        out[f"{name}_legs_per_core"] = int(1.0 / (50 * per_packet))
+    out["legs_speedup"] = round(out["table_legs_per_core"] / max(1, out["loop_legs_per_core"]), 1)
+    return out
+
+
+def _run_legs(legs: int, seconds: float, engine) -> dict:
+    """``legs`` RTPSender/RTPReceiver pairs (as SimMediaHub builds them), all
+    sending to one sink; returns thread count and per-stream gap jitter."""
+    from audio_worker import RTPReceiver, RTPSender
+
+    sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sink.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 << 20)
+    sink.bind(("127.0.0.1", 0))
+    sink.settimeout(0.2)
+    base_threads = threading.active_count()
+    pairs = []
+    for _ in range(legs):
+        rx = RTPReceiver(worker=None, bind_ip="127.0.0.1", port=0, engine=engine)
+        tx = RTPSender("127.0.0.1", sink.getsockname()[1], engine=engine)
+        rx.start()
+        tx.start()
+        pairs.append((rx, tx))
+    threads = threading.active_count() - base_threads
+    last: dict[int, float] = {}
+    gaps: dict[int, list[float]] = {}
+    end = time.monotonic() + seconds
+    try:
+        while time.monotonic() < end:
+            try:
+                data, _ = sink.recvfrom(2048)
+            except socket.timeout:
+                continue
+            now = time.monotonic()
+            ssrc = struct.unpack_from("!I", data, 8)[0]
+            prev = last.get(ssrc)
+            if prev is not None:
+                gaps.setdefault(ssrc, []).append((now - prev) * 1000.0)
+            last[ssrc] = now
+    finally:
+        for rx, tx in pairs:
+            rx.stop()
+            tx.stop()
+        if engine is not None:
+            engine.stop()
+        sink.close()
+    jitters = [statistics.pstdev(g) for g in gaps.values() if len(g) > 1]
+    packets = sum(len(g) + 1 for g in gaps.values())
+    return {
+        "threads": threads,
+        "pkts_per_sec": round(packets / seconds),
+        "gap_jitter_ms_mean": round(statistics.fmean(jitters), 3) if jitters else None,
+        "gap_jitter_ms_max": round(max(jitters), 3) if jitters else None,
+    }
+
+
+def _uncached_reply_set(device_name: str, dn: str) -> list[bytes]:
+    """The registration replies built from scratch, as before the payload caches."""
+    return [
+        payloads.register_ack.__wrapped__(30),
+        payloads.capabilities_req.__wrapped__(),
+        payloads.button_template_res.__wrapped__(),
+        payloads.softkey_template_res.__wrapped__(),
+        payloads.softkey_set_res.__wrapped__(),
+        schema.CONFIG_STAT_RES.frame(device_name, 0, 0, "SkinnySim", "PySkinnySim", 1, 0),
+        schema.LINE_STAT_RES.frame(1, dn, dn, dn, 0),
+        payloads.feature_stat_res.__wrapped__(),
+        payloads.forward_stat_res(1),
+        payloads._build_time_date_res(int(time.time())),
+        payloads.display_prompt_status("Ready"),
+        payloads.select_soft_keys(softkey_set_index=0),
+    ]
+
+
+def _cached_reply_set(device_name: str, dn: str) -> list[bytes]:
+    return [
+        payloads.register_ack(30),
+        payloads.capabilities_req(),
+        payloads.button_template_res(),
+        payloads.softkey_template_res(),
+        payloads.softkey_set_res(),
+        payloads.config_stat_res(device_name, "PySkinnySim"),
+        payloads.line_stat_res(1, dn),
+        payloads.feature_stat_res(),
+        payloads.forward_stat_res(1),
+        payloads.time_date_res(),
+        *payloads.registration_ready(),
+    ]
+
+
+def _registration_requests(mac: str) -> bytes:
+    """Phone → CM frames of one registration, sent as one burst."""
+    from messages.register import build_ip_port_message, send_register_req
+    from simulator.protocol import pack_message
+    from state import PhoneState
+
+    state = PhoneState(server="127.0.0.1", mac=mac, model="7970")
+    u32 = struct.Struct("<I").pack
+    return b"".join([
+        send_register_req(state),
+        build_ip_port_message(state),
+        pack_message(0x000E),            # ButtonTemplateReq
+        pack_message(0x0028),            # SoftKeyTemplateReq
+        pack_message(0x0025),            # SoftKeySetReq
+        pack_message(0x000C),            # ConfigStatReq
+        pack_message(0x000B, u32(1)),    # LineStatReq
+        pack_message(0x0034, u32(1)),    # FeatureStatReq
+        pack_message(0x0009, u32(1)),    # ForwardStatReq
+        pack_message(0x000D),            # TimeDateReq -> registration complete
+    ])
+
+
+def _register_raw(address, burst: bytes) -> int:
+    """Send one registration burst and read until the final SelectSoftKeys; returns recv calls."""
+    sock = socket.create_connection(address)
+    try:
+        sock.settimeout(5.0)
+        sock.sendall(burst)
+        reader = SkinnyFrameReader(sock)
+        reads = 0
+        while reader.fill():
+            reads += 1
+            for msg_id, _payload in reader.frames():
+                if msg_id == schema.SELECT_SOFT_KEYS.msg_id:
+                    return reads
+        raise RuntimeError("simulator closed before registration completed")
+    finally:
+        sock.close()
+
+
+def bench_registration(phones: int) -> dict:
+    """Simulator reply-set building (uncached vs cached) and raw registrations/s."""
+    from simulator.server import SkinnySimulator
+
+    iterations = max(phones * 4, 2000)
+    old_build = _rate(lambda: _uncached_reply_set("SEP001122334455", "1000"), iterations)
+    new_build = _rate(lambda: _cached_reply_set("SEP001122334455", "1000"), iterations)
+    out = {
+        "reply_set_uncached_per_sec": round(old_build),
+        "reply_set_cached_per_sec": round(new_build),
+        "build_speedup": round(new_build / old_build, 2),
+    }
+    bursts = [_registration_requests(f"0A0000{i:06X}") for i in range(phones)]
+    for mode in ("threads", "asyncio"):
+        sim = SkinnySimulator(
+            host="127.0.0.1", port=0, tftp=False, admin_port=0, cip_port=0, server_mode=mode
+        )
+        sim.start(background=True)
+        time.sleep(0.15)
+        try:
+            t0 = time.perf_counter()
+            reads = [_register_raw(sim.address, burst) for burst in bursts]
+            elapsed = time.perf_counter() - t0
+        finally:
+            sim.stop()
+        out[f"{mode}_registrations_per_sec"] = round(phones / elapsed)
+        out[f"{mode}_reads_per_registration"] = round(statistics.fmean(reads), 2)
+    return out
+
+
+def bench_dial_plan(dns: int) -> dict:
+    """Per-digit routing: exact DN dict lookup under a lock vs a DialPlan cursor."""
+    from simulator.dial_plan import MATCH, DialPlan
+
+    numbers = [str(100000 + i) for i in range(dns)]
+    t0 = time.perf_counter()
+    plan = DialPlan()
+    for number in numbers:
+        plan.add(number)
+    # a realistic set of translation / route patterns next to the DNs
+    plan.load_lines([
+        "9.1[2-9]XX[2-9]XXXXXX discard=predot",
+        "9.011! discard=predot",
+        "8XXXXXX strip=1",
+        "0 target=100000",
+    ])
+    build = time.perf_counter() - t0
+
+    by_dn = dict.fromkeys(numbers)
+    lock = threading.Lock()
+    sample = numbers[:: max(len(numbers) // 1000, 1)]
+    digits = sum(len(n) for n in sample)
+
+    def exact() -> None:
+        for number in sample:
+            dialed = ""
+            for digit in number:
+                dialed += digit
+                with lock:
+                    by_dn.get(dialed)
+
+    def trie() -> None:
+        for number in sample:
+            cursor = plan.cursor()
+            for digit in number:
+                cursor.feed(digit)
+            assert cursor.result.status == MATCH
+
+    old = _rate(exact, 20) * digits
+    new = _rate(trie, 20) * digits
+    return {
+        "routes": len(plan),
+        "trie_nodes": plan.stats()["nodes"],
+        "build_ms": round(build * 1000, 1),
+        "exact_dn_digits_per_sec": round(old),
+        "dial_plan_digits_per_sec": round(new),
+    }
+
+
+def bench_dispatch(iterations: int) -> dict:
+    """dispatch_message over CallInfo + KeepAliveAck: profiler off, every call, 1 in 16."""
+    import logging
+
+    import messages  # noqa: F401  (registers the handlers)
+    from client import SCCPClient
+    from dispatcher import dispatch_message, message_handlers
+    from state import PhoneState
+    from utils.dispatch_profile import DispatchProfiler
+
+    logging.disable(logging.INFO)
+    state = PhoneState(server="127.0.0.1", mac="AABBCCDDEEFF", model="7970", port=2000)
+    state.enable_audio = False
+    client = SCCPClient(state)
+    client.running = True
+    call_info = schema.CALL_INFO.pack("Alice", "1000", "Bob", "1001", 1, 9, 1)
+    frames = [(0x008F, call_info), (0x0100, b"")]
+    handlers = [message_handlers[msg_id]["handler"] for msg_id, _ in frames]
+
+    def direct() -> None:
+        for handler, (_, payload) in zip(handlers, frames):
+            handler(client, payload)
+
+    def dispatched() -> None:
+        for msg_id, payload in frames:
+            dispatch_message(client, msg_id, payload)
+
+    try:
+        out = {"direct_handler_calls_per_sec": round(_rate(direct, iterations) * len(frames))}
+        for label, profile in (("off", None), ("every", DispatchProfiler(1)), ("1_in_16", DispatchProfiler(16))):
+            client.dispatch_profile = profile
+            out[f"dispatch_profile_{label}_per_sec"] = round(_rate(dispatched, iterations) * len(frames))
+    finally:
+        logging.disable(logging.NOTSET)
+    return out
+
+
+def bench_rtp_engine(legs: int, seconds: float) -> dict:
+    from simulator.rtp_engine import RTPEngine
+
+    out = {}
+    for name, engine in (("threads", None), ("engine", RTPEngine())):
+        for key, value in _run_legs(legs, seconds, engine).items():
+            out[f"{name}_{key}"] = value
+        time.sleep(0.3)  # let per-leg threads exit before the next run
+    return out
+
+
+def _print(title: str, result: dict) -> None:
+    print(title)
+    for key, value in result.items():
+        print(f"  {key}: {value}")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="pyskinny micro-benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+    p = sub.add_parser("framing", help="Skinny frame reader: per-frame recv vs buffered recv_into")
+    p.add_argument("--rounds", type=int, default=2000, help="registration bursts to stream")
+    p = sub.add_parser("codec", help="Skinny message schema codecs vs hand-written Buf/struct code")
+    p.add_argument("--iterations", type=int, default=100000)
+    p = sub.add_parser("g711", help="G.711 lookup tables vs per-sample loop / bit arithmetic")
+    p.add_argument("--packets", type=int, default=2000, help="20 ms packets to encode and decode")
+    p = sub.add_parser("rtp-engine", help="simulator media legs: thread per sender/receiver vs shared RTPEngine")
+    p.add_argument("--legs", type=int, default=100)
+    p.add_argument("--seconds", type=float, default=3.0)
+    p = sub.add_parser("registration", help="simulator registration replies: rebuilt vs cached, one write per burst")
+    p.add_argument("--phones", type=int, default=500, help="sequential raw registrations per server mode")
+    p = sub.add_parser("dial-plan", help="simulator digit routing: exact DN lookup vs dial-plan trie cursor")
+    p.add_argument("--dns", type=int, default=20000, help="registered DNs loaded into the plan")
+    p = sub.add_parser("dispatch", help="client message dispatch with the handler profiler off / on")
+    p.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    if args.bench == "framing":
+        _print("framing (registration burst)", bench_framing(args.rounds))
+    elif args.bench == "codec":
+        _print("codec (CallInfo decode, StartMediaTransmission encode)", bench_codec(args.iterations))
+    elif args.bench == "g711":
+        _print("g711 (20 ms PCMU packets)", bench_g711(args.packets))
+    elif args.bench == "rtp-engine":
+        _print(f"rtp-engine ({args.legs} legs)", bench_rtp_engine(args.legs, args.seconds))
+    elif args.bench == "registration":
+        _print(f"registration ({args.phones} phones)", bench_registration(args.phones))
+    elif args.bench == "dial-plan":
+        _print(f"dial-plan ({args.dns} DNs)", bench_dial_plan(args.dns))
+    elif args.bench == "dispatch":
+        _print("dispatch (CallInfo + KeepAliveAck)", bench_dispatch(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
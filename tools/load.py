@@ -0,0 +1,410 @@
+"""Virtual-phone load generator with latency percentiles.
+
+Spins up N ``SCCPClient`` phones, ramps their registrations at a fixed rate,
+then places calls between idle phones at a fixed calls-per-second: the caller
+goes off-hook and dials the callee's DN, the callee answers and both hold the
+call for ``--hold`` seconds before the caller hangs up. The JSON report
+gives count / min / p50 / p90 / p95 / p99 / max / mean for
+
+* ``registration_ms``       connect + RegisterReq -> registered
+* ``dial_to_ringback_ms``   last digit sent -> caller in RingOut
+* ``answer_to_media_ms``    Answer pressed -> StartMediaTransmission on both legs
+* ``rtcp_rtt_ms``           RTCP round-trip time per leg at hang-up (``--rtcp SEC``;
+                            needs a ``--hold`` of about two report intervals)
+
+plus failures by stage and ``call_setup_ms``, the fleet histograms of the
+phones' own call-setup traces (dial tone, post-dial delay, media cut-through;
+see ``utils/call_trace.py``, exported with ``--trace-out``). Without
+``--server`` an embedded ``SkinnySimulator`` is started on localhost, which
+makes runs repeatable:
+
+    pyskinny-load --phones 50 --register-rate 25 --cps 5 --calls 100 --hold 1
+    pyskinny-load --server 10.0.0.10 --mac-start 0011AA000000 --models 7960,7970 --phones 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import math
+import queue
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+
+import messages  # noqa: F401 — register handlers
+from client import SCCPClient
+from messages.generic import handle_keypad_press
+from state import PhoneState
+from utils.call_trace import CallTraceFleet, CallTracer
+from utils.logs import add_logging_cli_args, configure_logging_from_verbose
+
+logger = logging.getLogger(__name__)
+
+CALL_STATE_RING_OUT = 3
+
+
+@dataclass
+class LoadConfig:
+    phones: int = 10
+    server: str | None = None         # None: embedded simulator on localhost
+    port: int = 2000
+    mac_start: str = "AABBCC000000"
+    models: tuple[str, ...] = ("7970",)
+    register_rate: float = 20.0       # registrations started per second
+    cps: float = 1.0                  # calls started per second
+    calls: int = 0                    # 0: one call per pair of phones
+    hold: float = 2.0                 # seconds each call stays connected
+    answer_delay: float = 0.0
+    timeout: float = 10.0             # per step
+    sim_mode: str = "threads"
+    tftp: bool = False
+    trace_out: str | None = None      # call-setup traces: .json or .csv
+    rtcp: float = 0.0                 # RTCP report interval on every phone (0 = off)
+
+
+def percentiles(values: list[float]) -> dict:
+    """Nearest-rank summary of ``values`` (milliseconds)."""
+    if not values:
+        return {"count": 0}
+    s = sorted(values)
+    n = len(s)
+
+    def rank(p: float) -> float:
+        return round(s[min(n - 1, max(0, math.ceil(p / 100.0 * n) - 1))], 2)
+
+    return {
+        "count": n,
+        "min": round(s[0], 2),
+        "p50": rank(50),
+        "p90": rank(90),
+        "p95": rank(95),
+        "p99": rank(99),
+        "max": round(s[-1], 2),
+        "mean": round(sum(s) / n, 2),
+    }
+
+
+def mac_range(start: str, count: int) -> list[str]:
+    base = int(start.replace(":", "").replace("-", ""), 16)
+    return [f"{(base + i) & 0xFFFFFFFFFFFF:012X}" for i in range(count)]
+
+
+def _left(deadline: float) -> float:
+    return max(deadline - time.monotonic(), 0.0)
+
+
+def _line_dn(client: SCCPClient) -> str:
+    return str((client.state.lines or {}).get("1", {}).get("line_dir_number") or "").strip()
+
+
+class _Results:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.registration_ms: list[float] = []
+        self.dial_to_ringback_ms: list[float] = []
+        self.answer_to_media_ms: list[float] = []
+        self.rtcp_rtt_ms: list[float] = []
+        self.failures: Counter[str] = Counter()
+        self.calls_attempted = 0
+        self.calls_completed = 0
+
+    def add(self, name: str, ms: float) -> None:
+        with self.lock:
+            getattr(self, name).append(ms)
+
+    def fail(self, stage: str) -> None:
+        with self.lock:
+            self.failures[stage] += 1
+
+
+class LoadRunner:
+    def __init__(self, config: LoadConfig):
+        self.config = config
+        self.results = _Results()
+        self.traces = CallTraceFleet()
+        self.clients: list[SCCPClient] = []
+        self._idle: queue.Queue[SCCPClient] = queue.Queue()
+        self._sim = None
+
+    # ---- setup ----
+    def _start_simulator(self) -> tuple[str, int]:
+        from simulator.server import SkinnySimulator
+
+        self._sim = SkinnySimulator(
+            host="127.0.0.1",
+            port=0,
+            tftp=False,
+            admin_port=0,
+            server_mode=self.config.sim_mode,
+            backlog=max(128, self.config.phones),
+        )
+        self._sim.start(background=True)
+        return self._sim.address
+
+    def _make_client(self, host: str, port: int, mac: str, model: str) -> SCCPClient:
+        state = PhoneState(server=host, mac=mac, model=model, port=port, tftp_port=6969)
+        state.enable_audio = False
+        state.rtcp_interval = self.config.rtcp
+        client = SCCPClient(state)
+        client.get_tftp_config = self.config.tftp
+        client.call_trace = CallTracer(state.device_name, fleet=self.traces)
+        return client
+
+    def _register_all(self, host: str, port: int) -> None:
+        cfg = self.config
+        macs = mac_range(cfg.mac_start, cfg.phones)
+        interval = 1.0 / cfg.register_rate if cfg.register_rate > 0 else 0.0
+        watchers = []
+        t0 = time.monotonic()
+        for i, mac in enumerate(macs):
+            delay = t0 + i * interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            client = self._make_client(host, port, mac, cfg.models[i % len(cfg.models)])
+            started = time.monotonic()
+            try:
+                client.start()
+            except OSError as exc:
+                logger.warning("%s: connect failed: %s", client.state.device_name, exc)
+                self.results.fail("connect")
+                continue
+            self.clients.append(client)
+            w = threading.Thread(target=self._await_registration, args=(client, started), daemon=True)
+            w.start()
+            watchers.append(w)
+        for w in watchers:
+            w.join()
+
+    def _await_registration(self, client: SCCPClient, started: float) -> None:
+        # event / state-change waits: no polling, and no poll interval in the latency
+        deadline = started + self.config.timeout
+        ok = client.state.is_registered.wait(_left(deadline)) and client.wait_until(
+            lambda: bool(_line_dn(client)), _left(deadline)
+        )
+        if not ok:
+            self.results.fail("register")
+            return
+        self.results.add("registration_ms", (time.monotonic() - started) * 1000.0)
+        self._idle.put(client)
+
+    # ---- calls ----
+    def _place_calls(self) -> None:
+        cfg = self.config
+        total = cfg.calls or max(len(self.clients) // 2, 1)
+        interval = 1.0 / cfg.cps if cfg.cps > 0 else 0.0
+        workers = []
+        t0 = time.monotonic()
+        for k in range(total):
+            delay = t0 + k * interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                caller = self._idle.get(timeout=cfg.timeout)
+            except queue.Empty:
+                self.results.fail("no_idle_phone")
+                continue
+            try:
+                callee = self._idle.get(timeout=cfg.timeout)
+            except queue.Empty:
+                self._idle.put(caller)
+                self.results.fail("no_idle_phone")
+                continue
+            with self.results.lock:
+                self.results.calls_attempted += 1
+            w = threading.Thread(target=self._call, args=(caller, callee), daemon=True)
+            w.start()
+            workers.append(w)
+        for w in workers:
+            w.join()
+
+    def _call(self, caller: SCCPClient, callee: SCCPClient) -> None:
+        cfg = self.config
+        res = self.results
+        for c in (caller, callee):
+            c.events.call_ringing.clear()
+            c.events.call_connected.clear()
+            c.events.media_started.clear()
+        stage = "dial_tone"
+        try:
+            known = set(caller.state.calls or {})
+            caller.press_softkey("NewCall")
+            ref = caller.wait_new_call(known, cfg.timeout)
+            if ref is None:
+                return
+            for ch in _line_dn(callee):
+                handle_keypad_press(caller, 1, int(ch))
+            dialed = time.monotonic()
+            stage = "ringback"
+            if not caller.wait_call_state(ref, CALL_STATE_RING_OUT, cfg.timeout):
+                return
+            res.add("dial_to_ringback_ms", (time.monotonic() - dialed) * 1000.0)
+            stage = "ring_in"
+            if not callee.events.call_ringing.wait(cfg.timeout):
+                return
+            if cfg.answer_delay:
+                time.sleep(cfg.answer_delay)
+            answered = time.monotonic()
+            callee.press_softkey("Answer")
+            stage = "media"
+            deadline = answered + cfg.timeout
+            if not (
+                caller.events.media_started.wait(_left(deadline))
+                and callee.events.media_started.wait(_left(deadline))
+            ):
+                return
+            res.add("answer_to_media_ms", (time.monotonic() - answered) * 1000.0)
+            time.sleep(cfg.hold)
+            for c in (caller, callee):
+                rtcp = c.state._rtcp
+                if rtcp is not None and rtcp.rtt_ms is not None:
+                    res.add("rtcp_rtt_ms", rtcp.rtt_ms)
+            caller.press_softkey("EndCall")
+            stage = "teardown"
+            deadline = time.monotonic() + cfg.timeout
+            if not all(
+                c.wait_until(lambda c=c: not c.state.active_calls_list, _left(deadline)) for c in (caller, callee)
+            ):
+                return
+            stage = ""
+            with res.lock:
+                res.calls_completed += 1
+        except Exception:
+            logger.exception("call %s -> %s failed", caller.state.device_name, callee.state.device_name)
+        finally:
+            if stage:
+                res.fail(stage)
+                for c in (caller, callee):
+                    try:
+                        if c.state.active_calls_list:
+                            c.press_softkey("EndCall")
+                    except Exception:
+                        pass
+            self._idle.put(caller)
+            self._idle.put(callee)
+
+    # ---- run ----
+    def run(self) -> dict:
+        cfg = self.config
+        started = time.monotonic()
+        try:
+            host, port = (cfg.server, cfg.port) if cfg.server else self._start_simulator()
+            self._register_all(host, port)
+            reg_done = time.monotonic()
+            self._place_calls()
+            calls_done = time.monotonic()
+        finally:
+            self._shutdown()
+        res = self.results
+        call_sec = calls_done - reg_done
+        report = {
+            "config": {**asdict(cfg), "models": list(cfg.models)},
+            "phones": {"requested": cfg.phones, "registered": len(res.registration_ms)},
+            "registration_ms": percentiles(res.registration_ms),
+            "dial_to_ringback_ms": percentiles(res.dial_to_ringback_ms),
+            "answer_to_media_ms": percentiles(res.answer_to_media_ms),
+            "rtcp_rtt_ms": percentiles(res.rtcp_rtt_ms),
+            "calls": {
+                "attempted": res.calls_attempted,
+                "completed": res.calls_completed,
+                "achieved_cps": round(res.calls_attempted / call_sec, 2) if call_sec > 0 else None,
+            },
+            "call_setup_ms": {
+                span: {k: v for k, v in hist.items() if k != "buckets"}
+                for span, hist in self.traces.as_dict(calls=False)["fleet"].items()
+            },
+            "failures": dict(res.failures),
+            "duration_sec": {
+                "registration": round(reg_done - started, 3),
+                "calls": round(call_sec, 3),
+            },
+        }
+        if cfg.trace_out:
+            self.traces.export(cfg.trace_out)
+        if self._sim is not None:
+            # embedded simulator: how often CallHub threads waited on each other
+            report["simulator_locks"] = self._sim.hub.lock_stats()
+        return report
+
+    def _shutdown(self) -> None:
+        stoppers = [threading.Thread(target=c.stop, daemon=True) for c in self.clients]
+        for t in stoppers:
+            t.start()
+        for t in stoppers:
+            t.join(timeout=15)
+        if self._sim is not None:
+            self._sim.stop()
+
+
+def run_load(config: LoadConfig) -> dict:
+    return LoadRunner(config).run()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Virtual-phone load generator (registration and call latency)")
+    parser.add_argument("--server", default=None, help="CallManager to load (default: embedded simulator on 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=2000, help="Skinny TCP port with --server (default: 2000)")
+    parser.add_argument("--phones", type=int, default=10, help="virtual phones to register (default: 10)")
+    parser.add_argument("--mac-start", default="AABBCC000000", help="first MAC; phones take consecutive MACs")
+    parser.add_argument("--models", default="7970", help="comma-separated models, assigned round-robin (default: 7970)")
+    parser.add_argument("--register-rate", type=float, default=20.0, metavar="PER_SEC", help="registration ramp (default: 20/s)")
+    parser.add_argument("--cps", type=float, default=1.0, help="calls started per second (default: 1)")
+    parser.add_argument("--calls", type=int, default=0, help="calls to place (default: phones / 2)")
+    parser.add_argument("--hold", type=float, default=2.0, metavar="SEC", help="connected time per call (default: 2)")
+    parser.add_argument("--answer-delay", type=float, default=0.0, metavar="SEC", help="callee rings this long before answering")
+    parser.add_argument("--timeout", type=float, default=10.0, metavar="SEC", help="per-step timeout (default: 10)")
+    parser.add_argument(
+        "--sim-mode",
+        choices=("threads", "asyncio"),
+        default="threads",
+        help="server mode of the embedded simulator (default: threads)",
+    )
+    parser.add_argument("--tftp", action="store_true", help="fetch SEP config over TFTP before registering")
+    parser.add_argument(
+        "--rtcp",
+        type=float,
+        default=0.0,
+        metavar="SEC",
+        help="run RTCP on every phone's RTP legs, reporting every SEC seconds (default: off)",
+    )
+    parser.add_argument(
+        "--trace-out",
+        default=None,
+        metavar="PATH",
+        help="export call-setup span histograms per phone and fleet (.json, or .csv for a summary)",
+    )
+    parser.add_argument("-o", "--output", default=None, metavar="PATH", help="write the JSON report to PATH (default: stdout)")
+    add_logging_cli_args(parser)
+    args = parser.parse_args(argv)
+    configure_logging_from_verbose(args.verbose, log_file=args.log_file)
+
+    config = LoadConfig(
+        phones=args.phones,
+        server=args.server,
+        port=args.port,
+        mac_start=args.mac_start,
+        models=tuple(m.strip() for m in args.models.split(",") if m.strip()) or ("7970",),
+        register_rate=args.register_rate,
+        cps=args.cps,
+        calls=args.calls,
+        hold=args.hold,
+        answer_delay=args.answer_delay,
+        timeout=args.timeout,
+        sim_mode=args.sim_mode,
+        tftp=args.tftp,
+        rtcp=args.rtcp,
+        trace_out=args.trace_out,
+    )
+    report = json.dumps(run_load(config), indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(report + "\n")
+    else:
+        sys.stdout.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -227,6 +227,22 @@ def exec_show_softkeys(client, clitext, argv, log):
     log("")
 
 
+def exec_show_perf(ctx, clitext, argv, log):
+    client = _require_client(ctx, log)
+    if not client:
+        return
+    profile = client.dispatch_profile
+    if profile is None:
+        log("% Dispatch profiling is off (start with --profile-dispatch [N])")
+        return
+    log(f"DISPATCH PROFILE (1 in {profile.sample_every} handler calls timed)")
+    for line in profile.format_lines():
+        log(line)
+    if argv[-1].lower() == "detail":
+        log(json.dumps(profile.snapshot(), indent=4))
+    log("")
+
+
 def exec_show_state_obj(client, clitext, argv, log):
     if not argv:
         log("% Usage: show state <ObjectName>")
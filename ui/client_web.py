@@ -65,6 +65,8 @@ class ClientWebController:
             client = self._require_client()
             state = client.state
             registered = state.is_registered.is_set()
+            rtp_stats = getattr(state, "_rtp_stats", None)
+            rtcp = getattr(state, "_rtcp", None)
             softkeys: list[dict[str, str]] = []
             buttons: list[dict[str, Any]] = []
 
@@ -124,6 +126,12 @@ class ClientWebController:
                 "buttons": buttons,
                 "calls": calls,
                 "capabilities": {"screenshot": True, "execute": registered},
+                "send_queue": client.send_stats(),
+                "dispatch_profile": (
+                    client.dispatch_profile.as_dict() if client.dispatch_profile else None
+                ),
+                "rtp_stats": rtp_stats.as_dict() if rtp_stats is not None else None,
+                "rtcp": rtcp.as_dict() if rtcp is not None else None,
             }
 
     def render_png(self) -> bytes:
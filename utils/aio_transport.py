@@ -0,0 +1,115 @@
+"""Socket-shaped wrapper over an asyncio transport.
+
+Code written against a blocking ``socket`` (``sendall`` / ``close`` /
+``shutdown``) can write to an asyncio connection through ``TransportSocket``:
+on the loop thread writes go straight to the transport, from any other thread
+they are handed over with ``call_soon_threadsafe``. Used by the asyncio
+client engine and by the simulator's asyncio server mode.
+
+Frames written during one loop iteration are coalesced: the first
+``sendall`` schedules a flush with ``call_soon`` and everything queued by then
+goes to the transport in one ``writelines``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import socket
+import threading
+
+from utils.skinny_writer import ByteRate
+
+
+class TransportSocket:
+    """Minimal ``socket`` stand-in over an asyncio transport (writes only)."""
+
+    __slots__ = (
+        "_transport", "_loop", "_loop_thread", "_pending", "_flush_scheduled",
+        "messages", "writes", "bytes_sent", "max_depth", "_rate",
+    )
+
+    def __init__(self, transport: asyncio.BaseTransport, loop: asyncio.AbstractEventLoop):
+        self._transport = transport
+        self._loop = loop
+        self._loop_thread = threading.get_ident()
+        self._pending: list[bytes] = []
+        self._flush_scheduled = False
+        self.messages = 0
+        self.writes = 0
+        self.bytes_sent = 0
+        self.max_depth = 0
+        self._rate = ByteRate()
+
+    def sendall(self, data) -> None:
+        if self._transport.is_closing():
+            raise OSError("transport closed")
+        if threading.get_ident() == self._loop_thread:
+            self._queue(bytes(data))
+        else:
+            # UI / macro / timer threads still press keys directly.
+            self._loop.call_soon_threadsafe(self._queue, bytes(data))
+
+    def _queue(self, data: bytes) -> None:
+        if self._transport.is_closing():
+            return
+        self._pending.append(data)
+        self.max_depth = max(self.max_depth, len(self._pending))
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self._loop.call_soon(self._flush)
+
+    def _flush(self) -> None:
+        self._flush_scheduled = False
+        batch, self._pending = self._pending, []
+        if not batch or self._transport.is_closing():
+            return
+        self._transport.writelines(batch)
+        n = sum(len(p) for p in batch)
+        self.messages += len(batch)
+        self.writes += 1
+        self.bytes_sent += n
+        self._rate.add(n)
+
+    def stats(self) -> dict:
+        return {
+            "depth": len(self._pending),
+            "bytes_queued": sum(len(p) for p in self._pending),
+            "max_depth": self.max_depth,
+            "messages": self.messages,
+            "writes": self.writes,
+            "bytes_sent": self.bytes_sent,
+            "bytes_per_sec": round(self._rate.rate(), 1),
+        }
+
+    def settimeout(self, timeout) -> None:
+        pass
+
+    def shutdown(self, how=socket.SHUT_RDWR) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if threading.get_ident() == self._loop_thread:
+            self._close()
+        else:
+            try:
+                self._loop.call_soon_threadsafe(self._close)
+            except RuntimeError:
+                pass  # loop already closed
+
+    def abort(self) -> None:
+        """Drop the connection without flushing (a stuck peer never drains it)."""
+        if threading.get_ident() == self._loop_thread:
+            self._abort()
+        else:
+            try:
+                self._loop.call_soon_threadsafe(self._abort)
+            except RuntimeError:
+                pass  # loop already closed
+
+    def _close(self) -> None:
+        self._flush()
+        self._transport.close()
+
+    def _abort(self) -> None:
+        self._pending.clear()
+        self._transport.abort()
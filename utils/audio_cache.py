@@ -0,0 +1,223 @@
+"""Process-wide cache of decoded audio assets and pre-encoded G.711 frames.
+
+Tones, key beeps and IVR prompts are small WAV files that get played over and
+over. ``ASSETS.get(path, rate)`` decodes a file once per target sample rate
+(16-bit PCM, downmixed to mono, nearest-neighbour resampled) and keeps the
+float32 PCM in an LRU capped by ``max_bytes``. Entries are keyed by path and
+target rate and validated against the file's mtime/size, but at most once
+every ``revalidate_sec`` so hot assets (key beeps) are served without any
+filesystem access.
+
+For 8 kHz assets, ``AudioAsset.frames(pt, samples, gain_db)`` returns the
+asset cut into RTP payloads (μ-law PT 0 / A-law PT 8), encoded once and
+cached with the asset, so ``RTPSender`` can send prompts with no per-packet
+decode or encode work. ``silence_frame`` / ``tone_frames`` do the same for
+the synthetic sources.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+import wave
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.g711 import pcma_encode_from_float32, pcmu_encode_from_float32
+
+G711_RATE = 8000
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+# Tones whose frames only repeat after this many packets are not pre-encoded.
+MAX_TONE_FRAMES = 64
+
+
+def _encoder(pt: int):
+    return pcma_encode_from_float32 if pt == 8 else pcmu_encode_from_float32
+
+
+def load_wav_float32(path: str, target_sr: int | None = None) -> tuple[np.ndarray, int]:
+    """Decode a 16-bit PCM WAV to float32 mono; returns ``(pcm, rate)``."""
+    with wave.open(path, "rb") as wf:
+        nchan, sampwidth, sr = wf.getnchannels(), wf.getsampwidth(), wf.getframerate()
+        raw = wf.readframes(wf.getnframes())
+    if sampwidth != 2:
+        raise ValueError(f"{os.path.basename(path)} must be 16-bit PCM WAV")
+    pcm = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+    if nchan > 1:
+        pcm = pcm.reshape(-1, nchan).mean(axis=1)  # downmix
+    if target_sr and sr != target_sr:
+        # quick nearest resample (good enough for prompts/tones)
+        ratio = target_sr / float(sr)
+        idx = (np.arange(int(len(pcm) * ratio)) / ratio).astype(np.int64)
+        pcm = pcm[idx]
+        sr = target_sr
+    if pcm.size == 0:
+        pcm = np.zeros(1, dtype=np.float32)
+    return pcm, sr
+
+
+class AudioAsset:
+    """Decoded float32 mono PCM (read-only) plus lazily encoded RTP frames."""
+
+    __slots__ = ("path", "rate", "pcm", "_frames", "_lock", "_on_grow")
+
+    def __init__(self, path: str, rate: int, pcm: np.ndarray, on_grow=None):
+        pcm.setflags(write=False)
+        self.path = path
+        self.rate = rate
+        self.pcm = pcm
+        self._frames: dict[tuple[int, int, float], tuple[bytes, ...]] = {}
+        self._lock = threading.Lock()
+        self._on_grow = on_grow
+
+    @property
+    def duration(self) -> float:
+        return self.pcm.size / float(self.rate)
+
+    @property
+    def nbytes(self) -> int:
+        return self.pcm.nbytes + sum(samples * len(frames) for (_, samples, _), frames in self._frames.items())
+
+    def frames(self, pt: int, samples: int, gain_db: float = 0.0) -> tuple[bytes, ...] | None:
+        """G.711 payloads of ``samples`` each (last one zero-padded); None unless 8 kHz."""
+        if self.rate != G711_RATE or samples <= 0:
+            return None
+        key = (8 if pt == 8 else 0, samples, float(gain_db))
+        frames = self._frames.get(key)
+        if frames is not None:
+            return frames
+        count = -(-self.pcm.size // samples)
+        padded = np.zeros(count * samples, dtype=np.float32)
+        padded[: self.pcm.size] = self.pcm
+        if gain_db:
+            padded *= 10 ** (gain_db / 20.0)
+        data = _encoder(key[0])(padded)
+        frames = tuple(data[i:i + samples] for i in range(0, len(data), samples))
+        with self._lock:
+            frames = self._frames.setdefault(key, frames)
+        if self._on_grow is not None:
+            self._on_grow(self)
+        return frames
+
+
+class _Entry:
+    __slots__ = ("asset", "mtime_ns", "size", "checked_at", "nbytes")
+
+    def __init__(self, asset: AudioAsset, st: os.stat_result, now: float):
+        self.asset = asset
+        self.mtime_ns = st.st_mtime_ns
+        self.size = st.st_size
+        self.checked_at = now
+        self.nbytes = asset.nbytes
+
+
+class AudioAssetCache:
+    """Thread-safe LRU of ``AudioAsset`` keyed by (path, target rate)."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, revalidate_sec: float = 2.0):
+        self.max_bytes = int(max_bytes)
+        self.revalidate_sec = float(revalidate_sec)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries: OrderedDict[tuple[str, int | None], _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._silence: dict[tuple[int, int], bytes] = {}
+        self._tones: dict[tuple, tuple[bytes, ...] | None] = {}
+
+    def get(self, path: str, rate: int | None = None) -> AudioAsset:
+        """Decoded asset for ``path`` at ``rate`` (None keeps the file's rate)."""
+        key = (os.path.abspath(path), rate)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry.checked_at < self.revalidate_sec:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.asset
+        st = os.stat(key[0])
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry.mtime_ns, entry.size) == (st.st_mtime_ns, st.st_size):
+                entry.checked_at = now
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.asset
+            self.misses += 1
+        pcm, sr = load_wav_float32(key[0], rate)
+        asset = AudioAsset(key[0], sr, pcm, on_grow=self._asset_grew)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            entry = _Entry(asset, st, now)
+            self._entries[key] = entry
+            self._bytes += entry.nbytes
+            self._evict()
+        return asset
+
+    def _asset_grew(self, asset: AudioAsset) -> None:
+        with self._lock:
+            for entry in self._entries.values():
+                if entry.asset is asset:
+                    size = asset.nbytes
+                    self._bytes += size - entry.nbytes
+                    entry.nbytes = size
+                    break
+            self._evict()
+
+    def _evict(self) -> None:
+        # Always keep the most recently used entry, even if it alone exceeds the cap.
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.nbytes
+            self.evictions += 1
+
+    def silence_frame(self, pt: int, samples: int) -> bytes:
+        key = (8 if pt == 8 else 0, samples)
+        frame = self._silence.get(key)
+        if frame is None:
+            frame = self._silence[key] = _encoder(key[0])(np.zeros(samples, dtype=np.float32))
+        return frame
+
+    def tone_frames(self, pt: int, samples: int, sr: int, freq_hz: float, gain_db: float) -> tuple[bytes, ...] | None:
+        """Sine payloads for one repeat of the tone; frame ``i`` starts at sample
+        ``i * samples``. None when it does not repeat within ``MAX_TONE_FRAMES``."""
+        key = (8 if pt == 8 else 0, samples, sr, float(freq_hz), float(gain_db))
+        if key in self._tones:
+            return self._tones[key]
+        frames = None
+        if sr == G711_RATE and float(freq_hz).is_integer() and freq_hz > 0 and samples > 0:
+            period = sr // math.gcd(int(freq_hz), sr)     # samples per repeat of the waveform
+            count = period // math.gcd(period, samples)   # packets per repeat
+            if count <= MAX_TONE_FRAMES:
+                gain = 10 ** (gain_db / 20.0)
+                idx = np.arange(count * samples, dtype=np.float64)
+                pcm = (gain * np.sin(2.0 * np.pi * float(freq_hz) * idx / sr)).astype(np.float32)
+                data = _encoder(key[0])(pcm)
+                frames = tuple(data[i:i + samples] for i in range(0, len(data), samples))
+        self._tones[key] = frames
+        return frames
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+ASSETS = AudioAssetCache()
@@ -42,8 +42,6 @@ def update_call_state(
     remote_name="",
     remote_number="",
 ):
-    now = datetime.datetime.now(datetime.timezone.utc)
-
     # CM2 may not provide call_reference. Pick a stable fallback.
     if not call_reference:
         call_reference = (
@@ -55,38 +53,34 @@ def update_call_state(
 
     key = str(call_reference)
 
-    existing = client.state.calls.get(key, {})
-
-    call_started = existing.get("call_started")
-    call_ended = existing.get("call_ended")
-
-    if call_state_name is None and call_state is not None:
-        call_state_name = CALL_STATE_NAMES.get(call_state, "UNKNOWN")
-
-    if call_state is None:
-        call_state = existing.get("call_state", 0)
-
-    client.state.calls[key] = {
-        **existing,
-        "call_state": call_state,
-        "call_state_name": call_state_name or existing.get("call_state_name", "UNKNOWN"),
-        "line_instance": line_instance or existing.get("line_instance", 0),
-        "call_reference": call_reference,
-        "current_time": now,
-        "call_started": call_started,
-        "call_ended": call_ended,
-        "last_update_source": source,
-        "calling_party_name": calling_party_name or existing.get("calling_party_name", ""),
-        "calling_party": calling_party or existing.get("calling_party", ""),
-        "called_party_name": called_party_name or existing.get("called_party_name", ""),
-        "called_party": called_party or existing.get("called_party", ""),
-        "remote_name": remote_name or existing.get("remote_name", ""),
-        "remote_number": remote_number or existing.get("remote_number", ""),
-    }
-
-    if key not in client.state.calls_list:
-        client.state.calls_list.append(key)
-
+    # Updated in place; the table re-indexes on call_state / line / ref changes.
+    call = client.state.calls.record(key)
+
+    if call_state is not None:
+        if call_state_name is None:
+            call_state_name = CALL_STATE_NAMES.get(call_state, "UNKNOWN")
+        call.call_state = call_state
+    if call_state_name:
+        call.call_state_name = call_state_name
+    if line_instance:
+        call.line_instance = line_instance
+    call.call_reference = call_reference
+    call.touch()
+    call.last_update_source = source
+    if calling_party_name:
+        call.calling_party_name = calling_party_name
+    if calling_party:
+        call.calling_party = calling_party
+    if called_party_name:
+        call.called_party_name = called_party_name
+    if called_party:
+        call.called_party = called_party
+    if remote_name:
+        call.remote_name = remote_name
+    if remote_number:
+        call.remote_number = remote_number
+
+    client.state.notify_changed()
     return key
 
 
@@ -161,9 +155,8 @@ def resolve_active_call_key(client, call_reference=0) -> tuple[str | None, dict]
         call = client.state.calls.get(ref_s)
         if call:
             return ref_s, call
-        for key, row in client.state.calls.items():
-            if str(row.get("call_reference")) == ref_s:
-                return str(key), row
+        for key in client.state.calls.keys_for_ref(ref_s):
+            return key, client.state.calls[key]
 
     for candidate in (
         getattr(client.state, "selected_call_reference", None),
@@ -0,0 +1,347 @@
+"""Per-call records for ``PhoneState.calls``, indexed by state, line and reference.
+
+``CallRecord`` is a slotted object that still behaves like the old per-call
+dict (``call["call_state"]``, ``call.get(...)``, ``dict(call)``), so handlers,
+the UIs and scripts keep working. Updates happen in place: changing
+``call_state``, ``line_instance`` or ``call_reference`` moves the record
+between ``CallTable``'s indexes, so "which call is held?" or "which key
+carries Skinny ref N?" is a dict lookup instead of a scan.
+
+Ended calls (OnHook) are kept for ``show calls`` and the web UI, but only
+the newest ``max_ended`` of them; older ones are dropped from the table
+(and ``on_evict`` lets PhoneState drop the matching CallInfo row), so a
+phone that runs for days handling thousands of calls stays flat in memory.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import MutableMapping
+from datetime import datetime, timezone
+from typing import Callable, Iterable, Iterator, Mapping
+
+DEFAULT_MAX_ENDED = 256
+ENDED_STATE = 2
+
+
+class CallRecord(MutableMapping):
+    # Mapping keys backed by slots, in the order the old dict rows used.
+    FIELDS = (
+        "call_state",
+        "call_state_name",
+        "line_instance",
+        "call_reference",
+        "current_time",
+        "call_started",
+        "call_ended",
+        "last_update_source",
+        "calling_party_name",
+        "calling_party",
+        "called_party_name",
+        "called_party",
+        "remote_name",
+        "remote_number",
+    )
+    _FIELD_SET = frozenset(FIELDS)
+    _INDEXED = frozenset(("call_state", "line_instance", "call_reference"))
+
+    __slots__ = (
+        "key",
+        "_table",
+        "_call_state",
+        "_line_instance",
+        "_call_reference",
+        "updated_at",
+        "call_state_name",
+        "call_started",
+        "call_ended",
+        "last_update_source",
+        "calling_party_name",
+        "calling_party",
+        "called_party_name",
+        "called_party",
+        "remote_name",
+        "remote_number",
+        "extra",
+    )
+
+    def __init__(self, key: str, values: Mapping | None = None):
+        self.key = key
+        self._table: CallTable | None = None
+        self._call_state = 0
+        self._line_instance = 0
+        self._call_reference = None
+        self.updated_at = time.time()
+        self.call_state_name = "UNKNOWN"
+        self.call_started = None
+        self.call_ended = None
+        self.last_update_source = ""
+        self.calling_party_name = ""
+        self.calling_party = ""
+        self.called_party_name = ""
+        self.called_party = ""
+        self.remote_name = ""
+        self.remote_number = ""
+        self.extra: dict | None = None  # privacy / precedence / script keys
+        if values:
+            for name, value in values.items():
+                self[name] = value
+
+    # ---- indexed fields ----
+    @property
+    def call_state(self) -> int:
+        return self._call_state
+
+    @call_state.setter
+    def call_state(self, value) -> None:
+        old, self._call_state = self._call_state, value
+        if self._table is not None and old != value:
+            self._table._reindex(self, "call_state", old, value)
+
+    @property
+    def line_instance(self) -> int:
+        return self._line_instance
+
+    @line_instance.setter
+    def line_instance(self, value) -> None:
+        old, self._line_instance = self._line_instance, value
+        if self._table is not None and old != value:
+            self._table._reindex(self, "line_instance", old, value)
+
+    @property
+    def call_reference(self):
+        return self._call_reference
+
+    @call_reference.setter
+    def call_reference(self, value) -> None:
+        old, self._call_reference = self._call_reference, value
+        if self._table is not None and old != value:
+            self._table._reindex(self, "call_reference", old, value)
+
+    @property
+    def current_time(self) -> datetime:
+        """Time of the last update (built on read; updates only store a float)."""
+        return datetime.fromtimestamp(self.updated_at, timezone.utc)
+
+    @current_time.setter
+    def current_time(self, value) -> None:
+        self.updated_at = value.timestamp() if isinstance(value, datetime) else float(value)
+
+    def touch(self) -> None:
+        self.updated_at = time.time()
+
+    @property
+    def ended(self) -> bool:
+        return self._call_state == ENDED_STATE
+
+    # ---- mapping protocol (compatibility with the old dict rows) ----
+    def __getitem__(self, name):
+        if name in self._FIELD_SET:
+            return getattr(self, name)
+        if self.extra is None:
+            raise KeyError(name)
+        return self.extra[name]
+
+    def __setitem__(self, name, value) -> None:
+        if name in self._FIELD_SET:
+            setattr(self, name, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[name] = value
+
+    def __delitem__(self, name) -> None:
+        if name in self._FIELD_SET:
+            raise KeyError(f"{name} is a fixed call field")
+        if self.extra is None:
+            raise KeyError(name)
+        del self.extra[name]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.FIELDS
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return len(self.FIELDS) + len(self.extra or ())
+
+    def __contains__(self, name) -> bool:
+        return name in self._FIELD_SET or bool(self.extra and name in self.extra)
+
+    def __repr__(self) -> str:
+        return f"CallRecord({self.key!r}, {dict(self)!r})"
+
+
+class CallTable(dict):
+    """``key -> CallRecord`` with state / line / reference indexes and bounded history."""
+
+    def __init__(
+        self,
+        rows: Mapping | Iterable | None = None,
+        *,
+        max_ended: int = DEFAULT_MAX_ENDED,
+        on_evict: Callable[[str], None] | None = None,
+    ):
+        super().__init__()
+        self.max_ended = max(int(max_ended), 1)
+        self.on_evict = on_evict
+        self.evicted = 0
+        # Ordered sets (dict -> None) so lookups and removals are O(1) and
+        # iteration follows the order records entered each bucket.
+        self._by_state: dict[object, dict[str, None]] = {}
+        self._by_line: dict[object, dict[str, None]] = {}
+        self._by_ref: dict[str, dict[str, None]] = {}
+        self._ended: dict[str, None] = {}
+        if rows:
+            self.update(rows)
+
+    # ---- dict overrides that keep the indexes consistent ----
+    def __setitem__(self, key, value) -> None:
+        key = str(key)
+        if not isinstance(value, CallRecord) or value._table not in (None, self):
+            value = CallRecord(key, value)
+        old = super().get(key)
+        if old is value:
+            return
+        if old is not None:
+            self._unindex(old)
+        value.key = key
+        value._table = self
+        super().__setitem__(key, value)
+        self._index(value)
+
+    def __delitem__(self, key) -> None:
+        call = super().pop(str(key))
+        self._unindex(call)
+
+    def pop(self, key, *default):
+        key = str(key)
+        if key not in self:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        call = super().pop(key)
+        self._unindex(call)
+        return call
+
+    def popitem(self):
+        key, call = super().popitem()
+        self._unindex(call)
+        return key, call
+
+    def clear(self) -> None:
+        for call in self.values():
+            call._table = None
+        super().clear()
+        self._by_state.clear()
+        self._by_line.clear()
+        self._by_ref.clear()
+        self._ended.clear()
+
+    def update(self, rows=(), **kw) -> None:
+        items = rows.items() if isinstance(rows, Mapping) else rows
+        for key, value in items:
+            self[key] = value
+        for key, value in kw.items():
+            self[key] = value
+
+    def setdefault(self, key, default=None):
+        key = str(key)
+        if key not in self:
+            self[key] = default or {}
+        return self[key]
+
+    def __copy__(self) -> dict:
+        return dict(self)
+
+    # ---- record access ----
+    def record(self, key) -> CallRecord:
+        """Existing record for ``key``, or a new empty one added to the table."""
+        key = str(key)
+        call = super().get(key)
+        if call is None:
+            call = CallRecord(key)
+            self[key] = call
+        return call
+
+    def keys_in_state(self, call_state) -> dict[str, None]:
+        """Keys currently in ``call_state`` (ordered by entry into that state)."""
+        return self._by_state.get(call_state, {})
+
+    def keys_on_line(self, line_instance) -> dict[str, None]:
+        return self._by_line.get(line_instance, {})
+
+    def keys_for_ref(self, call_reference) -> dict[str, None]:
+        """Keys whose ``call_reference`` is ``call_reference`` (``cm2-N`` rows alias numeric refs)."""
+        return self._by_ref.get(str(call_reference), {})
+
+    def stats(self) -> dict:
+        return {
+            "calls": len(self),
+            "ended": len(self._ended),
+            "max_ended": self.max_ended,
+            "evicted": self.evicted,
+            "by_state": {str(s): len(keys) for s, keys in self._by_state.items() if keys},
+        }
+
+    # ---- index maintenance ----
+    def _buckets(self, name):
+        if name == "call_state":
+            return self._by_state
+        if name == "line_instance":
+            return self._by_line
+        return self._by_ref
+
+    @staticmethod
+    def _bucket_key(name, value):
+        return str(value) if name == "call_reference" else value
+
+    def _index(self, call: CallRecord) -> None:
+        key = call.key
+        self._by_state.setdefault(call.call_state, {})[key] = None
+        self._by_line.setdefault(call.line_instance, {})[key] = None
+        if call.call_reference is not None:
+            self._by_ref.setdefault(str(call.call_reference), {})[key] = None
+        if call.ended:
+            self._note_ended(key)
+
+    def _unindex(self, call: CallRecord) -> None:
+        key = call.key
+        for name in CallRecord._INDEXED:
+            value = getattr(call, name)
+            if name == "call_reference" and value is None:
+                continue
+            self._discard(self._buckets(name), self._bucket_key(name, value), key)
+        self._ended.pop(key, None)
+        call._table = None
+
+    @staticmethod
+    def _discard(buckets: dict, bucket, key: str) -> None:
+        keys = buckets.get(bucket)
+        if keys is not None:
+            keys.pop(key, None)
+            if not keys:
+                del buckets[bucket]
+
+    def _reindex(self, call: CallRecord, name: str, old, new) -> None:
+        key = call.key
+        buckets = self._buckets(name)
+        if not (name == "call_reference" and old is None):
+            self._discard(buckets, self._bucket_key(name, old), key)
+        if not (name == "call_reference" and new is None):
+            buckets.setdefault(self._bucket_key(name, new), {})[key] = None
+        if name == "call_state":
+            if new == ENDED_STATE:
+                self._note_ended(key)
+            else:
+                self._ended.pop(key, None)
+
+    def _note_ended(self, key: str) -> None:
+        self._ended.pop(key, None)
+        self._ended[key] = None
+        while len(self._ended) > self.max_ended:
+            oldest = next(iter(self._ended))
+            self.pop(oldest)
+            self.evicted += 1
+            if self.on_evict is not None:
+                self.on_evict(oldest)
@@ -0,0 +1,393 @@
+"""Per-call setup timing: monotonic milestones, spans and latency histograms.
+
+Every ``SCCPClient`` owns a ``CallTracer``. The phone side marks its own
+actions (off-hook / NewCall, digits, Answer) and the ``messages/phone.py``
+handlers mark what CM sends (dial tone, RingOut / RingIn, Connected,
+``OpenReceiveChannel``, ``StartMediaTransmission``); the ``RTPReceiver``
+opened for the call marks the first RTP packet. All marks are
+``time.monotonic()`` and keep their first value, except the last digit.
+
+When CM puts the call on-hook the tracer turns the marks into spans (below),
+adds them to the phone's histograms and to the fleet's (``FLEET`` unless the
+client was given another ``CallTraceFleet``) and keeps the call record.
+Spans whose two marks did not both happen, or happened out of order, are
+left out. Export with ``export(path)``: ``.json`` gives histograms per phone
+and for the fleet plus recent calls, ``.csv`` one summary row per span and
+scope; ``export_calls_csv`` writes one row per call.
+
+Span                 from                    to
+-------------------  ----------------------  ----------------------
+dial_tone            offhook                 dial_tone
+post_dial_delay      last_digit              ring_out
+ringback             ring_out                connected
+answer               answer                  connected
+setup                offhook                 connected
+open_receive         connected               open_receive_channel
+start_media          open_receive_channel    start_media
+first_rtp            start_media             first_rtp
+cut_through          connected               first_rtp
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from pathlib import Path
+
+SPANS = (
+    ("dial_tone", "offhook", "dial_tone"),
+    ("post_dial_delay", "last_digit", "ring_out"),
+    ("ringback", "ring_out", "connected"),
+    ("answer", "answer", "connected"),
+    ("setup", "offhook", "connected"),
+    ("open_receive", "connected", "open_receive_channel"),
+    ("start_media", "open_receive_channel", "start_media"),
+    ("first_rtp", "start_media", "first_rtp"),
+    ("cut_through", "connected", "first_rtp"),
+)
+SPAN_NAMES = tuple(name for name, _, _ in SPANS)
+
+# Histogram bucket upper bounds in milliseconds; one overflow bucket follows.
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+
+OUTBOUND = "outbound"
+INBOUND = "inbound"
+
+
+class LatencyHistogram:
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, ms: float) -> None:
+        if not self.count or ms < self.min:
+            self.min = ms
+        if ms > self.max:
+            self.max = ms
+        self.count += 1
+        self.total += ms
+        self.buckets[bisect_left(BUCKETS_MS, ms)] += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the ``q`` quantile (capped at max)."""
+        if not self.count:
+            return 0.0
+        rank = max(1, round(q * self.count))
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(float(BUCKETS_MS[i]), self.max) if i < len(BUCKETS_MS) else self.max
+        return self.max
+
+    def as_dict(self) -> dict:
+        labels = [f"<={ms}ms" for ms in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 2) if self.count else 0.0,
+            "min_ms": round(self.min, 2),
+            "p50_ms": round(self.quantile(0.5), 2),
+            "p90_ms": round(self.quantile(0.9), 2),
+            "p99_ms": round(self.quantile(0.99), 2),
+            "max_ms": round(self.max, 2),
+            "buckets": dict(zip(labels, self.buckets)),
+        }
+
+
+class CallTrace:
+    __slots__ = ("call_ref", "direction", "marks")
+
+    def __init__(self, direction: str, call_ref: str | None = None):
+        self.call_ref = call_ref
+        self.direction = direction
+        self.marks: dict[str, float] = {}
+
+    def mark(self, name: str, now: float) -> None:
+        marks = self.marks
+        if name == "digit":
+            # digits after ringback are DTMF, not dialing
+            if "ring_out" in marks or "connected" in marks:
+                return
+            marks.setdefault("first_digit", now)
+            marks["last_digit"] = now
+        elif name not in marks:
+            marks[name] = now
+
+    def spans(self) -> dict[str, float]:
+        marks = self.marks
+        out = {}
+        for name, start, end in SPANS:
+            t0, t1 = marks.get(start), marks.get(end)
+            if t0 is not None and t1 is not None and t1 >= t0:
+                out[name] = (t1 - t0) * 1000.0
+        return out
+
+    def record(self, device: str) -> dict:
+        t0 = min(self.marks.values()) if self.marks else 0.0
+        return {
+            "device": device,
+            "call_ref": self.call_ref,
+            "direction": self.direction,
+            "spans_ms": {k: round(v, 2) for k, v in self.spans().items()},
+            "marks_ms": {k: round((v - t0) * 1000.0, 2) for k, v in self.marks.items()},
+        }
+
+
+def _summary_rows(scope: str, histograms: dict[str, LatencyHistogram]) -> list[dict]:
+    rows = []
+    for span in SPAN_NAMES:
+        hist = histograms.get(span)
+        if hist is None:
+            continue
+        row = {"scope": scope, "span": span}
+        row.update({k: v for k, v in hist.as_dict().items() if k != "buckets"})
+        rows.append(row)
+    return rows
+
+
+def _write_csv(path: str | Path, rows: list[dict], fields: list[str]) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+def _write_json(path: str | Path, data: dict) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    return path
+
+
+_SUMMARY_FIELDS = ["scope", "span", "count", "mean_ms", "min_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms"]
+_CALL_FIELDS = ["device", "call_ref", "direction", *SPAN_NAMES]
+
+
+def _call_rows(calls) -> list[dict]:
+    return [{"device": c["device"], "call_ref": c["call_ref"], "direction": c["direction"], **c["spans_ms"]} for c in calls]
+
+
+class CallTraceFleet:
+    """Histograms over every phone's finished calls, plus each phone's own."""
+
+    KEEP_CALLS = 2000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tracers: dict[str, CallTracer] = {}
+        self.histograms: dict[str, LatencyHistogram] = {}
+        self.calls: deque[dict] = deque(maxlen=self.KEEP_CALLS)
+
+    def register(self, tracer: "CallTracer") -> None:
+        with self._lock:
+            self._tracers[tracer.device] = tracer
+
+    def add(self, spans: dict[str, float], record: dict) -> None:
+        with self._lock:
+            for name, ms in spans.items():
+                hist = self.histograms.get(name)
+                if hist is None:
+                    hist = self.histograms[name] = LatencyHistogram()
+                hist.add(ms)
+            self.calls.append(record)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._tracers.clear()
+            self.histograms = {}
+            self.calls.clear()
+
+    def as_dict(self, *, calls: bool = True) -> dict:
+        with self._lock:
+            tracers = list(self._tracers.values())
+            fleet = {k: h.as_dict() for k, h in self.histograms.items()}
+            recent = list(self.calls) if calls else []
+        out = {
+            "fleet": fleet,
+            "phones": {t.device: t.as_dict(calls=False)["spans"] for t in tracers},
+        }
+        if calls:
+            out["calls"] = recent
+        return out
+
+    def export(self, path: str | Path) -> Path:
+        """``.csv``: summary row per span for the fleet and each phone; else JSON."""
+        if str(path).lower().endswith(".csv"):
+            with self._lock:
+                tracers = list(self._tracers.values())
+                rows = _summary_rows("fleet", self.histograms)
+            for tracer in tracers:
+                rows += tracer.summary_rows()
+            return _write_csv(path, rows, _SUMMARY_FIELDS)
+        return _write_json(path, self.as_dict())
+
+    def export_calls_csv(self, path: str | Path) -> Path:
+        with self._lock:
+            calls = list(self.calls)
+        return _write_csv(path, _call_rows(calls), _CALL_FIELDS)
+
+
+FLEET = CallTraceFleet()
+
+
+class CallTracer:
+    """One phone's call-setup traces; marks may come from any thread."""
+
+    KEEP_CALLS = 50
+
+    def __init__(self, device: str = "", fleet: CallTraceFleet | None = FLEET):
+        self.device = device
+        self.fleet = fleet
+        self._lock = threading.Lock()
+        self._pending: CallTrace | None = None     # off-hook before CM names the call
+        self._open: dict[str, CallTrace] = {}
+        self.histograms: dict[str, LatencyHistogram] = {}
+        self.calls: deque[dict] = deque(maxlen=self.KEEP_CALLS)
+        if fleet is not None:
+            fleet.register(self)
+
+    # ---- marks ----
+    def start(self, *, answer_ringing: bool = False) -> None:
+        """Local off-hook: a new outbound trace, bound to a call ref by ``bind``.
+
+        With ``answer_ringing`` (going off-hook on a button phone) a ringing
+        inbound call is answered instead.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if answer_ringing:
+                ringing = [t for t in self._open.values() if t.direction == INBOUND and "connected" not in t.marks]
+                if ringing:
+                    ringing[-1].mark("answer", now)
+                    return
+            trace = CallTrace(OUTBOUND)
+            trace.mark("offhook", now)
+            self._pending = trace
+
+    def bind(self, call_ref) -> None:
+        """CM named the call (CallState OffHook): attach the pending trace to it."""
+        ref = str(call_ref) if call_ref else None
+        if ref is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if ref in self._open:
+                return
+            trace = self._pending
+            self._pending = None
+            if trace is None:
+                trace = CallTrace(OUTBOUND)  # off-hook we did not see (CM or another UI)
+                trace.mark("offhook", now)
+            trace.call_ref = ref
+            self._open[ref] = trace
+
+    def ring_in(self, call_ref) -> None:
+        ref = str(call_ref) if call_ref else None
+        now = time.monotonic()
+        with self._lock:
+            if ref is not None and ref in self._open:
+                return
+            trace = CallTrace(INBOUND, ref)
+            trace.mark("ring_in", now)
+            if ref is None:
+                self._pending = trace
+            else:
+                self._open[ref] = trace
+
+    def mark(self, name: str, call_ref=None) -> None:
+        """Mark ``name`` on the call ``call_ref`` (0 / None: the newest call)."""
+        now = time.monotonic()
+        ref = str(call_ref) if call_ref else None
+        with self._lock:
+            trace = self._open.get(ref) if ref is not None else None
+            if trace is None:
+                if ref is not None and self._pending is not None:
+                    trace = self._pending
+                    self._pending = None
+                    trace.call_ref = ref
+                    self._open[ref] = trace
+                elif ref is None:
+                    trace = self._pending or (next(reversed(self._open.values())) if self._open else None)
+            if trace is not None:
+                trace.mark(name, now)
+
+    def finish(self, call_ref) -> dict | None:
+        """CM put the call on-hook: fold its spans into the histograms."""
+        ref = str(call_ref) if call_ref else None
+        with self._lock:
+            trace = self._open.pop(ref, None) if ref is not None else None
+            if trace is None:
+                return None
+            record = self._record_locked(trace)
+        return record
+
+    def flush(self) -> None:
+        """Finish every open trace (client shutting down)."""
+        with self._lock:
+            traces = list(self._open.values())
+            self._open.clear()
+            self._pending = None
+            for trace in traces:
+                self._record_locked(trace)
+
+    def _record_locked(self, trace: CallTrace) -> dict:
+        spans = trace.spans()
+        for name, ms in spans.items():
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = LatencyHistogram()
+            hist.add(ms)
+        record = trace.record(self.device)
+        self.calls.append(record)
+        if self.fleet is not None:
+            self.fleet.add(spans, record)
+        return record
+
+    # ---- export ----
+    def summary_rows(self) -> list[dict]:
+        with self._lock:
+            return _summary_rows(self.device, self.histograms)
+
+    def as_dict(self, *, calls: bool = True) -> dict:
+        with self._lock:
+            out = {
+                "device": self.device,
+                "spans": {k: h.as_dict() for k, h in self.histograms.items()},
+            }
+            if calls:
+                out["calls"] = list(self.calls)
+        return out
+
+    def export(self, path: str | Path) -> Path:
+        """``.csv``: one summary row per span; otherwise JSON with recent calls."""
+        if str(path).lower().endswith(".csv"):
+            return _write_csv(path, self.summary_rows(), _SUMMARY_FIELDS)
+        return _write_json(path, self.as_dict())
+
+    def export_calls_csv(self, path: str | Path) -> Path:
+        with self._lock:
+            calls = list(self.calls)
+        return _write_csv(path, _call_rows(calls), _CALL_FIELDS)
+
+
+def tracer(client) -> CallTracer | None:
+    """The client's tracer (handlers are also called with bare test clients)."""
+    return getattr(client, "call_trace", None)
+
+
+def mark(client, name: str, call_ref=None) -> None:
+    trace = tracer(client)
+    if trace is not None:
+        trace.mark(name, call_ref)
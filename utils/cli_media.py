@@ -77,6 +77,16 @@ def add_media_cli_args(parser: argparse.ArgumentParser) -> None:
         metavar="DIR",
         help="Directory for RTP recordings (default: logs/rtp)",
     )
+    group.add_argument(
+        "--rtp-record-raw",
+        action="store_true",
+        help="Record the G.711 payload as received/sent (mu-law/A-law WAV) instead of decoded PCM",
+    )
+    group.add_argument(
+        "--rtp-record-stereo",
+        action="store_true",
+        help="Record one stereo WAV per call (RX left, TX right) instead of _rx/_tx files",
+    )
     group.add_argument(
         "--rtp-pt",
         type=int,
@@ -87,7 +97,7 @@ def add_media_cli_args(parser: argparse.ArgumentParser) -> None:
     group.add_argument(
         "--rtp-stats",
         action="store_true",
-        help="Log RTP packet counters (summary on media stop; optional periodic updates)",
+        help="Log RTP counters, loss, reordering and jitter (summary on media stop; optional periodic updates)",
     )
     group.add_argument(
         "--rtp-stats-interval",
@@ -96,6 +106,24 @@ def add_media_cli_args(parser: argparse.ArgumentParser) -> None:
         metavar="SEC",
         help="Log RTP stats every SEC seconds while media is active (default: 5 with --rtp-stats)",
     )
+    group.add_argument(
+        "--rtcp",
+        type=float,
+        nargs="?",
+        const=5.0,
+        default=None,
+        metavar="SEC",
+        help="Send RTCP SR/RR on the RTP port + 1 every SEC seconds (default 5) and log loss / round-trip time",
+    )
+    group.add_argument(
+        "--profile-dispatch",
+        type=int,
+        nargs="?",
+        const=1,
+        default=None,
+        metavar="N",
+        help="Time Skinny message handlers (1 in N per message ID, default every one); see 'show perf'",
+    )
 
 
 def init_phone_state_from_args(args):
@@ -0,0 +1,101 @@
+"""Optional per-message-ID timing of ``@register_handler`` handlers.
+
+``dispatch_message`` checks ``client.dispatch_profile`` once per message;
+when it is ``None`` (the default) handlers run exactly as before. With
+``--profile-dispatch [N]`` the client gets a ``DispatchProfiler`` that counts
+every message and times one in ``N`` per message ID (``N=1`` times all of
+them): call count, total and max handler time and a latency histogram. The
+table shows which parsers (``parse_call_info``, ``parse_softkey_set``, ...)
+are worth optimising; see ``show perf``, the client web ``/api/state`` JSON
+and the summary logged when the client stops.
+"""
+
+from __future__ import annotations
+
+import time
+from bisect import bisect_left
+
+# Histogram bucket upper bounds in milliseconds; one overflow bucket follows.
+BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0)
+_BUCKETS_SEC = tuple(ms / 1000.0 for ms in BUCKETS_MS)
+_BUCKET_LABELS = tuple(f"<={ms:g}ms" for ms in BUCKETS_MS) + (f">{BUCKETS_MS[-1]:g}ms",)
+
+
+class _HandlerStats:
+    __slots__ = ("name", "handler", "count", "timed", "total", "max", "hist")
+
+    def __init__(self, name: str, handler: str):
+        self.name = name
+        self.handler = handler
+        self.count = 0
+        self.timed = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.hist = [0] * (len(BUCKETS_MS) + 1)
+
+
+class DispatchProfiler:
+    """Per-msg-id handler timings; written by the one thread that dispatches."""
+
+    def __init__(self, sample_every: int = 1):
+        self.sample_every = max(int(sample_every), 1)
+        self._rows: dict[int, _HandlerStats] = {}
+
+    def call(self, msg_id: int, entry: dict, client, payload: bytes) -> None:
+        """Run ``entry["handler"]``, counting it and timing every Nth call."""
+        handler = entry["handler"]
+        row = self._rows.get(msg_id)
+        if row is None:
+            row = self._rows[msg_id] = _HandlerStats(entry["name"], handler.__name__)
+        row.count += 1
+        if row.count % self.sample_every:
+            handler(client, payload)
+            return
+        start = time.perf_counter()
+        try:
+            handler(client, payload)
+        finally:
+            elapsed = time.perf_counter() - start
+            row.timed += 1
+            row.total += elapsed
+            if elapsed > row.max:
+                row.max = elapsed
+            row.hist[bisect_left(_BUCKETS_SEC, elapsed)] += 1
+
+    def snapshot(self) -> list[dict]:
+        """One dict per message ID, slowest total first."""
+        rows = []
+        for msg_id, row in list(self._rows.items()):
+            timed = row.timed
+            rows.append(
+                {
+                    "msg_id": f"0x{msg_id:04X}",
+                    "name": row.name,
+                    "handler": row.handler,
+                    "count": row.count,
+                    "timed": timed,
+                    "total_ms": round(row.total * 1000.0, 3),
+                    "avg_ms": round(row.total * 1000.0 / timed, 3) if timed else 0.0,
+                    "max_ms": round(row.max * 1000.0, 3),
+                    "histogram": dict(zip(_BUCKET_LABELS, row.hist)),
+                }
+            )
+        rows.sort(key=lambda r: r["total_ms"], reverse=True)
+        return rows
+
+    def as_dict(self) -> dict:
+        return {"sample_every": self.sample_every, "handlers": self.snapshot()}
+
+    def format_lines(self, limit: int | None = None) -> list[str]:
+        """Fixed-width table for ``show perf`` and the shutdown log."""
+        rows = self.snapshot()
+        lines = [
+            f"{'MsgId':<7} {'Handler':<28} {'Count':>7} {'Timed':>7} {'Total ms':>10} {'Avg ms':>8} {'Max ms':>8}",
+            f"{'-----':<7} {'-------':<28} {'-----':>7} {'-----':>7} {'--------':>10} {'------':>8} {'------':>8}",
+        ]
+        for r in rows[:limit]:
+            lines.append(
+                f"{r['msg_id']:<7} {r['handler'][:28]:<28} {r['count']:>7} {r['timed']:>7} "
+                f"{r['total_ms']:>10.3f} {r['avg_ms']:>8.3f} {r['max_ms']:>8.3f}"
+            )
+        return lines
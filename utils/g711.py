@@ -1,52 +1,100 @@
+"""G.711 μ-law / A-law codecs via lookup tables.
+
+Encoding indexes a 65536-entry table by the int16 sample (viewed as uint16);
+decoding indexes a 256-entry float32 table by the code byte. Both tables are
+built once at import from the reference bit-twiddling, so the output is
+bit-exact with the per-sample encoders this module replaces.
+"""
+
 import numpy as np
 
 
-def pcmu_decode_to_float32(data: bytes) -> np.ndarray:
-    """RTP PT=0 (μ-law) -> float32 mono [-1, 1]."""
-    u = np.frombuffer(data, dtype=np.uint8) ^ 0xFF  # invert bits
+def _build_ulaw_encode() -> np.ndarray:
+    s = np.arange(65536, dtype=np.uint16).view(np.int16).astype(np.int32)
+    sign = np.where(s < 0, 0x80, 0x00)
+    v = np.where(s < 0, -s - 1, s)
+    v = np.minimum(v, 32635) + 0x84
+    exp = np.zeros_like(v)
+    for e in range(1, 8):
+        exp += v >= (0x80 << e)
+    mant = (v >> (exp + 3)) & 0x0F
+    return (~(sign | (exp << 4) | mant) & 0xFF).astype(np.uint8)
+
+
+def _build_alaw_encode() -> np.ndarray:
+    s = np.arange(65536, dtype=np.uint16).view(np.int16).astype(np.int32)
+    sign = np.where(s < 0, 0x80, 0x00)
+    v = np.minimum(np.where(s < 0, -s - 1, s) >> 4, 0x1FFF)
+    exp = np.zeros_like(v)
+    for e in range(1, 8):
+        exp += v >= (0x20 << e)
+    mant = (v >> (exp + 1)) & 0x0F
+    return ((sign | (exp << 4) | mant) ^ 0x55).astype(np.uint8)
+
+
+def _build_ulaw_decode() -> np.ndarray:
+    u = np.arange(256, dtype=np.uint8) ^ 0xFF  # invert bits
     sign = (u & 0x80).astype(np.int16)
     exponent = (u >> 4) & 0x07
     mantissa = u & 0x0F
     mag = ((mantissa.astype(np.int16) << 3) + 0x84) << exponent
     pcm16 = np.where(sign != 0, -mag, mag).astype(np.int16)
-    return (pcm16.astype(np.float32) / 32768.0)
+    return pcm16.astype(np.float32) / 32768.0
 
 
-def pcma_decode_to_float32(data: bytes) -> np.ndarray:
-    """RTP PT=8 (A-law) -> float32 mono [-1, 1]."""
-    a = np.frombuffer(data, dtype=np.uint8) ^ 0x55
+def _build_alaw_decode() -> np.ndarray:
+    a = np.arange(256, dtype=np.uint8) ^ 0x55
     sign = a & 0x80
     exponent = (a & 0x70) >> 4
     mantissa = a & 0x0F
-    # magnitude
     mag = np.where(
         exponent > 0,
-        ((mantissa.astype(np.int16) << 4) + 0x108) << (exponent - 1),
+        ((mantissa.astype(np.int16) << 4) + 0x108) << np.maximum(exponent.astype(np.int16) - 1, 0),
         (mantissa.astype(np.int16) << 4) + 8
     )
     pcm16 = np.where(sign != 0, -mag, mag).astype(np.int16)
-    return (pcm16.astype(np.float32) / 32768.0)
+    return pcm16.astype(np.float32) / 32768.0
+
+
+ULAW_ENCODE = _build_ulaw_encode()
+ALAW_ENCODE = _build_alaw_encode()
+ULAW_DECODE = _build_ulaw_decode()
+ALAW_DECODE = _build_alaw_decode()
+for _t in (ULAW_ENCODE, ALAW_ENCODE, ULAW_DECODE, ALAW_DECODE):
+    _t.setflags(write=False)
+del _t
+
+
+def float32_to_int16(x: np.ndarray) -> np.ndarray:
+    """float32 [-1,1] -> int16 (clamped, scaled by 32767, truncated)."""
+    return (np.clip(x, -1.0, 1.0) * 32767.0).astype(np.int16)
+
+
+def pcmu_encode_int16(s: np.ndarray) -> bytes:
+    """int16 PCM -> μ-law bytes (RTP PT=0)."""
+    return ULAW_ENCODE[np.asarray(s, dtype=np.int16).view(np.uint16)].tobytes()
+
+
+def pcma_encode_int16(s: np.ndarray) -> bytes:
+    """int16 PCM -> A-law bytes (RTP PT=8)."""
+    return ALAW_ENCODE[np.asarray(s, dtype=np.int16).view(np.uint16)].tobytes()
 
 
 def pcmu_encode_from_float32(x: np.ndarray) -> bytes:
     """float32 [-1,1] -> μ-law bytes (RTP PT=0)."""
-    # clamp to int16
-    s = np.clip(x, -1.0, 1.0)
-    s = (s * 32767.0).astype(np.int16)
-
-    # μ-law encode
-    # based on the inverse of decode above
-    s16 = s.astype(np.int16)
-    sign = (s16 < 0).astype(np.int16)
-    mag = np.abs(s16).astype(np.int32)
-    mag = np.clip(mag + 0x84, 0, 0x7FFF)
-    exponent = np.zeros_like(mag)
-    # find exponent as position of msb among bits [7..13]
-    tmp = mag.copy()
-    for e in range(7):
-        mask = (tmp > 0x7F)
-        exponent[mask] += 1
-        tmp[mask] >>= 1
-    mantissa = (mag >> (exponent + 3)) & 0x0F
-    u = (~((sign << 7) | (exponent << 4) | mantissa)).astype(np.uint8)
-    return u.tobytes()
+    return ULAW_ENCODE[float32_to_int16(x).view(np.uint16)].tobytes()
+
+
+def pcma_encode_from_float32(x: np.ndarray) -> bytes:
+    """float32 [-1,1] -> A-law bytes (RTP PT=8)."""
+    return ALAW_ENCODE[float32_to_int16(x).view(np.uint16)].tobytes()
+
+
+def pcmu_decode_to_float32(data: bytes) -> np.ndarray:
+    """RTP PT=0 (μ-law) -> float32 mono [-1, 1]."""
+    return ULAW_DECODE[np.frombuffer(data, dtype=np.uint8)]
+
+
+def pcma_decode_to_float32(data: bytes) -> np.ndarray:
+    """RTP PT=8 (A-law) -> float32 mono [-1, 1]."""
+    return ALAW_DECODE[np.frombuffer(data, dtype=np.uint8)]
@@ -0,0 +1,172 @@
+"""Adaptive playout (jitter) buffer for received RTP audio.
+
+Frames are keyed by extended RTP sequence number and released on a playout
+clock that starts ``target_ms`` after the first packet of a talk spurt.
+Packets older than the playout cursor are dropped as late, gaps are concealed
+by repeating the previous frame with a fade, and the target delay follows the
+RFC 3550 interarrival jitter estimate between ``min_ms`` and ``max_ms``. When
+more audio is queued than the target allows, whole frames are discarded so
+mouth-to-ear latency stays bounded instead of drifting with bursts.
+
+All methods take ``now`` (seconds, ``time.monotonic``) so the buffer can be
+driven by a socket loop or by tests without sleeping.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+
+class JitterBuffer:
+    # Faded repeats of the last frame per gap. A buffer that runs dry for
+    # this many frames returns to its idle (re-buffering) state; a longer
+    # loss burst with later packets already queued plays silence instead.
+    MAX_CONCEAL = 5
+    CONCEAL_FADE = 0.5
+    # Sequence jumps beyond this are treated as a stream restart.
+    MAX_SEQ_JUMP = 1000
+
+    def __init__(
+        self,
+        *,
+        clock_rate: int = 8000,
+        min_ms: float = 20.0,
+        max_ms: float = 200.0,
+        initial_ms: float = 40.0,
+    ):
+        self.clock_rate = int(clock_rate)
+        self.min_ms = float(min_ms)
+        self.max_ms = max(float(max_ms), self.min_ms)
+        self.target_ms = min(max(float(initial_ms), self.min_ms), self.max_ms)
+        self.late = 0
+        self.duplicate = 0
+        self.overflow = 0
+        self.concealed = 0
+        self.underruns = 0
+        self.jitter_ms = 0.0
+        self._frames: dict[int, np.ndarray] = {}
+        self._frame_s = 0.020
+        self._reset_stream()
+
+    def _reset_stream(self) -> None:
+        self._frames.clear()
+        self._ssrc: int | None = None
+        self._next: int | None = None   # extended seq of the next frame to play
+        self._play_at: float | None = None
+        self._playing = False
+        self._last: np.ndarray | None = None
+        self._conceal_run = 0
+        self._transit: float | None = None
+
+    # ---- introspection ----
+    @property
+    def depth(self) -> int:
+        return len(self._frames)
+
+    @property
+    def depth_ms(self) -> float:
+        return len(self._frames) * self._frame_s * 1000.0
+
+    def next_deadline(self) -> float | None:
+        """Monotonic time of the next playout event, or None when idle."""
+        return self._play_at
+
+    # ---- input ----
+    def _extend(self, seq: int) -> int:
+        ref = self._next
+        delta = ((seq - ref + 0x8000) & 0xFFFF) - 0x8000
+        return ref + delta
+
+    def push(self, seq: int, ts: int, ssrc: int, pcm: np.ndarray, now: float) -> bool:
+        """Queue one decoded frame. Returns False if it was dropped."""
+        if self._ssrc is not None and ssrc != self._ssrc:
+            self._reset_stream()
+        if self._next is None:
+            self._ssrc = ssrc
+            self._next = seq
+            self._play_at = now + self.target_ms / 1000.0
+        ext = self._extend(seq)
+        if abs(ext - self._next) > self.MAX_SEQ_JUMP:
+            self._reset_stream()
+            return self.push(seq, ts, ssrc, pcm, now)
+        self._note_transit(ts, now)
+        if pcm.size:
+            self._frame_s = pcm.size / self.clock_rate
+        if ext < self._next:
+            if self._playing:
+                self.late += 1
+                return False
+            # Reordered head of the talk spurt, still buffering: start earlier.
+            self._next = ext
+        if ext in self._frames:
+            self.duplicate += 1
+            return False
+        self._frames[ext] = pcm
+        self._trim()
+        return True
+
+    def _note_transit(self, ts: int, now: float) -> None:
+        transit = now - (ts & 0xFFFFFFFF) / self.clock_rate
+        if self._transit is not None:
+            d = abs(transit - self._transit) * 1000.0
+            # Ignore timestamp discontinuities (silence suppression, restarts).
+            if d < 1000.0:
+                self.jitter_ms += (d - self.jitter_ms) / 16.0
+        self._transit = transit
+        frame_ms = self._frame_s * 1000.0
+        self.target_ms = min(max(frame_ms + 3.0 * self.jitter_ms, self.min_ms), self.max_ms)
+
+    def _trim(self) -> None:
+        """Discard the oldest frames while more than ``max_ms`` is queued."""
+        limit = self.max_ms / 1000.0
+        while self._frames and len(self._frames) * self._frame_s > limit:
+            oldest = min(self._frames)
+            del self._frames[oldest]
+            self.overflow += 1
+            self._next = oldest + 1
+
+    # ---- output ----
+    def _conceal(self) -> np.ndarray:
+        n = int(round(self._frame_s * self.clock_rate))
+        # pop() has already counted this frame in _conceal_run (1-based)
+        if self._last is None or self._conceal_run > self.MAX_CONCEAL:
+            return np.zeros(n, dtype=np.float32)
+        return (self._last * (self.CONCEAL_FADE ** self._conceal_run)).astype(np.float32, copy=False)
+
+    def pop(self, now: float) -> list[np.ndarray]:
+        """Frames due for playout at ``now``, in order (concealment included)."""
+        out: list[np.ndarray] = []
+        while self._play_at is not None and now >= self._play_at:
+            self._playing = True
+            frame = self._frames.pop(self._next, None)
+            if frame is not None:
+                self._conceal_run = 0
+                self._last = frame
+                out.append(frame)
+                self._next += 1
+            elif self._conceal_run >= self.MAX_CONCEAL and not self._frames:
+                # Talk spurt over (or stream stopped): rebuffer on the next packet.
+                ssrc = self._ssrc
+                self._reset_stream()
+                self._ssrc = ssrc
+                break
+            else:
+                self._conceal_run += 1
+                self.concealed += 1
+                out.append(self._conceal())
+                if self._frames:
+                    # Lost (or hopelessly reordered) packet: skip over it.
+                    self._next += 1
+                else:
+                    # Buffer ran dry: stretch playout by one frame so a late
+                    # packet can still make it, which grows the delay.
+                    self.underruns += 1
+            self._play_at += self._frame_s
+            # Adapt: skip one frame per tick while queued audio exceeds target.
+            if len(self._frames) * self._frame_s * 1000.0 > self.target_ms + 2 * self._frame_s * 1000.0:
+                oldest = min(self._frames)
+                if oldest == self._next:
+                    del self._frames[oldest]
+                    self.overflow += 1
+                    self._next += 1
+        return out
@@ -0,0 +1,366 @@
+"""RTCP (RFC 3550 section 6) sender / receiver reports on the RTP port + 1.
+
+An ``RTCPSession`` pairs with one ``RTPReceiver`` and, once media is being
+sent, its ``RTPSender``. It binds the receiver's port + 1 and sends a
+compound SR (or RR while not sending) plus SDES CNAME to the far end's RTP
+port + 1 at the RFC 3550 interval: ``interval`` seconds (5 by default)
+randomised over 0.5-1.5x, the first report after half of that. The report
+block describes the source the receiver hears, from its ``RTPStats``
+(fraction lost since the previous report, cumulative lost, extended highest
+sequence, interarrival jitter, LSR/DLSR).
+
+Incoming SR/RR are parsed: a report block about our own SSRC gives the far
+end's view of our stream (``remote``) and, when it echoes one of our SRs,
+the round-trip time ``A - LSR - DLSR``. ``stop()`` sends a BYE.
+
+Without ``engine`` the session runs its own small thread; with
+``engine=RTPEngine`` the engine selector reads the socket and its tick calls
+``poll`` so simulator legs do not add threads.
+"""
+
+from __future__ import annotations
+
+import random
+import select
+import socket
+import struct
+import threading
+import time
+
+from utils.rtp_stats import RTPStats
+
+PT_SR = 200
+PT_RR = 201
+PT_SDES = 202
+PT_BYE = 203
+
+DEFAULT_INTERVAL = 5.0
+NTP_EPOCH_OFFSET = 2208988800      # 1900-01-01 -> 1970-01-01
+MAX_REPORT_BLOCKS = 31
+
+_HEADER = struct.Struct("!BBHI")          # V/P/RC, PT, length, SSRC
+_SENDER_INFO = struct.Struct("!IIIII")    # NTP msw, NTP lsw, RTP ts, packets, octets
+_REPORT_BLOCK = struct.Struct("!IIIIII")  # SSRC, fraction+lost, ext seq, jitter, LSR, DLSR
+
+
+def ntp_timestamp(wall: float | None = None) -> tuple[int, int]:
+    """(seconds, fraction) NTP timestamp of ``wall`` (``time.time()``)."""
+    wall = time.time() if wall is None else wall
+    secs = int(wall)
+    return (secs + NTP_EPOCH_OFFSET) & 0xFFFFFFFF, int((wall - secs) * (1 << 32)) & 0xFFFFFFFF
+
+
+def ntp_compact(msw: int, lsw: int) -> int:
+    """Middle 32 bits of a 64-bit NTP timestamp (the LSR / RTT unit, 1/65536 s)."""
+    return ((msw & 0xFFFF) << 16) | (lsw >> 16)
+
+
+def _header(pt: int, count: int, body_len: int, ssrc: int) -> bytes:
+    # length is in 32-bit words minus one, counting the 8-byte header
+    return _HEADER.pack(0x80 | count, pt, (body_len + 8) // 4 - 1, ssrc)
+
+
+def _report_blocks(blocks: list[dict]) -> bytes:
+    out = []
+    for b in blocks[:MAX_REPORT_BLOCKS]:
+        lost = max(min(int(b["cumulative_lost"]), 0x7FFFFF), -0x800000) & 0xFFFFFF
+        out.append(
+            _REPORT_BLOCK.pack(
+                b["ssrc"] & 0xFFFFFFFF,
+                (int(b["fraction_lost"]) & 0xFF) << 24 | lost,
+                b["highest_seq"] & 0xFFFFFFFF,
+                int(b["jitter"]) & 0xFFFFFFFF,
+                b.get("lsr", 0) & 0xFFFFFFFF,
+                b.get("dlsr", 0) & 0xFFFFFFFF,
+            )
+        )
+    return b"".join(out)
+
+
+def build_sr(
+    ssrc: int, ntp: tuple[int, int], rtp_ts: int, packets: int, octets: int, blocks: list[dict] | None = None
+) -> bytes:
+    blocks = (blocks or [])[:MAX_REPORT_BLOCKS]
+    body = _SENDER_INFO.pack(ntp[0], ntp[1], rtp_ts & 0xFFFFFFFF, packets & 0xFFFFFFFF, octets & 0xFFFFFFFF)
+    body += _report_blocks(blocks)
+    return _header(PT_SR, len(blocks), len(body), ssrc) + body
+
+
+def build_rr(ssrc: int, blocks: list[dict] | None = None) -> bytes:
+    blocks = (blocks or [])[:MAX_REPORT_BLOCKS]
+    body = _report_blocks(blocks)
+    return _header(PT_RR, len(blocks), len(body), ssrc) + body
+
+
+def build_sdes_cname(ssrc: int, cname: str) -> bytes:
+    text = cname.encode("utf-8")[:255]
+    item = bytes((1, len(text))) + text + b"\0"     # CNAME item, then end of list
+    item += b"\0" * (-len(item) % 4)
+    return _header(PT_SDES, 1, len(item), ssrc) + item
+
+
+def build_bye(ssrc: int) -> bytes:
+    return _header(PT_BYE, 1, 0, ssrc)
+
+
+def _parse_blocks(data: bytes, offset: int, count: int) -> list[dict]:
+    blocks = []
+    for i in range(count):
+        start = offset + i * _REPORT_BLOCK.size
+        if start + _REPORT_BLOCK.size > len(data):
+            break
+        ssrc, lost_word, highest, jitter, lsr, dlsr = _REPORT_BLOCK.unpack_from(data, start)
+        lost = lost_word & 0xFFFFFF
+        if lost & 0x800000:
+            lost -= 0x1000000
+        blocks.append(
+            {
+                "ssrc": ssrc,
+                "fraction_lost": lost_word >> 24,
+                "cumulative_lost": lost,
+                "highest_seq": highest,
+                "jitter": jitter,
+                "lsr": lsr,
+                "dlsr": dlsr,
+            }
+        )
+    return blocks
+
+
+def parse_compound(data: bytes) -> list[dict]:
+    """SR / RR / BYE packets of a compound RTCP datagram (SDES and others skipped)."""
+    packets = []
+    offset = 0
+    while offset + _HEADER.size <= len(data):
+        b0, pt, length, ssrc = _HEADER.unpack_from(data, offset)
+        size = (length + 1) * 4
+        if b0 >> 6 != 2 or offset + size > len(data):
+            break
+        count = b0 & 0x1F
+        if pt == PT_SR and size >= _HEADER.size + _SENDER_INFO.size:
+            msw, lsw, rtp_ts, pkts, octets = _SENDER_INFO.unpack_from(data, offset + _HEADER.size)
+            packets.append(
+                {
+                    "type": "SR",
+                    "ssrc": ssrc,
+                    "ntp": (msw, lsw),
+                    "rtp_ts": rtp_ts,
+                    "packets": pkts,
+                    "octets": octets,
+                    "blocks": _parse_blocks(data, offset + _HEADER.size + _SENDER_INFO.size, count),
+                }
+            )
+        elif pt == PT_RR:
+            packets.append({"type": "RR", "ssrc": ssrc, "blocks": _parse_blocks(data, offset + _HEADER.size, count)})
+        elif pt == PT_BYE:
+            packets.append({"type": "BYE", "ssrc": ssrc})
+        offset += size
+    return packets
+
+
+class RTCPSession:
+    """RTCP for one RTP receiver (and optional sender), on the receiver's port + 1."""
+
+    def __init__(
+        self,
+        rx,
+        *,
+        bind_ip: str = "0.0.0.0",
+        cname: str = "pyskinny",
+        interval: float = DEFAULT_INTERVAL,
+        engine=None,
+        log=None,
+    ):
+        self.rx = rx
+        if rx.stats is None:
+            rx.attach_stats(RTPStats())
+        self.stats: RTPStats = rx.stats
+        self.cname = cname
+        self.interval = max(float(interval), 0.05)
+        self.engine = engine
+        self.log = log
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            self.sock.bind((bind_ip, rx.port + 1))
+        except OSError:
+            self.sock.close()
+            raise
+        self.port = self.sock.getsockname()[1]
+        self.tx = None
+        self.ssrc = random.getrandbits(32)
+        self.remote_addr: tuple[str, int] | None = None
+        self.reports_tx = 0
+        self.reports_rx = 0
+        self.rtt_ms: float | None = None
+        self.max_rtt_ms = 0.0
+        self.remote: dict | None = None        # far end's last report block about our stream
+        self.remote_bye = False
+        self._lock = threading.Lock()
+        self._prior: tuple[int, int, int] | None = None   # ssrc, expected, received at last report
+        self._peer_sr: tuple[int, int, float] | None = None  # ssrc, LSR, monotonic arrival
+        self._next_report = time.monotonic() + self.interval * random.uniform(0.25, 0.75)
+        self._stop = threading.Event()
+        self._thr = threading.Thread(target=self._run, name=f"RTCP:{self.port}", daemon=True)
+
+    # ---- wiring ----
+    def set_sender(self, tx) -> None:
+        """Media is being sent by ``tx``: SR to its peer's port + 1 (``None``: RR, same peer)."""
+        with self._lock:
+            self.tx = tx
+            if tx is not None:
+                self.ssrc = tx.ssrc
+                self.remote_addr = (tx.addr[0], int(tx.addr[1]) + 1)
+
+    def start(self) -> None:
+        if self.engine is not None:
+            self.engine.add_rtcp(self)
+        else:
+            self._thr.start()
+
+    def stop(self) -> None:
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        if self.engine is not None:
+            self.engine.remove_rtcp(self)
+        addr = self.remote_addr
+        if addr is not None:
+            try:
+                self.sock.sendto(build_bye(self.ssrc), addr)
+            except OSError:
+                pass
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+    # ---- reports ----
+    def _report_block(self) -> dict | None:
+        # the client may swap in its own RTPStats once media starts
+        stats = self.rx.stats or self.stats
+        self.stats = stats
+        reception = stats.reception()
+        if reception is None:
+            return None
+        ssrc, highest, expected, received, jitter = reception
+        prior = self._prior if self._prior is not None and self._prior[0] == ssrc else (ssrc, 0, 0)
+        self._prior = (ssrc, expected, received)
+        expected_int = expected - prior[1]
+        lost_int = expected_int - (received - prior[2])
+        fraction = (lost_int << 8) // expected_int if expected_int > 0 and lost_int > 0 else 0
+        block = {
+            "ssrc": ssrc,
+            "fraction_lost": min(fraction, 255),
+            "cumulative_lost": expected - received,
+            "highest_seq": highest,
+            "jitter": jitter,
+        }
+        peer = self._peer_sr
+        if peer is not None and peer[0] == ssrc:
+            block["lsr"] = peer[1]
+            block["dlsr"] = int((time.monotonic() - peer[2]) * 65536)
+        return block
+
+    def build_report(self) -> bytes:
+        with self._lock:
+            block = self._report_block()
+            blocks = [block] if block is not None else []
+            tx = self.tx
+            if tx is not None:
+                packet = build_sr(self.ssrc, ntp_timestamp(), tx.ts, tx.packets_sent, tx.octets_sent, blocks)
+            else:
+                packet = build_rr(self.ssrc, blocks)
+            return packet + build_sdes_cname(self.ssrc, self.cname)
+
+    def poll(self, now: float) -> None:
+        """Send a report when one is due (engine tick or own thread)."""
+        if now < self._next_report:
+            return
+        self._next_report = now + self.interval * random.uniform(0.5, 1.5)
+        addr = self.remote_addr
+        if addr is None:
+            return
+        try:
+            self.sock.sendto(self.build_report(), addr)
+        except OSError:
+            return
+        self.reports_tx += 1
+
+    def handle_datagram(self, data: bytes) -> None:
+        now = time.monotonic()
+        for pkt in parse_compound(data):
+            if pkt["type"] == "BYE":
+                self.remote_bye = True
+                continue
+            self.reports_rx += 1
+            with self._lock:
+                if pkt["type"] == "SR":
+                    self._peer_sr = (pkt["ssrc"], ntp_compact(*pkt["ntp"]), now)
+                for block in pkt["blocks"]:
+                    if block["ssrc"] == self.ssrc:
+                        self._note_remote(block)
+
+    def _note_remote(self, block: dict) -> None:
+        clock_rate = self.stats.clock_rate
+        self.remote = {
+            "fraction_lost": round(block["fraction_lost"] / 256.0, 4),
+            "cumulative_lost": block["cumulative_lost"],
+            "highest_seq": block["highest_seq"],
+            "jitter_ms": round(block["jitter"] * 1000.0 / clock_rate, 2),
+        }
+        if block["lsr"]:
+            a = ntp_compact(*ntp_timestamp())
+            rtt = (a - block["lsr"] - block["dlsr"]) & 0xFFFFFFFF
+            if rtt < 0x80000000:
+                self.rtt_ms = rtt * 1000.0 / 65536.0
+                self.max_rtt_ms = max(self.max_rtt_ms, self.rtt_ms)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "port": self.port,
+                "ssrc": self.ssrc,
+                "remote_addr": f"{self.remote_addr[0]}:{self.remote_addr[1]}" if self.remote_addr else None,
+                "reports_tx": self.reports_tx,
+                "reports_rx": self.reports_rx,
+                "rtt_ms": round(self.rtt_ms, 2) if self.rtt_ms is not None else None,
+                "max_rtt_ms": round(self.max_rtt_ms, 2),
+                "remote": dict(self.remote) if self.remote else None,
+                "remote_bye": self.remote_bye,
+            }
+
+    def summary(self) -> str:
+        d = self.as_dict()
+        text = f"reports tx={d['reports_tx']} rx={d['reports_rx']}"
+        if d["rtt_ms"] is not None:
+            text += f" rtt={d['rtt_ms']:.1f}ms max={d['max_rtt_ms']:.1f}ms"
+        remote = d["remote"]
+        if remote:
+            text += (
+                f" far-end lost={remote['cumulative_lost']} ({remote['fraction_lost'] * 100:.1f}%)"
+                f" jitter={remote['jitter_ms']:.1f}ms"
+            )
+        return text
+
+    # ---- own thread (no engine) ----
+    def _run(self) -> None:
+        sock = self.sock
+        sock.settimeout(0.5)  # once; the report deadline is waited on with select
+        while not self._stop.is_set():
+            wait = min(max(self._next_report - time.monotonic(), 0.0), 0.5)
+            try:
+                if select.select([sock], [], [], wait)[0]:
+                    data, _ = sock.recvfrom(2048)
+                else:
+                    data = None
+            except socket.timeout:
+                data = None
+            except (OSError, ValueError):
+                break  # socket closed by stop()
+            if data:
+                try:
+                    self.handle_datagram(data)
+                except Exception:
+                    if self.log:
+                        self.log.exception("[RTCP] bad report on %s", self.port)
+            self.poll(time.monotonic())
@@ -1,17 +1,118 @@
-"""Record decoded RTP PCM to WAV files (RX / TX legs)."""
+"""Stream RTP call audio (RX / TX legs) to WAV files on a background writer.
+
+``write_rx`` / ``write_tx`` (decoded float32 PCM) and, in raw mode,
+``write_rx_payload`` / ``write_tx_payload`` (RTP payload bytes) only convert
+or copy one packet and put it on a bounded queue, so the media threads never
+touch the disk. A writer thread appends to the files and rewrites the RIFF
+and data sizes every ``fixup_sec`` seconds; a crash or kill leaves a playable
+file missing at most that much audio. When the queue is full (a stalled disk)
+packets are dropped and counted instead of growing memory.
+
+Formats:
+
+* ``pcm`` (default): 16-bit linear PCM of the decoded audio, after the
+  jitter buffer.
+* ``g711``: the received / sent PCMU or PCMA payload stored as-is
+  (WAV format 7 / 6, 8-bit), in arrival order; no decode or encode. The
+  first payload type seen fixes the file's codec; packets in another codec
+  are counted in ``dropped``.
+
+With ``stereo`` both legs go into one ``<base>.wav``, RX left and TX right;
+a leg that falls more than ``MAX_SKEW_SEC`` behind (on hold, one-way audio)
+is padded with silence so the channels stay aligned. Otherwise each leg has
+its own ``<base>_rx.wav`` / ``<base>_tx.wav``. Files are only created once
+audio arrives.
+"""
 
 from __future__ import annotations
 
 import os
+import queue
+import struct
 import threading
-import wave
+import time
 from datetime import datetime
 
 import numpy as np
 
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_ALAW = 6
+WAVE_FORMAT_MULAW = 7
+# RTP payload type -> (WAV format tag, silence byte)
+_G711 = {0: (WAVE_FORMAT_MULAW, 0xFF), 8: (WAVE_FORMAT_ALAW, 0xD5)}
+
+_RX = 0
+_TX = 1
+_CLOSE = None
+
+
+class _WavStream:
+    """Append-only WAV file whose header sizes are fixed up in place."""
+
+    def __init__(self, path: str, *, channels: int, sr: int, fmt_tag: int):
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self.path = path
+        self.fmt_tag = fmt_tag
+        self.width = 2 if fmt_tag == WAVE_FORMAT_PCM else 1
+        self.block = channels * self.width
+        self.data_bytes = 0
+        self._fixed_bytes = 0
+        self._fh = open(path, "wb")
+        fmt = struct.pack("<HHIIHH", fmt_tag, channels, sr, sr * self.block, self.block, self.width * 8)
+        header = bytearray(b"RIFF\0\0\0\0WAVE")
+        if fmt_tag == WAVE_FORMAT_PCM:
+            header += b"fmt " + struct.pack("<I", 16) + fmt
+            self._fact_pos = None
+        else:
+            # non-PCM: 18-byte fmt (cbSize 0) and a fact chunk with the frame count
+            header += b"fmt " + struct.pack("<I", 18) + fmt + b"\0\0"
+            self._fact_pos = len(header) + 8
+            header += b"fact" + struct.pack("<II", 4, 0)
+        self._data_pos = len(header) + 4
+        header += b"data\0\0\0\0"
+        self._header_len = len(header)
+        self._fh.write(header)
+
+    def write(self, data: bytes) -> None:
+        self._fh.write(data)
+        self.data_bytes += len(data)
+
+    def fixup(self) -> None:
+        """Rewrite the RIFF / fact / data sizes for what is on disk and flush."""
+        if self._fixed_bytes == self.data_bytes:
+            return
+        fh = self._fh
+        end = fh.tell()
+        fh.seek(4)
+        fh.write(struct.pack("<I", end - 8))
+        if self._fact_pos is not None:
+            fh.seek(self._fact_pos)
+            fh.write(struct.pack("<I", self.data_bytes // self.block))
+        fh.seek(self._data_pos)
+        fh.write(struct.pack("<I", self.data_bytes))
+        fh.seek(end)
+        fh.flush()
+        self._fixed_bytes = self.data_bytes
+
+    def close(self) -> None:
+        if self.data_bytes % 2:
+            self._fh.write(b"\0")  # RIFF chunks are word aligned; the pad is not data
+        self._fixed_bytes = -1
+        self.fixup()
+        self._fh.close()
+
+    @property
+    def frames(self) -> int:
+        return self.data_bytes // self.block
+
 
 class RTPRecorder:
-    """Thread-safe float32 mono recorder; writes 16-bit PCM WAV on close()."""
+    """Bounded-memory streaming recorder; ``close()`` drains and finalises the files."""
+
+    MAX_QUEUE = 500          # packets (~10 s of 20 ms audio per leg)
+    MAX_SKEW_SEC = 0.5       # stereo: pad the lagging leg beyond this
 
     def __init__(
         self,
@@ -20,57 +121,181 @@ class RTPRecorder:
         sr: int = 8000,
         record_rx: bool = True,
         record_tx: bool = True,
+        fmt: str = "pcm",
+        stereo: bool = False,
+        fixup_sec: float = 1.0,
         log=None,
     ):
+        if fmt not in ("pcm", "g711"):
+            raise ValueError(f"fmt must be 'pcm' or 'g711', got {fmt!r}")
         self.sr = sr
         self.log = log
-        self.rx_path = f"{base_path}_rx.wav" if record_rx else None
-        self.tx_path = f"{base_path}_tx.wav" if record_tx else None
-        self._lock = threading.Lock()
-        self._rx_frames: list[np.ndarray] = []
-        self._tx_frames: list[np.ndarray] = []
+        self.fmt = fmt
+        self.passthrough = fmt == "g711"
+        self.stereo = stereo
+        self.fixup_sec = max(float(fixup_sec), 0.05)
+        self.record_rx = record_rx
+        self.record_tx = record_tx
+        if stereo:
+            self.path = f"{base_path}.wav"
+            self.rx_path = self.tx_path = None
+        else:
+            self.path = None
+            self.rx_path = f"{base_path}_rx.wav" if record_rx else None
+            self.tx_path = f"{base_path}_tx.wav" if record_tx else None
+        self.dropped = 0
+        self._pt: int | None = None       # g711: codec of the file(s)
+        self._queue: queue.Queue = queue.Queue(maxsize=self.MAX_QUEUE)
         self._closed = False
+        self._files: list[_WavStream | None] = [None, None]
+        self._pending = [bytearray(), bytearray()]   # stereo: not yet interleaved
+        self._thr = threading.Thread(target=self._run, name="RTPRecorder", daemon=True)
+        self._thr.start()
 
     @property
     def closed(self) -> bool:
         return self._closed
 
+    # ---- producers (media threads) ----
     def write_rx(self, pcm: np.ndarray) -> None:
-        if self._closed or self.rx_path is None or pcm.size == 0:
+        if self.passthrough or not self.record_rx:
             return
-        with self._lock:
-            self._rx_frames.append(pcm.astype(np.float32, copy=True))
+        self._put_pcm(_RX, pcm)
 
     def write_tx(self, pcm: np.ndarray) -> None:
-        if self._closed or self.tx_path is None or pcm.size == 0:
+        if self.passthrough or not self.record_tx:
             return
-        with self._lock:
-            self._tx_frames.append(pcm.astype(np.float32, copy=True))
+        self._put_pcm(_TX, pcm)
 
-    def close(self) -> None:
+    def write_rx_payload(self, pt: int, payload: bytes) -> None:
+        if self.passthrough and self.record_rx:
+            self._put_payload(_RX, pt, payload)
+
+    def write_tx_payload(self, pt: int, payload: bytes) -> None:
+        if self.passthrough and self.record_tx:
+            self._put_payload(_TX, pt, payload)
+
+    def _put_pcm(self, leg: int, pcm: np.ndarray) -> None:
+        if self._closed or pcm.size == 0:
+            return
+        data = (np.clip(pcm, -1.0, 1.0) * 32767.0).astype("<i2").tobytes()
+        self._put(leg, data)
+
+    def _put_payload(self, leg: int, pt: int, payload: bytes) -> None:
+        if self._closed or not payload:
+            return
+        if self._pt is None and pt in _G711:
+            self._pt = pt
+        if pt != self._pt:
+            self.dropped += 1
+            return
+        self._put(leg, bytes(payload))
+
+    def _put(self, leg: int, data: bytes) -> None:
+        try:
+            self._queue.put_nowait((leg, data))
+        except queue.Full:
+            self.dropped += 1
+
+    # ---- lifecycle ----
+    def close(self, timeout: float = 5.0) -> None:
         if self._closed:
             return
         self._closed = True
-        with self._lock:
-            rx_path = self._write_wav(self.rx_path, self._rx_frames) if self.rx_path else None
-            tx_path = self._write_wav(self.tx_path, self._tx_frames) if self.tx_path else None
+        try:
+            self._queue.put(_CLOSE, timeout=timeout)
+        except queue.Full:
+            pass  # writer gone or wedged; its finally block closes the files
+        self._thr.join(timeout=timeout)
         if self.log:
-            self.log.info("[RTP record] saved rx=%s tx=%s", rx_path, tx_path)
+            if self.stereo:
+                self.log.info("[RTP record] saved %s (dropped=%d)", self._saved(_RX), self.dropped)
+            else:
+                self.log.info(
+                    "[RTP record] saved rx=%s tx=%s (dropped=%d)", self._saved(_RX), self._saved(_TX), self.dropped
+                )
 
-    def _write_wav(self, path: str, frames: list[np.ndarray]) -> str | None:
-        parent = os.path.dirname(path)
-        if parent:
-            os.makedirs(parent, exist_ok=True)
-        if not frames:
-            return None
-        f32 = np.clip(np.concatenate(frames), -1.0, 1.0)
-        pcm = (f32 * 32767.0).astype(np.int16)
-        with wave.open(path, "wb") as wf:
-            wf.setnchannels(1)
-            wf.setsampwidth(2)
-            wf.setframerate(self.sr)
-            wf.writeframes(pcm.tobytes())
-        return path
+    def _saved(self, leg: int) -> str | None:
+        f = self._files[0 if self.stereo else leg]
+        return f.path if f is not None else None
+
+    # ---- writer thread ----
+    def _open(self, leg: int) -> _WavStream:
+        if self.passthrough:
+            tag = _G711[self._pt][0]
+        else:
+            tag = WAVE_FORMAT_PCM
+        if self.stereo:
+            f = self._files[0]
+            if f is None:
+                f = self._files[0] = _WavStream(self.path, channels=2, sr=self.sr, fmt_tag=tag)
+            return f
+        f = self._files[leg]
+        if f is None:
+            path = self.rx_path if leg == _RX else self.tx_path
+            f = self._files[leg] = _WavStream(path, channels=1, sr=self.sr, fmt_tag=tag)
+        return f
+
+    def _silence(self, nbytes: int) -> bytes:
+        if self.passthrough:
+            return bytes((_G711[self._pt][1],)) * nbytes
+        return bytes(nbytes)
+
+    def _interleave(self, final: bool = False) -> None:
+        rx, tx = self._pending
+        width = 1 if self.passthrough else 2
+        skew = int(self.MAX_SKEW_SEC * self.sr) * width
+        # a leg that stopped sending is padded with silence once the other is far ahead
+        if final or len(rx) - len(tx) > skew:
+            tx += self._silence(max(len(rx) - len(tx), 0))
+        if final or len(tx) - len(rx) > skew:
+            rx += self._silence(max(len(tx) - len(rx), 0))
+        n = min(len(rx), len(tx)) // width * width
+        if not n:
+            return
+        dtype = np.uint8 if width == 1 else np.dtype("<i2")
+        out = np.empty(2 * (n // width), dtype=dtype)
+        out[0::2] = np.frombuffer(rx, dtype=dtype, count=n // width)
+        out[1::2] = np.frombuffer(tx, dtype=dtype, count=n // width)
+        del rx[:n]
+        del tx[:n]
+        self._open(_RX).write(out.tobytes())
+
+    def _run(self) -> None:
+        next_fixup = time.monotonic() + self.fixup_sec
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=self.fixup_sec)
+                except queue.Empty:
+                    item = False
+                if item is _CLOSE:
+                    break
+                if item:
+                    leg, data = item
+                    if self.stereo:
+                        self._pending[leg] += data
+                        self._interleave()
+                    else:
+                        self._open(leg).write(data)
+                now = time.monotonic()
+                if now >= next_fixup:
+                    next_fixup = now + self.fixup_sec
+                    for f in self._files:
+                        if f is not None:
+                            f.fixup()
+            if self.stereo and any(self._pending):
+                self._interleave(final=True)
+        except Exception:
+            if self.log:
+                self.log.exception("[RTP record] writer failed")
+        finally:
+            for f in self._files:
+                if f is not None:
+                    try:
+                        f.close()
+                    except OSError:
+                        pass
 
 
 def rtp_record_base_path(state, call_ref: int) -> str:
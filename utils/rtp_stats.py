@@ -1,4 +1,22 @@
-"""RTP packet counters for media troubleshooting."""
+"""RTP packet counters and RFC 3550 receiver statistics for media troubleshooting.
+
+``note_rx`` follows RFC 3550 appendix A: 16-bit sequence numbers are
+extended with a cycle count (A.1, without the probation step), loss is
+``expected - received`` from the extended highest sequence (A.3) and
+interarrival jitter is the running ``J += (|D| - J) / 16`` over RTP
+timestamps (A.8), reported in milliseconds at the payload clock rate.
+
+Packets behind the highest sequence seen are classified against a
+``WINDOW``-packet bitmap: a sequence not seen yet is ``reordered`` (and fills
+what was counted as lost), one already seen is a ``duplicate`` (not counted
+as received, so duplicates cannot hide loss), and one too old for the
+bitmap is ``late``. A new SSRC restarts the sequence state and is counted in
+``rx_ssrc_changes``; the lost packets of the previous source are kept.
+Everything is updated in place under one lock, without per-packet objects.
+
+``snapshot()`` returns the stats since the previous snapshot (the RFC 3550
+"fraction lost" interval); ``RTPStatsMonitor`` takes one per log line.
+"""
 
 from __future__ import annotations
 
@@ -6,6 +24,13 @@ import threading
 import time
 from dataclasses import dataclass, field
 
+MAX_DROPOUT = 3000
+MAX_MISORDER = 100
+RTP_SEQ_MOD = 1 << 16
+WINDOW = 64            # packets behind the highest sequence we can classify
+DEFAULT_CLOCK_RATE = 8000
+_EMPTY_WINDOW = bytes(WINDOW)
+
 
 @dataclass
 class RTPStats:
@@ -18,11 +43,53 @@ class RTPStats:
     last_rx_pt: int | None = None
     last_tx_pt: int | None = None
     last_rx_ssrc: int | None = None
+    # RFC 3550 receiver statistics (current SSRC unless noted).
+    clock_rate: int = DEFAULT_CLOCK_RATE
+    rx_expected: int = 0
+    rx_received: int = 0          # unique packets from the current SSRC
+    rx_lost: int = 0              # all SSRCs; duplicates never offset loss
+    rx_reordered: int = 0
+    rx_duplicates: int = 0
+    rx_late: int = 0
+    rx_ssrc_changes: int = 0
+    rx_seq_resyncs: int = 0       # large jumps accepted as a restarted sequence
+    jitter_ms: float = 0.0
+    max_jitter_ms: float = 0.0
+    # Playout (jitter) buffer, copied from RTPReceiver's JitterBuffer.
+    jb_depth: int = 0
+    jb_target_ms: float | None = None
+    jb_late: int = 0
+    jb_duplicate: int = 0
+    jb_overflow: int = 0
+    jb_concealed: int = 0
+    jb_underruns: int = 0
     started_at: float = field(default_factory=time.monotonic)
-    _last_rx_seq: int | None = field(default=None, repr=False)
+    _ssrc: int | None = field(default=None, repr=False)
+    _base_seq: int = field(default=0, repr=False)
+    _max_seq: int = field(default=0, repr=False)
+    _cycles: int = field(default=0, repr=False)
+    _bad_seq: int = field(default=RTP_SEQ_MOD + 1, repr=False)
+    _lost_retired: int = field(default=0, repr=False)
+    _expected_retired: int = field(default=0, repr=False)
+    _jitter: float = field(default=0.0, repr=False)      # timestamp units
+    _last_ts: int | None = field(default=None, repr=False)
+    _last_arrival: float = field(default=0.0, repr=False)
+    _seen: bytearray = field(default_factory=lambda: bytearray(WINDOW), repr=False)
+    _prior: dict = field(default_factory=dict, repr=False)
     _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
 
-    def note_rx(self, pt: int, seq: int, ssrc: int, payload_len: int, *, known_codec: bool) -> None:
+    def note_rx(
+        self,
+        pt: int,
+        seq: int,
+        ssrc: int,
+        payload_len: int,
+        *,
+        known_codec: bool,
+        ts: int | None = None,
+        arrival: float | None = None,
+    ) -> None:
+        """Count one received packet; ``ts`` (RTP timestamp) enables jitter."""
         with self._lock:
             self.rx_packets += 1
             self.rx_bytes += payload_len
@@ -30,11 +97,121 @@ class RTPStats:
             self.last_rx_ssrc = ssrc
             if not known_codec:
                 self.rx_pt_unknown += 1
-            if self._last_rx_seq is not None:
-                expected = (self._last_rx_seq + 1) & 0xFFFF
-                if seq != expected:
-                    self.rx_seq_gaps += 1
-            self._last_rx_seq = seq
+            if ssrc != self._ssrc:
+                if self._ssrc is not None:
+                    self.rx_ssrc_changes += 1
+                    self._retire_source()
+                self._ssrc = ssrc
+                self._init_seq(seq)
+                self._last_ts = None
+                self._jitter = 0.0
+            elif not self._update_seq(seq):
+                return
+            self.rx_expected = self._cycles + self._max_seq - self._base_seq + 1
+            self.rx_lost = self._lost_retired + max(self.rx_expected - self.rx_received, 0)
+            if ts is not None:
+                self._update_jitter(ts, time.monotonic() if arrival is None else arrival)
+
+    def _retire_source(self) -> None:
+        self._lost_retired = self.rx_lost
+        self._expected_retired += self.rx_expected
+
+    def _init_seq(self, seq: int) -> None:
+        self._base_seq = seq
+        self._max_seq = seq
+        self._cycles = 0
+        self._bad_seq = RTP_SEQ_MOD + 1
+        self.rx_received = 1
+        seen = self._seen
+        seen[:] = _EMPTY_WINDOW
+        seen[seq % WINDOW] = 1
+
+    def _update_seq(self, seq: int) -> bool:
+        """RFC 3550 A.1 ``update_seq``; False drops the packet from the stats."""
+        max_seq = self._max_seq
+        udelta = (seq - max_seq) & 0xFFFF
+        seen = self._seen
+        if udelta == 0:
+            self.rx_duplicates += 1
+            return False
+        if udelta < MAX_DROPOUT:
+            if seq < max_seq:
+                self._cycles += RTP_SEQ_MOD
+            if udelta > 1:
+                self.rx_seq_gaps += 1
+            if udelta < WINDOW:
+                for i in range(1, udelta):
+                    seen[(max_seq + i) % WINDOW] = 0
+            else:
+                seen[:] = _EMPTY_WINDOW
+            seen[seq % WINDOW] = 1
+            self._max_seq = seq
+            self.rx_received += 1
+            return True
+        if udelta <= RTP_SEQ_MOD - MAX_MISORDER:
+            # a large jump: accept it once it is followed by its successor
+            if seq == self._bad_seq:
+                self.rx_seq_resyncs += 1
+                self._retire_source()
+                self._init_seq(seq)
+                self._last_ts = None
+                return True
+            self._bad_seq = (seq + 1) & 0xFFFF
+            return False
+        # behind the highest sequence: reordered, duplicate or late
+        behind = RTP_SEQ_MOD - udelta
+        if behind >= WINDOW:
+            self.rx_late += 1
+            self.rx_received += 1
+            return True
+        slot = seq % WINDOW
+        if seen[slot]:
+            self.rx_duplicates += 1
+            return False
+        seen[slot] = 1
+        self.rx_reordered += 1
+        self.rx_received += 1
+        return True
+
+    def _update_jitter(self, ts: int, arrival: float) -> None:
+        """RFC 3550 A.8 with wrap-safe timestamp deltas."""
+        last_ts = self._last_ts
+        if last_ts is not None:
+            dts = (ts - last_ts) & 0xFFFFFFFF
+            if dts >= 0x80000000:
+                dts -= 0x100000000
+            d = abs((arrival - self._last_arrival) * self.clock_rate - dts)
+            self._jitter += (d - self._jitter) / 16.0
+            jitter_ms = self._jitter * 1000.0 / self.clock_rate
+            self.jitter_ms = jitter_ms
+            if jitter_ms > self.max_jitter_ms:
+                self.max_jitter_ms = jitter_ms
+        self._last_ts = ts
+        self._last_arrival = arrival
+
+    def reception(self) -> tuple[int, int, int, int, int] | None:
+        """RTCP report block inputs for the current SSRC: (ssrc, extended
+        highest seq, expected, received, jitter in timestamp units)."""
+        with self._lock:
+            if self._ssrc is None:
+                return None
+            return (
+                self._ssrc,
+                self._cycles + self._max_seq,
+                self.rx_expected,
+                self.rx_received,
+                int(self._jitter),
+            )
+
+    def note_jitter_buffer(self, jb) -> None:
+        with self._lock:
+            self.jb_depth = jb.depth
+            self.jb_target_ms = jb.target_ms
+            self.jb_late = jb.late
+            self.jb_duplicate = jb.duplicate
+            self.jb_overflow = jb.overflow
+            self.jb_concealed = jb.concealed
+            self.jb_underruns = jb.underruns
 
     def note_tx(self, pt: int, payload_len: int) -> None:
         with self._lock:
@@ -42,17 +219,82 @@ class RTPStats:
             self.tx_bytes += payload_len
             self.last_tx_pt = pt
 
+    def _counters_locked(self) -> dict:
+        return {
+            "rx_packets": self.rx_packets,
+            "rx_expected": self._expected_retired + self.rx_expected,
+            "rx_lost": self.rx_lost,
+            "rx_reordered": self.rx_reordered,
+            "rx_duplicates": self.rx_duplicates,
+            "rx_late": self.rx_late,
+            "tx_packets": self.tx_packets,
+        }
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            out = self._counters_locked()
+            expected = out["rx_expected"]
+            out.update(
+                {
+                    "rx_bytes": self.rx_bytes,
+                    "tx_bytes": self.tx_bytes,
+                    "rx_ssrc": self._ssrc,
+                    "rx_ssrc_changes": self.rx_ssrc_changes,
+                    "rx_seq_resyncs": self.rx_seq_resyncs,
+                    "rx_pt_unknown": self.rx_pt_unknown,
+                    "loss_pct": round(100.0 * out["rx_lost"] / expected, 2) if expected else 0.0,
+                    "jitter_ms": round(self.jitter_ms, 2),
+                    "max_jitter_ms": round(self.max_jitter_ms, 2),
+                }
+            )
+            return out
+
+    def snapshot(self) -> dict:
+        """Stats since the previous snapshot; ``fraction_lost`` as in RTCP RR."""
+        now = time.monotonic()
+        with self._lock:
+            current = self._counters_locked()
+            prior = self._prior or {"at": self.started_at}
+            self._prior = dict(current, at=now)
+            jitter_ms = self.jitter_ms
+        out = {k: v - prior.get(k, 0) for k, v in current.items()}
+        expected = out["rx_expected"]
+        lost = out["rx_lost"]
+        out["interval_sec"] = round(now - prior["at"], 3)
+        out["fraction_lost"] = round(lost / expected, 4) if expected > 0 and lost > 0 else 0.0
+        out["jitter_ms"] = round(jitter_ms, 2)
+        return out
+
     def summary(self) -> str:
         with self._lock:
             elapsed = max(time.monotonic() - self.started_at, 0.001)
             rx_rate = self.rx_packets / elapsed
             tx_rate = self.tx_packets / elapsed
-            return (
+            text = (
                 f"rx={self.rx_packets} pkts ({self.rx_bytes} B, {rx_rate:.1f}/s) "
                 f"tx={self.tx_packets} pkts ({self.tx_bytes} B, {tx_rate:.1f}/s) "
+                f"lost={self.rx_lost} reordered={self.rx_reordered} dup={self.rx_duplicates} "
+                f"late={self.rx_late} jitter={self.jitter_ms:.1f}ms "
                 f"seq_gaps={self.rx_seq_gaps} unknown_pt={self.rx_pt_unknown} "
                 f"last_rx_pt={self.last_rx_pt} last_tx_pt={self.last_tx_pt}"
             )
+            if self.rx_ssrc_changes:
+                text += f" ssrc_changes={self.rx_ssrc_changes}"
+            if self.jb_target_ms is not None:
+                text += (
+                    f" jb={self.jb_depth} pkts/{self.jb_target_ms:.0f}ms "
+                    f"late={self.jb_late} dup={self.jb_duplicate} dropped={self.jb_overflow} "
+                    f"concealed={self.jb_concealed} underruns={self.jb_underruns}"
+                )
+            return text
+
+
+def format_interval(snap: dict) -> str:
+    return (
+        f"last {snap['interval_sec']:.1f}s: rx={snap['rx_packets']} expected={snap['rx_expected']} "
+        f"lost={snap['rx_lost']} ({snap['fraction_lost'] * 100:.1f}%) reordered={snap['rx_reordered']} "
+        f"dup={snap['rx_duplicates']} late={snap['rx_late']} jitter={snap['jitter_ms']:.1f}ms"
+    )
 
 
 class RTPStatsMonitor:
@@ -62,12 +304,14 @@ class RTPStatsMonitor:
         self.stats = stats
         self.log = log
         self.interval = max(float(interval), 0.0)
+        self.last_interval: dict | None = None
         self._stop = threading.Event()
         self._thr: threading.Thread | None = None
 
     def start(self) -> None:
         if self.interval <= 0:
             return
+        self.stats.snapshot()  # start the first interval now
         self._thr = threading.Thread(target=self._run, name="RTPStatsMonitor", daemon=True)
         self._thr.start()
 
@@ -82,4 +326,5 @@ class RTPStatsMonitor:
 
     def _run(self) -> None:
         while not self._stop.wait(self.interval):
-            self.log.info("[RTP stats] %s", self.stats.summary())
+            self.last_interval = self.stats.snapshot()
+            self.log.info("[RTP stats] %s | %s", self.stats.summary(), format_interval(self.last_interval))
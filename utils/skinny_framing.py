@@ -0,0 +1,110 @@
+"""Buffered Skinny framing shared by the client and the simulator.
+
+``SkinnyFrameReader`` reads with ``recv_into`` into one reusable buffer and
+parses every complete frame it holds, so a registration burst costs one
+syscall per TCP segment instead of two or more per message.  Partial frames
+stay buffered across socket timeouts.
+
+Payloads are ``memoryview`` slices of the internal buffer: they are valid
+until the next ``fill()`` / ``feed()``.  Take ``bytes(payload)`` if you need
+to keep one longer.
+"""
+
+from __future__ import annotations
+
+import struct
+from typing import Iterator
+
+HEADER = struct.Struct("<III")
+HEADER_SIZE = HEADER.size
+
+DEFAULT_BUFSIZE = 64 * 1024
+MIN_READ = 4096
+# Largest frame we accept; anything bigger is a desynchronised stream.
+MAX_FRAME = 1 << 20
+
+
+class SkinnyFrameReader:
+    """Incremental Skinny frame parser over a socket (``fill``) or raw bytes (``feed``)."""
+
+    __slots__ = ("sock", "_buf", "_view", "_start", "_end")
+
+    def __init__(self, sock=None, *, bufsize: int = DEFAULT_BUFSIZE):
+        self.sock = sock
+        self._buf = bytearray(bufsize)
+        self._view = memoryview(self._buf)
+        self._start = 0
+        self._end = 0
+
+    @property
+    def buffered(self) -> int:
+        """Bytes received but not yet returned as a frame."""
+        return self._end - self._start
+
+    def _missing(self) -> int:
+        pending = self._end - self._start
+        if pending < HEADER_SIZE:
+            return HEADER_SIZE - pending
+        data_length = HEADER.unpack_from(self._buf, self._start)[0]
+        return HEADER_SIZE + max(0, data_length - 4) - pending
+
+    def _reserve(self, need: int) -> None:
+        """Make room for at least ``need`` bytes after ``_end``."""
+        size = len(self._buf)
+        if size - self._end >= need:
+            return
+        pending = self._end - self._start
+        if size - pending >= need:
+            # Compact in place; never resizes, so outstanding views stay legal.
+            self._buf[0:pending] = self._buf[self._start:self._end]
+        else:
+            grown = bytearray(max(size * 2, pending + need))
+            grown[0:pending] = self._view[self._start:self._end]
+            self._buf = grown
+            self._view = memoryview(grown)
+        self._start = 0
+        self._end = pending
+
+    def fill(self) -> int:
+        """One ``recv_into`` call; returns bytes read (0 means the peer closed).
+
+        ``socket.timeout`` / ``OSError`` propagate and leave buffered data intact.
+        """
+        self._reserve(max(self._missing(), MIN_READ))
+        n = self.sock.recv_into(self._view[self._end:])
+        self._end += n
+        return n
+
+    def feed(self, data) -> None:
+        """Append bytes from a stream transport (asyncio ``data_received``)."""
+        n = len(data)
+        self._reserve(n)
+        self._view[self._end:self._end + n] = data
+        self._end += n
+
+    def next_frame(self) -> tuple[int, memoryview] | None:
+        """Return ``(msg_id, payload)`` for the next complete frame, or None."""
+        start = self._start
+        end = self._end
+        if end - start < HEADER_SIZE:
+            return None
+        data_length, _version, msg_id = HEADER.unpack_from(self._buf, start)
+        if data_length > MAX_FRAME:
+            raise ValueError(f"Skinny frame too large ({data_length} bytes, msg_id=0x{msg_id:04X})")
+        stop = start + HEADER_SIZE + max(0, data_length - 4)
+        if stop > end:
+            return None
+        payload = self._view[start + HEADER_SIZE:stop]
+        if stop == end:
+            self._start = self._end = 0
+        else:
+            self._start = stop
+        return msg_id, payload
+
+    def frames(self) -> Iterator[tuple[int, memoryview]]:
+        """Yield every complete frame currently buffered."""
+        while True:
+            frame = self.next_frame()
+            if frame is None:
+                return
+            yield frame
@@ -0,0 +1,488 @@
+"""Declarative Skinny message layouts shared by the client and the simulator.
+
+Each fixed-layout message is declared once, keyed by the IDs in
+``utils/skinny_messages.py``.  ``define`` compiles the field list into cached
+``struct.Struct`` objects (body, full frame with header, per-group)
+and a ``__slots__`` class for decoded messages, so the hot path does no
+format-string parsing and no intermediate slicing.
+
+Field codes::
+
+    "I" / "H" / "B"   little-endian u32 / u16 / u8
+    "ip"              IPv4 address in network byte order, decoded to an int
+    "40z"             NUL-padded ASCII string of 40 bytes (decoded to ``str``)
+    "16s"             raw bytes
+
+A field is ``(name, code)`` or ``(name, code, default)``.  A tuple of fields
+is an atomic group: older CallManagers truncate messages at group
+boundaries, and decode fills every field past the end of the payload with
+its default (the same rules as ``Buf.read_*(default)``).  Defaults describe
+what a decoder assumes for omitted fields; builders pass values explicitly.
+
+Variable-length messages (templates, soft key sets) stay hand-built.
+"""
+
+from __future__ import annotations
+
+import struct
+
+from utils.skinny_messages import get_message_name
+
+_HEADER_FMT = "<III"
+
+# Decoded / encoded field kinds.
+_NUM = 0
+_CSTR = 1
+_IP = 2
+_RAW = 3
+
+
+class SkinnyMessage:
+    """Base for generated decoded-message classes."""
+
+    __slots__ = ()
+    schema: "MessageSchema"
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other) -> bool:
+        return type(other) is type(self) and all(
+            getattr(self, n) == getattr(other, n) for n in self.__slots__
+        )
+
+    def __repr__(self) -> str:
+        body = ", ".join(f"{n}={getattr(self, n)!r}" for n in self.__slots__)
+        return f"{type(self).__name__}({body})"
+
+
+def _parse_code(code: str) -> tuple[str, int, object]:
+    """Return (struct format, kind, default) for one field code."""
+    if code in ("I", "H", "B"):
+        return code, _NUM, 0
+    if code == "ip":
+        return "4s", _IP, 0
+    if code.endswith("z"):
+        return f"{int(code[:-1])}s", _CSTR, ""
+    if code.endswith("s"):
+        return code, _RAW, b""
+    raise ValueError(f"unknown Skinny field code {code!r}")
+
+
+def _class_name(name: str) -> str:
+    return "".join(ch for ch in name if ch.isalnum()) or "SkinnyMessage"
+
+
+def _make_class(name: str, fields: tuple[str, ...]) -> type:
+    args = ", ".join(fields)
+    body = "\n".join(f"    self.{f} = {f}" for f in fields) or "    pass"
+    ns: dict = {}
+    exec(f"def __init__(self, {args}):\n{body}\n" if fields else f"def __init__(self):\n{body}\n", ns)
+    return type(_class_name(name), (SkinnyMessage,), {"__slots__": fields, "__init__": ns["__init__"]})
+
+
+class MessageSchema:
+    """Compiled codec for one fixed-layout Skinny message."""
+
+    __slots__ = (
+        "msg_id",
+        "name",
+        "fields",
+        "size",
+        "min_size",
+        "cls",
+        "_struct",
+        "_frame",
+        "_groups",
+        "_spec",
+        "_prefixes",
+        "_defaults",
+        "_cstr_idx",
+        "_ip_idx",
+        "_cstr_pack",
+        "_convert",
+        "_index",
+    )
+
+    def __init__(self, msg_id: int, spec, *, name: str | None = None, min_size: int = 0):
+        self.msg_id = msg_id
+        self.name = name or get_message_name(msg_id)
+        names: list[str] = []
+        fmts: list[str] = []
+        kinds: list[int] = []
+        defaults: list[object] = []
+        groups: list[tuple[int, int, struct.Struct]] = []
+        for entry in spec:
+            members = entry if isinstance(entry[0], tuple) else (entry,)
+            start = len(names)
+            for member in members:
+                fname, code = member[0], member[1]
+                fmt, kind, default = _parse_code(code)
+                if len(member) > 2:
+                    default = member[2]
+                names.append(fname)
+                fmts.append(fmt)
+                kinds.append(kind)
+                defaults.append(default)
+            groups.append((start, len(names), struct.Struct("<" + "".join(fmts[start:len(names)]))))
+        self.fields = tuple(names)
+        self._spec = tuple(spec)
+        self._prefixes: dict[str, MessageSchema] = {}
+        self._defaults = tuple(defaults)
+        self._struct = struct.Struct("<" + "".join(fmts))
+        self._frame = struct.Struct(_HEADER_FMT + "".join(fmts))
+        self.size = self._struct.size
+        self.min_size = min_size
+        self._groups = tuple(groups)
+        self._cstr_idx = tuple(i for i, k in enumerate(kinds) if k == _CSTR)
+        self._ip_idx = tuple(i for i, k in enumerate(kinds) if k == _IP)
+        self._cstr_pack = tuple((i, int(fmts[i][:-1])) for i in self._cstr_idx)
+        self._convert = bool(self._cstr_idx or self._ip_idx)
+        self._index = {fname: i for i, fname in enumerate(self.fields)}
+        self.cls = _make_class(self.name, self.fields)
+        self.cls.schema = self
+
+    def prefix(self, last_field: str) -> "MessageSchema":
+        """Schema truncated after ``last_field`` (for builders that send the short form)."""
+        cached = self._prefixes.get(last_field)
+        if cached is None:
+            spec = []
+            for entry in self._spec:
+                spec.append(entry)
+                members = entry if isinstance(entry[0], tuple) else (entry,)
+                if any(m[0] == last_field for m in members):
+                    break
+            else:
+                raise KeyError(last_field)
+            cached = MessageSchema(self.msg_id, spec, name=self.name, min_size=self.min_size)
+            self._prefixes[last_field] = cached
+        return cached
+
+    # --- decode --------------------------------------------------------------
+
+    def decode(self, payload) -> SkinnyMessage:
+        """Decode ``payload`` (bytes / memoryview); missing tail fields take defaults."""
+        n = len(payload)
+        if n < self.min_size:
+            raise ValueError(f"{self.name} too short ({n} bytes, need {self.min_size})")
+        if n >= self.size:
+            values = list(self._struct.unpack_from(payload))
+        else:
+            values = self._decode_partial(payload, n)
+        for i in self._cstr_idx:
+            raw = values[i]
+            if isinstance(raw, bytes):
+                values[i] = raw.split(b"\x00", 1)[0].decode("ascii", errors="ignore")
+        for i in self._ip_idx:
+            raw = values[i]
+            if isinstance(raw, bytes):
+                values[i] = int.from_bytes(raw, "big")
+        return self.cls(*values)
+
+    def _decode_partial(self, payload, n: int) -> list:
+        # Only truncated (older CallManager) payloads take this path.
+        values = list(self._defaults)
+        off = 0
+        for start, end, group in self._groups:
+            if n - off < group.size:
+                break
+            values[start:end] = group.unpack_from(payload, off)
+            off += group.size
+        return values
+
+    # --- encode --------------------------------------------------------------
+
+    def _values(self, args, kwargs) -> list:
+        if kwargs:
+            values = list(self._defaults)
+            values[: len(args)] = args
+            index = self._index
+            for key, val in kwargs.items():
+                values[index[key]] = val
+        elif len(args) == len(self.fields):
+            values = list(args)
+        else:
+            values = list(self._defaults)
+            values[: len(args)] = args
+        if not self._convert:
+            return values
+        for i, length in self._cstr_pack:
+            val = values[i]
+            if isinstance(val, str):
+                values[i] = val.encode("ascii", errors="replace")[: length - 1]
+        for i in self._ip_idx:
+            val = values[i]
+            if isinstance(val, int):
+                values[i] = val.to_bytes(4, "big")
+        return values
+
+    def pack(self, *args, **kwargs) -> bytes:
+        """Encode the message body (no Skinny header)."""
+        if kwargs or self._convert or len(args) != len(self.fields):
+            args = self._values(args, kwargs)
+        return self._struct.pack(*args)
+
+    def frame(self, *args, **kwargs) -> bytes:
+        """Encode a complete Skinny frame (header + body) in one ``pack`` call."""
+        if kwargs or self._convert or len(args) != len(self.fields):
+            args = self._values(args, kwargs)
+        return self._frame.pack(self.size + 4, 0, self.msg_id, *args)
+
+    def pack_into(self, buffer, offset: int, *args, **kwargs) -> None:
+        """Write the body into ``buffer`` at ``offset`` (prebuilt packet patching)."""
+        if kwargs or self._convert or len(args) != len(self.fields):
+            args = self._values(args, kwargs)
+        self._struct.pack_into(buffer, offset, *args)
+
+
+SCHEMAS: dict[int, MessageSchema] = {}
+
+
+def define(msg_id: int, spec, *, name: str | None = None, min_size: int = 0) -> MessageSchema:
+    schema = MessageSchema(msg_id, spec, name=name, min_size=min_size)
+    SCHEMAS[msg_id] = schema
+    return schema
+
+
+def schema_for(msg_id: int) -> MessageSchema | None:
+    return SCHEMAS.get(msg_id)
+
+
+def decode(msg_id: int, payload) -> SkinnyMessage | None:
+    """Decode a payload for any registered message ID (None if no schema)."""
+    schema = SCHEMAS.get(msg_id)
+    return schema.decode(payload) if schema is not None else None
+
+
+# --- Message layouts -----------------------------------------------------------
+# Station → CallManager
+
+KEYPAD_BUTTON = define(0x0003, (
+    ("button", "I"),
+    ("line_instance", "I"),
+    ("call_reference", "I"),
+))
+
+STIMULUS = define(0x0005, (
+    ("stimulus", "I"),
+    ("stimulus_instance", "I"),
+))
+
+OPEN_RECEIVE_CHANNEL_ACK = define(0x0022, (
+    (("status", "I"), ("ip", "ip"), ("port", "I")),
+    ("pass_through_party_id", "I"),
+    ("call_reference", "I"),
+), min_size=12)
+
+SOFTKEY_EVENT = define(0x0026, (
+    ("softkey_event", "I"),
+    ("line_instance", "I"),
+    ("call_reference", "I"),
+))
+
+# CallManager → station
+
+REGISTER_ACK = define(0x0081, (
+    ("keepalive", "I", 30),
+    ("date_template", "6s", b"MMDDYY"),
+    ("reserved", "H"),
+    ("secondary_keepalive", "I", 30),
+    ("protocol_version", "B", 5),
+    ("reserved2", "B"),
+    ("reserved3", "H"),
+))
+
+START_TONE = define(0x0082, (
+    ("tone", "I"),
+    ("tone_output_direction", "I"),   # Missing in CallManager 3.1
+    ("line_instance", "I"),
+    ("call_reference", "I"),
+), min_size=4)
+
+STOP_TONE = define(0x0083, (
+    ("line_instance", "I"),
+    ("call_reference", "I"),
+))
+
+SET_RINGER = define(0x0085, (
+    ("ring_mode", "I"),
+    ("ring_duration", "I"),        # Missing in CallManager 3.1
+    ("line_instance", "I"),
+    ("call_reference", "I"),
+), min_size=4)
+
+SET_LAMP = define(0x0086, (
+    ("stimulus", "I"),
+    ("stimulus_instance", "I"),
+    ("lamp_mode", "I"),
+), min_size=12)
+
+SET_SPEAKER_MODE = define(0x0088, (
+    ("speaker_mode", "I"),
+), min_size=4)
+
+START_MEDIA_TRANSMISSION = define(0x008A, (
+    ("conference_id", "I"),
+    ("pass_through_party_id", "I"),
+    ("remote_ip", "I"),
+    ("remote_port", "I"),
+    ("ms_packet_size", "I", 20),
+    ("compression_type", "I"),
+    ("precedence_value", "I"),
+    ("ss_value", "I"),
+    ("max_frames_per_packet", "H"),
+    ("padding", "H"),
+    # Present in later CM versions, missing in CM 2.01.
+    ("g723_bitrate", "I"),
+    ("call_reference", "I"),
+    ("algorithm_id", "I"),
+    ("key_len", "H"),
+    ("salt_len", "H"),
+    ("key", "16s"),
+    ("salt", "16s"),
+))
+
+STOP_MEDIA_TRANSMISSION = define(0x008B, (
+    ("conference_id", "I"),
+    ("pass_through_party_id", "I"),
+    ("call_reference", "I"),
+))
+
+START_MEDIA_RECEPTION = define(0x008C, STOP_MEDIA_TRANSMISSION._spec)
+STOP_MEDIA_RECEPTION = define(0x008D, STOP_MEDIA_TRANSMISSION._spec)
+
+CALL_INFO = define(0x008F, (
+    ("calling_party_name", "40z"),
+    ("calling_party", "24z"),
+    ("called_party_name", "40z"),
+    ("called_party", "24z"),
+    # CM 3.x/4.x+ extended CallInfo fields.
+    (("line_instance", "I"), ("call_reference", "I"), ("call_type", "I")),
+    ("original_called_party_name", "40z"),
+    ("original_called_party", "24z"),
+    ("last_redirecting_party_name", "40z"),
+    ("last_redirecting_party", "24z"),
+    (("original_cdpn_redirect_reason", "I"), ("last_redirecting_reason", "I")),
+    ("cgpn_voicemail_box", "24z"),
+    ("cdpn_voicemail_box", "24z"),
+    ("original_cdpn_voicemail_box", "24z"),
+    ("last_redirecting_voicemail_box", "24z"),
+    (("call_instance", "I"), ("call_security_status", "I"), ("party_pi_restriction_bits", "I")),
+))
+
+FORWARD_STAT_RES = define(0x0090, (
+    ("active_forward", "I"),
+    ("line_number", "I"),
+    ("forward_all_active", "I"),
+    ("forward_all_number", "24z"),
+    ("forward_busy_active", "I"),
+    ("forward_busy_number", "24z"),
+    ("forward_no_answer_active", "I"),
+    ("forward_no_answer_number", "24z"),
+))
+
+SPEED_DIAL_STAT_RES = define(0x0091, (
+    ("speed_dial_number", "I"),
+    ("dir_number", "24z"),
+    ("display_name", "40z"),
+))
+
+LINE_STAT_RES = define(0x0092, (
+    ("line_number", "I"),
+    ("line_dir_number", "24z"),
+    # Present in later CallManager versions, missing in CM 2.01.
+    ("line_fqdn", "40z"),
+    ("line_text_label", "40z"),
+    ("line_display_options", "I"),
+), min_size=28)
+
+CONFIG_STAT_RES = define(0x0093, (
+    ("device_name", "16z"),
+    ("reserved", "I"),
+    ("instance", "I"),
+    ("user_name", "40z"),
+    ("server_name", "40z"),
+    ("number_of_lines", "I"),
+    ("number_of_speed_dials", "I"),
+), min_size=112)
+
+TIME_DATE_RES = define(0x0094, (
+    ("year", "I"),
+    ("month", "I"),
+    ("day_of_week", "I"),
+    ("day", "I"),
+    ("hour", "I"),
+    ("minute", "I"),
+    ("second", "I"),
+    ("millisecond", "I"),
+    ("system_time", "I"),
+), min_size=36)
+
+OPEN_RECEIVE_CHANNEL = define(0x0105, (
+    ("conference_id", "I"),
+    ("pass_through_party_id", "I"),
+    ("ms_packet_size", "I", 20),
+    ("compression_type", "I"),
+    ("ec_value", "I"),
+    ("g723_bitrate", "I"),
+    ("call_reference", "I"),
+    ("algorithm_id", "I"),
+    ("key_len", "H"),
+    ("salt_len", "H"),
+    ("key", "16s"),
+    ("salt", "16s"),
+))
+
+CLOSE_RECEIVE_CHANNEL = define(0x0106, STOP_MEDIA_TRANSMISSION._spec)
+
+SELECT_SOFT_KEYS = define(0x0110, (
+    ("line_instance", "I"),
+    ("call_reference", "I"),
+    ("softkey_set_index", "I"),
+    ("valid_key_mask", "I"),
+), min_size=16)
+
+CALL_STATE = define(0x0111, (
+    (("call_state", "I"), ("line_instance", "I"), ("call_reference", "I")),
+    ("privacy", "I"),
+    ("precedence_level", "I"),
+    ("precedence_domain", "I"),
+), min_size=12)
+
+DISPLAY_PROMPT_STATUS = define(0x0112, (
+    ("timeout", "I"),
+    ("prompt", "32z"),
+    ("line_instance", "I"),
+    ("call_reference", "I"),
+), min_size=44)
+
+CLEAR_PROMPT_STATUS = define(0x0113, (
+    ("line_instance", "I"),
+    ("call_reference", "I"),
+), min_size=8)
+
+ACTIVATE_CALL_PLANE = define(0x0116, (
+    ("line_instance", "I"),
+), min_size=4)
+
+UNREGISTER_ACK = define(0x0118, (
+    ("status", "I"),
+), min_size=4)
+
+DIALED_NUMBER = define(0x011D, (
+    ("dialed_number", "24z"),
+    ("line_instance", "I"),
+    ("call_reference", "I"),
+), min_size=32)
+
+DISPLAY_PRI_NOTIFY = define(0x0120, (
+    ("timeout", "I"),
+    ("priority", "I"),
+    ("notify", "32z"),
+), min_size=8)
+
+CALL_SELECT_STAT_RES = define(0x0130, (
+    ("call_select_stat", "I"),
+    ("call_reference", "I"),
+    ("line_instance", "I"),
+), min_size=12)
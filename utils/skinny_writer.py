@@ -0,0 +1,171 @@
+"""Single outbound writer per client connection with message coalescing.
+
+Skinny handlers, the keepalive thread and UI/macro threads all call
+``client.sock.sendall``. ``SkinnyWriter`` wraps the connected socket so that
+``sendall`` only queues the frame; one writer thread waits ``tick_ms`` after
+the first queued frame and then puts everything queued in that window on the
+wire with a single ``sendmsg``. A registration burst (CapabilitiesRes plus the
+stat requests) or a run of digits costs one syscall instead of one per
+message, and frames from different threads can no longer interleave.
+
+Reads and socket options pass straight through to the wrapped socket.
+``shutdown`` flushes what is queued first, so an UnregisterReq sent just
+before closing still goes out. A failed write is remembered and re-raised to
+the next ``sendall`` caller as ``OSError``.
+"""
+
+from __future__ import annotations
+
+import socket
+import threading
+import time
+
+DEFAULT_TICK_MS = 5
+# Buffers per sendmsg (well under IOV_MAX).
+MAX_BATCH = 64
+
+
+class ByteRate:
+    """Bytes/s over the last completed one-second window."""
+
+    __slots__ = ("_window_start", "_window_bytes", "_rate")
+
+    def __init__(self):
+        self._window_start = time.monotonic()
+        self._window_bytes = 0
+        self._rate = 0.0
+
+    def add(self, n: int, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        self._roll(now)
+        self._window_bytes += n
+
+    def rate(self, now: float | None = None) -> float:
+        self._roll(time.monotonic() if now is None else now)
+        return self._rate
+
+    def _roll(self, now: float) -> None:
+        elapsed = now - self._window_start
+        if elapsed >= 1.0:
+            # an idle gap longer than one window means the last second was empty
+            self._rate = self._window_bytes / elapsed if elapsed < 2.0 else 0.0
+            self._window_start = now
+            self._window_bytes = 0
+
+
+class SkinnyWriter:
+    def __init__(self, sock: socket.socket, *, tick_ms: float = DEFAULT_TICK_MS, name: str = "pyskinny-writer"):
+        self.sock = sock
+        self.tick = max(float(tick_ms), 0.0) / 1000.0
+        self._pending: list[bytes] = []
+        self._pending_bytes = 0
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._closed = False
+        self._error: OSError | None = None
+        self.messages = 0
+        self.writes = 0
+        self.bytes_sent = 0
+        self.max_depth = 0
+        self._rate = ByteRate()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def __getattr__(self, name):
+        # recv_into / settimeout / fileno / getsockname ... go to the real socket
+        return getattr(self.sock, name)
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def sendall(self, data) -> None:
+        with self._cond:
+            if self._error is not None:
+                raise OSError(f"Skinny writer failed: {self._error}")
+            if self._closed:
+                raise OSError("Skinny writer closed")
+            self._pending.append(bytes(data))
+            self._pending_bytes += len(data)
+            self.max_depth = max(self.max_depth, len(self._pending))
+            if len(self._pending) == 1:
+                self._cond.notify()
+
+    def flush(self) -> None:
+        """Write everything queued now, on the calling thread."""
+        # take + write under one lock so concurrent flushes keep queue order
+        with self._write_lock:
+            while True:
+                with self._cond:
+                    batch = self._take()
+                if not batch or self._error is not None:
+                    return
+                self._write(batch)
+
+    def _take(self) -> list[bytes]:
+        batch = self._pending[:MAX_BATCH]
+        del self._pending[:MAX_BATCH]
+        self._pending_bytes -= sum(len(p) for p in batch)
+        return batch
+
+    def _write(self, batch: list[bytes]) -> None:
+        try:
+            if len(batch) > 1 and hasattr(self.sock, "sendmsg"):
+                bufs = [memoryview(p) for p in batch]
+                while bufs:
+                    sent = self.sock.sendmsg(bufs)
+                    while sent:
+                        if sent >= len(bufs[0]):
+                            sent -= len(bufs[0])
+                            bufs.pop(0)
+                        else:
+                            bufs[0] = bufs[0][sent:]
+                            sent = 0
+            else:
+                self.sock.sendall(b"".join(batch))
+        except OSError as exc:
+            with self._cond:
+                self._error = exc
+                self._pending.clear()
+                self._pending_bytes = 0
+            return
+        n = sum(len(p) for p in batch)
+        self.messages += len(batch)
+        self.writes += 1
+        self.bytes_sent += n
+        self._rate.add(n)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closed)
+                if self._closed and not self._pending:
+                    return
+            if self.tick:
+                time.sleep(self.tick)  # let the rest of the burst queue up
+            self.flush()
+
+    def shutdown(self, how=socket.SHUT_RDWR) -> None:
+        self.flush()
+        self.sock.shutdown(how)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self.sock.close()
+
+    def stats(self) -> dict:
+        with self._cond:
+            depth, queued = len(self._pending), self._pending_bytes
+        return {
+            "depth": depth,
+            "bytes_queued": queued,
+            "max_depth": self.max_depth,
+            "messages": self.messages,
+            "writes": self.writes,
+            "bytes_sent": self.bytes_sent,
+            "bytes_per_sec": round(self._rate.rate(), 1),
+        }
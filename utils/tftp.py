@@ -7,13 +7,14 @@ logger = logging.getLogger(__name__)
 TFTP_TIMEOUT = 10
 
 
-def get_device_config_via_tftp(tftp_server=None, device_name=None, port: int = 69):
+def get_device_config_via_tftp(tftp_server=None, device_name=None, port: int = 69, output_dir=None):
     if not tftp_server or not device_name:
         return
 
     client = tftpy.TftpClient(tftp_server, int(port))
     filenames = [f"{device_name}.cnf.xml", "XMLDefault.cnf.xml"]
-    output_dir = os.path.join(os.getcwd(), "downloaded_configs")
+    # default: ./downloaded_configs (git-ignored)
+    output_dir = output_dir or os.path.join(os.getcwd(), "downloaded_configs")
     os.makedirs(output_dir, exist_ok=True)
     file_content = ""
 
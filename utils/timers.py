@@ -0,0 +1,222 @@
+"""Process-wide timer heap shared by every ``SCCPClient`` in the process.
+
+A phone used to own a keepalive thread, and every timed DisplayPromptStatus
+started another thread that slept until the prompt should be restored; with
+thousands of virtual phones those threads dominated the process. Instead,
+clients register deadlines with ``default_scheduler()``: one daemon thread
+sleeps until the earliest deadline in a heap and runs the callback.
+
+Callbacks run on the scheduler thread and must be short (queueing a Skinny
+frame on the client's ``SkinnyWriter`` is fine; blocking I/O is not).
+Cancelling is O(1): the entry is only marked and skipped when it reaches the
+top of the heap, and the heap is compacted when cancelled entries dominate.
+
+``call_every`` re-arms a periodic timer after each run. Its interval may be a
+callable (the keepalive reads ``state.keepalive_interval`` each time, so a
+value from RegisterAck applies from the next beat) and ``jitter`` fires up
+to that fraction of the interval early, chosen at random per beat, so
+phones registered in the same burst do not all send KeepAliveReq in the
+same millisecond.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class TimerHandle:
+    __slots__ = ("when", "callback", "args", "cancelled", "_scheduler")
+
+    def __init__(self, when: float, callback: Callable, args: tuple, scheduler: "TimerScheduler"):
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+        self._scheduler = scheduler
+
+    def cancel(self) -> None:
+        if not self.cancelled:
+            self.cancelled = True
+            self._scheduler._note_cancelled()
+
+
+class PeriodicTimer:
+    """Handle for ``call_every``; ``cancel()`` stops future runs."""
+
+    __slots__ = ("interval", "jitter", "callback", "args", "cancelled", "_handle", "_scheduler")
+
+    def __init__(self, scheduler, interval, callback, args, jitter):
+        self._scheduler = scheduler
+        self.interval = interval
+        self.callback = callback
+        self.args = args
+        self.jitter = jitter
+        self.cancelled = False
+        self._handle: TimerHandle | None = None
+
+    def next_delay(self) -> float:
+        interval = self.interval() if callable(self.interval) else self.interval
+        interval = max(float(interval or 0), 0.001)
+        if self.jitter:
+            interval -= interval * self.jitter * random.random()
+        return interval
+
+    def _arm(self, delay: float) -> None:
+        self._handle = self._scheduler.call_later(delay, self._run)
+
+    def _run(self) -> None:
+        if self.cancelled:
+            return
+        # A callback returning False ends the series (e.g. socket gone).
+        if self.callback(*self.args) is False:
+            self.cancelled = True
+            return
+        if not self.cancelled:
+            self._arm(self.next_delay())
+
+    def cancel(self) -> None:
+        self.cancelled = True
+        handle = self._handle
+        if handle is not None:
+            handle.cancel()
+
+
+class TimerScheduler:
+    # Compact when more than this many cancelled entries are in the heap and
+    # they outnumber the live ones.
+    COMPACT_MIN = 64
+
+    def __init__(self, name: str = "skinny-timers"):
+        self.name = name
+        self._heap: list[tuple[float, int, TimerHandle]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._cancelled = 0
+        self._generation = 0
+        self.fired = 0
+        self.cancelled = 0
+        self.errors = 0
+        self.max_lag_ms = 0.0
+
+    def call_later(self, delay: float, callback: Callable, *args) -> TimerHandle:
+        return self.call_at(time.monotonic() + max(float(delay), 0.0), callback, *args)
+
+    def call_at(self, when: float, callback: Callable, *args) -> TimerHandle:
+        """Run ``callback(*args)`` at monotonic time ``when``."""
+        handle = TimerHandle(when, callback, args, self)
+        with self._cond:
+            heapq.heappush(self._heap, (when, next(self._seq), handle))
+            self._ensure_started()
+            if self._heap[0][2] is handle:
+                self._cond.notify()
+        return handle
+
+    def call_every(
+        self,
+        interval: float | Callable[[], float],
+        callback: Callable,
+        *args,
+        jitter: float = 0.0,
+        first_delay: float | None = None,
+    ) -> PeriodicTimer:
+        timer = PeriodicTimer(self, interval, callback, args, jitter)
+        timer._arm(timer.next_delay() if first_delay is None else first_delay)
+        return timer
+
+    @property
+    def pending(self) -> int:
+        return len(self._heap) - self._cancelled
+
+    def _note_cancelled(self) -> None:
+        with self._cond:
+            self.cancelled += 1
+            self._cancelled += 1
+            if self._cancelled > self.COMPACT_MIN and self._cancelled * 2 > len(self._heap):
+                self._heap = [entry for entry in self._heap if not entry[2].cancelled]
+                heapq.heapify(self._heap)
+                self._cancelled = 0
+
+    def _ensure_started(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, args=(self._generation,), name=self.name, daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Drop every pending timer and let the thread exit (a later call_* restarts it)."""
+        with self._cond:
+            for entry in self._heap:
+                entry[2].cancelled = True
+            self._heap.clear()
+            self._cancelled = 0
+            self._generation += 1
+            self._thread = None
+            self._cond.notify_all()
+
+    def _next_due(self, generation: int) -> TimerHandle | None:
+        with self._cond:
+            while True:
+                if generation != self._generation:
+                    return None
+                heap = self._heap
+                while heap and heap[0][2].cancelled:
+                    heapq.heappop(heap)
+                    self._cancelled -= 1
+                if not heap:
+                    self._cond.wait()
+                    continue
+                delay = heap[0][0] - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                handle = heapq.heappop(heap)[2]
+                # cancel() after this point is a no-op for the heap count
+                handle.cancelled = True
+                return handle
+
+    def _run(self, generation: int) -> None:
+        while True:
+            handle = self._next_due(generation)
+            if handle is None:
+                return
+            lag = time.monotonic() - handle.when
+            self.max_lag_ms = max(self.max_lag_ms, lag * 1000.0)
+            self.fired += 1
+            try:
+                handle.callback(*handle.args)
+            except Exception:
+                self.errors += 1
+                logger.exception("timer callback %r failed", handle.callback)
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending,
+            "fired": self.fired,
+            "cancelled": self.cancelled,
+            "errors": self.errors,
+            "max_lag_ms": round(self.max_lag_ms, 2),
+        }
+
+
+_default: TimerScheduler | None = None
+_default_lock = threading.Lock()
+
+
+def default_scheduler() -> TimerScheduler:
+    """The process-wide scheduler (thread starts on first use)."""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = TimerScheduler()
+    return _default